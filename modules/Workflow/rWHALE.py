@@ -55,8 +55,85 @@ sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))  # noqa: PTH120
 import importlib
 
 import whale.main as whale
+from asset_store import load_aim  # on the path set by whale.main
 from sWHALE import runSWhale
 from whale.main import log_div, log_msg
+from whale.scheduler import AssetScheduler
+
+# arguments shared by every per-asset task; set by _init_asset_task
+_asset_task_args = {}
+
+
+def _init_asset_task(task_args, worker_options=None):
+    """Prepare a process to run per-asset tasks"""  # noqa: D400
+    if worker_options is not None:
+        # local pool workers write to their own log file
+        worker_options = dict(worker_options)
+        worker_options['LogFile'] = f"{worker_options['LogFile']}.{os.getpid()}"
+        whale.set_options(worker_options)
+
+    _asset_task_args.clear()
+    _asset_task_args.update(task_args)
+
+
+def _run_asset_task(asst):
+    """Run the sWHALE workflow of a single asset"""  # noqa: D400
+    log_msg('', prepend_timestamp=False)
+    log_div(prepend_blank_space=False)
+    log_msg(
+        f"{_asset_task_args['asset_type']} id {asst['id']} in file {asst['file']}"
+    )
+    log_div()
+
+    runSWhale(
+        inputs=None,
+        WF=_asset_task_args['WF'],
+        assetID=asst['id'],
+        assetAIM=asst['file'],
+        prep_app_sequence=_asset_task_args['prep_app_sequence'],
+        WF_app_sequence=_asset_task_args['WF_app_sequence'],
+        asset_type=_asset_task_args['run_asset_type'],
+        copy_resources=True,
+        force_cleanup=_asset_task_args['force_cleanup'],
+    )
+
+
+def _read_number_of_stories(asst, stores):
+    """Read the number of stories of an asset, 1 if it is not available"""  # noqa: D400
+    try:
+        gi = load_aim(asst, stores)['GeneralInformation']
+        return max(float(gi.get('NumberOfStories', 1)), 1.0)
+    except (OSError, KeyError, TypeError, ValueError):
+        return 1.0
+
+
+def _estimate_asset_costs(asst_data, asset_type, cost_hint, previous_times):
+    """Estimate the relative cost of running each asset
+
+    Parameters
+    ----------
+    cost_hint: string
+        'none' assumes equal costs, 'NumberOfStories' uses the number of
+        stories in the AIM files, and 'previousRun' uses the run times
+        saved by an earlier run of the workflow.
+
+    """  # noqa: D400
+    costs = [1.0] * len(asst_data)
+
+    if cost_hint == 'NumberOfStories':
+        stores = {}
+        costs = [_read_number_of_stories(asst, stores) for asst in asst_data]
+        for store in stores.values():
+            store.close()
+
+    elif cost_hint == 'previousRun' and len(previous_times) > 0:
+        keys = [f"{asset_type}-{asst['id']}" for asst in asst_data]
+        known = [previous_times[key] for key in keys if key in previous_times]
+        # assets without a recorded time get the median of the known ones
+        default = sorted(known)[len(known) // 2] if len(known) > 0 else 1.0
+        costs = [previous_times.get(key, default) for key in keys]
+
+    return costs
 
 
 def main(  # noqa: C901, D103
@@ -73,6 +150,8 @@ def main(  # noqa: C901, D103
     parallelType,  # noqa: N803
     mpiExec,  # noqa: N803
     numPROC,  # noqa: N803
+    apps_in_process=False,  # noqa: FBT002
+    schedule_options=None,
 ):
     #
     # check if running in a parallel mpi job
@@ -132,9 +211,13 @@ def main(  # noqa: C901, D103
     else:
         log_file_path = working_dir + '/log.txt' + '.' + str(procID)
 
-    whale.set_options(
-        {'LogFile': log_file_path, 'LogShowMS': False, 'PrintLog': True}
-    )
+    log_options = {
+        'LogFile': log_file_path,
+        'LogShowMS': False,
+        'PrintLog': True,
+        'RunAppsInProcess': apps_in_process,
+    }
+    whale.set_options(log_options)
 
     log_msg(
         '\nrWHALE workflow\n', prepend_timestamp=False, prepend_blank_space=False
@@ -208,7 +291,24 @@ def main(  # noqa: C901, D103
         return
 
     # now for each asset run dl workflow .. in parallel if requested
-    count = 0
+    # asset scheduling options of the --schedule, --costHint and
+    # --localWorkers arguments
+    if schedule_options is None:
+        schedule_options = {}
+    schedule = schedule_options.get('schedule', 'dynamic')
+    cost_hint = schedule_options.get('cost_hint', 'none')
+    local_workers = schedule_options.get('local_workers', 1)
+
+    scheduler = AssetScheduler(
+        comm=comm if doParallel else None,
+        num_workers=local_workers,
+        mode=schedule,
+    )
+    scheduler_report_path = working_dir + '/scheduler_report.json'
+    previous_times = {}
+    if cost_hint == 'previousRun' and procID == 0:
+        previous_times = AssetScheduler.load_task_times(scheduler_report_path)
+
     for asset_type, assetIt in asset_files.items():  # noqa: N806
         # perform the regional mapping
         # WF.perform_regional_mapping(assetIt, asset_type)
@@ -238,28 +338,35 @@ def main(  # noqa: C901, D103
 
         # The workflow app sequence
         WF_app_sequence = ['Event', 'Modeling', 'EDP', 'Simulation']  # noqa: N806
-        # For each asset
-        for asst in asst_data:
-            if count % numP == procID:
-                log_msg('', prepend_timestamp=False)
-                log_div(prepend_blank_space=False)
-                log_msg(f"{asset_type} id {asst['id']} in file {asst['file']}")
-                log_div()
-
-                # Run sWhale
-                runSWhale(
-                    inputs=None,
-                    WF=WF,
-                    assetID=asst['id'],
-                    assetAIM=asst['file'],
-                    prep_app_sequence=preprocess_app_sequence,
-                    WF_app_sequence=WF_app_sequence,
-                    asset_type=run_asset_type,
-                    copy_resources=True,
-                    force_cleanup=force_cleanup,
-                )
 
-            count = count + 1
+        task_args = dict(  # noqa: C408
+            WF=WF,
+            asset_type=asset_type,
+            run_asset_type=run_asset_type,
+            prep_app_sequence=preprocess_app_sequence,
+            WF_app_sequence=WF_app_sequence,
+            force_cleanup=force_cleanup,
+        )
+        _init_asset_task(task_args)
+
+        # the same costs are needed on every rank to build the same chunks
+        costs = None
+        if procID == 0:
+            costs = _estimate_asset_costs(
+                asst_data, asset_type, cost_hint, previous_times
+            )
+        if doParallel == True:  # noqa: E712
+            costs = comm.bcast(costs, root=0)
+
+        # For each asset
+        scheduler.run(
+            asst_data,
+            _run_asset_task,
+            keys=[f"{asset_type}-{asst['id']}" for asst in asst_data],
+            costs=costs,
+            initializer=_init_asset_task,
+            initargs=(task_args, log_options),
+        )
 
         # wait for every process to finish
         if doParallel == True:  # noqa: E712
@@ -337,6 +444,22 @@ def main(  # noqa: C901, D103
         if doParallel == True:  # noqa: E712
             comm.Barrier()
 
+    whale.log_app_run_times()
+
+    report = scheduler.report(scheduler_report_path)
+    if report is not None:
+        log_msg(
+            f"Asset scheduling ({report['mode']}), "
+            f"elapsed time: {report['elapsed_time']:.2f} s"
+        )
+        for label, stats in report['workers'].items():
+            log_msg(
+                f"  {label}: {stats['tasks']} assets, "
+                f"busy {stats['busy_time']:.2f} s, "
+                f"utilization {stats['utilization']:.1%}",
+                prepend_timestamp=False,
+            )
+
     log_msg('Workflow completed.')
     log_div(prepend_blank_space=False)
     log_div(prepend_blank_space=False)
@@ -427,6 +550,33 @@ if __name__ == '__main__':
         default='8',
         help='If parallel, how many jobs to start with mpiexec option',
     )
+    workflowArgParser.add_argument(
+        '--schedule',
+        default='dynamic',
+        choices=['dynamic', 'static'],
+        help='How assets are distributed among processes: dynamic load '
+        'balancing or the static round-robin assignment',
+    )
+    workflowArgParser.add_argument(
+        '--costHint',
+        default='none',
+        choices=['none', 'NumberOfStories', 'previousRun'],
+        help='Estimate of the relative cost of each asset used for scheduling',
+    )
+    workflowArgParser.add_argument(
+        '-j',
+        '--localWorkers',
+        default=1,
+        type=int,
+        help='Number of local worker processes used when not running with MPI',
+    )
+    workflowArgParser.add_argument(
+        '-i',
+        '--appsInProcess',
+        action='store_true',
+        help='Run the Python applications in the workflow process instead of '
+        'starting a new interpreter for each of them.',
+    )
 
     # Parsing the command line arguments
     wfArgs = workflowArgParser.parse_args()  # noqa: N816
@@ -460,4 +610,10 @@ if __name__ == '__main__':
         parallelType=wfArgs.parallelType,
         mpiExec=wfArgs.mpiexec,
         numPROC=numPROC,
+        apps_in_process=wfArgs.appsInProcess,
+        schedule_options={
+            'schedule': wfArgs.schedule,
+            'cost_hint': wfArgs.costHint,
+            'local_workers': wfArgs.localWorkers,
+        },
     )
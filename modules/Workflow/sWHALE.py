@@ -136,7 +136,8 @@ def runSWhale(  # noqa: N802, D103
         )
 
     # When used in rWhale, delete the original AIM since it is the same with asset_id/templatedir/AIM
-    if assetAIM != 'AIM.json':
+    # AIMs of packed inventories have no file in the asset dir
+    if assetAIM != 'AIM.json' and os.path.exists(assetAIM):  # noqa: PTH110
         os.remove(assetAIM)  # noqa: PTH107
     if force_cleanup:
         # clean up intermediate files from the simulation
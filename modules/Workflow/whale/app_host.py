@@ -0,0 +1,190 @@
+#
+# Copyright (c) 2019 The Regents of the University of California
+# Copyright (c) 2019 Leland Stanford Junior University
+#
+# This file is part of whale.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# whale. If not, see <http://www.opensource.org/licenses/>.
+
+"""Run Python workflow applications inside the current interpreter.
+
+Every application of every asset is normally launched in a fresh Python
+interpreter, so numpy, pandas, pelicun, etc. are imported again for each of
+them. The :class:`AppHost` keeps the interpreter warm instead: the scripts
+are compiled once and executed as ``__main__`` in the calling process with
+their own argv, working directory and captured output. Third-party packages
+imported by the applications stay loaded between calls, while modules that
+belong to the applications themselves are dropped after each run so that
+apps with identically named helper modules do not see each other's code.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    AppHost
+
+"""
+
+import builtins
+import contextlib
+import io
+import os
+import site
+import sys
+import sysconfig
+import traceback
+from pathlib import Path
+
+
+def _shared_library_paths():
+    """Return the directories whose modules are kept loaded between apps."""
+    paths = {
+        sysconfig.get_paths()[key]
+        for key in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+    }
+    paths.update(site.getsitepackages() if hasattr(site, 'getsitepackages') else [])
+    paths.add(site.getusersitepackages())
+    paths.update([sys.prefix, sys.base_prefix, sys.exec_prefix])
+    return tuple(str(Path(p).resolve()) for p in paths if p)
+
+
+class AppHost:
+    """Execute Python workflow applications in the current interpreter.
+
+    Parameters
+    ----------
+    python_exe: str, optional
+        Path to the interpreter that commands must reference to be run
+        in-process. Defaults to the interpreter running this module.
+
+    """
+
+    def __init__(self, python_exe=None):
+        if python_exe is None:
+            python_exe = sys.executable
+        self.python_exe = os.path.realpath(python_exe)
+        self._code_cache = {}
+        self._shared_paths = _shared_library_paths()
+
+    def accepts(self, command_list):
+        """Check if a tokenized command can be run in-process.
+
+        Only commands of the form ``python script.py [args]`` that use the
+        interpreter of this process are accepted; everything else is left
+        to a subprocess.
+
+        """
+        if len(command_list) < 2:  # noqa: PLR2004
+            return False
+        if os.path.realpath(command_list[0]) != self.python_exe:
+            return False
+        script = command_list[1]
+        return script.endswith('.py') and os.path.isfile(script)  # noqa: PTH113
+
+    def _get_code(self, script_path):
+        code = self._code_cache.get(script_path)
+        if code is None:
+            with open(script_path, 'rb') as f:  # noqa: PTH123
+                source = f.read()
+            code = compile(source, script_path, 'exec', dont_inherit=True)
+            self._code_cache[script_path] = code
+        return code
+
+    def _is_shared(self, module):
+        module_file = getattr(module, '__file__', None)
+        if module_file is None:
+            return True
+        module_file = os.path.realpath(module_file)
+        return module_file.startswith(self._shared_paths)
+
+    def run(self, command_list):
+        """Run ``python script.py [args]`` in-process.
+
+        The working directory, ``sys.argv`` and ``sys.path`` are restored
+        after the run, and stdout/stderr are captured the same way the
+        subprocess runner captures them.
+
+        Parameters
+        ----------
+        command_list: list of str
+            Tokenized command with the interpreter as the first element.
+
+        Returns
+        -------
+        tuple
+            The captured output and the return code of the application.
+
+        """
+        script_path = os.path.abspath(command_list[1])  # noqa: PTH100
+        script_dir = os.path.dirname(script_path)  # noqa: PTH120
+
+        saved_cwd = os.getcwd()  # noqa: PTH109
+        saved_argv = sys.argv
+        saved_path = list(sys.path)
+        saved_modules = set(sys.modules)
+
+        sys.argv = [script_path] + list(command_list[2:])  # noqa: RUF005
+        sys.path.insert(0, script_dir)
+
+        app_globals = {
+            '__name__': '__main__',
+            '__file__': script_path,
+            '__builtins__': builtins,
+            '__package__': None,
+            '__spec__': None,
+        }
+
+        output = io.StringIO()
+        returncode = 0
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                exec(self._get_code(script_path), app_globals)  # noqa: S102
+            except SystemExit as e:
+                if e.code is None:
+                    returncode = 0
+                elif isinstance(e.code, int):
+                    returncode = e.code
+                else:
+                    print(e.code)  # noqa: T201
+                    returncode = 1
+            except Exception:  # noqa: BLE001
+                traceback.print_exc()
+                returncode = 1
+            finally:
+                sys.stdout.flush()
+                os.chdir(saved_cwd)
+                sys.argv = saved_argv
+                sys.path[:] = saved_path
+                for name in set(sys.modules) - saved_modules:
+                    module = sys.modules.get(name)
+                    if module is not None and not self._is_shared(module):
+                        del sys.modules[name]
+
+        return output.getvalue(), returncode
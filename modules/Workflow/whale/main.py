@@ -65,6 +65,7 @@ import pprint
 import shlex
 import subprocess
 import sys
+import time
 import warnings
 from copy import deepcopy
 from datetime import datetime
@@ -95,6 +96,17 @@ import pandas as pd
 import shapely.geometry
 import shapely.wkt
 
+from whale.app_host import AppHost
+from whale.results_store import (
+    ColumnarResultsReader,
+    ColumnarResultsWriter,
+    wrap_asset_hierarchy,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'common'))
+
+from asset_store import AssetStore, shard_path  # noqa: E402
+
 # import posixpath
 # import ntpath
 
@@ -197,6 +209,13 @@ options = Options()
 
 log_file = None
 
+# in-process host for the Python applications; None runs every app as a
+# subprocess
+app_host = None
+
+# wall time spent in each application: {app_name: [number_of_runs, seconds]}
+app_run_times = {}
+
 
 def set_options(config_options):  # noqa: D103
     if config_options is not None:
@@ -207,6 +226,8 @@ def set_options(config_options):  # noqa: D103
                 options.log_file = value
             elif key == 'PrintLog':
                 options.print_log = value
+            elif key == 'RunAppsInProcess':
+                globals()['app_host'] = AppHost() if str2bool(value) else None
 
 
 # Monkeypatch warnings to get prettier messages
@@ -344,45 +365,21 @@ def run_command(command, app_category=''):
         Explain...
 
     """  # noqa: D400
-    # If it is a python script, we do not run it, but rather import the main
-    # function. This ensures that the script is run using the same python
-    # interpreter that this script uses and it is also faster because we do not
-    # need to run multiple python interpreters simultaneously.
-    Frank_trusts_this_approach = False  # noqa: N806
-    if command[:6] == 'python' and Frank_trusts_this_approach:
-        import importlib  # only import this when it's needed
-
-        command_list = command.split()[1:]
-        # py_args = command_list[1:]
-
-        # get the dir and file name
-        py_script_dir, py_script_file = os.path.split(command_list[0][1:-1])
-
-        # add the dir to the path
-        sys.path.insert(0, py_script_dir)
-
-        # import the file
-        py_script = importlib.__import__(
-            py_script_file[:-3],
-            globals(),
-            locals(),
-            [
-                'main',
-            ],
-            0,
-        )
-
-        # remove the quotes from the arguments
-        arg_list = [c[1:-1] for c in command_list[1:]]
+    # fmk with Shell=True not working on older windows machines, new approach needed for quoted command .. turn into a list
+    command = shlex.split(command)
 
-        py_script.main(arg_list)
-
-        return '', ''  # noqa: DOC201, RUF100
+    app_name = os.path.basename(  # noqa: PTH119
+        command[1] if len(command) > 1 and command[1].endswith('.py') else command[0]
+    )
+    start_time = time.perf_counter()
 
-    else:  # noqa: RET505
-        # fmk with Shell=True not working on older windows machines, new approach needed for quoted command .. turn into a list
-        command = shlex.split(command)
+    # Python apps are executed in this interpreter when the app host is
+    # enabled. This avoids starting a new interpreter and importing the same
+    # libraries again for every app of every asset.
+    if app_host is not None and app_host.accepts(command):
+        result, returncode = app_host.run(command)
 
+    else:
         try:
             result = subprocess.check_output(  # noqa: S603
                 command, stderr=subprocess.STDOUT, text=True
@@ -392,37 +389,56 @@ def run_command(command, app_category=''):
             result = e.output
             returncode = e.returncode
 
-        if returncode != 0:
-            log_error(f'return code: {returncode}')
+    run_record = app_run_times.setdefault(app_name, [0, 0.0])
+    run_record[0] += 1
+    run_record[1] += time.perf_counter() - start_time
 
-        #
-        # sy - error checking trial 2 : only for windows and python & additional try statement
-        #
+    if returncode != 0:
+        log_error(f'return code: {returncode}')
 
-        try:
-            # if (platform.system() == 'Windows') and ('python.exe' in str(command)):
+    #
+    # sy - error checking trial 2 : only for windows and python & additional try statement
+    #
+
+    try:
+        # if (platform.system() == 'Windows') and ('python.exe' in str(command)):
+        if returncode != 0:
+            raise WorkFlowInputError('Analysis Failed at ' + app_category)  # noqa: TRY301
+
+        # sy - safe apps should be added below
+        elif 'OpenSeesInput' in str(command):  # noqa: RET506
             if returncode != 0:
                 raise WorkFlowInputError('Analysis Failed at ' + app_category)  # noqa: TRY301
 
-            # sy - safe apps should be added below
-            elif 'OpenSeesInput' in str(command):  # noqa: RET506
-                if returncode != 0:
-                    raise WorkFlowInputError('Analysis Failed at ' + app_category)  # noqa: TRY301
+        return str(result), returncode  # noqa: DOC201, RUF100
 
-            return str(result), returncode
+    except WorkFlowInputError as e:
+        # this will catch the error
+        print(str(e).replace("'", ''))  # noqa: T201
+        print('         =====================================')  # noqa: T201
+        print(str(result))  # noqa: T201
+        sys.exit(-20)
 
-        except WorkFlowInputError as e:
-            # this will catch the error
-            print(str(e).replace("'", ''))  # noqa: T201
-            print('         =====================================')  # noqa: T201
-            print(str(result))  # noqa: T201
-            sys.exit(-20)
+    except:  # noqa: E722
+        # if for whatever reason the function inside "try" fails, move on without checking error
+        return str(result), 0
 
-        except:  # noqa: E722
-            # if for whatever reason the function inside "try" fails, move on without checking error
-            return str(result), 0
 
-        return result, returncode
+def log_app_run_times():
+    """Log the number of runs and the wall time spent in each application"""  # noqa: D400
+    if len(app_run_times) == 0:
+        return
+
+    mode = 'in-process' if app_host is not None else 'subprocess'
+    log_msg(f'Application run times ({mode} Python apps):')
+    for app_name, (run_count, run_time) in sorted(
+        app_run_times.items(), key=lambda item: -item[1][1]
+    ):
+        log_msg(
+            f'  {app_name}: {run_count} runs, {run_time:.2f} s total, '
+            f'{run_time / run_count:.3f} s per run',
+            prepend_timestamp=False,
+        )
 
 
 def show_warning(warning_msg):  # noqa: D103
@@ -768,6 +784,13 @@ class Workflow:
         self.mpiExec = mpiExec
         self.numProc = numProc
 
+        # asset types and sample size of the Results_{rlz}.json files, set by
+        # combine_assets_results; with columnar results stores these files
+        # are only written by export_realization_results
+        self.realization_asset_types = []
+        self.realization_sample_size = 0
+        self.realizations_exported = False
+
         # if parallel setup, open script file to run
         self.inputFilePath = os.path.dirname(input_file)  # noqa: PTH120
         parCommandFileName = os.path.join(self.inputFilePath, 'sc_parScript.sh')  # noqa: PTH118, N806
@@ -784,6 +807,9 @@ class Workflow:
         self.numP = 1
         self.procID = 0
         self.doParallel = False
+        # AIMs of packed inventories and the stores opened to read them
+        self.packed_aims = {}
+        self.asset_stores = {}
         if parType == 'parRUN':
             mpi_spec = importlib.util.find_spec('mpi4py')
             found = mpi_spec is not None
@@ -1438,6 +1464,17 @@ class Workflow:
             with open(asset_file, encoding='utf-8') as f:  # noqa: PTH123
                 asset_data = json.load(f)
 
+            # AIMs of a packed inventory are read from and written to the store
+            store_path = None
+            if len(asset_data) > 0:
+                store_path = asset_data[0].get('store', None)
+            packed_store = None
+            packed_aims = []
+            if store_path is not None:
+                packed_store = AssetStore(store_path)
+                for asst in asset_data:
+                    self.packed_aims[asst['file']] = (store_path, asst['id'])
+
             # extract the extra information from the input file for this asset type
             extra_input = {'Applications': {}}
 
@@ -1509,8 +1546,11 @@ class Workflow:
                     # Open the AIM file and add the unit information to it
                     # print(count, self.numP, self.procID, AIM_file)
 
-                    with open(AIM_file, encoding='utf-8') as f:  # noqa: PTH123
-                        AIM_data = json.load(f)  # noqa: N806
+                    if packed_store is not None:
+                        AIM_data = packed_store.get(asst['id'])  # noqa: N806
+                    else:
+                        with open(AIM_file, encoding='utf-8') as f:  # noqa: PTH123
+                            AIM_data = json.load(f)  # noqa: N806
 
                     if 'DefaultValues' in input_data.keys():  # noqa: SIM118
                         AIM_data.update(
@@ -1548,11 +1588,18 @@ class Workflow:
 
                     AIM_data.update(extra_input)
 
-                    with open(AIM_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
-                        json.dump(AIM_data, f, indent=2)
+                    if packed_store is not None:
+                        packed_aims.append((asst['id'], AIM_data))
+                    else:
+                        with open(AIM_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
+                            json.dump(AIM_data, f, indent=2)
 
                 count = count + 1
 
+            if packed_store is not None:
+                packed_store.close()
+                self._update_packed_aims(store_path, packed_aims)
+
         log_msg(
             '\nAsset Information Model (AIM) files successfully augmented.',
             prepend_timestamp=False,
@@ -1561,6 +1608,63 @@ class Workflow:
 
         return assetFilesList  # noqa: DOC201, RUF100
 
+    def _update_packed_aims(self, store_path, aims):
+        """Write updated AIMs to a packed asset store
+
+        Every process writes its own shard of the store and the first process
+        merges the shards after all of them are written.
+
+        """  # noqa: D400
+        if self.numP == 1:
+            with AssetStore(store_path, mode='a') as store:
+                store.put_many(aims)
+            return
+
+        with AssetStore(shard_path(store_path, self.procID), mode='w') as store:
+            store.put_many(aims)
+        self.comm.Barrier()
+
+        if self.procID == 0:
+            with AssetStore(store_path, mode='a') as store:
+                store.merge([shard_path(store_path, i) for i in range(self.numP)])
+        self.comm.Barrier()
+
+    def _copy_aim(self, src, dst):
+        """Copy an AIM file or write it from the packed asset store"""  # noqa: D400
+        packed_aim = self.packed_aims.get(src, None)
+        if packed_aim is None:
+            shutil.copy(src, dst)
+            return
+
+        store_path, asset_id = packed_aim
+        # connections cannot be shared with forked worker processes
+        store_key = (os.getpid(), store_path)
+        if store_key not in self.asset_stores:
+            self.asset_stores[store_key] = AssetStore(store_path)
+        self.asset_stores[store_key].materialize(asset_id, dst)
+
+    def _unpack_asset_file(self, asset_file):
+        """Write the AIM files of a packed inventory and drop the store"""  # noqa: D400
+        with open(asset_file, encoding='utf-8') as f:  # noqa: PTH123
+            asset_data = json.load(f)
+
+        store_path = asset_data[0].get('store', None) if len(asset_data) > 0 else None
+        if store_path is None:
+            return
+
+        log_msg(
+            f'Writing the AIM files from {store_path}...', prepend_timestamp=False
+        )
+
+        with AssetStore(store_path) as store:
+            for asst in asset_data:
+                store.materialize(asst['id'], asst['file'])
+                asst.pop('store')
+                self.packed_aims.pop(asst['file'], None)
+
+        with open(asset_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
+            json.dump(asset_data, f, indent=2)
+
     def perform_system_performance_assessment(self, asset_type):
         """Run the system level performance assessment application.
 
@@ -1610,6 +1714,10 @@ class Workflow:
         )
         log_div()
 
+        # the application reads the Results_{rlz}.json files
+        if not self.realizations_exported:
+            self.export_realization_results()
+
         app_command_list = performance_app.get_command_list(
             app_path=self.app_dir_local
         )
@@ -1682,6 +1790,10 @@ class Workflow:
         )
         log_div()
 
+        # the application reads the Results_{rlz}.json files
+        if not self.realizations_exported:
+            self.export_realization_results()
+
         app_command_list = performance_app.get_command_list(
             app_path=self.app_dir_local
         )
@@ -1860,6 +1972,10 @@ class Workflow:
 
         reg_mapping_app = self.workflow_apps['RegionalMapping'][assetType]
 
+        # only NearestNeighborEvents reads and writes packed inventories
+        if reg_mapping_app.name != 'NearestNeighborEvents':
+            self._unpack_asset_file(AIM_file_path)
+
         # TODO: not elegant code, fix later  # noqa: TD002
         for input_ in reg_mapping_app.inputs:
             if input_['id'] == 'assetFile':
@@ -1976,7 +2092,7 @@ class Workflow:
             # dst = posixpath.join(aimDir, f'{asst_id}/templatedir/AIM.json')
 
             try:
-                shutil.copy(src, dst)
+                self._copy_aim(src, dst)
 
                 print('Copied AIM file to: ', dst)  # noqa: T201
                 # os.remove(src)
@@ -2694,7 +2810,7 @@ class Workflow:
                 dst = posixpath.join(aimDir, f'{asst_id}/{aimFileName}')
 
                 # copy the AIM file from the main dir to the building dir
-                shutil.copy(src, dst)
+                self._copy_aim(src, dst)
 
                 # src = posixpath.join(self.run_dir, AIM_file_path),
                 # dst = posixpath.join(self.run_dir,
@@ -2946,6 +3062,7 @@ class Workflow:
         asset_type='',
         out_types=['AIM', 'EDP', 'DM', 'DV', 'every_realization'],  # noqa: B006
         headers=None,
+        results_backend=None,
     ):
         """Short description
 
@@ -2953,6 +3070,15 @@ class Workflow:
 
         Parameters
         ----------
+        results_backend: str, optional
+            'JSON' saves every realization to a {asset_type}_{rlz}.json file,
+            'Columnar' appends the EDP, DMG and DV results of the assets to
+            a {asset_type}_realizations.h5 store that is converted to JSON
+            on demand. Defaults to the ResultsBackend in the input file or
+            'JSON'. With the columnar stores, the Results_{rlz}.json files
+            are only written before a system performance or recovery
+            application runs, by export_realization_results, or for every
+            run if ExportRealizationsJSON is set in the input file.
 
         """  # noqa: D400, D414
         log_msg('Collecting ' + asset_type + ' damage and loss results')
@@ -2960,6 +3086,9 @@ class Workflow:
         R2D_res_out_types = []  # noqa: N806
         with open(self.input_file) as f:  # noqa: PTH123
             input_data = json.load(f)
+        if results_backend is None:
+            results_backend = input_data.get('ResultsBackend', 'JSON')
+        columnar = results_backend.lower() == 'columnar'
         requested_output = input_data['outputs']
         for key, item in requested_output.items():
             if item:
@@ -2990,6 +3119,7 @@ class Workflow:
             and self.workflow_apps['DL'][asset_type].name == 'Pelicun3'
         ):
             initialize_dicts = True
+            results_store = None
             for a_i, asst in enumerate(asst_data):
                 bldg_dir = Path(os.path.dirname(asst_data[a_i]['file'])).resolve()  # noqa: PTH120
                 main_dir = bldg_dir
@@ -3029,9 +3159,17 @@ class Workflow:
                 if initialize_dicts:
                     # We assume all assets have the same output sample size
                     # Variable sample size doesn't seem to make sense
-                    realizations = {
-                        rlz_i: {asset_type: {}} for rlz_i in range(sample_size)
-                    }
+                    if columnar:
+                        results_store = ColumnarResultsWriter(
+                            main_dir / f'{asset_type}_realizations.h5',
+                            asset_type,
+                            sample_size,
+                        )
+                        realizations = {}
+                    else:
+                        realizations = {
+                            rlz_i: {asset_type: {}} for rlz_i in range(sample_size)
+                        }
 
                     # We also create a dict to collect deterministic info, i.e.,
                     # data that is identical for all realizations
@@ -3041,17 +3179,17 @@ class Workflow:
                 # Check if the asset type hierarchy exist in deterministic and
                 # realizations. Create a hierarchy if it doesn't exist.
                 deter_pointer = deterministic
-                rlzn_pointer = {
-                    rlz_i: realizations[rlz_i] for rlz_i in range(sample_size)
-                }
+                rlzn_pointer = {rlz_i: realizations[rlz_i] for rlz_i in realizations}
                 for assetTypeIter in assetTypeHierarchy:  # noqa: N806
                     if assetTypeIter not in deter_pointer.keys():  # noqa: SIM118
                         deter_pointer.update({assetTypeIter: {}})
                     deter_pointer = deter_pointer[assetTypeIter]
-                    for rlz_i in range(sample_size):
+                    for rlz_i in rlzn_pointer:
                         if assetTypeIter not in rlzn_pointer[rlz_i].keys():  # noqa: SIM118
                             rlzn_pointer[rlz_i].update({assetTypeIter: {}})
                         rlzn_pointer[rlz_i] = rlzn_pointer[rlz_i][assetTypeIter]
+                if results_store is not None:
+                    results_store.add_asset(asset_id, assetTypeHierarchy)
 
                 # Currently, all GI data is deterministic
                 GI_data_i_det = AIM_data_i['GeneralInformation']  # noqa: N806
@@ -3059,7 +3197,7 @@ class Workflow:
                 # TODO: later update this to handle probabilistic GI attributes  # noqa: TD002
                 GI_data_i_prob = {}  # noqa: N806
 
-                for rlz_i in range(sample_size):
+                for rlz_i in rlzn_pointer:
                     rlzn_pointer[rlz_i].update(
                         {asset_id: {'GeneralInformation': GI_data_i_prob}}
                     )
@@ -3092,20 +3230,24 @@ class Workflow:
                         # we assume demands are stored in JSON with a SimpleIndex
                         edp_data_i = pd.DataFrame(edp_data_i)
 
-                        # convert to a realization-by-realization format
-                        edp_output = {
-                            int(rlz_i): {
-                                col: float(edp_data_i.loc[rlz_i, col])
-                                for col in edp_data_i.columns
+                        if results_store is not None:
+                            results_store.append('EDP', asset_id, edp_data_i)
+
+                        else:
+                            # convert to a realization-by-realization format
+                            edp_output = {
+                                int(rlz_i): {
+                                    col: float(edp_data_i.loc[rlz_i, col])
+                                    for col in edp_data_i.columns
+                                }
+                                for rlz_i in edp_data_i.index
                             }
-                            for rlz_i in edp_data_i.index
-                        }
 
-                        # save the EDP intensities in each realization
-                        for rlz_i in range(sample_size):
-                            rlzn_pointer[rlz_i][asset_id].update(
-                                {'Demand': edp_output[rlz_i]}
-                            )
+                            # save the EDP intensities in each realization
+                            for rlz_i in range(sample_size):
+                                rlzn_pointer[rlz_i][asset_id].update(
+                                    {'Demand': edp_output[rlz_i]}
+                                )
 
                         # save the EDP units
                         deter_pointer[asset_id].update(
@@ -3144,25 +3286,29 @@ class Workflow:
                         # parse damage data into a DataFrame
                         dmg_data_i = pd.DataFrame(dmg_data_i)
 
-                        # convert to realization-by-realization format
-                        dmg_output = {}
-                        for rlz_i in dmg_data_i.index:
-                            rlz_output = {}
+                        if results_store is not None:
+                            results_store.append('DMG', asset_id, dmg_data_i)
 
-                            for col in dmg_data_i.columns:
-                                if not pd.isna(dmg_data_i.loc[rlz_i, col]):
-                                    rlz_output.update(
-                                        {col: int(dmg_data_i.loc[rlz_i, col])}
-                                    )
+                        else:
+                            # convert to realization-by-realization format
+                            dmg_output = {}
+                            for rlz_i in dmg_data_i.index:
+                                rlz_output = {}
+
+                                for col in dmg_data_i.columns:
+                                    if not pd.isna(dmg_data_i.loc[rlz_i, col]):
+                                        rlz_output.update(
+                                            {col: int(dmg_data_i.loc[rlz_i, col])}
+                                        )
 
-                            dmg_output.update({rlz_i: rlz_output})
+                                dmg_output.update({rlz_i: rlz_output})
 
-                        # we assume that damage information is condensed
-                        # TODO: implement condense_ds flag in DL_calc  # noqa: TD002
-                        for rlz_i in range(sample_size):
-                            rlzn_pointer[rlz_i][asset_id].update(
-                                {'Damage': dmg_output[rlz_i]}
-                            )
+                            # we assume that damage information is condensed
+                            # TODO: implement condense_ds flag in DL_calc  # noqa: TD002
+                            for rlz_i in range(sample_size):
+                                rlzn_pointer[rlz_i][asset_id].update(
+                                    {'Damage': dmg_output[rlz_i]}
+                                )
                         if 'DM' in R2D_res_out_types:
                             # use forward fill in case of multiple modes
                             meanValues = dmg_data_i.mode().ffill().mean()  # noqa: N806, F841
@@ -3221,31 +3367,35 @@ class Workflow:
                                 dv_data_i[col] = (
                                     dv_data_i[col] * replacement_cost
                                 )
-                        # get a list of dv types
-                        dv_types = np.unique(
-                            [col.split('-')[0] for col in dv_data_i.columns]
-                        )
+                        if results_store is not None:
+                            results_store.append('DV', asset_id, dv_data_i)
 
-                        # convert to realization-by-realization format
-                        dv_output = {
-                            int(rlz_i): {
-                                dv_type: {
-                                    col[len(dv_type) + 1 :]: float(
-                                        dv_data_i.loc[rlz_i, col]
-                                    )
-                                    for col in dv_data_i.columns
-                                    if col.startswith(dv_type)
+                        else:
+                            # get a list of dv types
+                            dv_types = np.unique(
+                                [col.split('-')[0] for col in dv_data_i.columns]
+                            )
+
+                            # convert to realization-by-realization format
+                            dv_output = {
+                                int(rlz_i): {
+                                    dv_type: {
+                                        col[len(dv_type) + 1 :]: float(
+                                            dv_data_i.loc[rlz_i, col]
+                                        )
+                                        for col in dv_data_i.columns
+                                        if col.startswith(dv_type)
+                                    }
+                                    for dv_type in dv_types
                                 }
-                                for dv_type in dv_types
+                                for rlz_i in dv_data_i.index
                             }
-                            for rlz_i in dv_data_i.index
-                        }
 
-                        # save loss data
-                        for rlz_i in range(sample_size):
-                            rlzn_pointer[rlz_i][asset_id].update(
-                                {'Loss': {'Repair': dv_output[rlz_i]}}
-                            )
+                            # save loss data
+                            for rlz_i in range(sample_size):
+                                rlzn_pointer[rlz_i][asset_id].update(
+                                    {'Loss': {'Repair': dv_output[rlz_i]}}
+                                )
 
                         # save DV units
                         deter_pointer[asset_id].update({'Loss': {'Units': dv_units}})
@@ -3302,23 +3452,18 @@ class Workflow:
             # This is also ugly but necessary for backward compatibility so that
             # file structure created from apps other than GeoJSON_TO_ASSET can be
             # dealt with
-            if len(assetTypeHierarchy) == 1:
-                if assetTypeHierarchy[0] == 'Buildings':
-                    deterministic = {
-                        'Buildings': {'Building': deterministic['Buildings']}
-                    }
-                    for rlz_i in realizations:
-                        realizations[rlz_i] = {
-                            'Buildings': {
-                                'Building': realizations[rlz_i]['Buildings']
-                            }
-                        }
-                else:
-                    deterministic = {assetTypeHierarchy[0]: deterministic}
-                    for rlz_i in realizations:
-                        realizations[rlz_i] = {
-                            assetTypeHierarchy[0]: realizations[rlz_i]
-                        }
+            deterministic = wrap_asset_hierarchy(deterministic, assetTypeHierarchy)
+            for rlz_i in realizations:
+                realizations[rlz_i] = wrap_asset_hierarchy(
+                    realizations[rlz_i], assetTypeHierarchy
+                )
+
+            # the realizations are exported to JSON on demand
+            if results_store is not None:
+                results_store.close(assetTypeHierarchy)
+            elif (main_dir / f'{asset_type}_realizations.h5').exists():
+                # remove the store of a previous columnar run
+                (main_dir / f'{asset_type}_realizations.h5').unlink()
 
             # save outputs to JSON files
             for rlz_i, rlz_data in realizations.items():
@@ -3626,27 +3771,74 @@ class Workflow:
             sample_size = min(sample_size)
             # Create the Results_det.json and Results_rlz_i.json for recoverary
             deterministic = {}
-            realizations = {rlz_i: {} for rlz_i in range(sample_size)}
+            has_store = False
             for asset_type in asset_files.keys():  # noqa: SIM118
                 asset_dir = self.run_dir / asset_type
                 determine_file = asset_dir / f'{asset_type}_det.json'
                 with open(determine_file, encoding='utf-8') as f:  # noqa: PTH123
                     determ_i = json.load(f)
                 deterministic.update(determ_i)
-                for rlz_i in range(sample_size):
-                    rlz_i_file = asset_dir / f'{asset_type}_{rlz_i}.json'
-                    with open(rlz_i_file, encoding='utf-8') as f:  # noqa: PTH123
-                        rlz_i_i = json.load(f)
-                    realizations[rlz_i].update(rlz_i_i)
+                store_file = asset_dir / f'{asset_type}_realizations.h5'
+                has_store = has_store or store_file.exists()
 
             determine_file = self.run_dir / 'Results_det.json'
             with open(determine_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
                 json.dump(deterministic, f, indent=2)
-            for rlz_i, rlz_data in realizations.items():
-                with open(  # noqa: PTH123
-                    self.run_dir / f'Results_{rlz_i}.json', 'w', encoding='utf-8'
-                ) as f:
-                    json.dump(rlz_data, f, indent=2)
+
+            self.realization_asset_types = list(asset_files.keys())
+            self.realization_sample_size = sample_size
+
+            if not has_store or input_data.get('ExportRealizationsJSON', False):
+                self.export_realization_results()
+            elif not self.realizations_exported:
+                log_msg(
+                    'The realization results are kept in the columnar stores; '
+                    'the Results_{rlz}.json files are written when an '
+                    'application needs them.',
+                    prepend_timestamp=False,
+                )
         else:
             pass
             # print("Visualizing results of asset types besides buildings is only supported when Pelicun3 is used as the DL for all asset types")
+
+    def export_realization_results(self, realizations=None):
+        """Write the Results_{rlz}.json files of the combined asset types.
+
+        The realizations of asset types with a columnar results store are
+        rebuilt from the store, the others are read from their
+        {asset_type}_{rlz}.json files.
+
+        Parameters
+        ----------
+        realizations: list of int, optional
+            Realizations to export, all of them by default.
+
+        """
+        results_stores = {}
+        for asset_type in self.realization_asset_types:
+            store_file = self.run_dir / asset_type / f'{asset_type}_realizations.h5'
+            if store_file.exists():
+                results_stores[asset_type] = ColumnarResultsReader(store_file)
+
+        if realizations is None:
+            realizations = range(self.realization_sample_size)
+
+        # collect one realization at a time
+        for rlz_i in realizations:
+            rlz_data = {}
+            for asset_type in self.realization_asset_types:
+                if asset_type in results_stores:
+                    rlz_i_i = results_stores[asset_type].get_realization(rlz_i)
+                else:
+                    rlz_i_file = (
+                        self.run_dir / asset_type / f'{asset_type}_{rlz_i}.json'
+                    )
+                    with open(rlz_i_file, encoding='utf-8') as f:  # noqa: PTH123
+                        rlz_i_i = json.load(f)
+                rlz_data.update(rlz_i_i)
+            with open(  # noqa: PTH123
+                self.run_dir / f'Results_{rlz_i}.json', 'w', encoding='utf-8'
+            ) as f:
+                json.dump(rlz_data, f, indent=2)
+
+        self.realizations_exported = True
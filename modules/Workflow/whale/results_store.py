@@ -0,0 +1,290 @@
+#
+# Copyright (c) 2019 The Regents of the University of California
+# Copyright (c) 2019 Leland Stanford Junior University
+#
+# This file is part of whale.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# whale. If not, see <http://www.opensource.org/licenses/>.
+
+"""Columnar storage of the realization-by-realization asset results.
+
+Instead of building nested dictionaries with every realization of every
+asset and dumping them to ``{asset_type}_{rlz}.json`` files, the EDP, DMG
+and DV results of each asset are appended to long tables (asset, rlz,
+column, value) in an HDF5 store, one table per result type. The realization
+JSON structure is rebuilt by :class:`ColumnarResultsReader` one realization
+at a time, only when it is requested.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    ColumnarResultsWriter
+    ColumnarResultsReader
+    wrap_asset_hierarchy
+
+"""
+
+import json
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# result tables and the key they are saved under in the realization outputs
+RESULT_TABLES = {'EDP': 'Demand', 'DMG': 'Damage', 'DV': 'Loss'}
+
+# maximum string lengths in the tables
+MIN_ITEMSIZE = {'asset': 64, 'column': 128, 'hierarchy': 256}
+
+
+def wrap_asset_hierarchy(data, asset_type_hierarchy):
+    """Wrap the results for backward compatibility with older file structures.
+
+    File structures created from apps other than GeoJSON_TO_ASSET have a
+    single level asset type hierarchy that needs an additional level.
+
+    Parameters
+    ----------
+    data: dict
+        Deterministic or realization results keyed by the asset type.
+    asset_type_hierarchy: list of str
+        Asset type hierarchy of the assets.
+
+    Returns
+    -------
+    dict
+        The wrapped results.
+
+    """
+    if len(asset_type_hierarchy) == 1:
+        if asset_type_hierarchy[0] == 'Buildings':
+            return {'Buildings': {'Building': data['Buildings']}}
+        return {asset_type_hierarchy[0]: data}
+    return data
+
+
+class ColumnarResultsWriter:
+    """Append asset results to a columnar HDF5 store.
+
+    Parameters
+    ----------
+    store_path: str or Path
+        Path of the HDF5 store (overwritten).
+    asset_type: str
+        Asset type of the results.
+    sample_size: int
+        Number of realizations.
+    buffer_size: int
+        Number of assets buffered before the tables are appended.
+
+    """
+
+    def __init__(self, store_path, asset_type, sample_size, buffer_size=500):
+        self.store_path = Path(store_path)
+        self.asset_type = asset_type
+        self.sample_size = sample_size
+        self.buffer_size = buffer_size
+
+        if self.store_path.exists():
+            self.store_path.unlink()
+        self.store = pd.HDFStore(self.store_path, mode='w', complevel=4)
+
+        self.asset_buffer = []
+        self.table_buffer = {table: [] for table in RESULT_TABLES}
+
+    def add_asset(self, asset_id, asset_type_hierarchy):
+        """Register an asset and its position in the asset type hierarchy."""
+        self.asset_buffer.append(
+            {'asset': str(asset_id), 'hierarchy': '/'.join(asset_type_hierarchy)}
+        )
+        if len(self.asset_buffer) >= self.buffer_size:
+            self.flush()
+
+    def append(self, table, asset_id, data):
+        """Append the results of an asset.
+
+        Parameters
+        ----------
+        table: str
+            Result type, one of 'EDP', 'DMG', and 'DV'.
+        asset_id: str
+            Asset id.
+        data: DataFrame
+            Results with one row per realization and one column per output.
+
+        """
+        values = data.to_numpy(dtype=float)
+        num_rlz, num_col = values.shape
+        self.table_buffer[table].append(
+            pd.DataFrame(
+                {
+                    'asset': np.full(num_rlz * num_col, str(asset_id)),
+                    'rlz': np.repeat(data.index.astype(int), num_col),
+                    'column': np.tile(np.array(data.columns, dtype=str), num_rlz),
+                    'value': values.ravel(),
+                }
+            )
+        )
+
+    def flush(self):
+        """Append the buffered results to the store."""
+        with warnings.catch_warnings():
+            warnings.simplefilter(action='ignore')
+
+            if self.asset_buffer:
+                self.store.append(
+                    'assets',
+                    pd.DataFrame(self.asset_buffer),
+                    format='table',
+                    min_itemsize={
+                        key: MIN_ITEMSIZE[key] for key in ['asset', 'hierarchy']
+                    },
+                    index=False,
+                )
+                self.asset_buffer = []
+
+            for table, frames in self.table_buffer.items():
+                if frames:
+                    self.store.append(
+                        table,
+                        pd.concat(frames, ignore_index=True),
+                        format='table',
+                        data_columns=['rlz'],
+                        min_itemsize={
+                            key: MIN_ITEMSIZE[key] for key in ['asset', 'column']
+                        },
+                        index=False,
+                    )
+                    self.table_buffer[table] = []
+
+    def close(self, asset_type_hierarchy):
+        """Flush the buffers, index the tables, and close the store.
+
+        Parameters
+        ----------
+        asset_type_hierarchy: list of str
+            Asset type hierarchy used to wrap the results, see
+            :func:`wrap_asset_hierarchy`.
+
+        """
+        self.flush()
+        for table in RESULT_TABLES:
+            if table in self.store:
+                self.store.create_table_index(table, columns=['rlz'], kind='full')
+        self.store.get_storer('assets').attrs.metadata = {
+            'asset_type': self.asset_type,
+            'sample_size': self.sample_size,
+            'asset_type_hierarchy': list(asset_type_hierarchy),
+        }
+        self.store.close()
+
+
+class ColumnarResultsReader:
+    """Lazily rebuild realization results from a columnar HDF5 store.
+
+    Parameters
+    ----------
+    store_path: str or Path
+        Path of the HDF5 store.
+
+    """
+
+    def __init__(self, store_path):
+        self.store_path = Path(store_path)
+        with pd.HDFStore(self.store_path, mode='r') as store:
+            metadata = store.get_storer('assets').attrs.metadata
+            self.assets = store.select('assets')
+            self.tables = [table for table in RESULT_TABLES if table in store]
+        self.asset_type = metadata['asset_type']
+        self.sample_size = metadata['sample_size']
+        self.asset_type_hierarchy = metadata['asset_type_hierarchy']
+
+    def get_realization(self, rlz_i):
+        """Return the results of one realization.
+
+        The dictionary has the same structure as the
+        ``{asset_type}_{rlz_i}.json`` files of the JSON backend.
+
+        """
+        rlz_data = {self.asset_type: {}}
+        asset_pointer = {}
+        for asset_id, hierarchy in zip(
+            self.assets['asset'], self.assets['hierarchy']
+        ):
+            pointer = rlz_data
+            for asset_type_iter in hierarchy.split('/'):
+                pointer = pointer.setdefault(asset_type_iter, {})
+            pointer[asset_id] = {'GeneralInformation': {}}
+            asset_pointer[asset_id] = pointer[asset_id]
+
+        with pd.HDFStore(self.store_path, mode='r') as store:
+            for table in self.tables:
+                table_data = store.select(table, where=f'rlz == {int(rlz_i)}')
+                output_key = RESULT_TABLES[table]
+                for asset_id, column, value in zip(
+                    table_data['asset'], table_data['column'], table_data['value']
+                ):
+                    asset_output = asset_pointer[asset_id].setdefault(output_key, {})
+                    if table == 'DMG':
+                        # damage states are integers, missing ones are skipped
+                        if not np.isnan(value):
+                            asset_output[column] = int(value)
+                    elif table == 'DV':
+                        dv_type = column.split('-')[0]
+                        asset_output.setdefault('Repair', {}).setdefault(
+                            dv_type, {}
+                        )[column[len(dv_type) + 1 :]] = float(value)
+                    else:
+                        asset_output[column] = float(value)
+
+        return wrap_asset_hierarchy(rlz_data, self.asset_type_hierarchy)
+
+    def to_json(self, output_dir, realizations=None):
+        """Write ``{asset_type}_{rlz_i}.json`` files for the realizations.
+
+        Parameters
+        ----------
+        output_dir: str or Path
+            Directory of the JSON files.
+        realizations: list of int, optional
+            Realizations to export, all of them by default.
+
+        """
+        if realizations is None:
+            realizations = range(self.sample_size)
+        for rlz_i in realizations:
+            with open(  # noqa: PTH123
+                Path(output_dir) / f'{self.asset_type}_{rlz_i}.json',
+                'w',
+                encoding='utf-8',
+            ) as f:
+                json.dump(self.get_realization(rlz_i), f, indent=2)
@@ -0,0 +1,374 @@
+#
+# Copyright (c) 2019 The Regents of the University of California
+# Copyright (c) 2019 Leland Stanford Junior University
+#
+# This file is part of whale.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# whale. If not, see <http://www.opensource.org/licenses/>.
+
+"""Load-balanced distribution of per-asset tasks.
+
+Assets used to be assigned to processes with ``count % numP == procID``.
+Since the cost of an asset ranges from a fraction of a second to hours, the
+:class:`AssetScheduler` hands out tasks dynamically instead. Tasks are
+sorted by their (estimated) cost and grouped into chunks that get smaller
+as the work runs out (guided self-scheduling). Under MPI, the ranks request
+the next chunk from a light thread on rank 0, so rank 0 keeps running
+tasks as well. Without MPI, the chunks are run by a local process pool or
+serially.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    chunk_tasks
+    AssetScheduler
+
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+
+def chunk_tasks(costs, num_workers, chunk_factor=2):
+    """Group tasks into chunks of decreasing size.
+
+    The most expensive tasks come first. Each chunk collects tasks until its
+    cost reaches the remaining cost divided by ``chunk_factor * num_workers``,
+    so expensive tasks are handed out one by one and cheap ones in bulk,
+    while the chunks at the end are small enough to even out the load.
+
+    Parameters
+    ----------
+    costs: array_like
+        Estimated cost of each task.
+    num_workers: int
+        Number of processes working on the tasks.
+    chunk_factor: float, optional
+        Larger values produce smaller chunks.
+
+    Returns
+    -------
+    list of ndarray
+        Task indices in each chunk, in the order they should be handed out.
+
+    """
+    costs = np.maximum(np.asarray(costs, dtype=float), 0.0)
+    order = np.argsort(-costs, kind='stable')
+    sorted_costs = costs[order]
+
+    remaining = sorted_costs.sum()
+    divisor = chunk_factor * max(num_workers, 1)
+
+    chunks = []
+    i = 0
+    n_tasks = len(order)
+    while i < n_tasks:
+        target = remaining / divisor
+        # number of tasks that fit in the target cost, at least one
+        cum_cost = np.cumsum(sorted_costs[i:])
+        size = max(int(np.searchsorted(cum_cost, target, side='right')), 1)
+        if cum_cost[-1] == 0.0:
+            # the rest of the tasks are free; split them evenly
+            size = max(int(np.ceil((n_tasks - i) / divisor)), 1)
+        chunks.append(order[i : i + size])
+        remaining -= cum_cost[min(size, len(cum_cost)) - 1]
+        i += size
+
+    return chunks
+
+
+def _run_chunk(task_fn, tasks):
+    times = []
+    for task in tasks:
+        start = time.perf_counter()
+        task_fn(task)
+        times.append(time.perf_counter() - start)
+    return os.getpid(), times
+
+
+class AssetScheduler:
+    """Distribute tasks among MPI ranks or local worker processes.
+
+    Parameters
+    ----------
+    comm: mpi4py.MPI.Comm, optional
+        Communicator of the parallel run. If None, the tasks are run by this
+        process or by a local process pool.
+    num_workers: int, optional
+        Size of the local process pool used when comm is None.
+    mode: {'dynamic', 'static'}, optional
+        'static' reproduces the round-robin assignment of earlier versions
+        under MPI.
+    chunk_factor: float, optional
+        Controls the chunk sizes, see :func:`chunk_tasks`.
+
+    """
+
+    def __init__(self, comm=None, num_workers=1, mode='dynamic', chunk_factor=2):
+        if mode not in ('dynamic', 'static'):
+            raise ValueError(f'Unknown scheduling mode: {mode}')  # noqa: EM102, TRY003
+        self.comm = comm
+        self.num_workers = max(int(num_workers), 1)
+        self.mode = mode
+        self.chunk_factor = chunk_factor
+
+        if comm is not None:
+            self.rank = comm.Get_rank()
+            self.size = comm.Get_size()
+        else:
+            self.rank = 0
+            self.size = 1
+
+        # {worker_label: [number_of_tasks, busy_seconds]}
+        self.worker_stats = {}
+        # {task_key: seconds}
+        self.task_times = {}
+        self.elapsed = 0.0
+
+    def _record(self, worker, keys, times):
+        stats = self.worker_stats.setdefault(worker, [0, 0.0])
+        stats[0] += len(times)
+        stats[1] += float(np.sum(times))
+        self.task_times.update(zip(keys, times))
+
+    def _take_chunk(self):
+        with self._lock:
+            chunk_id = self._next_chunk
+            self._next_chunk += 1
+        return chunk_id
+
+    def _serve_chunks(self, comm, n_chunks):
+        # runs in a thread on rank 0 and answers chunk requests while the
+        # main thread of rank 0 is busy with its own tasks
+        from mpi4py import MPI
+
+        status = MPI.Status()
+        finished = 0
+        while finished < self.size - 1:
+            if not comm.iprobe(source=MPI.ANY_SOURCE, tag=0, status=status):
+                time.sleep(0.005)
+                continue
+            source = status.Get_source()
+            comm.recv(source=source, tag=0)
+            chunk_id = self._take_chunk()
+            comm.send(chunk_id, dest=source, tag=1)
+            if chunk_id >= n_chunks:
+                finished += 1
+
+    def _run_mpi(self, tasks, keys, task_fn, chunks):
+        from mpi4py import MPI
+
+        if self.mode == 'dynamic' and MPI.Query_thread() < MPI.THREAD_SERIALIZED:
+            print(  # noqa: T201
+                'WARNING: MPI was initialized without thread support, '
+                'using static scheduling.'
+            )
+            self.mode = 'static'
+
+        if self.mode == 'static':
+            my_tasks = np.arange(self.rank, len(tasks), self.size)
+            times = _run_chunk(task_fn, [tasks[i] for i in my_tasks])[1]
+            self._record(f'rank {self.rank}', [keys[i] for i in my_tasks], times)
+            return
+
+        comm = self.comm.Dup()
+        server = None
+        if self.rank == 0:
+            self._lock = threading.Lock()
+            self._next_chunk = 0
+            server = threading.Thread(
+                target=self._serve_chunks, args=(comm, len(chunks)), daemon=True
+            )
+            server.start()
+
+        chunk_id = -1
+        try:
+            while True:
+                if self.rank == 0:
+                    chunk_id = self._take_chunk()
+                else:
+                    comm.send(None, dest=0, tag=0)
+                    chunk_id = comm.recv(source=0, tag=1)
+                if chunk_id >= len(chunks):
+                    break
+                chunk = chunks[chunk_id]
+                times = _run_chunk(task_fn, [tasks[i] for i in chunk])[1]
+                self._record(f'rank {self.rank}', [keys[i] for i in chunk], times)
+        finally:
+            if self.rank != 0 and chunk_id < len(chunks):
+                # a task failed on this rank; request chunk ids until the end
+                # of the tasks so that rank 0 does not wait for this rank
+                # forever, the chunks received here are not run
+                while chunk_id < len(chunks):
+                    comm.send(None, dest=0, tag=0)
+                    chunk_id = comm.recv(source=0, tag=1)
+            if server is not None:
+                server.join()
+            comm.Barrier()
+            comm.Free()
+
+    def _run_pool(self, tasks, keys, task_fn, chunks, initializer, initargs):
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=initializer,
+            initargs=initargs,
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _run_chunk, task_fn, [tasks[i] for i in chunk]
+                ): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                pid, times = future.result()
+                chunk = futures[future]
+                self._record(f'worker {pid}', [keys[i] for i in chunk], times)
+
+    def run(
+        self,
+        tasks,
+        task_fn,
+        keys=None,
+        costs=None,
+        initializer=None,
+        initargs=(),
+    ):
+        """Run task_fn on every task.
+
+        Every process calls this method with the same tasks, keys and costs;
+        each task is run exactly once by one of them.
+
+        Parameters
+        ----------
+        tasks: list
+            Arguments passed to task_fn, one per task.
+        task_fn: callable
+            Function that runs a task. It has to be picklable (i.e., defined
+            at the module level) when a local process pool is used.
+        keys: list of str, optional
+            Labels used to report the run time of each task.
+        costs: array_like, optional
+            Estimated relative cost of each task. Equal costs are assumed if
+            not provided.
+        initializer: callable, optional
+            Called once in each local pool worker before it runs tasks.
+        initargs: tuple, optional
+            Arguments passed to the initializer.
+
+        """
+        start = time.perf_counter()
+
+        if keys is None:
+            keys = [str(i) for i in range(len(tasks))]
+        if costs is None:
+            costs = np.ones(len(tasks))
+
+        if self.comm is not None:
+            chunks = chunk_tasks(costs, self.size, self.chunk_factor)
+            self._run_mpi(tasks, keys, task_fn, chunks)
+
+        elif self.num_workers > 1 and len(tasks) > 1:
+            chunks = chunk_tasks(costs, self.num_workers, self.chunk_factor)
+            self._run_pool(tasks, keys, task_fn, chunks, initializer, initargs)
+
+        else:
+            times = _run_chunk(task_fn, tasks)[1]
+            self._record('rank 0', keys, times)
+
+        self.elapsed += time.perf_counter() - start
+
+    def report(self, report_path=None):
+        """Collect the worker statistics and task times on rank 0.
+
+        Parameters
+        ----------
+        report_path: str, optional
+            If provided, rank 0 saves the report to this JSON file. The task
+            times in it can be loaded with :meth:`load_task_times` to serve
+            as cost hints in a later run.
+
+        Returns
+        -------
+        dict or None
+            The report on rank 0, None on the other ranks.
+
+        """
+        worker_stats = self.worker_stats
+        task_times = self.task_times
+        elapsed = self.elapsed
+
+        if self.comm is not None:
+            all_stats = self.comm.gather(worker_stats, root=0)
+            all_times = self.comm.gather(task_times, root=0)
+            all_elapsed = self.comm.gather(elapsed, root=0)
+            if self.rank != 0:
+                return None
+            elapsed = max(all_elapsed)
+            worker_stats = {}
+            task_times = {}
+            for stats, times in zip(all_stats, all_times):
+                worker_stats.update(stats)
+                task_times.update(times)
+
+        workers = {
+            label: {
+                'tasks': n_tasks,
+                'busy_time': busy,
+                'utilization': busy / elapsed if elapsed > 0.0 else 1.0,
+            }
+            for label, (n_tasks, busy) in sorted(worker_stats.items())
+        }
+        report = {
+            'mode': self.mode,
+            'elapsed_time': elapsed,
+            'workers': workers,
+            'task_times': task_times,
+        }
+
+        if report_path is not None:
+            with open(report_path, 'w', encoding='utf-8') as f:  # noqa: PTH123
+                json.dump(report, f, indent=2)
+
+        return report
+
+    @staticmethod
+    def load_task_times(report_path):
+        """Load the task times saved by :meth:`report` in an earlier run."""
+        if report_path is None or not Path(report_path).is_file():
+            return {}
+        with open(report_path, encoding='utf-8') as f:  # noqa: PTH123
+            return json.load(f).get('task_times', {})
@@ -0,0 +1,281 @@
+#  # noqa: INP001
+# Copyright (c) 2018 Leland Stanford Junior University
+# Copyright (c) 2018 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+#
+
+"""Packed storage of Asset Information Models (AIM).
+
+Regional workflows used to write one ``{id}-AIM.json`` file per asset and
+copy, read, and rewrite these files several times. On shared parallel file
+systems, the metadata operations on millions of small files become the
+bottleneck. The :class:`AssetStore` keeps the AIMs of an asset type in a
+single SQLite database keyed by the asset id. SQLite is part of the Python
+standard library and reads the database through memory mapping.
+
+Parallel writers must not share a database on a network file system, so every
+MPI rank writes its own shard (see :func:`shard_path`) and the shards are
+merged by rank 0 with :meth:`AssetStore.merge`.
+
+The asset list files keep their ``{"id": ..., "file": ...}`` records; records
+of packed assets also have a ``"store"`` entry with the path to the database.
+The ``file`` is only written when an application needs the AIM as a file,
+see :meth:`AssetStore.materialize`.
+
+"""
+
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+# memory mapped I/O size for the read connections
+MMAP_SIZE = 2**30
+
+
+def _json_default(obj):
+    # numpy and pandas scalars in the asset inventories
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')  # noqa: EM102, TRY003
+
+
+def shard_path(store_path, rank):
+    """Return the path of the shard written by an MPI rank."""
+    return f'{store_path}.{rank}'
+
+
+class AssetStore:
+    """Asset Information Models of many assets in one SQLite database.
+
+    Parameters
+    ----------
+    path: str
+        Path to the database file.
+    mode: {'r', 'a', 'w'}, optional
+        Open the database read-only ('r'), for reading and writing ('a'), or
+        create a new database and remove the existing one ('w').
+
+    """
+
+    def __init__(self, path, mode='r'):
+        self.path = str(path)
+        self.mode = mode
+
+        if mode == 'w' and os.path.exists(self.path):  # noqa: PTH110
+            os.remove(self.path)  # noqa: PTH107
+
+        if mode == 'r':
+            if not os.path.exists(self.path):  # noqa: PTH110
+                raise FileNotFoundError(self.path)
+            self._conn = sqlite3.connect(
+                f'file:{self.path}?mode=ro', uri=True, check_same_thread=False
+            )
+        else:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS aim '
+                '(id TEXT PRIMARY KEY, type TEXT, data TEXT NOT NULL)'
+            )
+            self._conn.commit()
+
+        self._conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, *args):  # noqa: D105
+        self.close()
+
+    def __len__(self):  # noqa: D105
+        return self._conn.execute('SELECT COUNT(*) FROM aim').fetchone()[0]
+
+    def __contains__(self, asset_id):  # noqa: D105
+        row = self._conn.execute(
+            'SELECT 1 FROM aim WHERE id = ?', (str(asset_id),)
+        ).fetchone()
+        return row is not None
+
+    def close(self):
+        """Commit the pending changes and close the database."""
+        if self._conn is not None:
+            if self.mode != 'r':
+                self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def commit(self):
+        """Commit the pending changes."""
+        self._conn.commit()
+
+    def ids(self, component_type=None):
+        """Return the asset ids, optionally only those of a component type."""
+        if component_type is None:
+            rows = self._conn.execute('SELECT id FROM aim ORDER BY rowid')
+        else:
+            rows = self._conn.execute(
+                'SELECT id FROM aim WHERE type = ? ORDER BY rowid',
+                (component_type,),
+            )
+        return [row[0] for row in rows]
+
+    def get(self, asset_id):
+        """Return the AIM of an asset as a dictionary."""
+        row = self._conn.execute(
+            'SELECT data FROM aim WHERE id = ?', (str(asset_id),)
+        ).fetchone()
+        if row is None:
+            raise KeyError(asset_id)
+        return json.loads(row[0])
+
+    def get_many(self, asset_ids):
+        """Return the AIMs of several assets in the order of asset_ids."""
+        asset_ids = [str(asset_id) for asset_id in asset_ids]
+        aims = {}
+        # stay below the SQLite limit of host parameters in a statement
+        for k in range(0, len(asset_ids), 900):
+            chunk = asset_ids[k : k + 900]
+            rows = self._conn.execute(
+                'SELECT id, data FROM aim WHERE id IN '  # noqa: S608
+                f'({",".join("?" * len(chunk))})',
+                chunk,
+            )
+            aims.update((row[0], row[1]) for row in rows)
+        return [json.loads(aims[asset_id]) for asset_id in asset_ids]
+
+    def put(self, asset_id, aim, component_type=None):
+        """Add or replace the AIM of an asset.
+
+        Changes are written by :meth:`commit` or when the store is closed.
+
+        """
+        self.put_many([(asset_id, aim, component_type)])
+
+    def put_many(self, items):
+        """Add or replace the AIMs of several assets.
+
+        Parameters
+        ----------
+        items: iterable of tuples
+            (asset_id, aim) or (asset_id, aim, component_type) tuples.
+
+        """
+        rows = []
+        for item in items:
+            asset_id, aim = item[0], item[1]
+            component_type = item[2] if len(item) > 2 else None  # noqa: PLR2004
+            rows.append(
+                (
+                    str(asset_id),
+                    component_type,
+                    json.dumps(aim, default=_json_default),
+                )
+            )
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO aim (id, type, data) VALUES (?, ?, ?)', rows
+        )
+
+    def merge(self, shard_paths, remove=True):  # noqa: FBT002
+        """Copy the AIMs from other stores (e.g., MPI shards) into this one."""
+        self._conn.commit()
+        for path in shard_paths:
+            if not os.path.exists(path):  # noqa: PTH110
+                continue
+            self._conn.execute('ATTACH DATABASE ? AS shard', (str(path),))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO aim (id, type, data) '
+                'SELECT id, type, data FROM shard.aim ORDER BY rowid'
+            )
+            self._conn.commit()
+            self._conn.execute('DETACH DATABASE shard')
+            if remove:
+                os.remove(path)  # noqa: PTH107
+
+    def materialize(self, asset_id, path, overlay=None, indent=2):
+        """Write the AIM of an asset to a JSON file.
+
+        Parameters
+        ----------
+        asset_id: str
+            Asset id.
+        path: str
+            Path of the JSON file.
+        overlay: callable, optional
+            Function that updates the AIM dictionary before it is written.
+        indent: int, optional
+            Indentation of the JSON file.
+
+        Returns
+        -------
+        str
+            The path of the file.
+
+        """
+        aim = self.get(asset_id)
+        if overlay is not None:
+            overlay(aim)
+        with open(path, 'w', encoding='utf-8') as f:  # noqa: PTH123
+            json.dump(aim, f, indent=indent, default=_json_default)
+        return path
+
+
+def load_aim(asset, stores=None):
+    """Load the AIM of an asset record from its store or from its file.
+
+    Parameters
+    ----------
+    asset: dict
+        Record of the asset list with 'id', 'file', and optionally 'store'.
+    stores: dict, optional
+        Open stores keyed by their path; new stores are added to it.
+
+    """
+    store_path = asset.get('store')
+    if store_path is None:
+        with open(asset['file'], encoding='utf-8') as f:  # noqa: PTH123
+            return json.load(f)
+
+    if stores is None:
+        with AssetStore(store_path) as store:
+            return store.get(asset['id'])
+
+    if store_path not in stores:
+        stores[store_path] = AssetStore(store_path)
+    return stores[store_path].get(asset['id'])
@@ -48,6 +48,7 @@ import numpy as np
 import pandas as pd
 from scipy.integrate import cumtrapz
 from scipy.interpolate import interp1d
+from scipy.signal import lfilter
 from scipy.stats.mstats import gmean
 
 this_dir = Path(os.path.dirname(os.path.abspath(__file__))).resolve()  # noqa: PTH100, PTH120
@@ -311,7 +312,19 @@ class IntensityMeasureComputer:  # noqa: D101
 
         raise ValueError(f'Unrecognized unit {from_}')  # noqa: EM102, TRY003
 
-    def compute_response_spectrum(self, periods=[], damping=0.05, im_units=dict()):  # noqa: B006, C408, D102
+    def compute_response_spectrum(  # noqa: D102
+        self,
+        periods=[],  # noqa: B006
+        damping=0.05,
+        im_units=dict(),  # noqa: B006, C408
+        method='Newmark',
+        batch_size=64,
+    ):
+        # method: 'Newmark' - average acceleration Newmark-Beta on records
+        #         resampled to 0.005 sec (default)
+        #         'Exact' - exact piecewise-linear (Nigam-Jennings) recurrence
+        #         on the original time step (no resampling)
+        # records are processed in batches of batch_size with running maxima
         if len(im_units) == 0:
             unit_factor_vspec = 1.0
             unit_factor_aspec = 1.0
@@ -343,96 +356,193 @@ class IntensityMeasureComputer:  # noqa: D101
             return
         elif type(periods) == list:  # noqa: RET505, E721
             periods = np.array(periods)
-        num_periods = len(periods)
 
-        for cur_hist_name, cur_hist in self.time_hist_dict.items():
-            dt = cur_hist[1]
-            ground_acc = cur_hist[2]
+        # circular frequency
+        omega = (2 * np.pi) / periods
+
+        hist_names = list(self.time_hist_dict.keys())
+        for k in range(0, len(hist_names), batch_size):
+            batch_names = hist_names[k : k + batch_size]
+            batch_hists = [
+                (self.time_hist_dict[x][1], self.time_hist_dict[x][2])
+                for x in batch_names
+            ]
+            if method.lower() == 'exact':
+                max_disp, max_vel, max_acc = self._response_spectrum_exact(
+                    batch_hists, periods, damping
+                )
+            else:
+                max_disp, max_vel, max_acc = self._response_spectrum_newmark(
+                    batch_hists, periods, damping
+                )
+            # collect data
+            for i, cur_hist_name in enumerate(batch_names):
+                self.disp_spectrum.update(
+                    {cur_hist_name: np.ndarray.tolist(unit_factor_psd * max_disp[i])}
+                )
+                self.vel_spectrum.update(
+                    {
+                        cur_hist_name: np.ndarray.tolist(
+                            unit_factor_vspec * max_vel[i]
+                        )
+                    }
+                )
+                self.acc_spectrum.update(
+                    {
+                        cur_hist_name: np.ndarray.tolist(
+                            unit_factor_aspec * max_acc[i] / 100.0 / self.g
+                        )
+                    }
+                )
+                self.psv.update(
+                    {
+                        cur_hist_name: np.ndarray.tolist(
+                            unit_factor_psv * omega * max_disp[i]
+                        )
+                    }
+                )
+                self.psa.update(
+                    {
+                        cur_hist_name: np.ndarray.tolist(
+                            unit_factor_psa * omega**2 * max_disp[i] / 100.0 / self.g
+                        )
+                    }
+                )
+                self.periods.update({cur_hist_name: periods.tolist()})
+
+    def _response_spectrum_newmark(self, hists, periods, damping, dt_disc=0.005):
+        # peak relative displacement, relative velocity, and absolute acceleration
+        # of a batch of (dt, ground_acc) records with the average acceleration
+        # Newmark-Beta method
+        num_hists = len(hists)
+        # discritize
+        num_steps_disc = np.zeros(num_hists, dtype=int)
+        for i, (dt, ground_acc) in enumerate(hists):
+            num_steps_disc[i] = int(np.floor(len(ground_acc) * dt / dt_disc))
+        ground_acc_disc = np.zeros((num_hists, max(np.max(num_steps_disc), 1)))
+        for i, (dt, ground_acc) in enumerate(hists):
             num_steps = len(ground_acc)
-            # discritize
-            dt_disc = 0.005
-            num_steps_disc = int(np.floor(num_steps * dt / dt_disc))
             f = interp1d(
                 [dt * x for x in range(num_steps)],
                 ground_acc,
                 bounds_error=False,
                 fill_value=(ground_acc[0], ground_acc[-1]),
             )
-            tmp_time = [dt_disc * x for x in range(num_steps_disc)]
-            ground_acc = f(tmp_time)
-            # circular frequency, damping, and stiffness terms
-            omega = (2 * np.pi) / periods
-            cval = damping * 2 * omega
-            kval = ((2 * np.pi) / periods) ** 2
-            # Newmark-Beta
-            accel = np.zeros([num_steps_disc, num_periods])
-            vel = np.zeros([num_steps_disc, num_periods])
-            disp = np.zeros([num_steps_disc, num_periods])
-            a_t = np.zeros([num_steps_disc, num_periods])
-            accel[0, :] = (-ground_acc[0] - (cval * vel[0, :])) - (kval * disp[0, :])
-            for j in range(1, num_steps_disc):
-                delta_acc = ground_acc[j] - ground_acc[j - 1]
-                delta_d2u = (
-                    -delta_acc
-                    - dt_disc * cval * accel[j - 1, :]
-                    - dt_disc
-                    * kval
-                    * (vel[j - 1, :] + 0.5 * dt_disc * accel[j - 1, :])
-                ) / (1.0 + 0.5 * dt_disc * cval + 0.25 * dt_disc**2 * kval)
-                delta_du = dt_disc * accel[j - 1, :] + 0.5 * dt_disc * delta_d2u
-                delta_u = (
-                    dt_disc * vel[j - 1, :]
-                    + 0.5 * dt_disc**2 * accel[j - 1, :]
-                    + 0.25 * dt_disc**2 * delta_d2u
-                )
-                accel[j, :] = delta_d2u + accel[j - 1, :]
-                vel[j, :] = delta_du + vel[j - 1, :]
-                disp[j, :] = delta_u + disp[j - 1, :]
-                a_t[j, :] = ground_acc[j] + accel[j, :]
-            # collect data
-            self.disp_spectrum.update(
-                {
-                    cur_hist_name: np.ndarray.tolist(
-                        unit_factor_psd * np.max(np.fabs(disp), axis=0)
-                    )
-                }
+            ground_acc_disc[i, : num_steps_disc[i]] = f(
+                dt_disc * np.arange(num_steps_disc[i])
             )
-            self.vel_spectrum.update(
-                {
-                    cur_hist_name: np.ndarray.tolist(
-                        unit_factor_vspec * np.max(np.fabs(vel), axis=0)
-                    )
-                }
+        # circular frequency, damping, and stiffness terms
+        omega = (2 * np.pi) / periods
+        cval = damping * 2 * omega
+        kval = ((2 * np.pi) / periods) ** 2
+        # Newmark-Beta (only the current step and the running maxima are kept)
+        vel = np.zeros([num_hists, len(periods)])
+        disp = np.zeros([num_hists, len(periods)])
+        accel = (-ground_acc_disc[:, [0]] - (cval * vel)) - (kval * disp)
+        max_disp = np.zeros([num_hists, len(periods)])
+        max_vel = np.zeros([num_hists, len(periods)])
+        max_acc = np.zeros([num_hists, len(periods)])
+        for j in range(1, ground_acc_disc.shape[1]):
+            active = (j < num_steps_disc)[:, np.newaxis]
+            delta_acc = (ground_acc_disc[:, j] - ground_acc_disc[:, j - 1])[
+                :, np.newaxis
+            ]
+            delta_d2u = (
+                -delta_acc
+                - dt_disc * cval * accel
+                - dt_disc * kval * (vel + 0.5 * dt_disc * accel)
+            ) / (1.0 + 0.5 * dt_disc * cval + 0.25 * dt_disc**2 * kval)
+            delta_du = dt_disc * accel + 0.5 * dt_disc * delta_d2u
+            delta_u = (
+                dt_disc * vel
+                + 0.5 * dt_disc**2 * accel
+                + 0.25 * dt_disc**2 * delta_d2u
             )
-            self.acc_spectrum.update(
-                {
-                    cur_hist_name: np.ndarray.tolist(
-                        unit_factor_aspec
-                        * np.max(np.fabs(a_t), axis=0)
-                        / 100.0
-                        / self.g
-                    )
-                }
+            accel = delta_d2u + accel
+            vel = delta_du + vel
+            disp = delta_u + disp
+            a_t = ground_acc_disc[:, [j]] + accel
+            max_disp = np.where(
+                active, np.maximum(max_disp, np.fabs(disp)), max_disp
             )
-            self.psv.update(
-                {
-                    cur_hist_name: np.ndarray.tolist(
-                        unit_factor_psv * omega * np.max(np.fabs(disp), axis=0)
-                    )
-                }
+            max_vel = np.where(active, np.maximum(max_vel, np.fabs(vel)), max_vel)
+            max_acc = np.where(active, np.maximum(max_acc, np.fabs(a_t)), max_acc)
+        return max_disp, max_vel, max_acc
+
+    def _response_spectrum_exact(self, hists, periods, damping):
+        # peak relative displacement, relative velocity, and absolute acceleration
+        # of a batch of (dt, ground_acc) records with the exact solution for
+        # piecewise-linear excitation (Nigam and Jennings, 1969), where the
+        # recurrence of each period is evaluated as a linear filter
+        num_hists = len(hists)
+        max_disp = np.zeros([num_hists, len(periods)])
+        max_vel = np.zeros([num_hists, len(periods)])
+        max_acc = np.zeros([num_hists, len(periods)])
+        # records sharing the time step share the filter coefficients
+        dt_groups = dict()  # noqa: C408
+        for i, (dt, ground_acc) in enumerate(hists):  # noqa: B007
+            dt_groups.setdefault(dt, []).append(i)
+        for dt, hist_ids in dt_groups.items():
+            num_steps = np.array([len(hists[i][1]) for i in hist_ids])
+            # effective force per unit mass (padded with zeros)
+            force = np.zeros((len(hist_ids), np.max(num_steps) + 1))
+            for r, i in enumerate(hist_ids):
+                force[r, : num_steps[r]] = -np.asarray(hists[i][1], dtype=float)
+            in_record = (
+                np.arange(np.max(num_steps))[np.newaxis, :]
+                < num_steps[:, np.newaxis]
             )
-            self.psa.update(
-                {
-                    cur_hist_name: np.ndarray.tolist(
-                        unit_factor_psa
-                        * omega**2
-                        * np.max(np.fabs(disp), axis=0)
-                        / 100.0
-                        / self.g
+            for k, cur_period in enumerate(periods):
+                omega = 2 * np.pi / cur_period
+                kval = omega**2
+                sq = np.sqrt(1.0 - damping**2)
+                omega_d = omega * sq
+                e = np.exp(-damping * omega * dt)
+                sin_d = np.sin(omega_d * dt)
+                cos_d = np.cos(omega_d * dt)
+                # u_{i+1} = a11 u_i + a12 v_i + b11 p_i + b12 p_{i+1}
+                # v_{i+1} = a21 u_i + a22 v_i + b21 p_i + b22 p_{i+1}
+                a11 = e * (damping / sq * sin_d + cos_d)
+                a12 = e * sin_d / omega_d
+                a21 = -e * omega / sq * sin_d
+                a22 = e * (cos_d - damping / sq * sin_d)
+                b11 = (
+                    2 * damping / (omega * dt)
+                    + e
+                    * (
+                        ((1 - 2 * damping**2) / (omega_d * dt) - damping / sq)
+                        * sin_d
+                        - (1 + 2 * damping / (omega * dt)) * cos_d
                     )
-                }
-            )
-            self.periods.update({cur_hist_name: periods.tolist()})
+                ) / kval
+                b12 = (
+                    1
+                    - 2 * damping / (omega * dt)
+                    + e
+                    * (
+                        (2 * damping**2 - 1) / (omega_d * dt) * sin_d
+                        + 2 * damping / (omega * dt) * cos_d
+                    )
+                ) / kval
+                b21 = (
+                    -1 / dt
+                    + e * ((omega / sq + damping / (dt * sq)) * sin_d + cos_d / dt)
+                ) / kval
+                b22 = (1 - e * (damping / sq * sin_d + cos_d)) / (kval * dt)
+                w1 = b11 * force[:, :-1] + b12 * force[:, 1:]
+                w2 = b21 * force[:, :-1] + b22 * force[:, 1:]
+                den = [1.0, -(a11 + a22), a11 * a22 - a12 * a21]
+                disp = lfilter([0.0, 1.0, -a22], den, w1, axis=1) + lfilter(
+                    [0.0, 0.0, a12], den, w2, axis=1
+                )
+                vel = lfilter([0.0, 0.0, a21], den, w1, axis=1) + lfilter(
+                    [0.0, 1.0, -a11], den, w2, axis=1
+                )
+                a_t = -(2 * damping * omega * vel + kval * disp)
+                max_disp[hist_ids, k] = np.max(np.fabs(disp) * in_record, axis=1)
+                max_vel[hist_ids, k] = np.max(np.fabs(vel) * in_record, axis=1)
+                max_acc[hist_ids, k] = np.max(np.fabs(a_t) * in_record, axis=1)
+        return max_disp, max_vel, max_acc
 
     def compute_peak_ground_responses(self, im_units=dict()):  # noqa: B006, C408, D102
         if len(im_units) == 0:
@@ -767,7 +877,11 @@ def computeIM(AIM_file, EVENT_file, IM_file, unitScaled, ampScaled, geoMean):  #
     if 'PeakGroundResponse' in im_types:
         im_computer.compute_peak_ground_responses(im_units=im_units)
     if 'PseudoSpectrum' in im_types or 'SpectralShape' in im_types:
-        im_computer.compute_response_spectrum(periods=periods, im_units=im_units)
+        im_computer.compute_response_spectrum(
+            periods=periods,
+            im_units=im_units,
+            method=AIM_event.get('SpectrumMethod', 'Newmark'),
+        )
     if 'AriasIntensity' in im_types or 'Duration' in im_types:
         im_computer.compute_arias_intensity(im_units=im_units)
     if 'SpectralShape' in im_types:
@@ -42,9 +42,21 @@
 import argparse
 import os
 import sys
+from pathlib import Path
 
+this_dir = Path(os.path.dirname(os.path.abspath(__file__))).resolve()  # noqa: PTH100, PTH120
+main_dir = this_dir.parents[1]
 
-def create_asset_files(output_file, asset_source_file, asset_filter, doParallel):  # noqa: C901, N803, D103
+sys.path.insert(0, str(main_dir / 'common'))
+
+
+def create_asset_files(  # noqa: C901, D103
+    output_file,
+    asset_source_file,
+    asset_filter,
+    doParallel,  # noqa: N803
+    packedAIM='False',  # noqa: N803
+):
     # these imports are here to save time when the app is called without
     # the -getRV flag
     import importlib
@@ -52,6 +64,7 @@ def create_asset_files(output_file, asset_source_file, asset_filter, doParallel)
 
     import numpy as np
     import pandas as pd
+    from asset_store import AssetStore, shard_path
 
     # check if running parallel
     numP = 1  # noqa: N806
@@ -104,6 +117,16 @@ def create_asset_files(output_file, asset_source_file, asset_filter, doParallel)
     # identify the labels
     labels = selected_assets.columns.values  # noqa: PD011
 
+    # write the AIMs into a single database instead of one file per asset
+    store = None
+    store_path = None
+    if packedAIM == 'True':
+        store_path = os.path.splitext(output_file)[0] + '_AIM.sqlite'  # noqa: PTH122
+        if procID == 0:
+            store = AssetStore(store_path, mode='w')
+        else:
+            store = AssetStore(shard_path(store_path, procID), mode='w')
+
     assets_array = []
 
     # for each asset...
@@ -130,13 +153,23 @@ def create_asset_files(output_file, asset_source_file, asset_filter, doParallel)
 
             AIM_file_name = os.path.join(outDir, AIM_file_name)  # noqa: PTH118, N806
 
-            with open(AIM_file_name, 'w', encoding='utf-8') as f:  # noqa: PTH123
-                json.dump(AIM_i, f, indent=2)
+            if store is not None:
+                store.put(str(asset_id), AIM_i)
+                assets_array.append(
+                    dict(id=str(asset_id), file=AIM_file_name, store=store_path)  # noqa: C408
+                )
+
+            else:
+                with open(AIM_file_name, 'w', encoding='utf-8') as f:  # noqa: PTH123
+                    json.dump(AIM_i, f, indent=2)
 
-            assets_array.append(dict(id=str(asset_id), file=AIM_file_name))  # noqa: C408
+                assets_array.append(dict(id=str(asset_id), file=AIM_file_name))  # noqa: C408
 
         count = count + 1
 
+    if store is not None:
+        store.close()
+
     if procID != 0:
         # if not P0, write data to output file with procID in name and barrier
 
@@ -159,6 +192,12 @@ def create_asset_files(output_file, asset_source_file, asset_filter, doParallel)
                 assetsToAppend = json.loads(json_data)  # noqa: N806
                 assets_array += assetsToAppend
 
+            if store is not None:
+                with AssetStore(store_path, mode='a') as packed_store:
+                    packed_store.merge(
+                        [shard_path(store_path, i) for i in range(1, numP)]
+                    )
+
         with open(output_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
             json.dump(assets_array, f, indent=2)
 
@@ -180,6 +219,11 @@ if __name__ == '__main__':
         default=None,
     )
     parser.add_argument('--doParallel', default='False')
+    parser.add_argument(
+        '--packedAIM',
+        help='Store the AIMs in a single database instead of one file per asset',
+        default='False',
+    )
     parser.add_argument('-n', '--numP', default='8')
     parser.add_argument('-m', '--mpiExec', default='mpiexec')
     parser.add_argument(
@@ -197,7 +241,11 @@ if __name__ == '__main__':
     if args.getRV:
         sys.exit(
             create_asset_files(
-                args.assetFile, args.assetSourceFile, args.filter, args.doParallel
+                args.assetFile,
+                args.assetSourceFile,
+                args.filter,
+                args.doParallel,
+                args.packedAIM,
             )
         )
     else:
@@ -6,6 +6,7 @@ import posixpath
 import shutil
 import sys
 import warnings
+from pathlib import Path
 
 import geopandas as gpd
 
@@ -14,6 +15,13 @@ import numpy as np
 import pandas as pd
 import shapely
 
+this_dir = Path(os.path.dirname(os.path.abspath(__file__))).resolve()  # noqa: PTH100, PTH120
+main_dir = this_dir.parents[1]
+
+sys.path.insert(0, str(main_dir / 'common'))
+
+from asset_store import AssetStore, shard_path  # noqa: E402
+
 
 # https://stackoverflow.com/questions/50916422/python-typeerror-object-of-type-int64-is-not-json-serializable
 class NpEncoder(json.JSONEncoder):  # noqa: D101
@@ -99,7 +107,7 @@ class generalAIMGenerator:
         #     AIM_i["GeneralInformation"].update({"assetSubtype":component_type})
         return AIM_i
 
-    def dumpAIM(self, AIM_i):  # noqa: N802, N803, D102
+    def getAIMFileName(self, AIM_i):  # noqa: N802, N803, D102
         # assetSubtype = AIM_i['GeneralInformation'].get("assetSubtype", None)
         componentType = AIM_i['GeneralInformation'].get('type', None)  # noqa: N806
         outDir = os.path.dirname(self.output_file)  # noqa: PTH120, N806
@@ -107,7 +115,18 @@ class generalAIMGenerator:
             outDir = os.path.join(outDir, componentType)  # noqa: PTH118, N806
         asset_id = AIM_i['GeneralInformation']['AIM_id']
         AIM_file_name = f'{asset_id}-AIM.json'  # noqa: N806
-        AIM_file_name = os.path.join(outDir, AIM_file_name)  # noqa: PTH118, N806
+        return os.path.join(outDir, AIM_file_name)  # noqa: PTH118
+
+    def dumpAIM(self, AIM_i, store=None):  # noqa: N802, N803, D102
+        AIM_file_name = self.getAIMFileName(AIM_i)  # noqa: N806
+        if store is not None:
+            # packed inventory: the file is only written when it is needed
+            store.put(
+                AIM_i['GeneralInformation']['AIM_id'],
+                AIM_i,
+                AIM_i['GeneralInformation'].get('type', None),
+            )
+            return AIM_file_name
         with open(AIM_file_name, 'w', encoding='utf-8') as f:  # noqa: PTH123
             json.dump(AIM_i, f, indent=2, cls=NpEncoder)
         return AIM_file_name
@@ -309,6 +328,7 @@ def create_asset_files(  # noqa: C901, D103
     asset_type,
     input_file,
     doParallel,  # noqa: N803
+    packedAIM='False',  # noqa: N803
 ):
     # check if running parallel
     numP = 1  # noqa: N806
@@ -343,6 +363,17 @@ def create_asset_files(  # noqa: C901, D103
     # assetSourceFile passed through command may be different from input_config when run on designsafe
     component_dict = split_and_select_components(input_config, asset_source_file)
     component_dir = init_workdir(component_dict, outDir)  # noqa: F841
+
+    # write the AIMs into a single database instead of one file per asset
+    store = None
+    store_path = None
+    if packedAIM == 'True':
+        store_path = os.path.splitext(output_file)[0] + '_AIM.sqlite'  # noqa: PTH122
+        if procID == 0:
+            store = AssetStore(store_path, mode='w')
+        else:
+            store = AssetStore(shard_path(store_path, procID), mode='w')
+
     assets_array = []
     for component_type, component_data in component_dict.items():
         geom_type = type(component_data['geometry'].values[0])  # noqa: PD011
@@ -374,13 +405,16 @@ def create_asset_files(  # noqa: C901, D103
             if runParallel == False or (count % numP) == procID:  # noqa: E712
                 # initialize the AIM file
                 AIM_i = AIMgenerator.createAIM(asset_idx, component_type)  # noqa: N806
-                AIM_file_name = AIMgenerator.dumpAIM(AIM_i)  # noqa: N806
-                assets_array.append(
-                    dict(  # noqa: C408
-                        id=AIM_i['GeneralInformation']['AIM_id'], file=AIM_file_name
-                    )
+                AIM_file_name = AIMgenerator.dumpAIM(AIM_i, store)  # noqa: N806
+                asset_record = dict(  # noqa: C408
+                    id=AIM_i['GeneralInformation']['AIM_id'], file=AIM_file_name
                 )
+                if store is not None:
+                    asset_record['store'] = store_path
+                assets_array.append(asset_record)
             count = count + 1
+    if store is not None:
+        store.close()
     if procID != 0:
         # if not P0, write data to output file with procID in name and barrier
         output_file_p = os.path.join(outDir, f'tmp_{procID}.json')  # noqa: PTH118
@@ -397,6 +431,11 @@ def create_asset_files(  # noqa: C901, D103
                     json_data = data_file.read()
                 assetsToAppend = json.loads(json_data)  # noqa: N806
                 assets_array += assetsToAppend
+            if store is not None:
+                with AssetStore(store_path, mode='a') as packed_store:
+                    packed_store.merge(
+                        [shard_path(store_path, i) for i in range(1, numP)]
+                    )
         with open(output_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
             json.dump(assets_array, f, indent=2, cls=NpEncoder)
     # else:
@@ -411,6 +450,7 @@ if __name__ == '__main__':
     parser.add_argument('--assetType')
     parser.add_argument('--inputJsonFile')
     parser.add_argument('--doParallel', default='False')
+    parser.add_argument('--packedAIM', default='False')
     parser.add_argument('-n', '--numP', default='8')
     parser.add_argument('-m', '--mpiExec', default='mpiexec')
     parser.add_argument('--getRV', nargs='?', const=True, default=False)
@@ -424,6 +464,7 @@ if __name__ == '__main__':
                 args.assetType,
                 args.inputJsonFile,
                 args.doParallel,
+                args.packedAIM,
             )
         )
     else:
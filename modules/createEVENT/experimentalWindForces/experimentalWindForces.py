@@ -8,8 +8,7 @@ try:
     import numpy as np
 
     moduleName = 'scipy'  # noqa: N816
-    from scipy.interpolate import interp1d
-    from scipy.signal import csd, windows
+    from scipy.signal import windows
 
     error_tag = False  # global variable
 except:  # noqa: E722
@@ -443,27 +442,19 @@ def perform_POD(s_target, f_target, ncomp, l_mo):  # noqa: N802, D103
 
     SpeN = f_full.shape[0]  # exclude freq = 0 Hz  # noqa: N806
 
-    Vs = np.zeros((ncomp, ncomp, SpeN), dtype='complex_')  # noqa: N806
-    Ds = np.zeros((ncomp, ncomp, SpeN))  # noqa: N806
-
-    for ii in range(
-        SpeN
-    ):  # eigen - decomposition at every frequency of CPSD matrix and sort them
-        [D_all, V_all] = np.linalg.eig(S_F[:, :, ii])  # noqa: N806
-        ind = np.argsort(D_all)
-        Ds[:, :, ii] = np.real(np.diag(D_all[ind]))
-        Vs[:, :, ii] = V_all[:, ind]
-
     # Truncation
-    V = np.zeros((ncomp, l_mo, SpeN), dtype='complex_')  # noqa: N806
-    D0 = np.zeros((l_mo, l_mo, SpeN))  # noqa: N806
-    for tt in range(l_mo):
-        V[:, tt, :] = Vs[:, ncomp - 1 - tt, :]
-        D0[tt, tt, :] = Ds[ncomp - 1 - tt, ncomp - 1 - tt, :]
-
+    V = np.zeros((ncomp, l_mo, SpeN), dtype=complex)  # noqa: N806
     D1 = np.zeros((l_mo, 1, SpeN))  # noqa: N806
-    for ii in range(SpeN):
-        D1[:, 0, ii] = np.diag(D0[:, :, ii])
+
+    # the CPSD matrix is Hermitian, so the eigen-decomposition of all
+    # frequencies in a chunk is done at once with eigh, which returns the
+    # eigenvalues in ascending order
+    chunk = max(1, 2**22 // (ncomp * ncomp))
+    for f0 in range(0, SpeN, chunk):
+        fc = slice(f0, min(f0 + chunk, SpeN))
+        D_all, V_all = np.linalg.eigh(S_F[:, :, fc].transpose(2, 0, 1))  # noqa: N806
+        V[:, :, fc] = V_all[:, :, ::-1][:, :, :l_mo].transpose(1, 2, 0)
+        D1[:, 0, fc] = D_all[:, ::-1][:, :l_mo].T
 
     return V, D1, SpeN
 
@@ -539,25 +530,46 @@ def learn_CPSD(  # noqa: N802, D103, PLR0913
 
 
 def cpsd_matlab(Components1, Components2, wind_size, nover, nfft, fp):  # noqa: N803, D103
+    # Same estimate as scipy.signal.csd for every pair of components, but the
+    # windowed FFT of each Welch segment of each component is computed once
+    # and the spectral matrix is formed with batched products.
     window = windows.hann(int(wind_size))
+    nperseg = len(window)
+    nover = int(nover)
+    step = nperseg - nover
 
-    ncombs1 = Components1.shape[1]
-    ncombs2 = Components2.shape[1]
     nSampPoints = int(nfft / 2 + 1)  # noqa: N806
-    s_target = np.zeros((ncombs1, ncombs2, nSampPoints), dtype='complex_')
 
     print('Training cross power spectrum density..')  # noqa: T201
-    for nc2 in range(ncombs2):
-        for nc1 in range(ncombs1):
-            [f_target, s_tmp] = csd(
-                Components1[:, nc1],
-                Components2[:, nc2],
-                window=window,
-                noverlap=nover,
-                nfft=nfft,
-                fs=fp,
-            )
-            s_target[nc1, nc2, :] = s_tmp  # *4/np.pi
+
+    def segment_fft(x):
+        # (segment, frequency, component) one-sided spectra
+        segs = np.lib.stride_tricks.sliding_window_view(x, nperseg, axis=0)[::step]
+        segs = segs - np.mean(segs, axis=-1, keepdims=True)
+        return np.fft.rfft(segs * window, n=int(nfft), axis=-1).transpose(0, 2, 1)
+
+    X1 = segment_fft(np.asarray(Components1, dtype=float))  # noqa: N806
+    if Components2 is Components1:
+        X2 = X1  # noqa: N806
+    else:
+        X2 = segment_fft(np.asarray(Components2, dtype=float))  # noqa: N806
+
+    # density scaling of the one-sided spectrum averaged over the segments
+    scale = np.full(nSampPoints, 2.0 / (fp * np.sum(window**2) * X1.shape[0]))
+    scale[0] /= 2
+    if int(nfft) % 2 == 0:
+        scale[-1] /= 2
+
+    s_target = np.zeros((X1.shape[2], X2.shape[2], nSampPoints), dtype=complex)
+    chunk = max(1, 2**22 // max(1, X1.shape[2] * X2.shape[2]))
+    for f0 in range(0, nSampPoints, chunk):
+        fc = slice(f0, min(f0 + chunk, nSampPoints))
+        s_tmp = np.matmul(
+            np.conj(X1[:, fc, :]).transpose(1, 2, 0), X2[:, fc, :].transpose(1, 0, 2)
+        )
+        s_target[:, :, fc] = (s_tmp * scale[fc, None, None]).transpose(1, 2, 0)
+
+    f_target = np.fft.rfftfreq(int(nfft), 1 / fp)
 
     return s_target, f_target
 
@@ -598,6 +610,15 @@ def simulation_gaussian(  # noqa: D103, PLR0913
     F_jzm = np.zeros((ncomp, N_t))  # noqa: N806
     f_tmp = np.linspace(0, (N_f - 1) * f_inc, N_f)
 
+    # linear interpolation (and extrapolation) from the decomposition
+    # frequencies to the simulation frequencies, shared by all modes
+    hi = np.clip(np.searchsorted(f, f_tmp), 1, len(f) - 1)
+    lo = hi - 1
+    frac = (f_tmp - f[lo]) / (f[hi] - f[lo])
+
+    # components are processed in chunks to limit the size of the ifft input
+    chunk = max(1, 2**22 // N_t)
+
     for m in range(l_mo):
         mo = m  # current        mode  #
         Vmo = V_vH[nf_dir, mo, :]  # eigenvector for mode mo  # noqa: N806
@@ -615,35 +636,23 @@ def simulation_gaussian(  # noqa: D103, PLR0913
         # Generate  random phase  angle for each frequency SpeN
         varth = (2 * np.pi) * np.random.random(size=(1, N_f))
 
-        # Loop over floors
-        # g_jm = np.zeros((N_t, ncomp),dtype = 'complex_')
-        F_jm = np.zeros((ncomp, N_t))  # noqa: N806
-
         coef = np.sqrt(2) * np.sqrt(f_inc) * np.exp(1j * varth)
         coef2 = np.exp(1j * ((mo + 1) / l_mo * f_inc) * tvec)
 
-        fVDmo = interp1d(f, VDmo, kind='linear', fill_value='extrapolate')  # noqa: N806
-        fthetmo = interp1d(f, thetmo, kind='linear', fill_value='extrapolate')
-        fV_interp = np.abs(fVDmo(f_tmp))  # noqa: N806
-        fthet_interp = np.exp((1j) * (fthetmo(f_tmp)))
-
-        for j in range(ncomp):
-            # l denotes a particular freq. point
-            # m denotes a particular mode
-            # j denotes a particular floor
-            fVDmo = interp1d(f, VDmo[j, :], kind='linear', fill_value='extrapolate')  # noqa: N806
-            fthetmo = interp1d(
-                f, thetmo[j, :], kind='linear', fill_value='extrapolate'
-            )
-
-            B_jm = np.zeros((N_t,), dtype='complex_')  # noqa: N806
-            B_jm[0:N_f] = coef * fV_interp[j, :] * fthet_interp[j, :]
+        fV_interp = np.abs(VDmo[:, lo] + (VDmo[:, hi] - VDmo[:, lo]) * frac)  # noqa: N806
+        fthet_interp = np.exp(
+            (1j) * (thetmo[:, lo] + (thetmo[:, hi] - thetmo[:, lo]) * frac)
+        )
 
-            g_jm = np.fft.ifft(B_jm) * N_t
-            F_jm[j, :] = np.real(g_jm * coef2)
+        # j denotes a particular floor
+        for j0 in range(0, ncomp, chunk):
+            jj = slice(j0, min(j0 + chunk, ncomp))
+            B_jm = np.zeros((jj.stop - j0, N_t), dtype=complex)  # noqa: N806
+            B_jm[:, 0:N_f] = coef * fV_interp[jj] * fthet_interp[jj]
 
-        # sum up F from different modes (zero - mean)
-        F_jzm = F_jzm + F_jm  # noqa: N806
+            g_jm = np.fft.ifft(B_jm, axis=1) * N_t
+            # sum up F from different modes (zero - mean)
+            F_jzm[jj] += np.real(g_jm * coef2)
 
     return F_jzm
 
@@ -1,7 +1,9 @@
-import json  # noqa: INP001, D100
+import hashlib  # noqa: INP001, D100
+import json
 import os
 import sys
 import time
+from pathlib import Path
 
 try:
     moduleName = 'numpy'  # noqa: N816
@@ -9,8 +11,7 @@ try:
 
     moduleName = 'scipy'  # noqa: N816
     from scipy import interpolate
-    from scipy.interpolate import interp1d
-    from scipy.signal import butter, csd, lfilter, windows
+    from scipy.signal import butter, lfilter, windows
     from scipy.stats import gaussian_kde, genpareto, norm
 
     error_tag = False  # global variable
@@ -60,10 +61,6 @@ def main(aimName, evtName, getRV):  # noqa: C901, N803, D103, PLR0915
         'windowSize'
     ]  # 4, window size/duration (sec) - smaller window leads to more smoothing - model scale
     overlap = evt_data['overlapPerc'] / 100  # 0.5   , 50% overlap - user defined
-    gg = evt_data[
-        'cpsdGroupSize'
-    ]  # 5 , User defined: variable that subdivides the CPSD matrix into ggxgg "groups" in order to avoid running out of memory
-
     ms = evt_data.get('modelScale', 0)  # model scale
 
     selected_taps = np.array(
@@ -221,67 +218,62 @@ def main(aimName, evtName, getRV):  # noqa: C901, N803, D103, PLR0915
         N_t = int(np.round(T_full / dt))  # number of time points  # noqa: N806
         nfft = N_t
 
+        unitLength = aim_data['GeneralInformation']['units']['length']  # noqa: N806
+        unitTime = aim_data['GeneralInformation']['units']['time']  # noqa: N806
+
         #
-        # Learning CPSD only if needed
+        # Learning CPSD only if needed: the decomposition only depends on the
+        # pressure data and the spectral parameters, so it is cached on disk
+        # and reused by later runs
         #
 
-        out = np.mod(tap, gg)
-        c = (tap - out) / gg
-        d = np.arange(0, c + 1, dtype=int) * int(gg)
-        if out > 0:
-            d = np.concatenate([d, np.array([d[-1] + out])])
-
-        # TODO: dealing with gpuArray, gather  # noqa: TD002
-        nSampPoints = int(nfft / 2 + 1)  # noqa: N806
-        s_target = np.zeros(
-            (len(selected_taps), len(selected_taps), nSampPoints), dtype='complex_'
+        pod_file = pod_cache_file(
+            evt_data,
+            filename,
+            selected_taps,
+            wind_size,
+            nover,
+            nfft,
+            fp,
+            filtHz,
+            l_mo,
         )
-        startTime = time.time()  # noqa: N806, F841
-        # TODO: works only if the selected taps are is continuous  # noqa: TD002
-        selected_taps_tmp = np.concatenate(
-            [selected_taps, [selected_taps[-1] + 1]]
-        )  # zero is dummy that will not appear in the analysis
+        if pod_file is not None and os.path.exists(pod_file):  # noqa: PTH110
+            print('Loading POD from ' + pod_file)  # noqa: T201
+            with np.load(pod_file) as pod_data:
+                V = pod_data['V']  # noqa: N806
+                D1 = pod_data['D1']  # noqa: N806
+                SpeN = int(pod_data['SpeN'])  # noqa: N806
+                f_target = pod_data['f_target']
 
-        print('Training cross power spectrum density..')  # noqa: T201
-        t_init = time.time()
+        else:
+            print('Training cross power spectrum density..')  # noqa: T201
+            t_init = time.time()
+
+            Cp_taps = Cp_norm[:, selected_taps - 1]  # noqa: N806
+            [s_target, f_target] = cpsd_matlab(
+                Cp_taps,
+                Cp_taps,
+                wind_size,
+                nover,
+                nfft,
+                fp,
+            )  # -1 because tab1 is at column 0
 
-        nloop = (len(d) - 1) * (len(d) - 1)
-        for i in range(1, len(d)):
-            for j in range(1, len(d)):
-                if np.mod((i - 1) * (len(d) - 1) + j, round(nloop / 10)) == 0:
-                    print(  # noqa: T201
-                        f'{((i - 1) * (len(d) - 1) + j) / nloop * 100:.0f} % completed'
-                    )
-
-                kk = np.arange(d[i - 1], d[i])
-                ll = np.arange(d[j - 1], d[j])
-                # ii = np.arange(selected_taps_tmp[d[i-1]],selected_taps_tmp[d[i]])
-                # jj = np.arange(selected_taps_tmp[d[j-1]],selected_taps_tmp[d[j]])
-                ii = selected_taps_tmp[kk]
-                jj = selected_taps_tmp[ll]
-
-                [s, f_target] = cpsd_matlab(
-                    Cp_norm[:, ii - 1],
-                    Cp_norm[:, jj - 1],
-                    wind_size,
-                    nover,
-                    nfft,
-                    fp,
-                )  # -1 because tab1 is at column 0
-                # cpsd_all[kk,ll] = s
-                s_target[d[i - 1] : d[i], d[j - 1] : d[j]] = s
-
-        print(f' - Elapsed time: {time.time() - t_init:.1f} seconds.\n')  # noqa: T201
+            print(f' - Elapsed time: {time.time() - t_init:.1f} seconds.\n')  # noqa: T201
 
-        unitLength = aim_data['GeneralInformation']['units']['length']  # noqa: N806
-        unitTime = aim_data['GeneralInformation']['units']['time']  # noqa: N806
+            print('Performing POD..')  # noqa: T201
+            t_init = time.time()
 
-        print('Performing POD..')  # noqa: T201
-        t_init = time.time()
+            # Spectral Proper Orthogonal Decomposition
+            try:
+                V, D1, SpeN = perform_POD(s_target, f_target, tap, l_mo)  # noqa: N806
+            except MemoryError:
+                err_exit('Low memory performing POD')
+            print(f' - Elapsed time: {time.time() - t_init:.1f} seconds.\n')  # noqa: T201
 
-        # Spectral Proper Orthogonal Decomposition
-        V, D1, SpeN = perform_POD(s_target, f_target, tap, l_mo, pool)  # noqa: N806
-        print(f' - Elapsed time: {time.time() - t_init:.1f} seconds.\n')  # noqa: T201
+            if pod_file is not None:
+                save_pod_cache(pod_file, V, D1, SpeN, f_target)
 
         #
         # Computing nonGaussian CDFs
@@ -783,77 +775,114 @@ def paretotails_icdf(pf, nl, nu, temp, my_cdf_vect, my_cdf_x):  # noqa: D103
 
 
 def cpsd_matlab(Components1, Components2, wind_size, nover, nfft, fp):  # noqa: N803, D103
+    # Same estimate as scipy.signal.csd for every pair of components, but the
+    # windowed FFT of each Welch segment of each component is computed once
+    # and the spectral matrix is formed with batched products.
     window = windows.hann(int(wind_size))
+    nperseg = len(window)
+    nover = int(nover)
+    step = nperseg - nover
 
-    ncombs1 = Components1.shape[1]
-    ncombs2 = Components2.shape[1]
     nSampPoints = int(nfft / 2 + 1)  # noqa: N806
 
     if nfft < 2500:  # noqa: PLR2004
         print('ERROR: time series is too short. Please put a longer duration')  # noqa: T201
         exit(-1)  # noqa: PLR1722
 
-    s_target = np.zeros((ncombs1, ncombs2, nSampPoints), dtype='complex_')
-
-    for nc2 in range(ncombs2):
-        for nc1 in range(ncombs1):
-            [f_target, s_tmp] = csd(
-                Components1[:, nc1],
-                Components2[:, nc2],
-                window=window,
-                noverlap=nover,
-                nfft=nfft,
-                fs=fp,
-            )
-            s_target[nc1, nc2, :] = s_tmp  # *4/np.pi
+    def segment_fft(x):
+        # (segment, frequency, component) one-sided spectra
+        segs = np.lib.stride_tricks.sliding_window_view(x, nperseg, axis=0)[::step]
+        segs = segs - np.mean(segs, axis=-1, keepdims=True)
+        return np.fft.rfft(segs * window, n=int(nfft), axis=-1).transpose(0, 2, 1)
+
+    X1 = segment_fft(np.asarray(Components1, dtype=float))  # noqa: N806
+    if Components2 is Components1:
+        X2 = X1  # noqa: N806
+    else:
+        X2 = segment_fft(np.asarray(Components2, dtype=float))  # noqa: N806
+
+    # density scaling of the one-sided spectrum averaged over the segments
+    scale = np.full(nSampPoints, 2.0 / (fp * np.sum(window**2) * X1.shape[0]))
+    scale[0] /= 2
+    if int(nfft) % 2 == 0:
+        scale[-1] /= 2
+
+    s_target = np.zeros((X1.shape[2], X2.shape[2], nSampPoints), dtype=complex)
+    chunk = max(1, 2**22 // max(1, X1.shape[2] * X2.shape[2]))
+    for f0 in range(0, nSampPoints, chunk):
+        fc = slice(f0, min(f0 + chunk, nSampPoints))
+        s_tmp = np.matmul(
+            np.conj(X1[:, fc, :]).transpose(1, 2, 0), X2[:, fc, :].transpose(1, 0, 2)
+        )
+        s_target[:, :, fc] = (s_tmp * scale[fc, None, None]).transpose(1, 2, 0)
+
+    f_target = np.fft.rfftfreq(int(nfft), 1 / fp)
 
     return s_target, f_target
 
 
-def perform_POD(s_target, f_target, ncomp, l_mo, pool):  # noqa: N802, D103
+def perform_POD(s_target, f_target, ncomp, l_mo):  # noqa: N802, D103
     S_F = s_target[:, :, 0:]  # do not exclude freq = 0 Hz  # noqa: N806
     f_full = f_target[0:]  # do not exclude freq = 0 Hz
 
     SpeN = f_full.shape[0]  # exclude freq = 0 Hz  # noqa: N806
 
-    Vs = np.zeros((ncomp, ncomp, SpeN), dtype='complex_')  # noqa: N806
-    Ds = np.zeros((ncomp, ncomp, SpeN))  # noqa: N806
+    # Truncation
+    V = np.zeros((ncomp, l_mo, SpeN), dtype=complex)  # noqa: N806
+    D1 = np.zeros((l_mo, 1, SpeN))  # noqa: N806
 
-    #
-    # eigenvalue analysis in parallel
-    #
-    iterables = ((S_F[:, :, ii],) for ii in range(SpeN))
-    try:
-        result_objs = list(pool.starmap(np.linalg.eig, iterables))
-    except MemoryError:
-        err_exit('Low memory performing POD')
+    # the CPSD matrix is Hermitian, so the eigen-decomposition of all
+    # frequencies in a chunk is done at once with eigh, which returns the
+    # eigenvalues in ascending order
+    chunk = max(1, 2**22 // (ncomp * ncomp))
+    for f0 in range(0, SpeN, chunk):
+        fc = slice(f0, min(f0 + chunk, SpeN))
+        D_all, V_all = np.linalg.eigh(S_F[:, :, fc].transpose(2, 0, 1))  # noqa: N806
+        V[:, :, fc] = V_all[:, :, ::-1][:, :, :l_mo].transpose(1, 2, 0)
+        D1[:, 0, fc] = D_all[:, ::-1][:, :l_mo].T
 
-    except KeyboardInterrupt:
-        print('Ctrl+c received, terminating and joining pool.')  # noqa: T201
-        try:
-            self.pool.shutdown()  # noqa: F405
-        except Exception:  # noqa: BLE001
-            sys.exit()
+    return V, D1, SpeN
 
-    for ii in range(SpeN):
-        D_all = result_objs[ii][0]  # noqa: N806
-        V_all = result_objs[ii][1]  # noqa: N806
-        ind = np.argsort(D_all)
-        Ds[:, :, ii] = np.real(np.diag(D_all[ind]))
-        Vs[:, :, ii] = V_all[:, ind]
 
-    # Truncation
-    V = np.zeros((ncomp, l_mo, SpeN), dtype='complex_')  # noqa: N806
-    D0 = np.zeros((l_mo, l_mo, SpeN))  # noqa: N806
-    for tt in range(l_mo):
-        V[:, tt, :] = Vs[:, ncomp - 1 - tt, :]
-        D0[tt, tt, :] = Ds[ncomp - 1 - tt, ncomp - 1 - tt, :]
+def pod_cache_file(  # noqa: D103
+    evt_data,
+    filename,
+    selected_taps,
+    wind_size,
+    nover,
+    nfft,
+    fp,
+    filtHz,  # noqa: N803
+    l_mo,
+):
+    # POD_cache next to the pressure data unless podCacheDir is given; an
+    # empty podCacheDir disables caching
+    cache_dir = evt_data.get(
+        'podCacheDir',
+        os.path.join(os.path.dirname(os.path.abspath(filename)), 'POD_cache'),  # noqa: PTH100, PTH118, PTH120
+    )
+    if not cache_dir:
+        return None
+
+    # the key changes whenever the pressure data or the parameters change
+    stat = Path(filename).stat()
+    key = hashlib.sha1()  # noqa: S324
+    key.update(
+        f'{os.path.abspath(filename)}|{stat.st_size}|{stat.st_mtime_ns}|'  # noqa: PTH100
+        f'{wind_size}|{nover}|{nfft}|{fp}|{filtHz}|{l_mo}'.encode()
+    )
+    key.update(np.ascontiguousarray(selected_taps, dtype=int).tobytes())
+    name = os.path.splitext(os.path.basename(filename))[0]  # noqa: PTH119, PTH122
+    return os.path.join(cache_dir, f'{name}_{key.hexdigest()}.npz')  # noqa: PTH118
 
-    D1 = np.zeros((l_mo, 1, SpeN))  # noqa: N806
-    for ii in range(SpeN):
-        D1[:, 0, ii] = np.diag(D0[:, :, ii])
 
-    return V, D1, SpeN
+def save_pod_cache(pod_file, V, D1, SpeN, f_target):  # noqa: N803, D103
+    os.makedirs(os.path.dirname(pod_file), exist_ok=True)  # noqa: PTH103, PTH120
+    # write to a temporary file first so readers never see partial files
+    tmp_file = f'{pod_file}.{os.getpid()}'
+    with open(tmp_file, 'wb') as f:  # noqa: PTH123
+        np.savez(f, V=V, D1=D1, SpeN=SpeN, f_target=f_target)
+    Path(tmp_file).replace(pod_file)
 
 
 def simulation_gaussian(  # noqa: D103, PLR0913
@@ -896,6 +925,15 @@ def simulation_gaussian(  # noqa: D103, PLR0913
     F_jzm = np.zeros((ncomp, N_t))  # noqa: N806
     f_tmp = np.linspace(0, (N_f - 1) * f_inc, N_f)
 
+    # linear interpolation (and extrapolation) from the decomposition
+    # frequencies to the simulation frequencies, shared by all modes
+    hi = np.clip(np.searchsorted(f, f_tmp), 1, len(f) - 1)
+    lo = hi - 1
+    frac = (f_tmp - f[lo]) / (f[hi] - f[lo])
+
+    # components are processed in chunks to limit the size of the ifft input
+    chunk = max(1, 2**22 // N_t)
+
     for m in range(l_mo):
         mo = m  # current        mode  #
         Vmo = V_vH[nf_dir, mo, :]  # eigenvector for mode mo  # noqa: N806
@@ -913,36 +951,23 @@ def simulation_gaussian(  # noqa: D103, PLR0913
         # Generate  random phase  angle for each frequency SpeN
         varth = (2 * np.pi) * np.random.random(size=(1, N_f))
 
-        # Loop over floors
-        # g_jm = np.zeros((N_t, ncomp),dtype = 'complex_')
-        F_jm = np.zeros((ncomp, N_t))  # noqa: N806
-
         coef = np.sqrt(2) * np.sqrt(f_inc) * np.exp(1j * varth)
         coef2 = np.exp(1j * ((mo + 1) / l_mo * f_inc) * tvec)
 
-        fVDmo = interp1d(f, VDmo, kind='linear', fill_value='extrapolate')  # noqa: N806
-        fthetmo = interp1d(f, thetmo, kind='linear', fill_value='extrapolate')
-        fV_interp = np.abs(fVDmo(f_tmp))  # noqa: N806
-        fthet_interp = np.exp((1j) * (fthetmo(f_tmp)))
-
-        for j in range(ncomp):
-            # l denotes a particular freq. point
-            # m denotes a particular mode
-            # j denotes a particular floor
-            fVDmo = interp1d(f, VDmo[j, :], kind='linear', fill_value='extrapolate')  # noqa: N806
-            fthetmo = interp1d(
-                f, thetmo[j, :], kind='linear', fill_value='extrapolate'
-            )
-
-            B_jm = np.zeros((N_t,), dtype='complex_')  # noqa: N806
-            B_jm[0:N_f] = coef * fV_interp[j, :] * fthet_interp[j, :]
+        fV_interp = np.abs(VDmo[:, lo] + (VDmo[:, hi] - VDmo[:, lo]) * frac)  # noqa: N806
+        fthet_interp = np.exp(
+            (1j) * (thetmo[:, lo] + (thetmo[:, hi] - thetmo[:, lo]) * frac)
+        )
 
-            g_jm = np.fft.ifft(B_jm) * N_t
-            F_jm[j, :] = np.real(g_jm * coef2)
+        # j denotes a particular floor
+        for j0 in range(0, ncomp, chunk):
+            jj = slice(j0, min(j0 + chunk, ncomp))
+            B_jm = np.zeros((jj.stop - j0, N_t), dtype=complex)  # noqa: N806
+            B_jm[:, 0:N_f] = coef * fV_interp[jj] * fthet_interp[jj]
 
-        # TODO it is hard to tell whether they are similar or not  # noqa: TD002, TD004
-        # sum up F from different modes (zero - mean)
-        F_jzm = F_jzm + F_jm  # noqa: N806
+            g_jm = np.fft.ifft(B_jm, axis=1) * N_t
+            # sum up F from different modes (zero - mean)
+            F_jzm[jj] += np.real(g_jm * coef2)
 
     return F_jzm
 
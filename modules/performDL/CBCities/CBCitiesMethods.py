@@ -94,8 +94,21 @@ def get_prefix(file_path):  # noqa: D103
     return prefix  # noqa: RET504
 
 
-# Get the PGV value for the pipe
-def add_pgv2pipe(pipe):  # noqa: D103
+# PGV column of each event file that was read already, so that pipes sharing
+# a site (and all pipes of a regional run) parse every event file only once
+event_pgv_cache = {}
+
+
+def read_event_pgv(path_Event_File):  # noqa: N803, D103
+    if path_Event_File not in event_pgv_cache:
+        # Read in the event file IM List
+        eventIMList = pd.read_csv(path_Event_File, header=0)  # noqa: N806
+        event_pgv_cache[path_Event_File] = eventIMList.loc[:, 'PGV'].to_numpy()
+
+    return event_pgv_cache[path_Event_File]
+
+
+def get_pipe_events(pipe):  # noqa: D103
     reg_event = pipe['RegionalEvent']
     events = pipe['Events'][0]
 
@@ -103,9 +116,9 @@ def add_pgv2pipe(pipe):  # noqa: D103
 
     event_array = events['Events']
 
-    event_units = reg_event['units']
+    pgv_unit = reg_event['units']['PGV']
 
-    pgvs = np.array([])
+    pipe_events = []
 
     for eventFile, scaleFactor in event_array:  # noqa: N806
         # Discard the numbering at the end of the csv file name
@@ -114,28 +127,88 @@ def add_pgv2pipe(pipe):  # noqa: D103
         # Get the path to the event file
         path_Event_File = posixpath.join(event_folder_path, eventFile)  # noqa: N806
 
-        # Read in the event file IM List
-        eventIMList = pd.read_csv(path_Event_File, header=0)  # noqa: N806
-
-        PGVCol = eventIMList.loc[:, 'PGV']  # noqa: N806
-
-        pgv_unit = event_units['PGV']
-
         # Scale the PGVs and account for units - fragility functions are in inch per second
         if pgv_unit == 'cmps':
-            PGVCol = PGVCol.apply(lambda x: cm2inch(x) * scaleFactor)  # noqa: B023, N806
+            pipe_events.append((path_Event_File, scaleFactor))
         elif pgv_unit == 'inps':
             continue
         else:
             print("Error, only 'cmps' and 'inps' units are supported for PGV")  # noqa: T201
+            pipe_events.append((path_Event_File, None))
+
+    return pipe_events
+
+
+def scale_event_pgv(pgv, scaleFactor):  # noqa: N803, D103
+    if scaleFactor is None:
+        return pgv
+    return cm2inch(pgv) * scaleFactor
 
-        pgvs = np.append(pgvs, PGVCol.values)
+
+# Get the PGV value for the pipe
+def add_pgv2pipe(pipe):  # noqa: D103
+    pgvs = np.array([])
+
+    for path_Event_File, scaleFactor in get_pipe_events(pipe):  # noqa: N806
+        pgvs = np.append(
+            pgvs, scale_event_pgv(read_event_pgv(path_Event_File), scaleFactor)
+        )
 
     pipe['pgv'] = pgvs
 
     return pipe
 
 
+# Get the PGV values for all pipes at once
+def add_pgv2pipes(pipes):  # noqa: D103
+    pipe_events = [get_pipe_events(pipe) for pipe in pipes]
+
+    # read every event file once and stack them when they are of equal size
+    event_files = {}
+    for path, _ in itertools.chain(*pipe_events):
+        if path not in event_files:
+            event_files[path] = len(event_files)
+    event_pgvs = [read_event_pgv(path) for path in event_files]
+
+    num_events = {len(events) for events in pipe_events}
+    num_realizations = {len(pgv) for pgv in event_pgvs}
+
+    if (
+        len(num_events) != 1
+        or len(num_realizations) > 1
+        or any(scale is None for _, scale in itertools.chain(*pipe_events))
+    ):
+        # irregular event lists are assembled pipe by pipe
+        for pipe in pipes:
+            add_pgv2pipe(pipe)
+        return np.array([pipe['pgv'] for pipe in pipes], dtype=object)
+
+    # (pipe, event) indices into the stacked event files and their scale factors
+    event_index = np.array(
+        [[event_files[path] for path, _ in events] for events in pipe_events],
+        dtype=int,
+    ).reshape(len(pipes), -1)
+    scale_factors = np.array(
+        [[scale for _, scale in events] for events in pipe_events],
+        dtype=float,
+    ).reshape(len(pipes), -1)
+
+    if len(event_pgvs) > 0:
+        event_pgvs = np.stack(event_pgvs)
+    else:
+        event_pgvs = np.zeros((0, 0))
+
+    # (pipe, realization) PGVs of all pipes
+    pgvs = (cm2inch(event_pgvs[event_index]) * scale_factors[:, :, None]).reshape(
+        len(pipes), -1
+    )
+
+    for pipe, pgv in zip(pipes, pgvs):
+        pipe['pgv'] = pgv
+
+    return pgvs
+
+
 #    pgv_info = pd.read_csv(pgv_path)
 #    gd_pgv = gpd.GeoDataFrame(
 #        pgv_info, geometry=gpd.points_from_xy(pgv_info.lon, pgv_info.lat))
@@ -192,6 +265,26 @@ def add_failrate2pipe(pipe):  # noqa: D103
     return pipe
 
 
+def add_failrate2pipes(pipes):  # noqa: D103
+    pgvs = add_pgv2pipes(pipes)
+
+    if pgvs.dtype == object:
+        for pipe in pipes:
+            pipe['fail_prob'] = get_pipe_failrate(pipe)
+        return pipes
+
+    # failure probabilities of all pipes and realizations at once
+    k = np.array([k_dict[pipe['GeneralInformation']['material']] for pipe in pipes])
+    l = np.array([pipe['GeneralInformation']['length'] for pipe in pipes])  # noqa: E741
+
+    fail_probs = calculate_fail_repairrate(k[:, None], l[:, None], pgvs)
+
+    for pipe, fail_prob in zip(pipes, fail_probs):
+        pipe['fail_prob'] = fail_prob
+
+    return pipes
+
+
 #
 #
 #    pgv_prefix = get_prefix(pgv_path)
@@ -246,13 +339,12 @@ def generate_leak_diameter(pipe_diam, min_ratio=0.05, max_ratio=0.25):  # noqa:
     return pipe_diam * r
 
 
-def get_leak_sizes(pipe_info):  # noqa: D103
+def get_leak_sizes(pipe_info, min_ratio=0.05, max_ratio=0.25):  # noqa: D103
     leak_size = np.zeros(len(pipe_info))
-    for index, row in pipe_info.iterrows():
-        d, repair = row['diameter'], row['repair']
-        if repair:
-            leak_d = generate_leak_diameter(d)
-            leak_size[index] = leak_d
+    repair = np.asarray(pipe_info['repair'], dtype=bool)
+    # one draw per repaired pipe, in the order of the pipe table
+    r = np.random.uniform(min_ratio, max_ratio, size=np.count_nonzero(repair))
+    leak_size[repair] = np.asarray(pipe_info['diameter'], dtype=float)[repair] * r
     return leak_size
 
 
@@ -81,13 +81,12 @@ def main(node_info, pipe_info):  # noqa: D103
     #    pgv_csv_files = glob('../data/rupture/rupture62_im/*.csv')
 
     # Mapping & Saving
-    import multiprocessing as mp
+    # each event file is read once and the failure probabilities of all pipes
+    # are computed together
+    results = add_failrate2pipes(allPipes)  # noqa: F405
 
-    pool = mp.Pool(mp.cpu_count() - 1)
-    results = pool.map(add_failrate2pipe, [pipe for pipe in allPipes])  # noqa: C416, F405
-    pool.close()
-
-    df = pd.DataFrame({'DV': {}, 'MeanFailureProbability': {}})  # noqa: PD901
+    pipe_ids = []
+    avgFailureProbs = []  # noqa: N806
 
     for pipe in results:
         failureProbArray = pipe['fail_prob']  # noqa: N806
@@ -98,10 +97,10 @@ def main(node_info, pipe_info):  # noqa: D103
         #        print("failureProbArray: ",failureProbArray)
         print('avgFailureProb: ', avgFailureProb)  # noqa: T201
 
-        df2 = pd.DataFrame(
-            {'DV': pipe_id, 'MeanFailureProbability': avgFailureProb}, index=[0]
-        )
-        df = pd.concat([df, df2], axis=0)  # noqa: PD901
+        pipe_ids.append(pipe_id)
+        avgFailureProbs.append(avgFailureProb)
+
+    df = pd.DataFrame({'DV': pipe_ids, 'MeanFailureProbability': avgFailureProbs})  # noqa: PD901
 
     # Get the directory for saving the results, assume it is the same one with the AIM file
     aimDir = os.path.dirname(pipe_info)  # noqa: PTH120, N806
@@ -144,188 +144,13 @@ def main(params_dir, surrogate_dir, json_dir, result_file, input_json):  # noqa:
 
     f.close()
 
-    did_stochastic = sur['doStochastic']
-    did_logtransform = sur['doLogtransform']
-    did_normalization = sur['doNormalization']
-    kernel = sur['kernName']
+    # build the GP models once; they are reused for every sample
+    predictor = SurrogatePredictor(sur, surrogate_dir)
 
-    if kernel == 'Radial Basis':
-        kern_name = 'rbf'
-    elif kernel == 'Exponential':
-        kern_name = 'Exponential'
-    elif kernel == 'Matern 3/2':
-        kern_name = 'Mat32'
-    elif kernel == 'Matern 5/2':
-        kern_name = 'Mat52'  # noqa: F841
-    did_mf = sur['doMultiFidelity']
-
-    # from json
-    g_name_sur = list()  # noqa: C408
-    ng_sur = 0
-    Y = np.zeros((sur['highFidelityInfo']['valSamp'], sur['ydim']))  # noqa: N806
-    for g in sur['ylabels']:
-        g_name_sur += [g]
-        Y[:, ng_sur] = np.array(sur['yExact'][g])
-        ng_sur += 1
-
-    rv_name_sur = list()  # noqa: C408
-    nrv_sur = 0
-    X = np.zeros((sur['highFidelityInfo']['valSamp'], sur['xdim']))  # noqa: N806
-    for rv in sur['xlabels']:
-        rv_name_sur += [rv]
-        X[:, nrv_sur] = np.array(sur['xExact'][rv])
-        nrv_sur += 1
-
-    try:
-        constIdx = sur['highFidelityInfo']['constIdx']  # noqa: N806
-        constVal = sur['highFidelityInfo']['constVal']  # noqa: N806
-    except:  # noqa: E722
-        constIdx = []  # noqa: N806
-        constVal = []  # noqa: N806
-
-        # Read pickles
-
-    if did_stochastic:
-        #
-        # Modify GPy package
-        #
-        def monkeypatch_method(cls):
-            def decorator(func):
-                setattr(cls, func.__name__, func)
-                return func
-
-            return decorator
-
-        @monkeypatch_method(GPy.likelihoods.Gaussian)
-        def gaussian_variance(self, Y_metadata=None):  # noqa: N803
-            if Y_metadata is None:
-                return self.variance
-            else:  # noqa: RET505
-                return self.variance * Y_metadata['variance_structure']
-
-        @monkeypatch_method(GPy.core.GP)
-        def set_XY2(self, X=None, Y=None, Y_metadata=None):  # noqa: N802, N803
-            if Y_metadata is not None:
-                if self.Y_metadata is None:
-                    self.Y_metadata = Y_metadata
-                else:
-                    self.Y_metadata.update(Y_metadata)
-                    # print("metadata_updated")
-
-            self.set_XY(X, Y)
-
-        def get_stochastic_variance(X, Y, x, ny):  # noqa: C901, N803
-            # X_unique, X_idx, indices, counts = np.unique(X, axis=0, return_index=True, return_counts=True, return_inverse=True)
-            X_unique, dummy, indices, counts = np.unique(  # noqa: N806
-                X, axis=0, return_index=True, return_counts=True, return_inverse=True
-            )
-
-            idx_repl = [i for i in np.where(counts > 1)[0]]  # noqa: C416
-
-            if len(idx_repl) > 0:
-                n_unique = X_unique.shape[0]
-                Y_mean, Y_var = np.zeros((n_unique, 1)), np.zeros((n_unique, 1))  # noqa: N806
-
-                for idx in range(n_unique):
-                    Y_subset = Y[[i for i in np.where(indices == idx)[0]], :]  # noqa: C416, N806
-                    Y_mean[idx, :] = np.mean(Y_subset, axis=0)
-                    Y_var[idx, :] = np.var(Y_subset, axis=0)
-
-                if (np.max(Y_var) / np.var(Y_mean) < 1.0e-10) and len(idx_repl) > 0:  # noqa: PLR2004
-                    return np.ones((X.shape[0], 1))
-
-                # kernel_var = GPy.kern.Matern52(
-                #    input_dim=nrv_sur, ARD=True
-                # ) + GPy.kern.Linear(input_dim=nrv_sur, ARD=True)
-                kernel_var = GPy.kern.Matern52(input_dim=nrv_sur, ARD=True)
-                log_vars = np.log(Y_var[idx_repl])
-                m_var = GPy.models.GPRegression(
-                    X_unique[idx_repl, :],
-                    log_vars,
-                    kernel_var,
-                    normalizer=True,
-                    Y_metadata=None,
-                )
-                # print("Collecting variance field of ny={}".format(ny))
-                for key, val in sur['modelInfo'][g_name_sur[ny] + '_Var'].items():  # noqa: B007, PERF102
-                    exec('m_var.' + key + '= np.array(val)')  # noqa: S102
-
-                log_var_pred, dum = m_var.predict(X_unique)
-                var_pred = np.exp(log_var_pred)
-
-                if did_normalization:
-                    # Y_normFact = np.var(Y_mean)  # noqa: N806, RUF100
-                    Y_normFact = np.mean(var_pred.T[0])  # noqa: N806
-                else:
-                    Y_normFact = 1  # noqa: N806
-
-                norm_var_str = (
-                    (var_pred.T[0]) / Y_normFact
-                )  # if normalization was used..
-
-                log_var_pred_x, dum = m_var.predict(x)
-                nugget_var_pred_x = np.exp(log_var_pred_x.T[0]) / Y_normFact
-
-            else:
-                X_unique = X  # noqa: N806
-                Y_mean = Y  # noqa: N806
-                indices = range(Y.shape[0])
-
-                #
-                # check if we have an old example file - to be deleted in the future
-                #
-                old_version = False
-                for key, val in sur['modelInfo'][g_name_sur[ny] + '_Var'].items():  # noqa: B007, PERF102
-                    if 'sum' in key:
-                        old_version = True
-                        break
-
-                if old_version:
-                    print(  # noqa: T201
-                        'The surrogate model was trained using an older version of the tool. Please retrain the model using this version or use older version.',
-                        file=sys.stderr,
-                    )
-                    exit(-1)  # noqa: PLR1722
-
-                log_vars = np.atleast_2d(
-                    sur['modelInfo'][g_name_sur[ny] + '_Var']['TrainingSamplesY']
-                ).T
-
-                kernel_var = GPy.kern.Matern52(input_dim=nrv_sur, ARD=True)
-
-                m_var = GPy.models.GPRegression(
-                    X, log_vars, kernel_var, normalizer=True, Y_metadata=None
-                )
-
-                # print("Variance field obtained for ny={}".format(ny))
-                for key, val in sur['modelInfo'][g_name_sur[ny] + '_Var'].items():  # noqa: B007, PERF102
-                    exec('m_var.' + key + '= np.array(val)')  # noqa: S102
-
-                log_var_pred, dum = m_var.predict(X)
-                var_pred = np.exp(log_var_pred)
-
-                if did_normalization:
-                    # Y_normFact = np.var(Y)  # noqa: N806, RUF100
-                    Y_normFact = np.mean(var_pred.T[0])  # noqa: N806
-
-                else:
-                    Y_normFact = 1  # noqa: N806
-
-                norm_var_str = (
-                    (var_pred.T[0]) / Y_normFact
-                )  # if normalization was used..
-
-                log_var_pred_x, dum = m_var.predict(x)
-                nugget_var_pred_x = np.exp(log_var_pred_x.T[0]) / Y_normFact
-
-            return (
-                X_unique,
-                Y_mean,
-                norm_var_str,
-                counts,
-                nugget_var_pred_x,
-                np.var(Y_mean),
-            )
+    g_name_sur = list(predictor.g_names)
+    ng_sur = len(g_name_sur)  # noqa: F841
+    rv_name_sur = list(predictor.rv_names)
+    nrv_sur = len(rv_name_sur)
 
     # REQUIRED: rv_name, y_var
 
@@ -528,209 +353,18 @@ def main(params_dir, surrogate_dir, json_dir, result_file, input_json):  # noqa:
     for i in range(nrv):
         rv_val[:, id_vec[i]] = rv_tmp[:, i]
 
-    if kernel == 'Radial Basis':
-        kr = GPy.kern.RBF(input_dim=nrv_sur, ARD=True)
-    elif kernel == 'Exponential':
-        kr = GPy.kern.Exponential(input_dim=nrv_sur, ARD=True)
-    elif kernel == 'Matern 3/2':
-        kr = GPy.kern.Matern32(input_dim=nrv_sur, ARD=True)
-    elif kernel == 'Matern 5/2':
-        kr = GPy.kern.Matern52(input_dim=nrv_sur, ARD=True)
-
-    if sur['doLinear']:
-        # kr = kr + GPy.kern.Linear(input_dim=nrv_sur, ARD=True)
-        did_linear = True
-        lin_index = [True] * nrv
-        lin_list = []
-        for ny in range(ng_sur):
-            tmp_lin = LinearRegression()
-            tmp_lin.coef_ = np.array(
-                sur['modelInfo'][g_name_sur[ny] + '_Lin']['coef']
-            )
-            tmp_lin.intercept_ = np.array(
-                sur['modelInfo'][g_name_sur[ny] + '_Lin']['intercept']
-            )
-            lin_list += [tmp_lin]
-    else:
-        did_linear = False
-
-    # preprocessing..
-
-    if did_logtransform:
-        Y = np.log(Y)  # noqa: N806
+    pred = predictor.predict(rv_val)
 
-    if did_linear:
-        for ny in range(ng_sur):
-            y_lin_pred = lin_list[ny].predict(X[:, lin_index])
-            Y[:, ny] = Y[:, ny] - y_lin_pred
-
-    kg = kr
-    m_list = list()  # noqa: C408
-    nugget_var_list = [0] * ng_sur
-
-    if not did_mf:
-        for ny in range(ng_sur):
-            if did_stochastic[ny]:
-                m_list = m_list + [  # noqa: RUF005
-                    GPy.models.GPRegression(
-                        X,
-                        Y[:, ny][np.newaxis].transpose(),
-                        kernel=kg.copy(),
-                        normalizer=did_normalization,
-                    )
-                ]
-                (
-                    X_unique,  # noqa: N806
-                    Y_mean,  # noqa: N806
-                    norm_var_str,
-                    counts,
-                    nugget_var_pred,
-                    Y_normFact,  # noqa: N806
-                ) = get_stochastic_variance(X, Y[:, ny][np.newaxis].T, rv_val, ny)
-                Y_metadata = {'variance_structure': norm_var_str / counts}  # noqa: N806
-                m_list[ny].set_XY2(X_unique, Y_mean, Y_metadata=Y_metadata)
-                for key, val in sur['modelInfo'][g_name_sur[ny]].items():  # noqa: B007, PERF102
-                    exec('m_list[ny].' + key + '= np.array(val)')  # noqa: S102
-
-                nugget_var_list[ny] = (
-                    m_list[ny].Gaussian_noise.parameters
-                    * nugget_var_pred
-                    * Y_normFact
-                )
-
-            else:
-                m_list = m_list + [  # noqa: RUF005
-                    GPy.models.GPRegression(
-                        X,
-                        Y[:, ny][np.newaxis].transpose(),
-                        kernel=kg.copy(),
-                        normalizer=True,
-                    )
-                ]
-                for key, val in sur['modelInfo'][g_name_sur[ny]].items():  # noqa: B007, PERF102
-                    exec('m_list[ny].' + key + '= np.array(val)')  # noqa: S102
-
-                Y_normFact = np.var(Y[:, ny])  # noqa: N806
-                nugget_var_list[ny] = np.squeeze(
-                    np.array(m_list[ny].Gaussian_noise.parameters)
-                    * np.array(Y_normFact)
-                )
-
-    else:
-        with open(surrogate_dir, 'rb') as file:  # noqa: PTH123
-            m_list = pickle.load(file)  # noqa: S301
-
-        for ny in range(ng_sur):
-            Y_normFact = np.var(Y[:, ny])  # noqa: N806
-            nugget_var_list[ny] = (
-                m_list[ny].gpy_model['mixed_noise.Gaussian_noise.variance']
-                * Y_normFact
-            )
-
-    # read param in file and sort input
-    y_dim = len(m_list)
-
-    y_pred_median = np.zeros([nsamp, y_dim])
-    y_pred_var_tmp = np.zeros([nsamp, y_dim])  # might be log space
-    y_pred_var_m_tmp = np.zeros([nsamp, y_dim])  # might be log space
-
-    y_pred_var = np.zeros([nsamp, y_dim])
-    y_pred_var_m = np.zeros([nsamp, y_dim])
-
-    y_data_var = np.zeros([nsamp, y_dim])
-    y_samp = np.zeros([nsamp, y_dim])
-    y_q1 = np.zeros([nsamp, y_dim])
-    y_q3 = np.zeros([nsamp, y_dim])
-    y_q1m = np.zeros([nsamp, y_dim])
-    y_q3m = np.zeros([nsamp, y_dim])
-
-    for ny in range(y_dim):
-        y_data_var[:, ny] = np.var(m_list[ny].Y)
-        if ny in constIdx:
-            y_pred_median_tmp, y_pred_var_tmp[ny], y_pred_var_m_tmp[ny] = (
-                np.ones([nsamp]) * constVal[constIdx.index(ny)],
-                np.zeros([nsamp]),
-                np.zeros([nsamp]),
-            )
-        else:
-            y_pred_median_tmp, y_pred_var_tmp_tmp = predict(
-                m_list[ny], rv_val, did_mf
-            )  # noiseless
-            y_pred_median_tmp = np.squeeze(y_pred_median_tmp)
-            y_pred_var_tmp_tmp = np.squeeze(y_pred_var_tmp_tmp)
-
-            if did_linear:
-                y_lin_pred = lin_list[ny].predict(rv_val[:, lin_index])
-                y_pred_median_tmp = y_pred_median_tmp + y_lin_pred
-
-        y_pred_var_tmp[:, ny] = y_pred_var_tmp_tmp
-        y_pred_var_m_tmp[:, ny] = y_pred_var_tmp_tmp + np.squeeze(
-            nugget_var_list[ny]
-        )
-        y_samp_tmp = np.random.normal(
-            y_pred_median_tmp, np.sqrt(y_pred_var_m_tmp[:, ny])
-        )
-
-        if did_logtransform:
-            y_pred_median[:, ny] = np.exp(y_pred_median_tmp)
-            y_pred_var[:, ny] = np.exp(
-                2 * y_pred_median_tmp + y_pred_var_tmp[:, ny]
-            ) * (np.exp(y_pred_var_tmp[:, ny]) - 1)
-            y_pred_var_m[:, ny] = np.exp(
-                2 * y_pred_median_tmp + y_pred_var_m_tmp[:, ny]
-            ) * (np.exp(y_pred_var_m_tmp[:, ny]) - 1)
-
-            y_samp[:, ny] = np.exp(y_samp_tmp)
-
-            y_q1[:, ny] = lognorm.ppf(
-                0.05,
-                s=np.sqrt(y_pred_var_tmp[:, ny]),
-                scale=np.exp(y_pred_median_tmp),
-            )
-            y_q3[:, ny] = lognorm.ppf(
-                0.95,
-                s=np.sqrt(y_pred_var_tmp[:, ny]),
-                scale=np.exp(y_pred_median_tmp),
-            )
-            y_q1m[:, ny] = lognorm.ppf(
-                0.05,
-                s=np.sqrt(y_pred_var_m_tmp[:, ny]),
-                scale=np.exp(y_pred_median_tmp),
-            )
-            y_q3m[:, ny] = lognorm.ppf(
-                0.95,
-                s=np.sqrt(y_pred_var_m_tmp[:, ny]),
-                scale=np.exp(y_pred_median_tmp),
-            )
-
-        else:
-            y_pred_median[:, ny] = y_pred_median_tmp
-            y_pred_var[:, ny] = y_pred_var_tmp[:, ny]
-            y_pred_var_m[:, ny] = y_pred_var_m_tmp[:, ny]
-            y_samp[:, ny] = y_samp_tmp
-            y_q1[:, ny] = norm.ppf(
-                0.05, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_tmp[:, ny])
-            )
-            y_q3[:, ny] = norm.ppf(
-                0.95, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_tmp[:, ny])
-            )
-            y_q1m[:, ny] = norm.ppf(
-                0.05, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_m_tmp[:, ny])
-            )
-            y_q3m[:, ny] = norm.ppf(
-                0.95, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_m_tmp[:, ny])
-            )
-
-        if np.isnan(y_samp[:, ny]).any():
-            y_samp[:, ny] = np.nan_to_num(y_samp[:, ny])
-        if np.isnan(y_pred_var[:, ny]).any():
-            y_pred_var[:, ny] = np.nan_to_num(y_pred_var[:, ny])
-        if np.isnan(y_pred_var_m[:, ny]).any():
-            y_pred_var_m[:, ny] = np.nan_to_num(y_pred_var_m[:, ny])  # noqa: F821
-
-        # for parname in m_list[ny].parameter_names():
-        #    if (kern_name in parname) and parname.endswith('variance'):
-        #        exec('y_pred_prior_var[ny]=m_list[ny].' + parname)
+    y_pred_median = pred['median']
+    y_pred_var = pred['var']
+    y_pred_var_m = pred['var_m']
+    y_pred_var_m_tmp = pred['var_m_tmp']
+    y_data_var = pred['data_var']
+    y_samp = pred['samp']
+    y_q1 = pred['q1']
+    y_q3 = pred['q3']
+    y_q1m = pred['q1m']
+    y_q3m = pred['q3m']
 
     # error_ratio1 = y_pred_var.T / y_pred_prior_var
     error_ratio2 = y_pred_var_m_tmp / y_data_var
@@ -1020,6 +654,454 @@ def main(params_dir, surrogate_dir, json_dir, result_file, input_json):  # noqa:
     file_object.close()
 
 
+def _patch_gpy_stochastic():
+    # Modify GPy package to support the heteroscedastic noise of the
+    # stochastic surrogates
+    def monkeypatch_method(cls):
+        def decorator(func):
+            setattr(cls, func.__name__, func)
+            return func
+
+        return decorator
+
+    @monkeypatch_method(GPy.likelihoods.Gaussian)
+    def gaussian_variance(self, Y_metadata=None):  # noqa: N803
+        if Y_metadata is None:
+            return self.variance
+        else:  # noqa: RET505
+            return self.variance * Y_metadata['variance_structure']
+
+    @monkeypatch_method(GPy.core.GP)
+    def set_XY2(self, X=None, Y=None, Y_metadata=None):  # noqa: N802, N803
+        if Y_metadata is not None:
+            if self.Y_metadata is None:
+                self.Y_metadata = Y_metadata
+            else:
+                self.Y_metadata.update(Y_metadata)
+                # print("metadata_updated")
+
+        self.set_XY(X, Y)
+
+
+def _make_kernel(kernel, input_dim):
+    if kernel == 'Radial Basis':
+        return GPy.kern.RBF(input_dim=input_dim, ARD=True)
+    if kernel == 'Exponential':
+        return GPy.kern.Exponential(input_dim=input_dim, ARD=True)
+    if kernel == 'Matern 3/2':
+        return GPy.kern.Matern32(input_dim=input_dim, ARD=True)
+    if kernel == 'Matern 5/2':
+        return GPy.kern.Matern52(input_dim=input_dim, ARD=True)
+    return None
+
+
+class SurrogatePredictor:
+    """Trained GP surrogate that is built once and used for many predictions.
+
+    Building the GPy models from the surrogate json file (or loading them from
+    the pickle file of multi-fidelity surrogates) is much more expensive than
+    predicting a few outputs. This class keeps the models in memory, so that
+    the inputs of many samples or assets can be predicted in one call.
+
+    Parameters
+    ----------
+    sur: dict
+        Contents of the surrogate json file.
+    surrogate_dir: str, optional
+        Path to the pickle file of multi-fidelity surrogates.
+
+    """
+
+    def __init__(self, sur, surrogate_dir='dummy'):
+        self.sur = sur
+
+        self.did_stochastic = sur['doStochastic']
+        self.did_logtransform = sur['doLogtransform']
+        self.did_normalization = sur['doNormalization']
+        self.did_mf = sur['doMultiFidelity']
+        self.did_linear = sur['doLinear']
+        kernel = sur['kernName']
+
+        self.g_names = list(sur['ylabels'])
+        self.rv_names = list(sur['xlabels'])
+        ng_sur = len(self.g_names)
+        nrv_sur = len(self.rv_names)
+
+        try:
+            self.constIdx = sur['highFidelityInfo']['constIdx']
+            self.constVal = sur['highFidelityInfo']['constVal']
+        except:  # noqa: E722
+            self.constIdx = []
+            self.constVal = []
+
+        kr = _make_kernel(kernel, nrv_sur)
+
+        X, Y = self._training_data()  # noqa: N806
+
+        self.m_list = list()  # noqa: C408
+        # noise variance of the stochastic surrogates is a function of the
+        # inputs; these store the variance models and the scale factors
+        self.var_models = [None] * ng_sur
+        self.nugget_var_list = [0] * ng_sur
+
+        if not self.did_mf:
+            if any(np.atleast_1d(self.did_stochastic)):
+                _patch_gpy_stochastic()
+
+            for ny in range(ng_sur):
+                self._build_model(X, Y, ny, kr)
+
+        else:
+            with open(surrogate_dir, 'rb') as file:  # noqa: PTH123
+                self.m_list = pickle.load(file)  # noqa: S301
+
+            for ny in range(ng_sur):
+                Y_normFact = np.var(Y[:, ny])  # noqa: N806
+                self.nugget_var_list[ny] = (
+                    self.m_list[ny].gpy_model['mixed_noise.Gaussian_noise.variance']
+                    * Y_normFact
+                )
+
+    def _training_data(self):
+        # training samples with the log transform and linear trend removed
+        sur = self.sur
+        ng_sur = len(self.g_names)
+        nrv_sur = len(self.rv_names)
+
+        Y = np.zeros((sur['highFidelityInfo']['valSamp'], sur['ydim']))  # noqa: N806
+        for ng, g in enumerate(self.g_names):
+            Y[:, ng] = np.array(sur['yExact'][g])
+
+        X = np.zeros((sur['highFidelityInfo']['valSamp'], sur['xdim']))  # noqa: N806
+        for nrv, rv in enumerate(self.rv_names):
+            X[:, nrv] = np.array(sur['xExact'][rv])
+
+        self.lin_index = [True] * nrv_sur
+        self.lin_list = []
+        if self.did_linear:
+            # kr = kr + GPy.kern.Linear(input_dim=nrv_sur, ARD=True)
+            for ny in range(ng_sur):
+                tmp_lin = LinearRegression()
+                tmp_lin.coef_ = np.array(
+                    sur['modelInfo'][self.g_names[ny] + '_Lin']['coef']
+                )
+                tmp_lin.intercept_ = np.array(
+                    sur['modelInfo'][self.g_names[ny] + '_Lin']['intercept']
+                )
+                self.lin_list += [tmp_lin]
+
+        # preprocessing..
+
+        if self.did_logtransform:
+            Y = np.log(Y)  # noqa: N806
+
+        if self.did_linear:
+            for ny in range(ng_sur):
+                y_lin_pred = self.lin_list[ny].predict(X[:, self.lin_index])
+                Y[:, ny] = Y[:, ny] - y_lin_pred
+
+        return X, Y
+
+    def _build_model(self, X, Y, ny, kg):  # noqa: N803
+        sur = self.sur
+        if self.did_stochastic[ny]:
+            self.m_list = self.m_list + [  # noqa: RUF005
+                GPy.models.GPRegression(
+                    X,
+                    Y[:, ny][np.newaxis].transpose(),
+                    kernel=kg.copy(),
+                    normalizer=self.did_normalization,
+                )
+            ]
+            (
+                X_unique,  # noqa: N806
+                Y_mean,  # noqa: N806
+                norm_var_str,
+                counts,
+                m_var,
+                var_normFact,  # noqa: N806
+                Y_normFact,  # noqa: N806
+            ) = self._stochastic_variance(X, Y[:, ny][np.newaxis].T, ny)
+            Y_metadata = {'variance_structure': norm_var_str / counts}  # noqa: N806
+            self.m_list[ny].set_XY2(X_unique, Y_mean, Y_metadata=Y_metadata)
+            for key, val in sur['modelInfo'][self.g_names[ny]].items():  # noqa: B007, PERF102
+                exec('self.m_list[ny].' + key + '= np.array(val)')  # noqa: S102
+
+            self.var_models[ny] = (m_var, var_normFact, Y_normFact)
+
+        else:
+            self.m_list = self.m_list + [  # noqa: RUF005
+                GPy.models.GPRegression(
+                    X,
+                    Y[:, ny][np.newaxis].transpose(),
+                    kernel=kg.copy(),
+                    normalizer=True,
+                )
+            ]
+            for key, val in sur['modelInfo'][self.g_names[ny]].items():  # noqa: B007, PERF102
+                exec('self.m_list[ny].' + key + '= np.array(val)')  # noqa: S102
+
+            Y_normFact = np.var(Y[:, ny])  # noqa: N806
+            self.nugget_var_list[ny] = np.squeeze(
+                np.array(self.m_list[ny].Gaussian_noise.parameters)
+                * np.array(Y_normFact)
+            )
+
+    def _stochastic_variance(self, X, Y, ny):  # noqa: N803
+        sur = self.sur
+        g_name_sur = self.g_names
+        nrv_sur = len(self.rv_names)
+
+        # X_unique, X_idx, indices, counts = np.unique(X, axis=0, return_index=True, return_counts=True, return_inverse=True)
+        X_unique, _, indices, counts = np.unique(  # noqa: N806
+            X, axis=0, return_index=True, return_counts=True, return_inverse=True
+        )
+
+        idx_repl = [i for i in np.where(counts > 1)[0]]  # noqa: C416
+
+        if len(idx_repl) > 0:
+            n_unique = X_unique.shape[0]
+            Y_mean, Y_var = np.zeros((n_unique, 1)), np.zeros((n_unique, 1))  # noqa: N806
+
+            for idx in range(n_unique):
+                Y_subset = Y[[i for i in np.where(indices == idx)[0]], :]  # noqa: C416, N806
+                Y_mean[idx, :] = np.mean(Y_subset, axis=0)
+                Y_var[idx, :] = np.var(Y_subset, axis=0)
+
+            if (np.max(Y_var) / np.var(Y_mean) < 1.0e-10) and len(idx_repl) > 0:  # noqa: PLR2004
+                return np.ones((X.shape[0], 1))
+
+            # kernel_var = GPy.kern.Matern52(
+            #    input_dim=nrv_sur, ARD=True
+            # ) + GPy.kern.Linear(input_dim=nrv_sur, ARD=True)
+            kernel_var = GPy.kern.Matern52(input_dim=nrv_sur, ARD=True)
+            log_vars = np.log(Y_var[idx_repl])
+            m_var = GPy.models.GPRegression(
+                X_unique[idx_repl, :],
+                log_vars,
+                kernel_var,
+                normalizer=True,
+                Y_metadata=None,
+            )
+            # print("Collecting variance field of ny={}".format(ny))
+            for key, val in sur['modelInfo'][g_name_sur[ny] + '_Var'].items():  # noqa: B007, PERF102
+                exec('m_var.' + key + '= np.array(val)')  # noqa: S102
+
+            norm_var_str, Y_normFact = self._variance_structure(m_var, X_unique)  # noqa: N806
+
+        else:
+            X_unique = X  # noqa: N806
+            Y_mean = Y  # noqa: N806
+            indices = range(Y.shape[0])
+
+            #
+            # check if we have an old example file - to be deleted in the future
+            #
+            if any(
+                'sum' in key for key in sur['modelInfo'][g_name_sur[ny] + '_Var']
+            ):
+                print(  # noqa: T201
+                    'The surrogate model was trained using an older version of the tool. Please retrain the model using this version or use older version.',
+                    file=sys.stderr,
+                )
+                exit(-1)  # noqa: PLR1722
+
+            log_vars = np.atleast_2d(
+                sur['modelInfo'][g_name_sur[ny] + '_Var']['TrainingSamplesY']
+            ).T
+
+            kernel_var = GPy.kern.Matern52(input_dim=nrv_sur, ARD=True)
+
+            m_var = GPy.models.GPRegression(
+                X, log_vars, kernel_var, normalizer=True, Y_metadata=None
+            )
+
+            # print("Variance field obtained for ny={}".format(ny))
+            for key, val in sur['modelInfo'][g_name_sur[ny] + '_Var'].items():  # noqa: B007, PERF102
+                exec('m_var.' + key + '= np.array(val)')  # noqa: S102
+
+            norm_var_str, Y_normFact = self._variance_structure(m_var, X)  # noqa: N806
+
+        return (
+            X_unique,
+            Y_mean,
+            norm_var_str,
+            counts,
+            m_var,
+            Y_normFact,
+            np.var(Y_mean),
+        )
+
+    def _variance_structure(self, m_var, X):  # noqa: N803
+        log_var_pred, _ = m_var.predict(X)
+        var_pred = np.exp(log_var_pred)
+
+        if self.did_normalization:
+            Y_normFact = np.mean(var_pred.T[0])  # noqa: N806
+        else:
+            Y_normFact = 1  # noqa: N806
+
+        # if normalization was used..
+        return (var_pred.T[0]) / Y_normFact, Y_normFact
+
+    def predict(self, rv_val):
+        """Predict the outputs of the surrogate for each row of rv_val.
+
+        Random samples of the outputs are drawn from the global numpy random
+        state, one output at a time.
+
+        Parameters
+        ----------
+        rv_val: array
+            Input values with one sample per row and the columns ordered as
+            the xlabels of the surrogate.
+
+        Returns
+        -------
+        dict
+            Arrays of shape (nsamp, ydim) with the median, variance,
+            variance with measurement noise, random sample and the 5% and 95%
+            quantiles (with and without measurement noise) of each output,
+            the variance of the training data and the variance of the
+            predictions in the (possibly log-transformed) GP space.
+
+        """
+        rv_val = np.atleast_2d(rv_val)
+        nsamp = rv_val.shape[0]
+        m_list = self.m_list
+        did_logtransform = self.did_logtransform
+
+        # read param in file and sort input
+        y_dim = len(m_list)
+
+        y_pred_median = np.zeros([nsamp, y_dim])
+        y_pred_var_tmp = np.zeros([nsamp, y_dim])  # might be log space
+        y_pred_var_m_tmp = np.zeros([nsamp, y_dim])  # might be log space
+
+        y_pred_var = np.zeros([nsamp, y_dim])
+        y_pred_var_m = np.zeros([nsamp, y_dim])
+
+        y_data_var = np.zeros([nsamp, y_dim])
+        y_samp = np.zeros([nsamp, y_dim])
+        y_q1 = np.zeros([nsamp, y_dim])
+        y_q3 = np.zeros([nsamp, y_dim])
+        y_q1m = np.zeros([nsamp, y_dim])
+        y_q3m = np.zeros([nsamp, y_dim])
+
+        for ny in range(y_dim):
+            y_data_var[:, ny] = np.var(m_list[ny].Y)
+
+            if self.var_models[ny] is not None:
+                # the noise variance of stochastic surrogates depends on x
+                m_var, var_normFact, Y_normFact = self.var_models[ny]  # noqa: N806
+                log_var_pred_x, _ = m_var.predict(rv_val)
+                nugget_var_pred = np.exp(log_var_pred_x.T[0]) / var_normFact
+                nugget_var = (
+                    m_list[ny].Gaussian_noise.parameters
+                    * nugget_var_pred
+                    * Y_normFact
+                )
+            else:
+                nugget_var = self.nugget_var_list[ny]
+
+            if ny in self.constIdx:
+                y_pred_median_tmp, y_pred_var_tmp_tmp = (
+                    np.ones([nsamp]) * self.constVal[self.constIdx.index(ny)],
+                    np.zeros([nsamp]),
+                )
+            else:
+                y_pred_median_tmp, y_pred_var_tmp_tmp = predict(
+                    m_list[ny], rv_val, self.did_mf
+                )  # noiseless
+                y_pred_median_tmp = np.squeeze(y_pred_median_tmp)
+                y_pred_var_tmp_tmp = np.squeeze(y_pred_var_tmp_tmp)
+
+                if self.did_linear:
+                    y_lin_pred = self.lin_list[ny].predict(rv_val[:, self.lin_index])
+                    y_pred_median_tmp = y_pred_median_tmp + y_lin_pred
+
+            y_pred_var_tmp[:, ny] = y_pred_var_tmp_tmp
+            y_pred_var_m_tmp[:, ny] = y_pred_var_tmp_tmp + np.squeeze(nugget_var)
+            y_samp_tmp = np.random.normal(
+                y_pred_median_tmp, np.sqrt(y_pred_var_m_tmp[:, ny])
+            )
+
+            if did_logtransform:
+                y_pred_median[:, ny] = np.exp(y_pred_median_tmp)
+                y_pred_var[:, ny] = np.exp(
+                    2 * y_pred_median_tmp + y_pred_var_tmp[:, ny]
+                ) * (np.exp(y_pred_var_tmp[:, ny]) - 1)
+                y_pred_var_m[:, ny] = np.exp(
+                    2 * y_pred_median_tmp + y_pred_var_m_tmp[:, ny]
+                ) * (np.exp(y_pred_var_m_tmp[:, ny]) - 1)
+
+                y_samp[:, ny] = np.exp(y_samp_tmp)
+
+                y_q1[:, ny] = lognorm.ppf(
+                    0.05,
+                    s=np.sqrt(y_pred_var_tmp[:, ny]),
+                    scale=np.exp(y_pred_median_tmp),
+                )
+                y_q3[:, ny] = lognorm.ppf(
+                    0.95,
+                    s=np.sqrt(y_pred_var_tmp[:, ny]),
+                    scale=np.exp(y_pred_median_tmp),
+                )
+                y_q1m[:, ny] = lognorm.ppf(
+                    0.05,
+                    s=np.sqrt(y_pred_var_m_tmp[:, ny]),
+                    scale=np.exp(y_pred_median_tmp),
+                )
+                y_q3m[:, ny] = lognorm.ppf(
+                    0.95,
+                    s=np.sqrt(y_pred_var_m_tmp[:, ny]),
+                    scale=np.exp(y_pred_median_tmp),
+                )
+
+            else:
+                y_pred_median[:, ny] = y_pred_median_tmp
+                y_pred_var[:, ny] = y_pred_var_tmp[:, ny]
+                y_pred_var_m[:, ny] = y_pred_var_m_tmp[:, ny]
+                y_samp[:, ny] = y_samp_tmp
+                y_q1[:, ny] = norm.ppf(
+                    0.05, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_tmp[:, ny])
+                )
+                y_q3[:, ny] = norm.ppf(
+                    0.95, loc=y_pred_median_tmp, scale=np.sqrt(y_pred_var_tmp[:, ny])
+                )
+                y_q1m[:, ny] = norm.ppf(
+                    0.05,
+                    loc=y_pred_median_tmp,
+                    scale=np.sqrt(y_pred_var_m_tmp[:, ny]),
+                )
+                y_q3m[:, ny] = norm.ppf(
+                    0.95,
+                    loc=y_pred_median_tmp,
+                    scale=np.sqrt(y_pred_var_m_tmp[:, ny]),
+                )
+
+            if np.isnan(y_samp[:, ny]).any():
+                y_samp[:, ny] = np.nan_to_num(y_samp[:, ny])
+            if np.isnan(y_pred_var[:, ny]).any():
+                y_pred_var[:, ny] = np.nan_to_num(y_pred_var[:, ny])
+            if np.isnan(y_pred_var_m[:, ny]).any():
+                y_pred_var_m[:, ny] = np.nan_to_num(y_pred_var_m[:, ny])
+
+        return {
+            'median': y_pred_median,
+            'var': y_pred_var,
+            'var_m': y_pred_var_m,
+            'samp': y_samp,
+            'q1': y_q1,
+            'q3': y_q3,
+            'q1m': y_q1m,
+            'q3m': y_q3m,
+            'data_var': y_data_var,
+            'var_tmp': y_pred_var_tmp,
+            'var_m_tmp': y_pred_var_m_tmp,
+        }
+
+
 def predict(m, X, did_mf):  # noqa: N803, D103
     if not did_mf:
         return m.predict_noiseless(X)
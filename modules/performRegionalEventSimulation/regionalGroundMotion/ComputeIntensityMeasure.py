@@ -44,7 +44,6 @@
 
 import re
 
-import h5py
 import numpy as np
 
 LOCAL_IM_GMPE = {
@@ -94,8 +93,8 @@ OPENSHA_IM_GMPE = {
 
 IM_GMPE = {'LOCAL': LOCAL_IM_GMPE, 'OPENSHA': OPENSHA_IM_GMPE}
 
-import collections  # noqa: E402
 import json  # noqa: E402
+import multiprocessing as mp  # noqa: E402
 import os  # noqa: E402
 import socket  # noqa: E402
 import sys  # noqa: E402
@@ -104,12 +103,12 @@ from pathlib import Path  # noqa: E402
 
 import pandas as pd  # noqa: E402
 from gmpe import SignificantDurationModel, openSHAGMPE  # noqa: E402
+from IntensityMeasureStore import IMMeanStdWriter  # noqa: E402
 from tqdm import tqdm  # noqa: E402
 
 if 'stampede2' not in socket.gethostname():
     from FetchOpenQuake import get_site_rup_info_oq
     from FetchOpenSHA import *  # noqa: F403
-import threading  # noqa: E402
 
 import ujson  # noqa: E402
 
@@ -123,6 +122,8 @@ class IM_Calculator:  # noqa: D101
     BSSA = None
     # Campbell & Bozorgnia (2014)
     CB = None
+    # evaluate the NGA-West2 GMPEs for all sites at once (get_IM_array)
+    vectorized = False
 
     # profile
     timeGetRuptureInfo = 0  # noqa: N815
@@ -414,77 +415,98 @@ class IM_Calculator:  # noqa: D101
                     f'ComputeIntensityMeasure.get_im_from_local: warning - {cur_gmpe} is not available.'
                 )
                 continue
-            for cur_site in self.site_info:
-                # current site-rupture distance
-                cur_dist = cur_site['rRup']
-                cur_vs30 = cur_site['vs30']
-                tmpResult = {  # noqa: N806
-                    'Mean': [],
-                    'TotalStdDev': [],
-                    'InterEvStdDev': [],
-                    'IntraEvStdDev': [],
-                }
-                if cur_gmpe == 'Bommer, Stafford & Alarcon (2009)':
-                    mean, stdDev, interEvStdDev, intraEvStdDev = (  # noqa: N806
-                        SignificantDurationModel.bommer_stafford_alarcon_ds_2009(
-                            magnitude=eq_magnitude,
-                            distance=cur_dist,
-                            vs30=cur_vs30,
-                            duration_type=im_type,
+            cur_gmpe_obj = {
+                'Chiou & Youngs (2014)': self.CY,
+                'Abrahamson, Silva & Kamai (2014)': self.ASK,
+                'Boore, Stewart, Seyhan & Atkinson (2014)': self.BSSA,
+                'Campbell & Bozorgnia (2014)': self.CB,
+            }.get(cur_gmpe, None)
+            if self.vectorized and cur_gmpe_obj is not None:
+                # all sites and periods in one call
+                tmpResult = cur_gmpe_obj.get_IM_array(  # noqa: N806
+                    eq_magnitude, self.site_rup_dict, self.site_info, im_info
+                )
+                tmpResult = {key: value.tolist() for key, value in tmpResult.items()}  # noqa: N806
+                gm_collector = [
+                    {
+                        'ln' + im_type: {
+                            key: value[j] for key, value in tmpResult.items()
+                        }
+                    }
+                    for j in range(len(self.site_info))
+                ]
+            else:
+                for cur_site in self.site_info:
+                    # current site-rupture distance
+                    cur_dist = cur_site['rRup']
+                    cur_vs30 = cur_site['vs30']
+                    tmpResult = {  # noqa: N806
+                        'Mean': [],
+                        'TotalStdDev': [],
+                        'InterEvStdDev': [],
+                        'IntraEvStdDev': [],
+                    }
+                    if cur_gmpe == 'Bommer, Stafford & Alarcon (2009)':
+                        mean, stdDev, interEvStdDev, intraEvStdDev = (  # noqa: N806
+                            SignificantDurationModel.bommer_stafford_alarcon_ds_2009(
+                                magnitude=eq_magnitude,
+                                distance=cur_dist,
+                                vs30=cur_vs30,
+                                duration_type=im_type,
+                            )
                         )
-                    )
-                    tmpResult['Mean'].append(float(mean))
-                    tmpResult['TotalStdDev'].append(float(stdDev))
-                    tmpResult['InterEvStdDev'].append(float(interEvStdDev))
-                    tmpResult['IntraEvStdDev'].append(float(intraEvStdDev))
-                elif cur_gmpe == 'Afshari & Stewart (2016)':
-                    mean, stdDev, interEvStdDev, intraEvStdDev = (  # noqa: N806
-                        SignificantDurationModel.afshari_stewart_ds_2016(
-                            magnitude=eq_magnitude,
-                            distance=cur_dist,
-                            vs30=cur_vs30,
-                            duration_type=im_type,
+                        tmpResult['Mean'].append(float(mean))
+                        tmpResult['TotalStdDev'].append(float(stdDev))
+                        tmpResult['InterEvStdDev'].append(float(interEvStdDev))
+                        tmpResult['IntraEvStdDev'].append(float(intraEvStdDev))
+                    elif cur_gmpe == 'Afshari & Stewart (2016)':
+                        mean, stdDev, interEvStdDev, intraEvStdDev = (  # noqa: N806
+                            SignificantDurationModel.afshari_stewart_ds_2016(
+                                magnitude=eq_magnitude,
+                                distance=cur_dist,
+                                vs30=cur_vs30,
+                                duration_type=im_type,
+                            )
                         )
-                    )
-                    tmpResult['Mean'].append(float(mean))
-                    tmpResult['TotalStdDev'].append(float(stdDev))
-                    tmpResult['InterEvStdDev'].append(float(interEvStdDev))
-                    tmpResult['IntraEvStdDev'].append(float(intraEvStdDev))
-                elif cur_gmpe == 'Chiou & Youngs (2014)':
-                    # start = time.process_time_ns()
-                    tmpResult = self.CY.get_IM(  # noqa: N806
-                        eq_magnitude, self.site_rup_dict, cur_site, im_info
-                    )
-                    # self.timeGetIM += time.process_time_ns() - start
-                elif cur_gmpe == 'Abrahamson, Silva & Kamai (2014)':
-                    # start = time.process_time_ns()
-                    tmpResult = self.ASK.get_IM(  # noqa: N806
-                        eq_magnitude, self.site_rup_dict, cur_site, im_info
-                    )
-                    # self.timeGetIM += time.process_time_ns() - start
-                elif cur_gmpe == 'Boore, Stewart, Seyhan & Atkinson (2014)':
-                    # start = time.process_time_ns()
-                    tmpResult = self.BSSA.get_IM(  # noqa: N806
-                        eq_magnitude, self.site_rup_dict, cur_site, im_info
-                    )
-                    # self.timeGetIM += time.process_time_ns() - start
-                elif cur_gmpe == 'Campbell & Bozorgnia (2014)':
-                    # start = time.process_time_ns()
-                    tmpResult = self.CB.get_IM(  # noqa: N806
-                        eq_magnitude, self.site_rup_dict, cur_site, im_info
-                    )
-                    # self.timeGetIM += time.process_time_ns() - start
-                else:
-                    print(  # noqa: T201
-                        f'ComputeIntensityMeasure.get_im_from_local: gmpe_name {cur_gmpe} is not supported.'
-                    )
-                # collect sites
-                # gm_collector.append({
-                # 	"Location": {'Latitude':cur_site['lat'], 'Longitude':cur_site['lon']},
-                #              "SiteData": {key: cur_site[key] for key in cur_site if key not in ['lat','lon']},
-                # 			 'ln'+im_type: tmpResult
-                # 			 })
-                gm_collector.append({'ln' + im_type: tmpResult})
+                        tmpResult['Mean'].append(float(mean))
+                        tmpResult['TotalStdDev'].append(float(stdDev))
+                        tmpResult['InterEvStdDev'].append(float(interEvStdDev))
+                        tmpResult['IntraEvStdDev'].append(float(intraEvStdDev))
+                    elif cur_gmpe == 'Chiou & Youngs (2014)':
+                        # start = time.process_time_ns()
+                        tmpResult = self.CY.get_IM(  # noqa: N806
+                            eq_magnitude, self.site_rup_dict, cur_site, im_info
+                        )
+                        # self.timeGetIM += time.process_time_ns() - start
+                    elif cur_gmpe == 'Abrahamson, Silva & Kamai (2014)':
+                        # start = time.process_time_ns()
+                        tmpResult = self.ASK.get_IM(  # noqa: N806
+                            eq_magnitude, self.site_rup_dict, cur_site, im_info
+                        )
+                        # self.timeGetIM += time.process_time_ns() - start
+                    elif cur_gmpe == 'Boore, Stewart, Seyhan & Atkinson (2014)':
+                        # start = time.process_time_ns()
+                        tmpResult = self.BSSA.get_IM(  # noqa: N806
+                            eq_magnitude, self.site_rup_dict, cur_site, im_info
+                        )
+                        # self.timeGetIM += time.process_time_ns() - start
+                    elif cur_gmpe == 'Campbell & Bozorgnia (2014)':
+                        # start = time.process_time_ns()
+                        tmpResult = self.CB.get_IM(  # noqa: N806
+                            eq_magnitude, self.site_rup_dict, cur_site, im_info
+                        )
+                        # self.timeGetIM += time.process_time_ns() - start
+                    else:
+                        print(  # noqa: T201
+                            f'ComputeIntensityMeasure.get_im_from_local: gmpe_name {cur_gmpe} is not supported.'
+                        )
+                    # collect sites
+                    # gm_collector.append({
+                    # 	"Location": {'Latitude':cur_site['lat'], 'Longitude':cur_site['lon']},
+                    #              "SiteData": {key: cur_site[key] for key in cur_site if key not in ['lat','lon']},
+                    # 			 'ln'+im_type: tmpResult
+                    # 			 })
+                    gm_collector.append({'ln' + im_type: tmpResult})
 
             # Final results
             cur_res = {
@@ -744,6 +766,8 @@ def compute_im(  # noqa: C901, D103
     output_dir,
     filename='IntensityMeasureMeanStd.hdf5',
     mth_flag=True,  # noqa: FBT002
+    vectorized_flag=False,  # noqa: FBT002
+    num_processors=None,
 ):
     # Calling OpenSHA to compute median PSA
     if len(scenarios) < 10:  # noqa: PLR2004
@@ -769,20 +793,6 @@ def compute_im(  # noqa: C901, D103
     if 'DS595H' in im_info.keys() or im_info.get('Type', None) == 'DS595H':  # noqa: SIM118
         im_list.append('DS595H')
 
-    # Stations
-    station_list = [
-        {
-            'Location': {
-                'Latitude': stations[j]['lat'],
-                'Longitude': stations[j]['lon'],
-            }
-        }
-        for j in range(len(stations))
-    ]
-    for j in range(len(stations)):
-        if stations[j].get('vs30'):
-            station_list[j].update({'Vs30': int(stations[j]['vs30'])})
-    station_info = {'Type': 'SiteList', 'SiteList': station_list}
     # hazard occurrent model
     if generator_info['method'] == 'Subsampling':
         # check if the period in the hazard curve is in the period list in the intensity measure
@@ -814,112 +824,88 @@ def compute_im(  # noqa: C901, D103
     im_dict = get_im_dict(im_info)
 
     t_start = time.time()
+    scenario_keys = [int(x) for x in scenarios.keys()]  # noqa: SIM118
+    # Initialize an hdf5 file for IMmeanStd
+    if os.path.exists(filename):  # noqa: PTH110
+        os.remove(filename)  # noqa: PTH107
+    if not saveInJson:
+        # one open handle streaming into (scenario, site, im) datasets
+        im_writer = IMMeanStdWriter(
+            filename, scenario_keys, len(stations), im_list
+        )
     # Loop over scenarios
     if mth_flag is False:
         # create a IM calculator
-        im_calculator = IM_Calculator(
-            im_dict=im_dict,
-            gmpe_dict=gmpe_dict,
-            gmpe_weights_dict=gmpe_weights_dict,
-            site_info=stations,
+        im_calculator = create_im_calculator(
+            im_dict,
+            gmpe_dict,
+            gmpe_weights_dict,
+            stations,
+            EqRupture_info,
+            vectorized_flag,
         )
-        if EqRupture_info['EqRupture']['Type'] == 'ERF':
-            im_calculator.erf = getERF(EqRupture_info)  # noqa: F405
-        else:
-            im_calculator.erf = None
-        gmpe_set = set()
-        for _, item in gmpe_dict.items():  # noqa: PERF102
-            gmpe_set = gmpe_set.union(set(item))
-        for gmpe in gmpe_set:
-            if gmpe == 'Chiou & Youngs (2014)':
-                im_calculator.CY = openSHAGMPE.chiou_youngs_2013()
-            if gmpe == 'Abrahamson, Silva & Kamai (2014)':
-                im_calculator.ASK = openSHAGMPE.abrahamson_silva_kamai_2014()
-            if gmpe == 'Boore, Stewart, Seyhan & Atkinson (2014)':
-                im_calculator.BSSA = openSHAGMPE.boore_etal_2014()
-            if gmpe == 'Campbell & Bozorgnia (2014)':
-                im_calculator.CB = openSHAGMPE.campbell_bozorgnia_2014()
-            # if gmpe == 'Afshari & Stewart (2016)':
-            #     im_calculator.AS2016 = SignificantDurationModel.afshari_stewart_ds_2016()
-        # for i in tqdm(range(len(scenarios.keys())), desc=f"Evaluate GMPEs for {len(scenarios.keys())} scenarios"):
-        # Initialize an hdf5 file for IMmeanStd
-        if os.path.exists(filename):  # noqa: PTH110
-            os.remove(filename)  # noqa: PTH107
-        for i in tqdm(
-            range(len(scenarios.keys())),
-            desc=f'Evaluate GMPEs for {len(scenarios.keys())} scenarios',
+        for key in tqdm(
+            scenario_keys,
+            desc=f'Evaluate GMPEs for {len(scenario_keys)} scenarios',
         ):
-            # for i, key in enumerate(scenarios.keys()):
-            # print('ComputeIntensityMeasure: Scenario #{}/{}'.format(i+1,len(scenarios)))
             # Rupture
-            key = int(list(scenarios.keys())[i])
-            source_info = scenarios[key]
-            im_calculator.set_source(source_info)
-            # Computing IM
-            res_list = dict()  # noqa: C408
-            for cur_im_type in list(im_dict.keys()):
-                im_calculator.set_im_type(cur_im_type)
-                res_list.update({cur_im_type: im_calculator.calculate_im()})
-            # Collecting outputs
-            # collectedResult.update({'SourceIndex':source_info['SourceIndex'], 'RuptureIndex':source_info['RuptureIndex']})
+            collectedResult = compute_scenario_im(  # noqa: N806
+                im_calculator, scenarios[key], im_dict, im_list, saveInJson
+            )
             if saveInJson:
-                collectedResult = collect_multi_im_res(res_list)  # noqa: N806
                 im_raw.update({key: collectedResult})
             else:
-                collectedResult = collect_multi_im_res_hdf5(res_list, im_list)  # noqa: N806
-                with h5py.File(filename, 'a') as f:
-                    # Add a group named by the scenario index and has four dataset
-                    # mean, totalSTd, interStd,itrastd
-                    grp = f.create_group(str(i))
-                    grp.create_dataset('Mean', data=collectedResult['Mean'])
-                    grp.create_dataset(
-                        'InterEvStdDev', data=collectedResult['InterEvStdDev']
-                    )
-                    grp.create_dataset(
-                        'IntraEvStdDev', data=collectedResult['IntraEvStdDev']
-                    )
-            # if (i % 250 == 0):
-            # 	if saveInJson:
-            # 		print(f"Size of im_raw for {i} scenario is {sys.getsizeof(im_raw)}")
-            # 	else:
-            # 		print(f"Another 250 scenarios computed")
-
-    if mth_flag:
-        res_dict = {}
-        sub_ths = []
-        num_bins = 200
-        bin_size = int(np.ceil(len(scenarios) / num_bins))
-        ids_list = []
-        scen_list = []
-        for k in range(0, len(scenarios), bin_size):
-            ids_list.append(list(scenarios.keys())[k : k + bin_size])
-            scen_list.append(
-                [scenarios[x] for x in list(scenarios.keys())[k : k + bin_size]]
-            )
-        # print(ids_list)
-        for i in range(len(ids_list)):
-            th = threading.Thread(
-                target=compute_im_para,
-                args=(
-                    ids_list[i],
-                    scen_list[i],
-                    im_dict,
-                    gmpe_dict,
-                    gmpe_weights_dict,
-                    station_info,
-                    res_dict,
-                ),
+                im_writer.append(collectedResult)
+    else:
+        # shard the scenarios over a process pool, each worker holds one IM
+        # calculator and the results are collected in the scenario order
+        if num_processors is None:
+            num_processors = os.cpu_count()
+        num_processors = max(1, min(num_processors, len(scenarios)))
+        chunk_size = max(
+            1, min(50, int(np.ceil(len(scenario_keys) / (4 * num_processors))))
+        )
+        chunks = [
+            [(x, scenarios[x]) for x in scenario_keys[k : k + chunk_size]]
+            for k in range(0, len(scenario_keys), chunk_size)
+        ]
+        worker_stats = dict()  # noqa: C408
+        # spawn: each worker starts its own JVM when importing FetchOpenSHA
+        with mp.get_context('spawn').Pool(
+            num_processors,
+            initializer=init_im_worker,
+            initargs=(
+                im_dict,
+                gmpe_dict,
+                gmpe_weights_dict,
+                stations,
+                EqRupture_info,
+                vectorized_flag,
+                im_list,
+                saveInJson,
+            ),
+        ) as pool:
+            for worker_id, elapsed, chunk_res in tqdm(
+                pool.imap(compute_im_para, chunks),
+                total=len(chunks),
+                desc=f'Evaluate GMPEs for {len(scenario_keys)} scenarios on {num_processors} processes',
+            ):
+                num_done, time_used = worker_stats.get(worker_id, (0, 0.0))
+                worker_stats[worker_id] = (
+                    num_done + len(chunk_res),
+                    time_used + elapsed,
+                )
+                for key, collectedResult in chunk_res:  # noqa: N806
+                    if saveInJson:
+                        im_raw.update({key: collectedResult})
+                    else:
+                        im_writer.append(collectedResult)
+        for worker_id, (num_done, time_used) in worker_stats.items():
+            print(  # noqa: T201
+                f'ComputeIntensityMeasure: worker {worker_id} computed {num_done} scenarios in {time_used:.1f} sec ({num_done / max(time_used, 1e-6):.2f} scenarios/sec)'
             )
-            sub_ths.append(th)
-            th.start()
-
-        for th in sub_ths:
-            th.join()
-
-        # order the res_dict by id
-        res_ordered = collections.OrderedDict(sorted(res_dict.items()))
-        for i, cur_res in res_ordered.items():  # noqa: B007
-            im_raw.append(cur_res)
+    if not saveInJson:
+        im_writer.close()
 
     print(  # noqa: T201
         f'ComputeIntensityMeasure: mean and standard deviation of intensity measures {time.time() - t_start} sec'
@@ -932,39 +918,104 @@ def compute_im(  # noqa: C901, D103
     return filename, im_list
 
 
-def compute_im_para(  # noqa: D103
-    ids,
-    scenario_infos,
+def create_im_calculator(  # noqa: D103
     im_dict,
     gmpe_dict,
     gmpe_weights_dict,
-    station_info,
-    res_dict,
+    stations,
+    EqRupture_info,  # noqa: N803
+    vectorized_flag=False,  # noqa: FBT002
 ):
-    for i, id in enumerate(ids):  # noqa: A001
-        print(f'ComputeIntensityMeasure: Scenario #{id + 1}.')  # noqa: T201
-        scenario_info = scenario_infos[i]
-        # create a IM calculator
-        im_calculator = IM_Calculator(
-            im_dict=im_dict,
-            gmpe_dict=gmpe_dict,
-            gmpe_weights_dict=gmpe_weights_dict,
-            site_info=station_info,
+    im_calculator = IM_Calculator(
+        im_dict=im_dict,
+        gmpe_dict=gmpe_dict,
+        gmpe_weights_dict=gmpe_weights_dict,
+        site_info=stations,
+    )
+    im_calculator.vectorized = vectorized_flag
+    if EqRupture_info['EqRupture']['Type'] == 'ERF':
+        im_calculator.erf = getERF(EqRupture_info)  # noqa: F405
+    else:
+        im_calculator.erf = None
+    gmpe_set = set()
+    for _, item in gmpe_dict.items():  # noqa: PERF102
+        gmpe_set = gmpe_set.union(set(item))
+    for gmpe in gmpe_set:
+        if gmpe == 'Chiou & Youngs (2014)':
+            im_calculator.CY = openSHAGMPE.chiou_youngs_2013()
+        if gmpe == 'Abrahamson, Silva & Kamai (2014)':
+            im_calculator.ASK = openSHAGMPE.abrahamson_silva_kamai_2014()
+        if gmpe == 'Boore, Stewart, Seyhan & Atkinson (2014)':
+            im_calculator.BSSA = openSHAGMPE.boore_etal_2014()
+        if gmpe == 'Campbell & Bozorgnia (2014)':
+            im_calculator.CB = openSHAGMPE.campbell_bozorgnia_2014()
+        # if gmpe == 'Afshari & Stewart (2016)':
+        #     im_calculator.AS2016 = SignificantDurationModel.afshari_stewart_ds_2016()
+    return im_calculator
+
+
+def compute_scenario_im(im_calculator, source_info, im_dict, im_list, json_flag):  # noqa: D103
+    im_calculator.set_source(source_info)
+    # Computing IM
+    res_list = dict()  # noqa: C408
+    for cur_im_type in list(im_dict.keys()):
+        im_calculator.set_im_type(cur_im_type)
+        res_list.update({cur_im_type: im_calculator.calculate_im()})
+    # Collecting outputs
+    if json_flag:
+        return collect_multi_im_res(res_list)
+    return collect_multi_im_res_hdf5(res_list, im_list)
+
+
+# IM calculator and settings of a compute_im worker process
+_im_worker = dict()  # noqa: C408
+
+
+def init_im_worker(  # noqa: D103
+    im_dict,
+    gmpe_dict,
+    gmpe_weights_dict,
+    stations,
+    EqRupture_info,  # noqa: N803
+    vectorized_flag,
+    im_list,
+    json_flag,
+):
+    _im_worker.update(
+        {
+            'calculator': create_im_calculator(
+                im_dict,
+                gmpe_dict,
+                gmpe_weights_dict,
+                stations,
+                EqRupture_info,
+                vectorized_flag,
+            ),
+            'im_dict': im_dict,
+            'im_list': im_list,
+            'json_flag': json_flag,
+        }
+    )
+
+
+def compute_im_para(scenario_chunk):  # noqa: D103
+    t_start = time.time()
+    res = []
+    for key, source_info in scenario_chunk:
+        res.append(  # noqa: PERF401
+            (
+                key,
+                compute_scenario_im(
+                    _im_worker['calculator'],
+                    source_info,
+                    _im_worker['im_dict'],
+                    _im_worker['im_list'],
+                    _im_worker['json_flag'],
+                ),
+            )
         )
-        # set scenario information
-        im_calculator.set_source(scenario_info)
-        # computing IM
-        res_list = []
-        for cur_im_type in list(im_dict.keys()):
-            im_calculator.set_im_type(cur_im_type)
-            res_list.append(im_calculator.calculate_im())
-        # clean
-        del im_calculator
-        # collect multiple ims
-        res = collect_multi_im_res(res_list)
-        # append res to res_dcit
-        res_dict[id] = res
     # return
+    return os.getpid(), time.time() - t_start, res
 
 
 def export_im(  # noqa: C901, D103, PLR0912
@@ -45,12 +45,12 @@ import sys  # noqa: I001
 import time
 import warnings
 
-import h5py
 import numpy as np
 import ujson
 import geopandas as gpd
 from scipy.spatial.distance import cdist
-from gmpe import CorrelationModel
+from gmpe import CorrelationModel, VecchiaSampler
+from IntensityMeasureStore import IMMeanStdReader
 from tqdm import tqdm
 
 IM_CORR_INTER = {
@@ -96,13 +96,9 @@ def simulate_ground_motion(  # noqa: D103
             im_info=im_info,
         )
     elif im_raw_path.endswith('.hdf5'):
-        with h5py.File(im_raw_path, 'r') as f:
+        with IMMeanStdReader(im_raw_path) as f:
             for i in eq_ids:
-                sample = dict()  # noqa: C408
-                sample.update({'Mean': f[str(i)]['Mean'][()]})
-                sample.update({'InterEvStdDev': f[str(i)]['InterEvStdDev'][()]})
-                sample.update({'IntraEvStdDev': f[str(i)]['IntraEvStdDev'][()]})
-                im_sampled.update({i: sample})
+                im_sampled.update({i: f.get_scenario(i)})
         gm_simulator = GM_Simulator_hdf5(
             site_info=stations,
             im_list=im_list,
@@ -169,11 +165,28 @@ class GM_Simulator:  # noqa: D101
         correlation_info=None,
         im_info=None,
     ):
+        self.set_sampling_method(correlation_info)
         self.set_sites(site_info)
         self.set_num_simu(num_simu)
         self.parse_correlation_info(correlation_info, im_info)
         self.set_im_raw(im_raw, im_list)
 
+    def set_sampling_method(self, correlation_info):  # noqa: D102
+        # sampling method of the spatially correlated intra-event residuals
+        # 'Cholesky': exact simulation with the dense covariance matrix (default)
+        # 'Vecchia': sparse nearest-neighbor approximation conditioning each site
+        #            on 'NumNeighbors' sites (larger is more accurate but slower)
+        if correlation_info is None:
+            correlation_info = dict()  # noqa: C408
+        self.sampling_method = correlation_info.get('SamplingMethod', 'Cholesky')
+        self.num_neighbors = int(correlation_info.get('NumNeighbors', 30))
+        self.sampler = None
+        if self.sampling_method not in ['Cholesky', 'Vecchia']:
+            print(  # noqa: T201
+                f'GM_Simulator: warning - sampling method {self.sampling_method} is not supported, Cholesky is used.'
+            )
+            self.sampling_method = 'Cholesky'
+
     def set_sites(self, site_info):  # noqa: D102
         # set sites
         self.sites = site_info.copy()
@@ -184,8 +197,34 @@ class GM_Simulator:  # noqa: D101
                 'GM_Simulator: Only one site is defined, spatial correlation models ignored.'
             )
             return
+        if getattr(self, 'sampling_method', 'Cholesky') == 'Vecchia':
+            # no dense distance matrix, only the nearest neighbors are needed
+            self.stn_dist = None
+            self.sampler = VecchiaSampler.VecchiaSampler(
+                self._compute_site_coordinates(), self.num_neighbors
+            )
+            return
         self._compute_distance_matrix()
 
+    def _compute_site_coordinates(self):
+        # projected site coordinates (in km)
+        loc_i = np.array(
+            [
+                [self.sites[i]['lat'], self.sites[i]['lon']]
+                for i in range(self.num_sites)
+            ]
+        )
+        loc_i_gdf = gpd.GeoDataFrame(
+            {'geometry': gpd.points_from_xy(loc_i[:, 1], loc_i[:, 0])},
+            crs='EPSG:4326',
+        ).to_crs('EPSG:6500')
+        return (
+            np.column_stack(
+                [loc_i_gdf.geometry.x.to_numpy(), loc_i_gdf.geometry.y.to_numpy()]
+            )
+            / 1000
+        )
+
     def _compute_distance_matrix(self):
         # site number check
         if self.num_sites < 2:  # noqa: PLR2004
@@ -201,21 +240,8 @@ class GM_Simulator:  # noqa: D101
         #         # Computing station-wise distances
         #         tmp[i, j] = CorrelationModel.get_distance_from_lat_lon(loc_i, loc_j)
         # self.stn_dist = tmp
-        loc_i = np.array(
-            [
-                [self.sites[i]['lat'], self.sites[i]['lon']]
-                for i in range(self.num_sites)
-            ]
-        )
-        loc_i_gdf = gpd.GeoDataFrame(
-            {'geometry': gpd.points_from_xy(loc_i[:, 1], loc_i[:, 0])},
-            crs='EPSG:4326',
-        ).to_crs('EPSG:6500')
-        lat = loc_i_gdf.geometry.y
-        lon = loc_i_gdf.geometry.x
-        loc_i = np.array([[lon[i], lat[i]] for i in range(self.num_sites)])
-        loc_j = np.array([[lon[i], lat[i]] for i in range(self.num_sites)])
-        distances = cdist(loc_i, loc_j, 'euclidean') / 1000  # in km
+        loc_i = self._compute_site_coordinates()
+        distances = cdist(loc_i, loc_i, 'euclidean')  # in km
         self.stn_dist = distances
 
     def set_num_simu(self, num_simu):  # noqa: D102
@@ -458,7 +484,17 @@ class GM_Simulator:  # noqa: D101
         return residuals  # noqa: RET504
 
     def compute_intra_event_residual_i(self, cm, im_name_list, num_simu):  # noqa: D102
-        if cm == 'Jayaram & Baker (2009)':
+        if cm == 'Jayaram & Baker (2009)' and self.sampler is not None:
+            residuals = np.zeros((self.num_sites, len(im_name_list), num_simu))
+            for k, cur_im in enumerate(im_name_list):
+                residuals[:, k, :] = self.sampler.sample(
+                    lambda h, im=cur_im: CorrelationModel.jayaram_baker_correlation_2009(
+                        im, h, flag_clustering=False
+                    ),
+                    num_simu,
+                    cache_key=(cm, cur_im),
+                )
+        elif cm == 'Jayaram & Baker (2009)':
             rho = np.zeros((self.num_sites, self.num_sites, len(im_name_list)))
             for i in range(self.num_sites):
                 for j in range(self.num_sites):
@@ -477,21 +513,25 @@ class GM_Simulator:  # noqa: D101
                 ).T
         elif cm == 'Loth & Baker (2013)':
             residuals = CorrelationModel.loth_baker_correlation_2013(
-                self.sites, im_name_list, num_simu, self.stn_dist
+                self.sites,
+                im_name_list,
+                stn_dist=self.stn_dist,
+                num_simu=num_simu,
+                sampler=self.sampler,
             )
         elif cm == 'Markhvida et al. (2017)':
             num_pc = 19
             residuals = CorrelationModel.markhvida_ceferino_baker_correlation_2017(
-                self.sites, im_name_list, num_simu, self.stn_dist, num_pc
+                self.sites, im_name_list, num_simu, self.stn_dist, num_pc, self.sampler
             )
         elif cm == 'Du & Ning (2021)':
             num_pc = 23
             residuals = CorrelationModel.du_ning_correlation_2021(
-                self.sites, im_name_list, num_simu, self.stn_dist, num_pc
+                self.sites, im_name_list, num_simu, self.stn_dist, num_pc, self.sampler
             )
         elif cm == 'Du & Ning Simple (2021)':
             residuals = CorrelationModel.du_ning_correlation_2021_simple(
-                self.sites, im_name_list, num_simu, self.stn_dist
+                self.sites, im_name_list, num_simu, self.stn_dist, self.sampler
             )
         else:
             # TODO: extending this to more inter-event correlation models  # noqa: TD002
@@ -545,6 +585,7 @@ class GM_Simulator_hdf5(GM_Simulator):  # noqa: D101
         im_info=None,
     ):
         self.set_im_type(im_list)
+        self.set_sampling_method(correlation_info)
         self.set_sites(site_info)
         self.set_num_simu(num_simu)
         self.parse_correlation_info(correlation_info, im_info)
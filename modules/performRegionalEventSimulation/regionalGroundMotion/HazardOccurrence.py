@@ -38,20 +38,19 @@
 #
 
 import collections
-import itertools
 import json
 import os
 import sys
 import threading
 import time
 
-import h5py
 import numpy as np
 import pandas as pd
-import pulp
+from scipy import optimize, sparse
 from scipy.stats import norm
 from sklearn.linear_model import lasso_path
 from tqdm import tqdm
+from IntensityMeasureStore import IMMeanStdReader
 from USGS_API import *  # noqa: F403
 
 
@@ -331,23 +330,26 @@ def calc_hazard_curves_hdf5(IMfile, im_list, site_config, im, scenarios):  # noq
         {'siteID': 0, 'ReturnPeriod': list(exceedRate), 'IM': list(exceedRate)}
     ] * len(site_config)
     scenario_idx = list(scenarios.keys())
-    with h5py.File(IMfile, 'r') as IMdata:  # noqa: N806
-        for scenario_ind in tqdm(
-            range(len(scenario_idx)),
+    # read the im of interest in blocks of scenarios
+    block_size = 256
+    with IMMeanStdReader(IMfile) as IMdata:  # noqa: N806
+        for block_start in tqdm(
+            range(0, len(scenario_idx), block_size),
             desc='Calculate ' f'Hazard Curves from {len(scenario_idx)} scenarios',
         ):
-            scenario_im = IMdata[str(scenario_idx[scenario_ind])]
-            mar = scenarios[scenario_idx[scenario_ind]]['MeanAnnualRate']
-            lnIM_mean = scenario_im['Mean'][:, im_ind]  # noqa: N806
-            lnIM_interStd = scenario_im['InterEvStdDev'][:, im_ind]  # noqa: N806
-            lnIM_intraStd = scenario_im['IntraEvStdDev'][:, im_ind]  # noqa: N806
-            lnIM_std = np.sqrt(lnIM_intraStd**2 + lnIM_interStd**2)  # noqa: N806
-            for site_ind in range(len(site_config)):
-                p_exceed = 1 - norm.cdf(
-                    np.log(IMRange), lnIM_mean[site_ind], lnIM_std[site_ind]
+            block_idx = scenario_idx[block_start : block_start + block_size]
+            block_im = IMdata.get_scenarios(block_idx, im_index=im_ind)
+            lnIM_std = np.sqrt(  # noqa: N806
+                block_im['IntraEvStdDev'] ** 2 + block_im['InterEvStdDev'] ** 2
+            )
+            for k, scenario_id in enumerate(block_idx):
+                mar = scenarios[scenario_id]['MeanAnnualRate']
+                p_exceed = norm.sf(
+                    np.log(IMRange)[:, np.newaxis],
+                    block_im['Mean'][k][np.newaxis, :],
+                    lnIM_std[k][np.newaxis, :],
                 )
-                rate_exceed = mar * p_exceed
-                exceedRate[:, site_ind] = exceedRate[:, site_ind] + rate_exceed
+                exceedRate += mar * p_exceed  # noqa: N806
     exceedRate[exceedRate < 1e-20] = 1e-20  # noqa: PLR2004
     for site_ind, site in enumerate(site_config):
         hc_data[site_ind] = {
@@ -404,8 +406,8 @@ def get_im_exceedance_probility(  # noqa: C901, D103
             im_raw = json.load(f)
         num_sites = len(im_raw[scenario_idx[0]].get('GroundMotions'))
     elif IMfile.lower().endswith('.hdf5'):
-        with h5py.File(IMfile, 'r') as f:
-            num_sites = f[str(scenario_idx[0])]['Mean'].shape[0]
+        with IMMeanStdReader(IMfile) as f:
+            num_sites = f.num_sites
 
     im_exceedance_prob = np.zeros((num_sites, num_scen, num_rps))
 
@@ -456,17 +458,18 @@ def get_im_exceedance_probility(  # noqa: C901, D103
             )
             return im_exceedance_prob
         im_ind = im_list.index(im_name)
-        with h5py.File(IMfile, 'r') as im_raw:
+        with IMMeanStdReader(IMfile) as im_raw:
             for k in range(num_scen):
-                curIM = im_raw[str(scenario_idx[k])]  # noqa: N806
-                for i in range(num_sites):
-                    curMean = curIM['Mean'][i, im_ind]  # noqa: N806
-                    curInterStd = curIM['InterEvStdDev'][i, im_ind]  # noqa: N806
-                    curIntraStd = curIM['IntraEvStdDev'][i, im_ind]  # noqa: N806
-                    curStd = np.sqrt(curInterStd**2 + curIntraStd**2)  # noqa: N806
-                    im_exceedance_prob[i, k, :] = 1.0 - norm.cdf(
-                        np.log(im_level[i, :]), loc=curMean, scale=curStd
-                    )
+                curIM = im_raw.get_scenarios([scenario_idx[k]], im_index=im_ind)  # noqa: N806
+                curMean = curIM['Mean'][0]  # noqa: N806
+                curStd = np.sqrt(  # noqa: N806
+                    curIM['InterEvStdDev'][0] ** 2 + curIM['IntraEvStdDev'][0] ** 2
+                )
+                im_exceedance_prob[:, k, :] = 1.0 - norm.cdf(
+                    np.log(im_level),
+                    loc=curMean[:, np.newaxis],
+                    scale=curStd[:, np.newaxis],
+                )
     # return
     return im_exceedance_prob
 
@@ -528,6 +531,7 @@ def sample_earthquake_occurrence(  # noqa: D103
             num_scenarios=num_target_eqs,
             reweight_only=reweight_only,
             occurence_rate_origin=occurence_rate_origin,
+            hzo_config=hzo_config,
         )
         # solve the optimiation
         om.solve_opt()
@@ -620,12 +624,14 @@ class OccurrenceModel_ManzourDavidson2016:  # noqa: D101
         num_scenarios=-1,
         reweight_only=False,  # noqa: FBT002
         occurence_rate_origin=None,
+        hzo_config=None,
     ):
         """__init__: initialization a hazard occurrence optimizer
         :param return_periods: 1-D array of return periods, RP(r)
         :param earthquake_mafs: 1-D array of annual occurrence probability, MAF(j)
         :param im_exceedance_probs: 3-D array of exceedance probability of Sa, EP(i,j,r) for site #i, earthquake #j, return period #r
         :param num_scenarios: integer for number of target scenarios
+        :param hzo_config: dictionary of optional solver settings
         """  # noqa: D205, D400
         # read input parameters
         self.return_periods = return_periods
@@ -634,6 +640,14 @@ class OccurrenceModel_ManzourDavidson2016:  # noqa: D101
         self.num_scenarios = num_scenarios
         self.reweight_only = reweight_only
         self.occurence_rate_origin = occurence_rate_origin
+        if hzo_config is None:
+            hzo_config = {}
+        # 'MIP' solves the mixed integer program, 'LP' solves its relaxation
+        # and re-solves the rates of the scenarios with the largest weights
+        self.solver = hzo_config.get('Solver', 'MIP')
+        # exceedance probabilities below the threshold are dropped
+        self.prob_threshold = hzo_config.get('ExceedanceProbabilityThreshold', 1e-10)
+        self.timing = {}
         # check input parameters
         self.input_valid = self._input_check()
         if not self.input_valid:
@@ -693,96 +707,143 @@ class OccurrenceModel_ManzourDavidson2016:  # noqa: D101
                 return False
 
     def _opt_initialization(self):
-        """_opt_initialization: initialization of optimization problem"""  # noqa: D400
-        # the problem is mixed integer program
-        self.prob = pulp.LpProblem('MIP', pulp.LpMinimize)
-
-        # variables
-        self.e_plus = {}
-        self.e_minus = {}
-        self.e_plus_name = {}
-        self.e_minus_name = {}
-        for i in range(self.num_sites):
-            for j in range(self.num_return_periods):
-                self.e_plus_name[i, j] = f'ep-{i}-{j}'
-                self.e_minus_name[i, j] = f'en-{i}-{j}'
-                self.e_plus[i, j] = pulp.LpVariable(self.e_plus_name[i, j], 0, None)
-                self.e_minus[i, j] = pulp.LpVariable(
-                    self.e_minus_name[i, j], 0, None
-                )
-        self.P = {}
-        self.Z = {}
-        self.P_name = {}
-        self.Z_name = {}
-        for i in range(self.num_eqs):
-            self.P_name[i] = f'p-{i}'
-            self.Z_name[i] = f'z-{i}'
-            if self.reweight_only:
-                self.P[i] = pulp.LpVariable(
-                    self.P_name[i], self.occurence_rate_origin[i], 1
-                )
-            else:
-                self.P[i] = pulp.LpVariable(self.P_name[i], 0, 1)
-                self.Z[i] = pulp.LpVariable(self.Z_name[i], 0, 1, pulp.LpBinary)
+        """_opt_initialization: initialization of optimization problem
 
-        # objective function
-        comb_sites_rps = list(
-            itertools.product(range(self.num_sites), range(self.num_return_periods))
-        )
-        self.prob += pulp.lpSum(
-            self.return_periods[j] * self.e_plus[(i, j)]  # noqa: RUF031, RUF100
-            + self.return_periods[j] * self.e_minus[(i, j)]  # noqa: RUF031, RUF100
-            for (i, j) in comb_sites_rps
+        The variables are ordered as [P, Z, e+, e-], where P are the
+        occurrence rates and Z the binary selection flags of the earthquakes,
+        and e+ and e- are the errors at each site and return period. The
+        constraints are assembled as sparse matrices.
+        """  # noqa: D400
+        t_start = time.time()
+
+        num_eqs = self.num_eqs
+        num_err = self.num_sites * self.num_return_periods
+        num_z = 0 if self.reweight_only else num_eqs
+        self.num_vars = num_eqs + num_z + 2 * num_err
+
+        # objective function: sum of the errors weighted by the return period
+        return_periods = np.asarray(self.return_periods, dtype=float)
+        rp_weights = np.tile(return_periods, self.num_sites)
+        self.c = np.concatenate(
+            [np.zeros(num_eqs + num_z), rp_weights, rp_weights]
         )
 
-        # constraints
-        for i in range(self.num_sites):
-            for j in range(self.num_return_periods):
-                self.prob += (
-                    pulp.lpSum(
-                        self.P[k] * self.im_exceedance_probs[i, k, j]
-                        for k in range(self.num_eqs)
-                    )
-                    + self.e_minus[i, j]
-                    - self.e_plus[i, j]
-                    == 1.0 / self.return_periods[j]
-                )
+        # hazard constraints: sum_k P[k] EP(i,k,r) + e-(i,r) - e+(i,r) = 1/RP(r)
+        # with rows ordered by site and then by return period
+        ep = np.asarray(self.im_exceedance_probs, dtype=float)
+        ep = ep.transpose(0, 2, 1).reshape(num_err, num_eqs)
+        ep[ep < self.prob_threshold] = 0.0
+        ep = sparse.csr_matrix(ep)
+        print(  # noqa: T201
+            f'OccurrenceModel_ManzourDavidson2016._opt_initialization: {ep.nnz} of {num_err * num_eqs} exceedance probabilities kept.'
+        )
+        eye_err = sparse.identity(num_err, format='csr')
+        a_eq = sparse.hstack(
+            [ep, sparse.csr_matrix((num_err, num_z)), -eye_err, eye_err],
+            format='csr',
+        )
+        b_eq = 1.0 / rp_weights
+        self.constraints = [optimize.LinearConstraint(a_eq, b_eq, b_eq)]
 
+        # selection constraints: P[k] - Z[k] <= 0 and sum_k Z[k] <= N
         if not self.reweight_only:
-            for i in range(self.num_eqs):
-                self.prob += self.P[i] - self.Z[i] <= 0
-
-            self.prob += (
-                pulp.lpSum(self.Z[i] for i in range(self.num_eqs))
-                <= self.num_scenarios
+            eye_eqs = sparse.identity(num_eqs, format='csr')
+            a_ub = sparse.vstack(
+                [
+                    sparse.hstack(
+                        [eye_eqs, -eye_eqs, sparse.csr_matrix((num_eqs, 2 * num_err))]
+                    ),
+                    sparse.hstack(
+                        [
+                            sparse.csr_matrix((1, num_eqs)),
+                            np.ones((1, num_eqs)),
+                            sparse.csr_matrix((1, 2 * num_err)),
+                        ]
+                    ),
+                ],
+                format='csr',
             )
+            b_ub = np.append(np.zeros(num_eqs), self.num_scenarios)
+            self.constraints.append(optimize.LinearConstraint(a_ub, -np.inf, b_ub))
+
+        # bounds and integrality
+        self.lb = np.zeros(self.num_vars)
+        self.ub = np.full(self.num_vars, np.inf)
+        self.ub[: num_eqs + num_z] = 1.0
+        if self.reweight_only:
+            self.lb[:num_eqs] = self.occurence_rate_origin
+        self.integrality = np.zeros(self.num_vars)
+        self.integrality[num_eqs : num_eqs + num_z] = 1
+
+        self.timing['build'] = time.time() - t_start
 
         return True  # noqa: DOC201, RUF100
 
+    def _solve(self, integrality, lb, ub):
+        maximum_runtime = 1 * 60 * 60  # 1 hours maximum
+        res = optimize.milp(
+            self.c,
+            integrality=integrality,
+            bounds=optimize.Bounds(lb, ub),
+            constraints=self.constraints,
+            options={'time_limit': maximum_runtime, 'mip_rel_gap': 0.001},
+        )
+        print('Status:', res.message)  # noqa: T201
+        if res.x is None:
+            sys.exit(
+                'ERROR: the hazard occurrence optimization in Manzour & Davidson (2016) failed.\n'  # noqa: ISC003
+                + res.message
+            )
+        return res.x  # noqa: DOC201, RUF100
+
     def solve_opt(self):
         """target_function: compute the target function to be minimized
         :param X: 2-D array of annual occurrence probability of earthquakes and corresponding binary variables (many values are reduced to zeros)
         """  # noqa: D205, D400
-        maximum_runtime = 1 * 60 * 60  # 1 hours maximum
-        self.prob.solve(pulp.PULP_CBC_CMD(timeLimit=maximum_runtime, gapRel=0.001))
-        print('Status:', pulp.LpStatus[self.prob.status])  # noqa: T201
+        t_start = time.time()
+        if self.solver == 'LP' and not self.reweight_only:
+            # solve the LP relaxation and keep the scenarios with the largest
+            # rates, then solve for the rates of the kept scenarios
+            x = self._solve(np.zeros(self.num_vars), self.lb, self.ub)
+            rates = x[: self.num_eqs]
+            num_kept = min(self.num_scenarios, int(np.sum(rates > 0)))
+            kept = np.argsort(-rates, kind='stable')[:num_kept]
+            lb = self.lb.copy()
+            ub = self.ub.copy()
+            ub[: self.num_eqs] = 0.0
+            ub[kept] = 1.0
+            lb[self.num_eqs + kept] = 1.0
+            ub[self.num_eqs : 2 * self.num_eqs] = 0.0
+            ub[self.num_eqs + kept] = 1.0
+            self.x = self._solve(np.zeros(self.num_vars), lb, ub)
+        else:
+            self.x = self._solve(self.integrality, self.lb, self.ub)
+        self.timing['solve'] = time.time() - t_start
+        print(  # noqa: T201
+            'OccurrenceModel_ManzourDavidson2016.solve_opt: build {:.2f} s, solve {:.2f} s.'.format(
+                self.timing['build'], self.timing['solve']
+            )
+        )
 
     def get_selected_earthquake(self):  # noqa: D102
-        P_selected = [self.P[i].varValue for i in range(self.num_eqs)]  # noqa: N806
+        P_selected = self.x[: self.num_eqs].tolist()  # noqa: N806
         if self.reweight_only:
             Z_selected = [1 for i in range(self.num_eqs)]  # noqa: N806
         else:
-            Z_selected = [self.Z[i].varValue for i in range(self.num_eqs)]  # noqa: N806
+            Z_selected = np.round(  # noqa: N806
+                self.x[self.num_eqs : 2 * self.num_eqs]
+            ).tolist()
 
         return P_selected, Z_selected
 
     def get_error_vector(self):  # noqa: D102
-        e_plus_selected = np.zeros([self.num_sites, self.num_return_periods])
-        e_minus_selected = np.zeros([self.num_sites, self.num_return_periods])
-        for i in range(self.num_sites):
-            for j in range(self.num_return_periods):
-                e_plus_selected[i, j] = self.e_plus[i, j].varValue
-                e_minus_selected[i, j] = self.e_minus[i, j].varValue
+        num_err = self.num_sites * self.num_return_periods
+        e_plus_selected = self.x[-2 * num_err : -num_err].reshape(
+            self.num_sites, self.num_return_periods
+        )
+        e_minus_selected = self.x[-num_err:].reshape(
+            self.num_sites, self.num_return_periods
+        )
         error = ((e_plus_selected - e_minus_selected) ** 2).sum(
             axis=1
         ) / self.num_return_periods
@@ -901,20 +962,14 @@ class OccurrenceModel_Wangetal2023:  # noqa: D101
         )
         self.y = 1 / np.tile(self.return_periods, self.im_exceedance_probs.shape[0])
 
-        # define weights
-        self.W = np.diag(np.sqrt(1 / self.y))
-
-        # rate matrix for events
-        # self.occurence_rate_origin_mat = np.repeat(self.occurence_rate_origin, self.X_P.shape[0]).reshape(self.X_P.shape[0], -1)
-        self.occurence_rate_origin_mat = np.vstack(
-            [np.array(self.occurence_rate_origin)] * self.X_P.shape[0]
-        )
+        # define weights (diagonal of the weight matrix)
+        self.W = np.sqrt(1 / self.y)
 
         # hazard by each event
-        self.X = self.X_P * self.occurence_rate_origin_mat
+        self.X = self.X_P * np.asarray(self.occurence_rate_origin)[np.newaxis, :]
 
-        self.X_weighted = np.dot(self.W, self.X)
-        self.y_weighted = np.dot(self.W, self.y)
+        self.X_weighted = self.X * self.W[:, np.newaxis]
+        self.y_weighted = self.W * self.y
 
         return True  # noqa: DOC201, RUF100
 
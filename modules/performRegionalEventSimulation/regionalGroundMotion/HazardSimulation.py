@@ -524,9 +524,9 @@ if __name__ == '__main__':
 
     # dependencies
     if R2D:
-        packages = ['tqdm', 'psutil', 'PuLP', 'requests']
+        packages = ['tqdm', 'psutil', 'requests']
     else:
-        packages = ['selenium', 'tqdm', 'psutil', 'PuLP', 'requests']
+        packages = ['selenium', 'tqdm', 'psutil', 'requests']
     for p in packages:
         if importlib.util.find_spec(p) is None:
             subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-q', p])  # noqa: S603
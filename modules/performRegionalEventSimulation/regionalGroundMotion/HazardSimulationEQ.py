@@ -130,7 +130,8 @@ def hazard_job(hazard_info):  # noqa: C901, D103, PLR0915
                 event_info['IntensityMeasure'],
                 scenario_info['Generator'],
                 output_dir,
-                mth_flag=False,
+                mth_flag=event_info.get('NumProcessors', 1) > 1,
+                num_processors=event_info.get('NumProcessors', 1),
             )
             # update the im_info
             event_info['IntensityMeasure'] = im_info
@@ -437,6 +438,13 @@ def hazard_job(hazard_info):  # noqa: C901, D103, PLR0915
     gf_im_list = []
     if 'GroundFailure' in hazard_info['Event'].keys():  # noqa: SIM118
         ground_failure_info = hazard_info['Event']['GroundFailure']
+        # site parameters sampled from rasters are cached for repeated runs
+        if ground_failure_info.get('CacheSiteParameters', True):
+            import RasterSampler
+
+            RasterSampler.set_cache_dir(
+                os.path.join(hazard_info['Directory'], 'Input', 'SiteParameterCache')  # noqa: PTH118
+            )
         if 'Liquefaction' in ground_failure_info.keys():  # noqa: SIM118
             import liquefaction
 
@@ -551,9 +559,9 @@ if __name__ == '__main__':
 
     # dependencies
     if R2D:
-        packages = ['tqdm', 'psutil', 'PuLP', 'requests']
+        packages = ['tqdm', 'psutil', 'requests']
     else:
-        packages = ['selenium', 'tqdm', 'psutil', 'PuLP', 'requests']
+        packages = ['selenium', 'tqdm', 'psutil', 'requests']
     for p in packages:
         if importlib.util.find_spec(p) is None:
             subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-q', p])  # noqa: S603
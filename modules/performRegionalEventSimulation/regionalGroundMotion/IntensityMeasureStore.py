@@ -0,0 +1,263 @@
+#  # noqa: INP001, D100
+# Copyright (c) 2018 Leland Stanford Junior University
+# Copyright (c) 2018 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+#
+# Storage of the mean and standard deviations of the intensity measures
+# (IntensityMeasureMeanStd.hdf5). The file holds three datasets ('Mean',
+# 'InterEvStdDev' and 'IntraEvStdDev') of shape (scenario, site, im) that are
+# chunked and compressed, plus a 'ScenarioIDs' index and an 'IMList'
+# attribute. The writer keeps a single file handle open and streams the
+# scenarios in blocks of whole chunks; the reader slices by scenario, site,
+# or intensity measure without loading the full file. Files written in the
+# legacy layout (one group per scenario) can still be read.
+
+import h5py
+import numpy as np
+
+IM_MEAN_STD_KEYS = ['Mean', 'InterEvStdDev', 'IntraEvStdDev']
+
+
+class IMMeanStdWriter:
+    """Streaming writer of the intensity measure mean and standard deviations
+    Input:
+        filename: path of the hdf5 file (overwritten)
+        scenario_ids: list of scenario indices in the order of writing
+        num_sites: number of sites
+        im_list: list of intensity measure names
+        chunk_scenarios: number of scenarios per chunk (and per write)
+        chunk_sites: maximum number of sites per chunk
+        compression_level: gzip compression level
+    """  # noqa: D205, D400
+
+    def __init__(
+        self,
+        filename,
+        scenario_ids,
+        num_sites,
+        im_list,
+        chunk_scenarios=32,
+        chunk_sites=4096,
+        compression_level=4,
+    ):
+        self.filename = filename
+        self.num_scenarios = len(scenario_ids)
+        self.num_sites = num_sites
+        self.num_im = len(im_list)
+        self.file = h5py.File(filename, 'w')
+        self.file.attrs['IMList'] = [str(x) for x in im_list]
+        self.file.create_dataset(
+            'ScenarioIDs', data=np.array([int(x) for x in scenario_ids])
+        )
+        shape = (self.num_scenarios, self.num_sites, self.num_im)
+        chunks = (
+            max(1, min(chunk_scenarios, self.num_scenarios)),
+            max(1, min(chunk_sites, self.num_sites)),
+            max(1, self.num_im),
+        )
+        for key in IM_MEAN_STD_KEYS:
+            self.file.create_dataset(
+                key,
+                shape=shape,
+                dtype='f8',
+                chunks=chunks,
+                compression='gzip',
+                compression_opts=compression_level,
+                shuffle=True,
+            )
+        # scenarios are buffered and written in blocks of whole chunks
+        self.buffer = {
+            key: np.zeros((chunks[0], self.num_sites, self.num_im))
+            for key in IM_MEAN_STD_KEYS
+        }
+        self.buffer_start = 0
+        self.buffer_count = 0
+
+    def append(self, im_mean_std):
+        """Appending the results of the next scenario
+        Input:
+            im_mean_std: dict of 'Mean', 'InterEvStdDev' and 'IntraEvStdDev'
+                         arrays of shape (num_sites, num_im)
+        """  # noqa: D205, D400, D401
+        if self.buffer_start + self.buffer_count >= self.num_scenarios:
+            print(  # noqa: T201
+                f'IMMeanStdWriter.append: error - more than {self.num_scenarios} scenarios written to {self.filename}.'
+            )
+            return
+        for key in IM_MEAN_STD_KEYS:
+            self.buffer[key][self.buffer_count] = im_mean_std[key]
+        self.buffer_count = self.buffer_count + 1
+        if self.buffer_count == self.buffer['Mean'].shape[0]:
+            self.flush()
+
+    def flush(self):  # noqa: D102
+        if self.buffer_count == 0:
+            return
+        end = self.buffer_start + self.buffer_count
+        for key in IM_MEAN_STD_KEYS:
+            self.file[key][self.buffer_start : end] = self.buffer[key][
+                : self.buffer_count
+            ]
+        self.buffer_start = end
+        self.buffer_count = 0
+
+    def close(self):  # noqa: D102
+        if self.file is None:
+            return
+        self.flush()
+        if self.buffer_start < self.num_scenarios:
+            print(  # noqa: T201
+                f'IMMeanStdWriter.close: warning - only {self.buffer_start} of {self.num_scenarios} scenarios written to {self.filename}.'
+            )
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa: D105
+        self.close()
+
+
+class IMMeanStdReader:
+    """Indexed reader of the intensity measure mean and standard deviations
+    Input:
+        filename: path of the hdf5 file
+    """  # noqa: D205, D400
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = h5py.File(filename, 'r')
+        self.legacy = not isinstance(self.file.get('Mean', None), h5py.Dataset)
+        if self.legacy:
+            # one group per scenario named by the scenario index
+            self.scenario_ids = sorted(int(x) for x in self.file.keys())  # noqa: SIM118
+            first = self.file[str(self.scenario_ids[0])]['Mean']
+            self.num_sites, self.num_im = first.shape
+            self.im_list = None
+        else:
+            self.scenario_ids = self.file['ScenarioIDs'][()].tolist()
+            _, self.num_sites, self.num_im = self.file['Mean'].shape
+            self.im_list = [str(x) for x in self.file.attrs['IMList']]
+        self.scenario_row = {x: i for i, x in enumerate(self.scenario_ids)}
+
+    def get_scenario(self, scenario_id):
+        """Reading the results of one scenario
+        Input:
+            scenario_id: scenario index
+        Output:
+            dict of 'Mean', 'InterEvStdDev' and 'IntraEvStdDev' arrays of
+            shape (num_sites, num_im)
+        """  # noqa: D205, D400, D401
+        if self.legacy:
+            grp = self.file[str(scenario_id)]
+            return {key: grp[key][()] for key in IM_MEAN_STD_KEYS}
+        row = self.scenario_row[int(scenario_id)]
+        return {key: self.file[key][row] for key in IM_MEAN_STD_KEYS}
+
+    def get_scenarios(self, scenario_ids=None, site_index=None, im_index=None):
+        """Reading a slice of the results
+        Input:
+            scenario_ids: list of scenario indices (default: all)
+            site_index: site index, list of site indices, or None (all sites)
+            im_index: im index, list of im indices, or None (all ims)
+        Output:
+            dict of 'Mean', 'InterEvStdDev' and 'IntraEvStdDev' arrays of
+            shape (num_scenarios, ...) where integer site_index/im_index
+            axes are dropped
+        """  # noqa: D205, D400, D401
+        if scenario_ids is None:
+            scenario_ids = self.scenario_ids
+        site_sel = slice(None) if site_index is None else site_index
+        im_sel = slice(None) if im_index is None else im_index
+        if self.legacy:
+            return {
+                key: np.array(
+                    [
+                        self.file[str(x)][key][()][site_sel][..., im_sel]
+                        for x in scenario_ids
+                    ]
+                )
+                for key in IM_MEAN_STD_KEYS
+            }
+        rows = np.array([self.scenario_row[int(x)] for x in scenario_ids], dtype=int)
+        if len(rows) == 0:
+            return {
+                key: np.zeros((0, self.num_sites, self.num_im))[
+                    :, site_sel, im_sel
+                ]
+                for key in IM_MEAN_STD_KEYS
+            }
+        # h5py requires increasing unique indices: read sorted and map back
+        rows_unique, rows_inverse = np.unique(rows, return_inverse=True)
+        if rows_unique[-1] - rows_unique[0] + 1 == len(rows_unique):
+            scen_sel = slice(rows_unique[0], rows_unique[-1] + 1)
+        else:
+            scen_sel = rows_unique
+        if isinstance(site_sel, slice) or np.isscalar(site_sel):
+            # sites sliced in the file, ims selected in memory
+            site_read, site_sel = site_sel, None
+        else:
+            site_sel = np.asarray(site_sel, dtype=int)
+            site_read = slice(site_sel.min(), site_sel.max() + 1)
+            site_sel = site_sel - site_sel.min()
+        res = dict()  # noqa: C408
+        for key in IM_MEAN_STD_KEYS:
+            data = self.file[key][scen_sel, site_read]
+            if site_sel is not None:
+                data = data[:, site_sel]
+            res[key] = data[..., im_sel][rows_inverse]
+        return res
+
+    def get_site(self, site_index, im_index=None):
+        """Reading the results of one site over all scenarios
+        Input:
+            site_index: site index
+            im_index: im index, list of im indices, or None (all ims)
+        Output:
+            dict of 'Mean', 'InterEvStdDev' and 'IntraEvStdDev' arrays of
+            shape (num_scenarios, ...)
+        """  # noqa: D205, D400, D401
+        return self.get_scenarios(site_index=site_index, im_index=im_index)
+
+    def close(self):  # noqa: D102
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):  # noqa: D105
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa: D105
+        self.close()
+
@@ -0,0 +1,206 @@
+#  # noqa: INP001, D100
+# Copyright (c) 2018 Leland Stanford Junior University
+# Copyright (c) 2018 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+#
+# Sampling of site parameters (e.g., slope, groundwater depth, distance to
+# water) from raster files at the stations. Only the tiles of the raster that
+# cover the stations are read, and the interpolation is vectorized over all
+# stations of a tile. Sampled values can be cached on disk, keyed by the
+# raster file and the station coordinates, so that repeated scenarios with the
+# same sites do not sample the rasters again.
+
+import hashlib
+import os
+import sys
+import warnings
+
+import numpy as np
+import rasterio as rio
+from pyproj import CRS, Transformer
+from rasterio.windows import Window
+from scipy.ndimage import map_coordinates
+
+# number of raster rows and columns in a tile
+TILE_SIZE = 512
+
+# spline order of the interpolation schemes
+INTERP_ORDER = {'nearest': 0, 'linear': 1, 'cubic': 3, 'quintic': 5}
+
+# directory of the cached samples (None disables caching)
+_cache_dir = None
+
+
+def set_cache_dir(cache_dir):
+    """Set the directory of the cached raster samples (None disables caching)"""  # noqa: D400
+    global _cache_dir  # noqa: PLW0603
+    _cache_dir = cache_dir
+
+
+def _cache_file(raster_file_path, raster_crs, x, y, interp_scheme):
+    # the key changes whenever the raster file or the stations change
+    stat = os.stat(raster_file_path)
+    key = hashlib.sha1()  # noqa: S324
+    key.update(
+        f'{os.path.abspath(raster_file_path)}|{stat.st_size}|{stat.st_mtime_ns}|'  # noqa: PTH100
+        f'{raster_crs}|{interp_scheme}'.encode()
+    )
+    key.update(np.ascontiguousarray(x, dtype=float).tobytes())
+    key.update(np.ascontiguousarray(y, dtype=float).tobytes())
+    name = os.path.splitext(os.path.basename(raster_file_path))[0]  # noqa: PTH119, PTH122
+    return os.path.join(_cache_dir, f'{name}_{key.hexdigest()}.npy')  # noqa: PTH118
+
+
+def _sample_tiles(raster_file, rows, cols, order):
+    """Interpolate band 1 at fractional pixel coordinates, one tile at a time
+
+    Pixel centers are at integer coordinates. Stations outside of the raster
+    get NaN.
+    """  # noqa: D400
+    sample = np.full(len(rows), np.nan)
+    height, width = raster_file.height, raster_file.width
+    if order == 0:
+        rows = np.floor(rows + 0.5)
+        cols = np.floor(cols + 0.5)
+    inside = (
+        (rows >= -0.5) & (rows <= height - 0.5) & (cols >= -0.5) & (cols <= width - 0.5)
+    )
+    rows = np.clip(rows, 0, height - 1)
+    cols = np.clip(cols, 0, width - 1)
+
+    # halo of pixels around a tile for the support of the interpolation
+    halo = 0 if order == 0 else (1 if order == 1 else 16)
+
+    station_ids = np.where(inside)[0]
+    tile_ids = (rows[station_ids].astype(int) // TILE_SIZE) * (
+        width // TILE_SIZE + 1
+    ) + cols[station_ids].astype(int) // TILE_SIZE
+    for tile_id in np.unique(tile_ids):
+        ids = station_ids[tile_ids == tile_id]
+        tile_row = int(rows[ids[0]]) // TILE_SIZE
+        tile_col = int(cols[ids[0]]) // TILE_SIZE
+        row_off = max(tile_row * TILE_SIZE - halo, 0)
+        col_off = max(tile_col * TILE_SIZE - halo, 0)
+        row_end = min((tile_row + 1) * TILE_SIZE + halo, height)
+        col_end = min((tile_col + 1) * TILE_SIZE + halo, width)
+        data = raster_file.read(
+            1, window=Window(col_off, row_off, col_end - col_off, row_end - row_off)
+        )
+        if order == 0:
+            sample[ids] = data[
+                rows[ids].astype(int) - row_off, cols[ids].astype(int) - col_off
+            ]
+        else:
+            sample[ids] = map_coordinates(
+                data.astype(float),
+                [rows[ids] - row_off, cols[ids] - col_off],
+                order=order,
+                mode='nearest',
+            )
+    return sample
+
+
+def sample_raster(
+    raster_file_path,
+    raster_crs,
+    x,
+    y,
+    interp_scheme='nearest',
+    dtype=None,
+):
+    """Sample the first band of a raster at (x,y) pairs in CRS 4326
+    Input:
+        raster_file_path: path of the raster file
+        raster_crs: CRS of the raster
+        x: longitudes of the stations
+        y: latitudes of the stations
+        interp_scheme: 'nearest', 'linear', 'cubic', or 'quintic'
+        dtype: data type of the samples
+    Output:
+        sample: 1-D array of the sampled values (NaN outside of the raster)
+    """  # noqa: D205, D400
+    print(f'Sampling from the Raster File: {os.path.basename(raster_file_path)}...')  # noqa: T201, PTH119
+    if interp_scheme not in INTERP_ORDER:
+        sys.exit(f'The interpolation scheme {interp_scheme} is not supported.')
+
+    cache_file = None
+    if _cache_dir is not None:
+        cache_file = _cache_file(raster_file_path, raster_crs, x, y, interp_scheme)
+        if os.path.exists(cache_file):  # noqa: PTH110
+            print(f'Using the cached samples in {cache_file}')  # noqa: T201
+            sample = np.load(cache_file)
+            if dtype is not None:
+                sample = sample.astype(dtype)
+            return sample  # noqa: DOC201, RUF100
+
+    invalid_value = np.nan
+    xy_crs = CRS.from_user_input(4326)
+    raster_crs = CRS.from_user_input(raster_crs)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    try:
+        raster_file = rio.open(raster_file_path)
+    except:  # noqa: E722
+        sys.exit(f'Can not read data from {raster_file_path}')
+    with raster_file:
+        if raster_file.count > 1:
+            warnings.warn(  # noqa: B028
+                f'More than one band in the file {raster_file_path}, the first band is used.'
+            )
+        if xy_crs != raster_crs:
+            # make transformer for reprojection
+            transformer_xy_to_data = Transformer.from_crs(
+                xy_crs, raster_crs, always_xy=True
+            )
+            # reproject and store
+            x, y = transformer_xy_to_data.transform(x, y)
+        # fractional pixel coordinates with the pixel centers at integers
+        cols, rows = ~raster_file.transform * (np.asarray(x), np.asarray(y))
+        sample = _sample_tiles(
+            raster_file, rows - 0.5, cols - 0.5, INTERP_ORDER[interp_scheme]
+        )
+    # clean up invalid values (returned as 1e38 by NumPy)
+    sample[abs(sample) > 1e10] = invalid_value  # noqa: PLR2004
+
+    if cache_file is not None:
+        os.makedirs(_cache_dir, exist_ok=True)  # noqa: PTH103
+        # write to a temporary file first so readers never see partial files
+        tmp_file = f'{cache_file}.{os.getpid()}'
+        with open(tmp_file, 'wb') as f:  # noqa: PTH123
+            np.save(f, sample)
+        os.replace(tmp_file, cache_file)
+
+    # convert to target datatype
+    if dtype is not None:
+        sample = sample.astype(dtype)
+    return sample
@@ -83,7 +83,7 @@ if __name__ == '__main__':
         oq_flag = False
 
     # dependencies
-    packages = ['tqdm', 'psutil', 'pulp', 'requests']
+    packages = ['tqdm', 'psutil', 'requests']
     for p in packages:
         if importlib.util.find_spec(p) is None:
             # print(f"""The Python package {p} is required but not found.
@@ -44,13 +44,99 @@ from pathlib import Path
 R2D = True
 if not R2D:
     pass
-import copy  # noqa: E402
 import csv  # noqa: E402
 
 import numpy as np  # noqa: E402
 import pandas as pd  # noqa: E402
 
 
+class GM_Index:
+    """Prebuilt index of the ground motion database for record selection
+
+    The intensity measures of the records are stored in log space. The
+    scalable intensity measures (all but durations) of a record scaled by s
+    are shifted by ln(s), so the least-squares scale factor of every record
+    and target has a closed form: the mean log residual of the scalable
+    intensity measures, bounded by [sf_min, sf_max]. Targets are processed in
+    blocks against all records with matrix products.
+    """  # noqa: D205, D400
+
+    def __init__(self, gmdb_im_df, sf_min=None, sf_max=None):
+        self.rsn = gmdb_im_df['RSN'].values.tolist()  # noqa: PD011
+        self.im_list = [x for x in gmdb_im_df.keys() if x != 'RSN']
+        self.scalable = np.array(
+            [not cur_im.startswith('DS') for cur_im in self.im_list]
+        )
+        self.ln_sf_min = np.log(0.0001 if sf_min is None else sf_min)
+        self.ln_sf_max = np.log(100000.0 if sf_max is None else sf_max)
+
+        im_table = gmdb_im_df[self.im_list].to_numpy(dtype=float)
+        # records with missing (non-positive) intensity measures are skipped
+        self.valid = np.all(im_table > 0, axis=1)
+        ln_im = np.log(np.where(self.valid[:, np.newaxis], im_table, 1.0))
+        self.ln_im_s = ln_im[:, self.scalable]
+        self.ln_im_u = ln_im[:, ~self.scalable]
+        self.num_s = int(np.sum(self.scalable))
+        # terms of the squared errors that only depend on the records
+        self.sum_s = self.ln_im_s.sum(axis=1)
+        self.sq_s = (self.ln_im_s**2).sum(axis=1)
+        self.sq_u = (self.ln_im_u**2).sum(axis=1)
+
+    def select_records(self, target_ln_im, block_size=None):
+        """Select the best record for every target
+        Input:
+            target_ln_im: 2-D array of log intensity measures (target, im) in
+                the order of im_list
+            block_size: number of targets processed together
+        Output:
+            loc_tag: index of the selected record of each target
+            sf: scale factor of the selected record of each target
+            min_err: sum of squared log residuals of the selected records
+        """  # noqa: D205, D400
+        target_ln_im = np.atleast_2d(np.asarray(target_ln_im, dtype=float))
+        num_targets = target_ln_im.shape[0]
+        if block_size is None:
+            # about 2e7 errors (160 MB) per block
+            block_size = max(1, int(2e7 // len(self.rsn)))
+
+        loc_tag = np.zeros(num_targets, dtype=int)
+        sf = np.ones(num_targets)
+        min_err = np.zeros(num_targets)
+        for k in range(0, num_targets, block_size):
+            t_s = target_ln_im[k : k + block_size, self.scalable]
+            t_u = target_ln_im[k : k + block_size, ~self.scalable]
+
+            # residual of the scalable IMs: (t_s - g_s - ln_sf)
+            sq = (
+                (t_s**2).sum(axis=1)[:, np.newaxis]
+                + self.sq_s[np.newaxis, :]
+                - 2.0 * t_s @ self.ln_im_s.T
+            )
+            if self.num_s > 0:
+                diff_sum = t_s.sum(axis=1)[:, np.newaxis] - self.sum_s[np.newaxis, :]
+                ln_sf = np.clip(diff_sum / self.num_s, self.ln_sf_min, self.ln_sf_max)
+                err = sq - 2.0 * ln_sf * diff_sum + self.num_s * ln_sf**2
+            else:
+                ln_sf = np.zeros_like(sq)
+                err = sq
+            # residual of the IMs that are not scaled
+            if t_u.shape[1] > 0:
+                err += (
+                    (t_u**2).sum(axis=1)[:, np.newaxis]
+                    + self.sq_u[np.newaxis, :]
+                    - 2.0 * t_u @ self.ln_im_u.T
+                )
+            err[:, ~self.valid] = np.inf
+
+            best = np.argmin(err, axis=1)
+            rows = np.arange(len(best))
+            loc_tag[k : k + block_size] = best
+            sf[k : k + block_size] = np.exp(ln_sf[rows, best])
+            min_err[k : k + block_size] = np.maximum(err[rows, best], 0.0)
+
+        return loc_tag, sf, min_err
+
+
 class GM_Selector:  # noqa: D101
     def __init__(
         self,
@@ -59,11 +145,13 @@ class GM_Selector:  # noqa: D101
         sf_min=None,
         sf_max=None,
         target_im=None,
+        gm_index=None,
     ):
         self.set_gmdb_im_df(gmdb_im_df)
         self.set_num_records(num_records)
         self.set_sf_range(sf_min, sf_max)
         self.set_target_im(target_im)
+        self.gm_index = gm_index
 
     def set_gmdb_im_df(self, gmdb_im_df):  # noqa: D102
         self.gmdb_im_df = gmdb_im_df
@@ -91,31 +179,19 @@ class GM_Selector:  # noqa: D101
             self.sf_max = 100000.0
         else:
             self.sf_max = sf_max
-        self.sf_range = np.linspace(self.sf_min, self.sf_max, 100)
 
     def set_target_im(self, target_im):  # noqa: D102
-        self.target_im = [target_im for k in range(self.num_gm)]
+        self.target_im = target_im
 
     def select_records(self):  # noqa: D102
-        im_table = self.gmdb_im_df.iloc[:, 1:]
-        min_err = 1000000.0
-        for s in self.sf_range:
-            cur_im_table = copy.copy(im_table)
-            for i in range(cur_im_table.shape[1]):
-                if self.scalable[i]:
-                    cur_im_table.iloc[:, i] = cur_im_table.iloc[:, i] * s
-            err = np.linalg.norm(
-                np.exp(self.target_im) - cur_im_table.to_numpy(), axis=1
-            )
-            if np.min(err) < min_err:
-                min_err = np.min(err)
-                tmp_tag = err.argmin()
-                sf = s
+        if self.gm_index is None:
+            self.gm_index = GM_Index(self.gmdb_im_df, self.sf_min, self.sf_max)
+        loc_tag, sf, min_err = self.gm_index.select_records([self.target_im])
 
-        self.loc_tag = tmp_tag
-        self.min_err = min_err
-        self.rsn_tag = self.gmdb_im_df['RSN'].values.tolist()[tmp_tag]  # noqa: PD011
-        self.sf = sf
+        self.loc_tag = int(loc_tag[0])
+        self.min_err = min_err[0]
+        self.rsn_tag = self.gm_index.rsn[self.loc_tag]
+        self.sf = sf[0]
 
 
 def select_ground_motion(  # noqa: C901, D103
@@ -139,15 +215,9 @@ def select_ground_motion(  # noqa: C901, D103
             low_memory=False,
         )
         # Parsing spectral data
-        num_gm = len(gmdb['RecId'])
         tmp = gmdb.keys()[37:147]
-        T_db = [float(a.replace('T', '').replace('S', '')) for a in tmp]  # noqa: N806
+        T_db = np.array([float(a.replace('T', '').replace('S', '')) for a in tmp])  # noqa: N806
         psa_db = gmdb.iloc[:, 37:147]
-        pga = gmdb.iloc[:, 34]  # noqa: F841
-        pgv = gmdb.iloc[:, 35]  # noqa: F841
-        pgd = gmdb.iloc[:, 36]  # noqa: F841
-        # Scaling factors
-        sf_range = np.linspace(sf_min, sf_max, 100)  # noqa: F841
         # Selected ground motion ID
         gm_id = []
         sf_data = []
@@ -156,32 +226,39 @@ def select_ground_motion(  # noqa: C901, D103
         # Parese im_list
         target_period = []  # noqa: F841
         im_map = {'PGA': 34, 'PGV': 35, 'PGD': 36, 'DS575H': 151, 'DS595H': 152}
-        im_loc_tag = []
         gmdb_im_dict = dict()  # noqa: C408
         gmdb_im_dict.update({'RSN': gmdb['RecId'].values.tolist()})  # noqa: PD011
+        psa_values = psa_db.to_numpy(dtype=float)
         for cur_im in im_list:
             if cur_im.startswith('SA'):
+                # linear interpolation of all spectra at the period
                 cur_period = float(cur_im[3:-1])
+                k = np.clip(np.searchsorted(T_db, cur_period) - 1, 0, len(T_db) - 2)
+                w = np.clip(
+                    (cur_period - T_db[k]) / (T_db[k + 1] - T_db[k]), 0.0, 1.0
+                )
                 gmdb_im_dict.update(
                     {
-                        cur_im: [
-                            np.interp(cur_period, T_db, psa_db.iloc[k, :])
-                            for k in range(num_gm)
-                        ]
+                        cur_im: (1.0 - w) * psa_values[:, k]
+                        + w * psa_values[:, k + 1]
                     }
                 )
             else:
-                im_loc_tag.append(im_map.get(cur_im))
                 gmdb_im_dict.update(
-                    {
-                        cur_im: [
-                            x[0]
-                            for x in gmdb.iloc[:, im_loc_tag].values.tolist()  # noqa: PD011
-                        ]
-                    }
+                    {cur_im: gmdb.iloc[:, im_map.get(cur_im)].to_numpy(dtype=float)}
                 )
         # ground motion database intensity measure data frame
         gmdb_im_df = pd.DataFrame.from_dict(gmdb_im_dict)
+        # index of the database used for all targets
+        gm_index = GM_Index(gmdb_im_df, sf_min=sf_min, sf_max=sf_max)
+        rec_ids = gmdb['RecId'].to_numpy()
+        file_names = [
+            [
+                str(x).replace('\\', '_').replace('/', '_')
+                for x in gmdb[f'FileNameHorizontal{h}']
+            ]
+            for h in [1, 2]
+        ]
         count = 0
         # Looping over all scenarios
         for cur_target in target_ln_im:
@@ -189,44 +266,20 @@ def select_ground_motion(  # noqa: C901, D103
             count = count + 1
             print('-Scenario #' + str(tmp_scen))  # noqa: T201
             num_stations, num_periods, num_simu = cur_target.shape
-            tmp_id = np.zeros((num_stations, num_simu))
-            tmp_sf = np.zeros((num_stations, num_simu))
-            tmp_min_err = np.zeros((num_stations, num_simu))
+            # select the records of all stations and realizations at once
+            # (targets ordered by realization and then by station)
+            loc_tag, sf, _ = gm_index.select_records(
+                cur_target.transpose(2, 0, 1).reshape(-1, num_periods)
+            )
+            loc_tag = loc_tag.reshape(num_simu, num_stations).T
+            tmp_id = rec_ids[loc_tag].astype(float)
+            tmp_sf = sf.reshape(num_simu, num_stations).T
             tmp_filename = []
             for i in range(num_simu):
-                print('--Realization #' + str(i + 1))  # noqa: T201
                 for j in range(num_stations):
-                    # create a ground motion selector
-                    gm_selector = GM_Selector(
-                        gmdb_im_df=gmdb_im_df,
-                        num_records=1,
-                        sf_min=sf_min,
-                        sf_max=sf_max,
-                        target_im=cur_target[j, :, i],
-                    )
-                    # select records
-                    gm_selector.select_records()
-                    # collect results
-                    tmp_min_err[j, i] = gm_selector.min_err
-                    tmp_id[j, i] = int(gmdb['RecId'][gm_selector.loc_tag])
-                    tmp_sf[j, i] = gm_selector.sf
-                    tmp_filename.append(
-                        'RSN'
-                        + str(int(tmp_id[j, i]))
-                        + '_'
-                        + gmdb['FileNameHorizontal1'][gm_selector.loc_tag]
-                        .replace('\\', '_')
-                        .replace('/', '_')
-                    )
-                    tmp_filename.append(
-                        'RSN'
-                        + str(int(tmp_id[j, i]))
-                        + '_'
-                        + gmdb['FileNameHorizontal2'][gm_selector.loc_tag]
-                        .replace('\\', '_')
-                        .replace('/', '_')
-                    )
-                    # print('---Station #'+str(j+1))
+                    rsn = 'RSN' + str(int(tmp_id[j, i])) + '_'
+                    tmp_filename.append(rsn + file_names[0][loc_tag[j, i]])
+                    tmp_filename.append(rsn + file_names[1][loc_tag[j, i]])
             # Collecting results in one scenario
             gm_id.append(tmp_id)
             sf_data.append(tmp_sf)
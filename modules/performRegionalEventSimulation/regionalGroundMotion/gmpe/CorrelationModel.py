@@ -42,7 +42,7 @@ import os
 import numpy as np
 import pandas as pd
 import scipy
-from scipy.interpolate import interp1d, interp2d
+from scipy.interpolate import RegularGridInterpolator, interp1d, interp2d
 
 
 def baker_jayaram_correlation_2008(im1, im2, flag_orth=False):  # noqa: FBT002, C901
@@ -312,7 +312,34 @@ def compute_rho_loth_baker_correlation_2013(T1, T2, h, B1, B2, B3):  # noqa: N80
     return rho  # noqa: DOC201, RET504, RUF100
 
 
-def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu):
+def get_loth_baker_correlation_2013_coreg(periods, B1, B2, B3):  # noqa: N803
+    """Interpolating the three coregionalization matrices at given periods
+    Reference:
+        Loth and Baker (2013) A spatial cross-correlation model of spectral
+        accelerations at multiple periods (with the Erratum)
+    Input:
+        periods: Sa periods
+        B1: short-range coregionalization matrix
+        B2: long-range coregionalization matrix
+        B3: Nugget effect correlationalization matrix
+    Output:
+        b_list: [b1, b2, b3] matrices of size num_periods x num_periods
+    Note:
+        Periods out of 0.01s ~ 10.0s are given the boundary value
+    """  # noqa: D205, D400, D401
+    b_list = []
+    for B in [B1, B2, B3]:  # noqa: N806
+        model_periods = B['Period (s)'].to_numpy(dtype=float)
+        interp_fun = RegularGridInterpolator(
+            (model_periods, model_periods), B.iloc[:, 1:].to_numpy(dtype=float)
+        )
+        T = np.clip(periods, model_periods[0], model_periods[-1])  # noqa: N806
+        T1, T2 = np.meshgrid(T, T, indexing='ij')  # noqa: N806
+        b_list.append(interp_fun(np.stack([T1.ravel(), T2.ravel()], axis=-1)).reshape(T1.shape))
+    return b_list  # noqa: DOC201, RUF100
+
+
+def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu, sampler=None):
     """Simulating intra-event residuals
     Reference:
         Loth and Baker (2013) A spatial cross-correlation model of spectral
@@ -321,6 +348,9 @@ def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu):
         stations: stations coordinates
         im_name_list: simulated intensity measure names
         num_simu: number of realizations
+        sampler: VecchiaSampler of the stations (optional), if given the
+                 residuals are simulated by the nearest-neighbor approximation
+                 without the dense covariance matrix (stn_dist is not used)
     Output:
         residuals: intra-event residuals
     Note:
@@ -346,6 +376,26 @@ def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu):
     num_stations = len(stations)
     # Creating a covariance matrices for each of the principal components
     num_periods = len(periods)
+    if sampler is not None:
+        # Linear model of coregionalization: the sum of three independent
+        # fields L_k Z_k with B_k = L_k L_k^T and Z_k having num_periods
+        # independent components of the k-th spatial correlation structure
+        residuals = np.zeros((num_stations, num_periods, num_simu))
+        b_list = get_loth_baker_correlation_2013_coreg(periods, B1, B2, B3)
+        for b_k, corr_range in zip(b_list, [20.0, 70.0, None]):
+            eig_val, eig_vec = np.linalg.eigh(b_k)
+            L_k = eig_vec * np.sqrt(np.maximum(eig_val, 0.0))  # noqa: N806
+            if corr_range is None:
+                # nugget effect
+                z_k = np.random.standard_normal((num_stations, num_periods, num_simu))
+            else:
+                z_k = sampler.sample(
+                    lambda h, r=corr_range: np.exp(-3.0 * h / r),
+                    num_periods * num_simu,
+                    cache_key=('Loth & Baker (2013)', corr_range),
+                ).reshape(num_stations, num_periods, num_simu)
+            residuals += np.einsum('pq,nqs->nps', L_k, z_k)
+        return residuals
     cov_matrix = np.zeros((num_stations * num_periods, num_stations * num_periods))
     for i in range(num_periods):
         for j in range(num_periods):
@@ -359,7 +409,7 @@ def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu):
     # mu = np.zeros(num_stations * num_periods)
     # residuals_raw = np.random.multivariate_normal(mu, covMatrix, num_simu)
     # Replace np multivariate_normal with cholesky and standard normal
-    standard_normal = np.random.standard_normal((num_simu, num_stations))
+    standard_normal = np.random.standard_normal((num_simu, num_stations * num_periods))
     chole_lower = scipy.linalg.cholesky(cov_matrix, lower=True)
     corr_samples = chole_lower @ standard_normal.T
     residuals_raw = corr_samples.T
@@ -381,6 +431,38 @@ def loth_baker_correlation_2013(stations, im_name_list, stn_dist, num_simu):
     return residuals  # noqa: DOC201, RET504, RUF100
 
 
+def sample_nested_exponential(sampler, num_simu, nugget, sills, ranges, cache_key=None):
+    """Simulating a field with a nested exponential covariance function
+        C(h) = nugget * (h == 0) + sum_k sills[k] * exp(-3 h / ranges[k])
+    with the nearest-neighbor (Vecchia) sampler
+    Input:
+        sampler: VecchiaSampler of the stations
+        num_simu: number of realizations
+        nugget: nugget effect
+        sills: sills of the exponential structures
+        ranges: ranges of the exponential structures (km)
+        cache_key: key to reuse the sparse factor of the sampler
+    Output:
+        samples: num_stations x num_simu samples
+    """  # noqa: D205, D400, D401
+    nugget = float(nugget)
+    sills = [float(x) for x in sills]
+    ranges = [float(x) for x in ranges]
+    if sills[0] == 0:
+        # nug
+        return np.sqrt(nugget) * np.random.standard_normal(  # noqa: DOC201, RUF100
+            (sampler.num_sites, num_simu)
+        )
+
+    def cov_func(h):
+        cov = nugget * (h == 0)
+        for sill, corr_range in zip(sills, ranges):
+            cov = cov + sill * np.exp(-3.0 * h / corr_range)
+        return cov
+
+    return sampler.sample(cov_func, num_simu, cache_key=cache_key)
+
+
 def load_markhvida_ceferino_baker_correlation_2017(datapath):
     """Loading the three matrices in the Markhivida et al. correaltion model (2017)
     Reference:
@@ -418,6 +500,7 @@ def markhvida_ceferino_baker_correlation_2017(  # noqa: C901
     num_simu,
     stn_dist,
     num_pc=19,
+    sampler=None,
 ):
     """Simulating intra-event residuals
     Reference:
@@ -429,6 +512,9 @@ def markhvida_ceferino_baker_correlation_2017(  # noqa: C901
         im_name_list: simulated intensity measure names
         num_simu: number of realizations
         num_pc: number of principle components
+        sampler: VecchiaSampler of the stations (optional), if given the
+                 residuals are simulated by the nearest-neighbor approximation
+                 without the dense covariance matrix (stn_dist is not used)
     Output:
         residuals: intra-event residuals
     Note:
@@ -475,6 +561,16 @@ def markhvida_ceferino_baker_correlation_2017(  # noqa: C901
     # Simulating residuals
     residuals_pca = np.zeros((num_stations, num_simu, num_pc))
     for i in range(num_pc):
+        if sampler is not None:
+            residuals_pca[:, :, i] = sample_nested_exponential(
+                sampler,
+                num_simu,
+                c0.iloc[0, i],
+                [c1.iloc[0, i], c2.iloc[0, i]],
+                [a1.iloc[0, i], a2.iloc[0, i]],
+                cache_key=('Markhvida et al. (2017)', num_pc, i),
+            )
+            continue
         # Creating a covariance matrices for each of the principal components
         if c1.iloc[0, i] == 0:
             # nug
@@ -553,7 +649,9 @@ def load_du_ning_correlation_2021(datapath):
     )
     return DN_model, DN_pca, DN_var  # noqa: DOC201, RUF100
 
-def du_ning_correlation_2021_simple(stations, im_name_list, num_simu, stn_dist):
+def du_ning_correlation_2021_simple(  # noqa: D103
+    stations, im_name_list, num_simu, stn_dist, sampler=None
+):
     num_pc = 7
     periods_ims = []
     for cur_im in im_name_list:
@@ -595,6 +693,16 @@ def du_ning_correlation_2021_simple(stations, im_name_list, num_simu, stn_dist):
     residuals_pca = np.zeros((num_stations, num_simu, num_pc))
     # print('du_ning_correlation_2021: set up before looping num_pc {0} sec'.format(time.time() - t_start))
     for i in range(num_pc):
+        if sampler is not None:
+            residuals_pca[:, :, i] = sample_nested_exponential(
+                sampler,
+                num_simu,
+                c1.iloc[0, i],
+                [a1.iloc[0, i], a2.iloc[0, i]],
+                [b1.iloc[0, i], b2.iloc[0, i]],
+                cache_key=('Du & Ning Simple (2021)', num_pc, i),
+            )
+            continue
         if a1.iloc[0, i] == 0:
             # nug
             cov_matrix = np.eye(num_stations) * c1.iloc[0, i]
@@ -645,7 +753,9 @@ def du_ning_correlation_2021_simple(stations, im_name_list, num_simu, stn_dist):
         )
     return residuals  # noqa: DOC201, RUF100
 
-def du_ning_correlation_2021(stations, im_name_list, num_simu, stn_dist, num_pc=23):
+def du_ning_correlation_2021(
+    stations, im_name_list, num_simu, stn_dist, num_pc=23, sampler=None
+):
     """Simulating intra-event residuals
     Reference:
         Du and Ning (2021) Modeling spatial cross-correlation of multiple
@@ -656,6 +766,9 @@ def du_ning_correlation_2021(stations, im_name_list, num_simu, stn_dist, num_pc=
         im_name_list: simulated intensity measure names
         num_simu: number of realizations
         num_pc: number of principle components
+        sampler: VecchiaSampler of the stations (optional), if given the
+                 residuals are simulated by the nearest-neighbor approximation
+                 without the dense covariance matrix (stn_dist is not used)
     Output:
         residuals: intra-event residuals
     Note:
@@ -704,6 +817,16 @@ def du_ning_correlation_2021(stations, im_name_list, num_simu, stn_dist, num_pc=
     for i in range(num_pc):
         # from tqdm import tqdm
         # for i in tqdm(range(num_pc)):
+        if sampler is not None:
+            residuals_pca[:, :, i] = sample_nested_exponential(
+                sampler,
+                num_simu,
+                c1.iloc[0, i],
+                [a1.iloc[0, i], a2.iloc[0, i]],
+                [b1.iloc[0, i], b2.iloc[0, i]],
+                cache_key=('Du & Ning (2021)', num_pc + 1, i),
+            )
+            continue
         if a1.iloc[0, i] == 0:
             # nug
             cov_matrix = np.eye(num_stations) * c1.iloc[0, i]
@@ -0,0 +1,190 @@
+#  # noqa: N999, D100
+# Copyright (c) 2018 Leland Stanford Junior University
+# Copyright (c) 2018 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+#
+# Nearest-neighbor (Vecchia) approximation for simulating spatially correlated
+# intra-event residuals at many sites without forming or factorizing the dense
+# num_sites x num_sites covariance matrix.
+#
+# Reference:
+#     Vecchia (1988) Estimation and model identification for continuous
+#     spatial processes
+#     Katzfuss and Guinness (2021) A general framework for Vecchia
+#     approximations of Gaussian processes
+
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import spsolve
+from scipy.spatial import cKDTree
+
+
+def get_vecchia_neighbors(coords, num_neighbors):
+    """Finding the nearest previously-ordered neighbors of each site
+    Input:
+        coords: (num_sites, 2) site coordinates (already in the Vecchia order)
+        num_neighbors: maximum number of conditioning neighbors
+    Output:
+        neighbors: (num_sites, num_neighbors) indices of the nearest sites
+                   that precede each site in the ordering (-1 if none)
+    """  # noqa: D205, D400, D401
+    num_sites = coords.shape[0]
+    neighbors = -np.ones((num_sites, num_neighbors), dtype=int)
+    if num_sites < 2 or num_neighbors < 1:  # noqa: PLR2004
+        return neighbors  # noqa: DOC201, RUF100
+    # sites in [start, 2 * start) are searched in a tree of the first
+    # 2 * start sites, so at least half of the candidates precede them
+    start = 1
+    while start < num_sites:
+        end = min(2 * start, num_sites)
+        tree = cKDTree(coords[:end])
+        pending = np.arange(start, end)
+        k = min(end, 4 * num_neighbors)
+        while pending.size > 0:
+            _, idx = tree.query(coords[pending], k=k)
+            idx = idx.reshape(len(pending), -1)
+            # only the sites ordered before the current one can be conditioned on
+            prev = idx < pending[:, None]
+            done = (prev.sum(axis=1) >= np.minimum(num_neighbors, pending)) | (
+                k == end
+            )
+            # move the previous sites to the front while keeping the distance order
+            order = np.argsort(~prev[done], axis=1, kind='stable')[:, :num_neighbors]
+            found = np.take_along_axis(idx[done], order, axis=1)
+            valid = np.take_along_axis(prev[done], order, axis=1)
+            found[~valid] = -1
+            neighbors[pending[done], : found.shape[1]] = found
+            pending = pending[~done]
+            k = min(end, 2 * k)
+        start = end
+    return neighbors
+
+
+class VecchiaSampler:
+    """Sampling zero-mean Gaussian random fields with isotropic covariance
+    functions at a fixed set of sites
+
+    Each site is conditioned on (at most) num_neighbors nearest sites that
+    precede it in a random ordering, which gives a sparse triangular factor
+    with num_sites * num_neighbors nonzeros. num_neighbors is the accuracy
+    knob: the approximation converges to the exact (Cholesky) simulation as it
+    approaches the number of sites, while the cost grows as
+    num_sites * num_neighbors^3.
+    """  # noqa: D205, D400
+
+    def __init__(self, coords, num_neighbors=30, chunk_size=5000, seed=0):
+        """Setting up the ordering and the conditioning sets
+        Input:
+            coords: (num_sites, 2) projected site coordinates (in km)
+            num_neighbors: number of conditioning neighbors
+            chunk_size: number of sites processed per batched solve
+            seed: seed of the (random) site ordering
+        """  # noqa: D205, D400, D401
+        self.coords = np.asarray(coords, dtype=float)
+        self.num_sites = self.coords.shape[0]
+        self.num_neighbors = int(max(min(num_neighbors, self.num_sites - 1), 0))
+        self.chunk_size = chunk_size
+        # random ordering is more accurate than coordinate-based orderings
+        self.order = np.random.default_rng(seed).permutation(self.num_sites)
+        self.ordered_coords = self.coords[self.order]
+        self.neighbors = get_vecchia_neighbors(
+            self.ordered_coords, self.num_neighbors
+        )
+        self.factors = {}
+
+    def _get_factor(self, cov_func):
+        # build the sparse lower-triangular matrix A = I - B and the conditional
+        # standard deviations d so that A x = d * z gives correlated samples x
+        num_sites = self.num_sites
+        var0 = float(cov_func(np.zeros(1))[0])
+        jitter = 1e-10 * var0
+        rows = [np.arange(num_sites)]
+        cols = [np.arange(num_sites)]
+        vals = [np.ones(num_sites)]
+        cond_std = np.sqrt(var0) * np.ones(num_sites)
+        num_valid = (self.neighbors >= 0).sum(axis=1)
+        for cur_m in np.unique(num_valid):
+            if cur_m == 0:
+                continue
+            sites = np.where(num_valid == cur_m)[0]
+            for start in range(0, len(sites), self.chunk_size):
+                cur_sites = sites[start : start + self.chunk_size]
+                nb = self.neighbors[cur_sites, :cur_m]
+                nb_coords = self.ordered_coords[nb]
+                # covariance among the neighbors and with the current site
+                d_nn = np.linalg.norm(
+                    nb_coords[:, :, None, :] - nb_coords[:, None, :, :], axis=-1
+                )
+                d_in = np.linalg.norm(
+                    nb_coords - self.ordered_coords[cur_sites][:, None, :], axis=-1
+                )
+                c_nn = cov_func(d_nn) + jitter * np.eye(cur_m)
+                c_in = cov_func(d_in)
+                b = np.linalg.solve(c_nn, c_in[:, :, None])[:, :, 0]
+                cond_var = var0 - np.sum(b * c_in, axis=1)
+                cond_std[cur_sites] = np.sqrt(np.maximum(cond_var, jitter))
+                rows.append(np.repeat(cur_sites, cur_m))
+                cols.append(nb.ravel())
+                vals.append(-b.ravel())
+        A = csc_matrix(  # noqa: N806
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(num_sites, num_sites),
+        )
+        return A, cond_std
+
+    def sample(self, cov_func, num_simu, cache_key=None):
+        """Simulating correlated samples
+        Input:
+            cov_func: vectorized covariance function of the separation distance
+                      (in km), e.g., lambda h: np.exp(-3.0 * h / 20.0)
+            num_simu: number of realizations
+            cache_key: if given, the sparse factor is kept for later calls with
+                       the same key (e.g., the same model and principal component)
+        Output:
+            samples: (num_sites, num_simu) correlated samples
+        """  # noqa: D205, D400, D401
+        if cache_key is not None and cache_key in self.factors:
+            A, cond_std = self.factors[cache_key]  # noqa: N806
+        else:
+            A, cond_std = self._get_factor(cov_func)  # noqa: N806
+            if cache_key is not None:
+                self.factors[cache_key] = (A, cond_std)
+        standard_normal = np.random.standard_normal((self.num_sites, num_simu))
+        corr_samples = spsolve(
+            A, cond_std[:, None] * standard_normal, permc_spec='NATURAL'
+        )
+        corr_samples = np.reshape(corr_samples, (self.num_sites, num_simu))
+        # back to the original site order
+        samples = np.empty_like(corr_samples)
+        samples[self.order] = corr_samples
+        return samples  # noqa: DOC201, RUF100
@@ -37,4 +37,4 @@
 # Kuanshi Zhong
 #
 
-__all__ = ['CorrelationModel', 'SignificantDurationModel']
+__all__ = ['CorrelationModel', 'SignificantDurationModel', 'VecchiaSampler']
@@ -44,6 +44,114 @@ import time
 import numpy as np
 import pandas as pd
 
+# Site attributes used by the vectorized (array) GMPE evaluations
+SITE_ARRAY_KEYS = ['rJB', 'rRup', 'rX', 'vs30', 'vsInferred', 'z1pt0', 'z2pt5']
+# Rupture attributes used by the vectorized (array) GMPE evaluations
+RUP_ARRAY_KEYS = ['dip', 'width', 'zTop', 'zHyp', 'aveRake']
+
+
+def get_periods_from_im_info(im_info):  # noqa: D103
+    if 'SA' in im_info['Type']:
+        return list(im_info.get('Periods', None))
+    if im_info['Type'] in ['PGA', 'PGV']:
+        return [im_info['Type']]
+    print(f'The IM type {im_info["Type"]} is not supported')  # noqa: T201
+    return []
+
+
+def site_info_to_arrays(site_info):
+    """Convert a list of site dicts (as used by get_IM) to a dict of arrays.
+
+    site_info can also be a dict of array-like values already, in which case
+    the values are cast to float arrays. Missing attributes are set to nan.
+    """
+    if isinstance(site_info, dict):
+        return {
+            key: np.asarray(site_info.get(key, np.nan), dtype=float)
+            for key in SITE_ARRAY_KEYS
+        }
+    return {
+        key: np.array([cur_site.get(key, np.nan) for cur_site in site_info], dtype=float)
+        for key in SITE_ARRAY_KEYS
+    }
+
+
+def prepare_array_inputs(Mw, site_rup_dict, site_info):  # noqa: N803
+    """Reshape magnitude, rupture and site inputs for broadcasting.
+
+    Mw is a scalar (one rupture) or a 1-D array (num_rup ruptures). The values
+    in site_rup_dict follow the shape of Mw. Site-rupture distances (rJB, rRup,
+    rX) in site_info are (num_site,) or (num_rup, num_site) arrays, the other
+    site attributes are (num_site,) arrays. All outputs are 3-D arrays that
+    broadcast against per-period coefficients to (num_rup, num_site, num_period).
+    Returns the magnitude, the rupture dict, the site dict and whether Mw was a
+    batch of ruptures.
+    """
+    mw = np.asarray(Mw, dtype=float)
+    batch = mw.ndim > 0
+    mw = mw.reshape(-1, 1, 1)
+    rup = {
+        key: np.asarray(site_rup_dict.get(key, np.nan), dtype=float).reshape(-1, 1, 1)
+        for key in RUP_ARRAY_KEYS
+    }
+    site = site_info_to_arrays(site_info)
+    num_site = site['vs30'].shape[-1]
+    for key in SITE_ARRAY_KEYS:
+        site[key] = np.broadcast_to(site[key], site[key].shape[:-1] + (num_site,))
+        site[key] = site[key].reshape(-1, num_site, 1)
+    return mw, rup, site, batch
+
+
+def get_fault_masks_from_rake(rake):
+    """Vectorized getFaultFromRake, returning (reverse, normal) boolean masks."""
+    rake = np.asarray(rake, dtype=float)
+    strike_slip = (rake >= 135) | (rake <= -135) | ((rake >= -45) & (rake <= 45))  # noqa: PLR2004
+    reverse = ~strike_slip & (rake >= 45) & (rake <= 135)  # noqa: PLR2004
+    normal = ~strike_slip & ~reverse
+    return reverse, normal
+
+
+def format_array_result(mean, std, inter_std, intra_std, batch):  # noqa: D103
+    res = {
+        'Mean': mean,
+        'TotalStdDev': std,
+        'InterEvStdDev': inter_std,
+        'IntraEvStdDev': intra_std,
+    }
+    # some terms do not depend on the site, expand them to the full shape
+    shape = np.broadcast_shapes(*[np.shape(x) for x in res.values()])
+    for key, value in res.items():
+        value = np.broadcast_to(np.asarray(value, dtype=float), shape).copy()  # noqa: PLW2901
+        res[key] = value if batch else value[0]
+    return res
+
+
+def get_coeff_table(gmpe, imt_list):
+    """Collect the coefficients of a GMPE for a list of IM types into arrays.
+
+    The tables are cached on the GMPE object by IM type list so that they are
+    only assembled once for a run. Each entry is a (num_period,) array; the
+    extra entries 'T' (period, nan for PGA/PGV) and 'isSA' flag the IM types.
+    """
+    key = tuple(imt_list)
+    cache = gmpe.__dict__.setdefault('coeffTables', {})
+    if key in cache:
+        return cache[key]
+    for imt in imt_list:
+        if imt not in gmpe.supportedImt:
+            # exits with the list of supported IM types
+            gmpe.setIMT(imt)
+    table = {
+        name: np.array([gmpe.coeff[name][imt] for imt in imt_list], dtype=float)
+        for name in gmpe.coeff
+    }
+    table['isSA'] = np.array([imt not in ['PGA', 'PGV'] for imt in imt_list])
+    table['T'] = np.array(
+        [float(imt) if imt not in ['PGA', 'PGV'] else np.nan for imt in imt_list]
+    )
+    cache[key] = table
+    return table
+
 
 # Chiou and Young (2014)
 class chiou_youngs_2013:  # noqa: D101
@@ -305,6 +413,102 @@ class chiou_youngs_2013:  # noqa: D101
         }
         return saResult  # noqa: RET504
 
+    def calc_array(self, Mw, rJB, rRup, rX, dip, zTop, vs30, vsInf, z1p0, reverse, normal, cf):  # noqa: N803
+        """Array version of calc: inputs broadcast against the (num_period,)
+        coefficient arrays in cf (see get_coeff_table).
+        """  # noqa: D205
+        # Magnitude scaling
+        r1 = cf['c1'] + self.C2 * (Mw - 6.0) + ((self.C2 - cf['c3']) / cf['cn']) * np.log(
+            1.0 + np.exp(cf['cn'] * (cf['cM'] - Mw))
+        )
+        # Near-field magnitude and distance scaling
+        r2 = self.C4 * np.log(
+            rRup + cf['c5'] * np.cosh(cf['c6'] * np.maximum(Mw - cf['cHM'], 0.0))
+        )
+        # Far-field distance scaling
+        gamma = cf['cgamma1'] + cf['cgamma2'] / np.cosh(
+            np.maximum(Mw - cf['cgamma3'], 0.0)
+        )
+        r3 = self.dC4 * np.log(np.sqrt(rRup * rRup + self.CRBsq)) + rRup * gamma
+        # Scaling with other source variables
+        coshM = np.cosh(2 * np.maximum(Mw - 4.5, 0))  # noqa: N806
+        cosDelta = np.cos(dip * np.pi / 180.0)  # noqa: N806
+        # Center zTop on the zTop-M relation
+        mzTop = np.where(  # noqa: N806
+            reverse,
+            np.where(Mw <= 5.849, 2.704, np.maximum(2.704 - 1.226 * (Mw - 5.849), 0)),  # noqa: PLR2004
+            np.where(Mw <= 4.970, 2.673, np.maximum(2.673 - 1.136 * (Mw - 4.970), 0)),  # noqa: PLR2004
+        )
+        deltaZtop = zTop - mzTop * mzTop  # noqa: N806
+        r4 = (cf['c7'] + cf['c7b'] / coshM) * deltaZtop + (
+            self.C11 + cf['c11b'] / coshM
+        ) * cosDelta * cosDelta
+        r4 = r4 + np.where(reverse, cf['c1a'] + cf['c1c'] / coshM, 0.0)
+        r4 = r4 + np.where(normal, cf['c1b'] + cf['c1d'] / coshM, 0.0)
+        # Hanging-wall effect
+        r5 = np.where(
+            rX >= 0.0,
+            cf['c9']
+            * cosDelta
+            * (cf['c9a'] + (1.0 - cf['c9a']) * np.tanh(rX / cf['c9b']))
+            * (1 - np.sqrt(rJB * rJB + zTop * zTop) / (rRup + 1.0)),
+            0.0,
+        )
+        saRef = np.exp(r1 + r2 + r3 + r4 + r5)  # noqa: N806
+        # Soil effect: nonlinear response base
+        soilNonLin = cf['phi2'] * (  # noqa: N806
+            np.exp(cf['phi3'] * (np.minimum(vs30, 1130.0) - 360.0))
+            - np.exp(cf['phi3'] * (1130.0 - 360.0))
+        )
+        # Soil effect: linear response
+        sl = cf['phi1'] * np.minimum(np.log(vs30 / 1130.0), 0.0)
+        snl = soilNonLin * np.log((saRef + cf['phi4']) / cf['phi4'])
+        # Soil effect: sediment thickness
+        dZ1 = np.where(np.isnan(z1p0), 0.0, 1000.0 * (z1p0 - self.calcZ1ref(vs30)))  # noqa: N806
+        rkdepth = cf['phi5'] * (1.0 - np.exp(-dZ1 / self.PHI6))
+        mean = np.log(saRef) + sl + snl + rkdepth
+        # Aleatory uncertainty model
+        NL0 = soilNonLin * saRef / (saRef + cf['phi4'])  # noqa: N806
+        NL0sq = (1 + NL0) * (1 + NL0)  # noqa: N806
+        mTest = np.minimum(np.maximum(Mw, 5.0), 6.5) - 5.0  # noqa: N806
+        tau = cf['tau1'] + (cf['tau2'] - cf['tau1']) / 1.5 * mTest
+        tauSq = tau * tau * NL0sq  # noqa: N806
+        sigmaNL0 = cf['sigma1'] + (cf['sigma2'] - cf['sigma1']) / 1.5 * mTest  # noqa: N806
+        vsTerm = np.where(vsInf, cf['sigma3'], 0.7)  # noqa: N806
+        sigmaNL0 = sigmaNL0 * np.sqrt(vsTerm + NL0sq)  # noqa: N806
+        phiSq = sigmaNL0 * sigmaNL0  # noqa: N806
+        stdDev = np.sqrt(tauSq + phiSq)  # noqa: N806
+        return mean, stdDev, np.sqrt(tauSq), np.sqrt(phiSq)
+
+    def get_IM_array(self, Mw, site_rup_dict, site_info, im_info):  # noqa: N802, N803
+        """Vectorized get_IM for all sites, periods (and ruptures) at once.
+
+        Mw is a scalar for a single rupture (results are (num_site, num_period)
+        arrays) or a 1-D array for a batch of ruptures (results are
+        (num_rup, num_site, num_period) arrays), see prepare_array_inputs.
+        """
+        cur_T = get_periods_from_im_info(im_info)  # noqa: N806
+        cf = get_coeff_table(self, cur_T)
+        start = time.process_time_ns()
+        mw, rup, site, batch = prepare_array_inputs(Mw, site_rup_dict, site_info)
+        reverse, normal = get_fault_masks_from_rake(rup['aveRake'])
+        res = self.calc_array(
+            mw,
+            site['rJB'],
+            site['rRup'],
+            site['rX'],
+            rup['dip'],
+            rup['zTop'],
+            site['vs30'],
+            site['vsInferred'].astype(bool),
+            site['z1pt0'] / 1000.0,
+            reverse,
+            normal,
+            cf,
+        )
+        self.timeCalc += time.process_time_ns() - start
+        return format_array_result(*res, batch)
+
         # Station
         # if station_info['Type'] == 'SiteList':
         #     siteSpec = station_info['SiteList']
@@ -618,6 +822,206 @@ class abrahamson_silva_kamai_2014:  # noqa: D101
         }
         return saResult  # noqa: RET504
 
+    def getV1_array(self, cf):  # noqa: N802, D102
+        T = cf['T']  # noqa: N806
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v1 = np.where(
+                T >= 3.0,  # noqa: PLR2004
+                800.0,
+                np.where(
+                    T > 0.5,  # noqa: PLR2004
+                    np.exp(-0.35 * np.log(T / 0.5) + np.log(1500.0)),
+                    1500.0,
+                ),
+            )
+        return np.where(cf['isSA'], v1, 1500.0)
+
+    def calcSoilTerm_array(self, vs30, z1p0, cf):  # noqa: N802, D102
+        # np.interp over the Vs30 bins with period-dependent coefficients
+        VS_BINS = np.array([150.0, 250.0, 400.0, 700.0, 1000.0])  # noqa: N806
+        vsCoeff = np.stack([cf['a43'], cf['a44'], cf['a45'], cf['a46'], cf['a46']])  # noqa: N806
+        vs = vs30[..., 0]
+        idx = np.clip(np.searchsorted(VS_BINS, vs, side='right') - 1, 0, 3)
+        w = np.clip((vs - VS_BINS[idx]) / (VS_BINS[idx + 1] - VS_BINS[idx]), 0, 1)
+        z1c = vsCoeff[idx] * (1.0 - w[..., None]) + vsCoeff[idx + 1] * w[..., None]
+        z1ref = self.calcZ1ref(vs30)
+        with np.errstate(invalid='ignore'):
+            f10 = z1c * np.log((z1p0 + 0.01) / (z1ref + 0.01))
+        return np.where(np.isnan(z1p0), 0.0, f10)
+
+    def calcValues_array(  # noqa: N802
+        self,
+        Mw,  # noqa: N803
+        rJB,  # noqa: N803
+        rRup,  # noqa: N803
+        rX,  # noqa: N803
+        dip,
+        width,
+        zTop,  # noqa: N803
+        vs30,
+        vsInferred,  # noqa: N803
+        z1p0,
+        normal,
+        cf,
+    ):
+        """Array version of calcValues: inputs broadcast against the
+        (num_period,) coefficient arrays in cf (see get_coeff_table).
+        """  # noqa: D205
+        c4mag = np.where(
+            Mw > 5,  # noqa: PLR2004
+            self.C4,
+            np.where(Mw > 4, self.C4 - (self.C4 - 1.0) * (5.0 - Mw), 1.0),  # noqa: PLR2004
+        )
+        # -- Equation 3
+        R = np.sqrt(rRup * rRup + c4mag * c4mag)  # noqa: N806
+        # -- Equation 2
+        MaxMwSq = (8.5 - Mw) * (8.5 - Mw)  # noqa: N806
+        MwM1 = Mw - cf['M1']  # noqa: N806
+        M2M1 = self.M2 - cf['M1']  # noqa: N806
+        MaxM2Sq = (8.5 - self.M2) * (8.5 - self.M2)  # noqa: N806
+        f1 = cf['a1'] + cf['a17'] * rRup
+        f1 = f1 + np.where(
+            Mw > cf['M1'],
+            self.A5 * MwM1
+            + cf['a8'] * MaxMwSq
+            + (cf['a2'] + self.A3 * MwM1) * np.log(R),
+            np.where(
+                Mw >= self.M2,
+                self.A4 * MwM1
+                + cf['a8'] * MaxMwSq
+                + (cf['a2'] + self.A3 * MwM1) * np.log(R),
+                self.A4 * M2M1
+                + cf['a8'] * MaxM2Sq
+                + cf['a6'] * (Mw - self.M2)
+                + (cf['a2'] + self.A3 * M2M1) * np.log(R),
+            ),
+        )
+
+        # Hanging Wall Model
+        T1 = np.where(dip > 30.0, (90.0 - dip) / 45, 1.33333333)  # noqa: N806, PLR2004
+        dM = Mw - 6.5  # noqa: N806
+        T2 = np.where(  # noqa: N806
+            Mw >= 6.5,  # noqa: PLR2004
+            1 + self.A2_HW * dM,
+            1 + self.A2_HW * dM - (1 - self.A2_HW) * dM * dM,
+        )
+        r1 = width * np.cos(dip * np.pi / 180.0)
+        r2 = 3 * r1
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rXr1 = rX / r1  # noqa: N806
+            T3 = np.where(  # noqa: N806
+                r1 == 0,
+                0.0,
+                np.where(
+                    rX <= r1,
+                    self.H1 + self.H2 * rXr1 + self.H3 * rXr1 * rXr1,
+                    np.where(rX <= r2, 1 - (rX - r1) / (r2 - r1), 0.0),
+                ),
+            )
+        T4 = 1 - (zTop * zTop) / 100.0  # noqa: N806
+        T5 = np.where(rJB == 0.0, 1.0, 1 - rJB / 30.0)  # noqa: N806
+        hw = (rJB < 30) & (rX >= 0.0) & (Mw > 5.5) & (zTop <= 10.0)  # noqa: PLR2004
+        f4 = np.where(hw, cf['a13'] * T1 * T2 * T3 * T4 * T5, 0.0)
+        f6 = cf['a15'] * np.where(zTop < 20.0, zTop / 20.0, 1.0)  # noqa: PLR2004
+        f78 = np.where(
+            normal,
+            np.where(
+                Mw > 5.0,  # noqa: PLR2004
+                cf['a12'],
+                np.where(Mw >= 4.0, cf['a12'] * (Mw - 4), 0.0),  # noqa: PLR2004
+            ),
+            0.0,
+        )
+        # -- Equation 17
+        f10 = self.calcSoilTerm_array(vs30, z1p0, cf)
+
+        # Site Response Model
+        v1 = self.getV1_array(cf)  # -- Equation 9
+        vs30s = np.minimum(v1, vs30)  # -- Equation 8
+        # Site term -- Equation 7
+        nonlin = vs30 < cf['Vlin']
+        vs30s_rk = np.where(v1 > self.VS_RK, self.VS_RK, v1)
+        f5_rk = (cf['a10'] + cf['b'] * self.N) * np.log(vs30s_rk / cf['Vlin'])
+        saRock = np.where(nonlin, np.exp(f1 + f78 + f5_rk + f4 + f6), 0.0)  # noqa: N806
+        f5 = np.where(
+            nonlin,
+            cf['a10'] * np.log(vs30s / cf['Vlin'])
+            - cf['b'] * np.log(saRock + cf['c'])
+            + cf['b'] * np.log(saRock + cf['c'] * np.power(vs30s / cf['Vlin'], self.N)),
+            (cf['a10'] + cf['b'] * self.N) * np.log(vs30s / cf['Vlin']),
+        )
+        # total model (no aftershock f11) -- Equation 1
+        mean = f1 + f78 + f5 + f4 + f6 + f10
+
+        # ****** Aleatory uncertainty model ******
+        # Intra-event term -- Equation 24
+        s1 = np.where(vsInferred, cf['s1e'], cf['s1m'])
+        s2 = np.where(vsInferred, cf['s2e'], cf['s2m'])
+        phiAsq = np.where(  # noqa: N806
+            Mw < 4.0,  # noqa: PLR2004
+            s1,
+            np.where(Mw > 6.0, s2, s1 + ((s2 - s1) / 2) * (Mw - 4.0)),  # noqa: PLR2004
+        )
+        phiAsq = phiAsq * phiAsq  # noqa: N806
+        # Inter-event term -- Equation 25
+        tauB = np.where(  # noqa: N806
+            Mw < 5.0,  # noqa: PLR2004
+            cf['s3'],
+            np.where(
+                Mw > 7.0,  # noqa: PLR2004
+                cf['s4'],
+                cf['s3'] + ((cf['s4'] - cf['s3']) / 2) * (Mw - 5.0),
+            ),
+        )
+        # Intra-event term with site amp variability removed -- Equation 27
+        phiBsq = phiAsq - self.PHI_AMP_SQ  # noqa: N806
+        # Partial deriv. of ln(soil amp) w.r.t. ln(SA1180) -- Equation 30
+        dAmp = np.where(  # noqa: N806
+            vs30 >= cf['Vlin'],
+            0.0,
+            (-cf['b'] * saRock) / (saRock + cf['c'])
+            + (cf['b'] * saRock)
+            / (saRock + cf['c'] * np.power(vs30 / cf['Vlin'], self.N)),
+        )
+        dAmp_p1 = dAmp + 1.0  # noqa: N806
+        # phi squared, with non-linear effects -- Equation 28
+        phiSq = phiBsq * dAmp_p1 * dAmp_p1 + self.PHI_AMP_SQ  # noqa: N806
+        #  tau squared, with non-linear effects -- Equation 29
+        tau = tauB * dAmp_p1
+        # total std dev
+        stdDev = np.sqrt(phiSq + tau * tau)  # noqa: N806
+        # same output order as calcValues
+        return mean, stdDev, np.sqrt(phiSq), tau
+
+    def get_IM_array(self, Mw, site_rup_dict, site_info, im_info):  # noqa: N802, N803
+        """Vectorized get_IM for all sites, periods (and ruptures) at once.
+
+        Mw is a scalar for a single rupture (results are (num_site, num_period)
+        arrays) or a 1-D array for a batch of ruptures (results are
+        (num_rup, num_site, num_period) arrays), see prepare_array_inputs.
+        """
+        cur_T = get_periods_from_im_info(im_info)  # noqa: N806
+        cf = get_coeff_table(self, cur_T)
+        start = time.process_time_ns()
+        mw, rup, site, batch = prepare_array_inputs(Mw, site_rup_dict, site_info)
+        _, normal = get_fault_masks_from_rake(rup['aveRake'])
+        res = self.calcValues_array(
+            mw,
+            site['rJB'],
+            site['rRup'],
+            site['rX'],
+            rup['dip'],
+            rup['width'],
+            rup['zTop'],
+            site['vs30'],
+            site['vsInferred'].astype(bool),
+            site['z1pt0'] / 1000.0,
+            normal,
+            cf,
+        )
+        self.timeCalc += time.process_time_ns() - start
+        return format_array_result(*res, batch)
+
 
 # Boore, Stewart, Seyhan, Atkinson (2014)
 class boore_etal_2014:  # noqa: D101
@@ -850,6 +1254,115 @@ class boore_etal_2014:  # noqa: D101
         }
         return saResult  # noqa: RET504
 
+    def calcSourceTerm_array(self, Mw, reverse, normal, cf):  # noqa: N802, N803, D102
+        Fe = np.where(reverse, cf['e3'], np.where(normal, cf['e2'], cf['e1']))  # noqa: N806
+        MwMh = Mw - cf['Mh']  # noqa: N806
+        return Fe + np.where(
+            Mw <= cf['Mh'], cf['e4'] * MwMh + cf['e5'] * MwMh * MwMh, cf['e6'] * MwMh
+        )
+
+    def calcPathTerm_array(self, Mw, R, cf):  # noqa: N802, N803, D102
+        return (cf['c1'] + cf['c2'] * (Mw - self.M_REF)) * np.log(R / self.R_REF) + (
+            cf['c3'] + self.DC3_CA_TW
+        ) * (R - self.R_REF)
+
+    def calc_array(self, Mw, rJB, vs30, z1p0, reverse, normal, cf, cf_pga):  # noqa: N803
+        """Array version of calc: inputs broadcast against the (num_period,)
+        coefficient arrays in cf (see get_coeff_table), cf_pga holds the PGA
+        coefficients used for the rock PGA.
+        """  # noqa: D205
+        # rock PGA
+        R_pga = np.sqrt(rJB * rJB + cf_pga['h'] * cf_pga['h'])  # noqa: N806
+        pgaRock = np.exp(  # noqa: N806
+            self.calcSourceTerm_array(Mw, reverse, normal, cf_pga)
+            + self.calcPathTerm_array(Mw, R_pga, cf_pga)
+        )
+        # mean
+        Fe = self.calcSourceTerm_array(Mw, reverse, normal, cf)  # noqa: N806
+        R = np.sqrt(rJB * rJB + cf['h'] * cf['h'])  # noqa: N806
+        Fp = self.calcPathTerm_array(Mw, R, cf)  # noqa: N806
+        lnFlin = cf['c'] * np.log(np.minimum(vs30, cf['Vc']) / self.V_REF)  # noqa: N806
+        f2 = cf['f4'] * (
+            np.exp(cf['f5'] * (np.minimum(vs30, 760.0) - 360.0))
+            - np.exp(cf['f5'] * (760.0 - 360.0))
+        )
+        lnFnl = self.F1 + f2 * np.log((pgaRock + self.F3) / self.F3)  # noqa: N806
+        DZ1 = np.where(np.isnan(z1p0), 0.0, z1p0 - self.calcZ1ref(vs30))  # noqa: N806
+        with np.errstate(invalid='ignore', divide='ignore'):
+            Fdz1 = np.where(  # noqa: N806
+                cf['isSA'] & (cf['T'] >= 0.65),  # noqa: PLR2004
+                np.where((cf['f7'] / cf['f6']) >= DZ1, cf['f6'] * DZ1, cf['f7']),
+                0.0,
+            )
+        mean = Fe + Fp + lnFlin + lnFnl + Fdz1
+        # phi
+        phiM = np.where(  # noqa: N806
+            Mw >= 5.5,  # noqa: PLR2004
+            cf['phi2'],
+            np.where(
+                Mw <= 4.5,  # noqa: PLR2004
+                cf['phi1'],
+                cf['phi1'] + (cf['phi2'] - cf['phi1']) * (Mw - 4.5),
+            ),
+        )
+        with np.errstate(invalid='ignore', divide='ignore'):
+            phiMR = phiM + np.where(  # noqa: N806
+                rJB > cf['R2'],
+                cf['dPhiR'],
+                np.where(
+                    rJB > cf['R1'],
+                    cf['dPhiR'] * (np.log(rJB / cf['R1']) / np.log(cf['R2'] / cf['R1'])),
+                    0.0,
+                ),
+            )
+        phi = phiMR - np.where(
+            vs30 <= self.V1,
+            cf['dPhiV'],
+            np.where(
+                vs30 < self.V2,
+                cf['dPhiV'] * (np.log(self.V2 / vs30) / np.log(self.V2 / self.V1)),
+                0.0,
+            ),
+        )
+        # tau
+        tau = np.where(
+            Mw >= 5.5,  # noqa: PLR2004
+            cf['tau2'],
+            np.where(
+                Mw <= 4.5,  # noqa: PLR2004
+                cf['tau1'],
+                cf['tau1'] + (cf['tau2'] - cf['tau1']) * (Mw - 4.5),
+            ),
+        )
+        stdDev = self.calcStdDev(phi, tau)  # noqa: N806
+        return mean, stdDev, tau, phi
+
+    def get_IM_array(self, Mw, site_rup_dict, site_info, im_info):  # noqa: N802, N803
+        """Vectorized get_IM for all sites, periods (and ruptures) at once.
+
+        Mw is a scalar for a single rupture (results are (num_site, num_period)
+        arrays) or a 1-D array for a batch of ruptures (results are
+        (num_rup, num_site, num_period) arrays), see prepare_array_inputs.
+        """
+        cur_T = get_periods_from_im_info(im_info)  # noqa: N806
+        cf = get_coeff_table(self, cur_T)
+        cf_pga = get_coeff_table(self, ['PGA'])
+        start = time.process_time_ns()
+        mw, rup, site, batch = prepare_array_inputs(Mw, site_rup_dict, site_info)
+        reverse, normal = get_fault_masks_from_rake(rup['aveRake'])
+        res = self.calc_array(
+            mw,
+            site['rJB'],
+            site['vs30'],
+            site['z1pt0'] / 1000.0,
+            reverse,
+            normal,
+            cf,
+            cf_pga,
+        )
+        self.timeCalc += time.process_time_ns() - start
+        return format_array_result(*res, batch)
+
 
 # Campbell & Bozorgnia (2014)
 class campbell_bozorgnia_2014:  # noqa: D101
@@ -1169,3 +1682,194 @@ class campbell_bozorgnia_2014:  # noqa: D101
             'IntraEvStdDev': IntraEvStdDevList,
         }
         return saResult  # noqa: RET504
+
+    def calcMean_array(  # noqa: N802
+        self,
+        Mw,  # noqa: N803
+        rJB,  # noqa: N803
+        rRup,  # noqa: N803
+        rX,  # noqa: N803
+        dip,
+        width,
+        zTop,  # noqa: N803
+        zHyp,  # noqa: N803
+        vs30,
+        z2p5,
+        normal,
+        pgaRock,  # noqa: N803
+        cf,
+    ):
+        """Array version of calcMean: inputs broadcast against the
+        (num_period,) coefficient arrays in cf (see get_coeff_table).
+        """  # noqa: D205
+        Fmag = (  # noqa: N806
+            cf['c0']
+            + cf['c1'] * Mw
+            + np.where(Mw > 4.5, cf['c2'] * (Mw - 4.5), 0.0)  # noqa: PLR2004
+            + np.where(Mw > 5.5, cf['c3'] * (Mw - 5.5), 0.0)  # noqa: PLR2004
+            + np.where(Mw > 6.5, cf['c4'] * (Mw - 6.5), 0.0)  # noqa: PLR2004
+        )
+        r = np.sqrt(rRup * rRup + cf['c7'] * cf['c7'])
+        Fr = (cf['c5'] + cf['c6'] * Mw) * np.log(r)  # noqa: N806
+        Fflt = np.where(  # noqa: N806
+            normal & (Mw > 4.5),  # noqa: PLR2004
+            cf['c9'] * np.where(Mw <= 5.5, Mw - 4.5, 1.0),  # noqa: PLR2004
+            0.0,
+        )
+        r1 = width * np.cos(np.radians(dip))
+        r2 = 62.0 * Mw - 350.0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rXr1 = np.where(r1 != 0, rX / r1, 0.0)  # noqa: N806
+            rXr2r1 = (rX - r1) / (r2 - r1)  # noqa: N806
+            f1_rX = cf['h1'] + cf['h2'] * rXr1 + cf['h3'] * (rXr1 * rXr1)  # noqa: N806
+            f2_rX = self.H4 + cf['h5'] * (rXr2r1) + cf['h6'] * rXr2r1 * rXr2r1  # noqa: N806
+            Fhw_rX = np.where(rX >= r1, np.maximum(f2_rX, 0.0), f1_rX)  # noqa: N806
+            Fhw_rRup = np.where(rRup == 0.0, 1.0, (rRup - rJB) / rRup)  # noqa: N806
+        Fhw_m = (1.0 + cf['a2'] * (Mw - 6.5)) * np.where(Mw <= 6.5, Mw - 5.5, 1.0)  # noqa: N806, PLR2004
+        Fhw_z = 1.0 - 0.06 * zTop  # noqa: N806
+        Fhw_d = (90.0 - dip) / 45.0  # noqa: N806
+        Fhw = np.where(  # noqa: N806
+            (rX >= 0.0) & (Mw > 5.5) & (zTop <= 16.66),  # noqa: PLR2004
+            cf['c10'] * Fhw_rX * Fhw_rRup * Fhw_m * Fhw_z * Fhw_d,
+            0.0,
+        )
+        vsk1 = vs30 / cf['k1']
+        Fsite = np.where(  # noqa: N806
+            vs30 <= cf['k1'],
+            cf['c11'] * np.log(vsk1)
+            + cf['k2']
+            * (
+                np.log(pgaRock + self.C * np.power(vsk1, self.N))
+                - np.log(pgaRock + self.C)
+            ),
+            (cf['c11'] + cf['k2'] * self.N) * np.log(vsk1),
+        )
+        z2p5 = np.where(np.isnan(z2p5), self.calcZ25ref(vs30), z2p5)
+        Fsed = np.where(  # noqa: N806
+            z2p5 <= 1.0,
+            cf['c14'] * (z2p5 - 1.0),
+            np.where(
+                z2p5 > 3.0,  # noqa: PLR2004
+                cf['c16'] * cf['k3'] * np.exp(-0.75) * (1.0 - np.exp(-0.25 * (z2p5 - 3.0))),
+                0.0,
+            ),
+        )
+        Fhyp = np.clip(zHyp - 7.0, 0.0, 13.0) * np.where(  # noqa: N806
+            Mw <= 5.5,  # noqa: PLR2004
+            cf['c17'],
+            np.where(
+                Mw <= 6.5,  # noqa: PLR2004
+                cf['c17'] + (cf['c18'] - cf['c17']) * (Mw - 5.5),
+                cf['c18'],
+            ),
+        )
+        Fdip = np.where(  # noqa: N806
+            Mw > 5.5,  # noqa: PLR2004
+            0.0,
+            np.where(Mw > 4.5, cf['c19'] * (5.5 - Mw) * dip, cf['c19'] * dip),  # noqa: PLR2004
+        )
+        Fatn = np.where(rRup > 80.0, cf['c20'] * (rRup - 80.0), 0.0)  # noqa: N806, PLR2004
+        return Fmag + Fr + Fflt + Fhw + Fsite + Fsed + Fhyp + Fdip + Fatn
+
+    def calc_array(  # noqa: D102
+        self,
+        Mw,  # noqa: N803
+        rJB,  # noqa: N803
+        rRup,  # noqa: N803
+        rX,  # noqa: N803
+        dip,
+        width,
+        zTop,  # noqa: N803
+        zHyp,  # noqa: N803
+        vs30,
+        z2p5,
+        normal,
+        cf,
+        cf_pga,
+    ):
+        geo = (Mw, rJB, rRup, rX, dip, width, zTop, zHyp)
+        # rock PGA, only needed where vs30 < k1
+        nonlin = vs30 < cf['k1']
+        pgaRock = np.where(  # noqa: N806
+            nonlin,
+            np.exp(self.calcMean_array(*geo, 1100.0, 0.398, normal, 0.0, cf_pga)),
+            0.0,
+        )
+        mean = self.calcMean_array(*geo, vs30, z2p5, normal, pgaRock, cf)
+        # short-period SA is not allowed to fall below PGA
+        short = cf['isSA'] & (cf['T'] <= 0.25)  # noqa: PLR2004
+        if np.any(short):
+            pgaMean = self.calcMean_array(  # noqa: N806
+                *geo, vs30, z2p5, normal, pgaRock, cf_pga
+            )
+            mean = np.where(short, np.maximum(mean, pgaMean), mean)
+        vsk1 = vs30 / cf['k1']
+        alpha = np.where(
+            nonlin,
+            cf['k2']
+            * pgaRock
+            * (
+                1 / (pgaRock + self.C * np.power(vsk1, self.N))
+                - 1 / (pgaRock + self.C)
+            ),
+            0.0,
+        )
+        lo = Mw <= 4.5  # noqa: PLR2004
+        hi = Mw >= 5.5  # noqa: PLR2004
+
+        def mag_dep(lo_val, hi_val):
+            return np.where(
+                lo, lo_val, np.where(hi, hi_val, self.stdMagDep(lo_val, hi_val, Mw))
+            )
+
+        phi_lnY = mag_dep(cf['phi1'], cf['phi2'])  # noqa: N806
+        phi_lnPGAB = mag_dep(self.phi_lo_PGA, self.phi_hi_PGA)  # noqa: N806
+        phi_lnYB = np.sqrt(phi_lnY * phi_lnY - self.PHI_LNAF_SQ)  # noqa: N806
+        phi_lnPGAB = np.sqrt(phi_lnPGAB * phi_lnPGAB - self.PHI_LNAF_SQ)  # noqa: N806
+        aPhi_lnPGAB = alpha * phi_lnPGAB  # noqa: N806
+        phiSq = (  # noqa: N806
+            phi_lnY * phi_lnY
+            + aPhi_lnPGAB * aPhi_lnPGAB
+            + 2.0 * cf['rho'] * phi_lnYB * aPhi_lnPGAB
+        )
+        tau_lnYB = mag_dep(cf['tau1'], cf['tau2'])  # noqa: N806
+        tau_lnPGAB = mag_dep(self.tau_lo_PGA, self.tau_hi_PGA)  # noqa: N806
+        alphaTau = alpha * tau_lnPGAB  # noqa: N806
+        tauSq = (  # noqa: N806
+            tau_lnYB * tau_lnYB
+            + alphaTau * alphaTau
+            + 2.0 * alpha * cf['rho'] * tau_lnYB * tau_lnPGAB
+        )
+        stdDev = np.sqrt(phiSq + tauSq)  # noqa: N806
+        return mean, stdDev, np.sqrt(tauSq), np.sqrt(phiSq)
+
+    def get_IM_array(self, Mw, site_rup_dict, site_info, im_info):  # noqa: N802, N803
+        """Vectorized get_IM for all sites, periods (and ruptures) at once.
+
+        Mw is a scalar for a single rupture (results are (num_site, num_period)
+        arrays) or a 1-D array for a batch of ruptures (results are
+        (num_rup, num_site, num_period) arrays), see prepare_array_inputs.
+        """
+        cur_T = get_periods_from_im_info(im_info)  # noqa: N806
+        cf = get_coeff_table(self, cur_T)
+        cf_pga = get_coeff_table(self, ['PGA'])
+        start = time.process_time_ns()
+        mw, rup, site, batch = prepare_array_inputs(Mw, site_rup_dict, site_info)
+        _, normal = get_fault_masks_from_rake(rup['aveRake'])
+        res = self.calc_array(
+            mw,
+            site['rJB'],
+            site['rRup'],
+            site['rX'],
+            rup['dip'],
+            rup['width'],
+            rup['zTop'],
+            rup['zHyp'],
+            site['vs30'],
+            site['z2pt5'] / 1000.0,
+            normal,
+            cf,
+            cf_pga,
+        )
+        self.timeCalc += time.process_time_ns() - start
+        return format_array_result(*res, batch)
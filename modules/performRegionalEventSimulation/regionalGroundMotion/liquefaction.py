@@ -7,10 +7,9 @@ from itertools import starmap
 import geopandas as gpd
 import numpy as np
 import pandas  # noqa: ICN001
-import rasterio as rio
 import shapely
 from pyproj import CRS, Transformer
-from scipy.interpolate import interp2d
+from RasterSampler import sample_raster
 from scipy.spatial import ConvexHull
 
 
@@ -24,65 +23,9 @@ def sampleRaster(  # noqa: N802
     dtype=None,
 ):
     """Performs 2D interpolation at (x,y) pairs. Accepted interp_scheme = 'nearest', 'linear', 'cubic', and 'quintic'"""  # noqa: D400, D401
-    print(f'Sampling from the Raster File: {os.path.basename(raster_file_path)}...')  # noqa: T201, PTH119
-    invalid_value = np.nan
-    xy_crs = CRS.from_user_input(4326)
-    raster_crs = CRS.from_user_input(raster_crs)
-    with rio.open(raster_file_path) as raster_file:
-        try:
-            raster_data = raster_file.read()
-            if raster_data.shape[0] > 1:
-                warnings.warn(  # noqa: B028
-                    f'More than one band in the file {raster_file_path}, the first band is used.'
-                )
-        except:  # noqa: E722
-            sys.exit(f'Can not read data from {raster_file_path}')
-        if xy_crs != raster_crs:
-            # make transformer for reprojection
-            transformer_xy_to_data = Transformer.from_crs(
-                xy_crs, raster_crs, always_xy=True
-            )
-            # reproject and store
-            x_proj, y_proj = transformer_xy_to_data.transform(x, y)
-            x = x_proj
-            y = y_proj
-        n_sample = len(x)
-        if interp_scheme == 'nearest':
-            sample = np.array(
-                [val[0] for val in raster_file.sample(list(zip(x, y)))]
-            )
-        else:
-            # create x and y ticks for grid
-            x_tick = np.linspace(
-                raster_file.bounds.left,
-                raster_file.bounds.right,
-                raster_file.width,
-                endpoint=False,
-            )
-            y_tick = np.linspace(
-                raster_file.bounds.bottom,
-                raster_file.bounds.top,
-                raster_file.height,
-                endpoint=False,
-            )
-            # create interp2d function
-            interp_function = interp2d(
-                x_tick,
-                y_tick,
-                np.flipud(raster_file.read(1)),
-                kind=interp_scheme,
-                fill_value=invalid_value,
-            )
-            # get samples
-            sample = np.transpose(
-                [interp_function(x[i], y[i]) for i in range(n_sample)]
-            )[0]
-    # convert to target datatype
-    if dtype is not None:
-        sample = sample.astype(dtype)
-    # clean up invalid values (returned as 1e38 by NumPy)
-    sample[abs(sample) > 1e10] = invalid_value  # noqa: PLR2004
-    return sample  # noqa: DOC201, RUF100
+    return sample_raster(  # noqa: DOC201, RUF100
+        raster_file_path, raster_crs, x, y, interp_scheme=interp_scheme, dtype=dtype
+    )
 
 
 # Helper functions
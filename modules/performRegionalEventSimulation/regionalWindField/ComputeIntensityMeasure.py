@@ -38,7 +38,6 @@
 #
 
 import json
-import multiprocessing as mp
 import os
 import shutil
 import subprocess
@@ -49,7 +48,7 @@ import pandas as pd
 from WindFieldSimulation import *  # noqa: F403
 
 
-def run_model(scen, p, t, path_perturb, feat_perturb, res_mp):  # noqa: D103
+def run_model(scen, p, t, path_perturb, feat_perturb, num_rlz=1):  # noqa: D103
     model = LinearAnalyticalModel_SnaikiWu_2017(cyclone_param=p, storm_track=t)  # noqa: F405
     if scen['Terrain']:
         model.add_reference_terrain(scen['Terrain'])
@@ -57,17 +56,20 @@ def run_model(scen, p, t, path_perturb, feat_perturb, res_mp):  # noqa: D103
     model.set_measure_height(scen['MeasureHeight'])
     model.define_track(scen['TrackSimu'])
     model.add_stations(scen['StationList'])
-    delta_path = (np.random.rand(3) - 0.5) * path_perturb
-    delta_feat = np.array(p[3:6]) + (np.random.rand(3) - 0.5) * feat_perturb
-    # this just an engineering judgement that the pressure difference, moving speed, and max-wind-speed radius
-    # should not be less than 0.0 in the value.
-    delta_feat[delta_feat < 0.0] = 0.0
-    print('dLatitude, dLongtitude, dAngle = ', delta_path)  # noqa: T201
-    print('dP, v, Rmax = ', delta_feat)  # noqa: T201
-    model.set_delta_path(delta_path)
-    model.set_delta_feat(delta_feat)
-    model.compute_wind_field()
-    res_mp.append(model.get_station_data())
+    delta_path_list = []
+    delta_feat_list = []
+    for i in range(num_rlz):  # noqa: B007
+        delta_path = (np.random.rand(3) - 0.5) * path_perturb
+        delta_feat = np.array(p[3:6]) + (np.random.rand(3) - 0.5) * feat_perturb
+        # this just an engineering judgement that the pressure difference, moving speed, and max-wind-speed radius
+        # should not be less than 0.0 in the value.
+        delta_feat[delta_feat < 0.0] = 0.0
+        print('dLatitude, dLongtitude, dAngle = ', delta_path)  # noqa: T201
+        print('dP, v, Rmax = ', delta_feat)  # noqa: T201
+        delta_path_list.append(delta_path)
+        delta_feat_list.append(delta_feat)
+    # all realizations are computed in one batch
+    return model.compute_wind_field_batch(delta_path_list, delta_feat_list)
 
 
 def simulate_storm(scenarios, event_info, model_type):  # noqa: D103
@@ -96,32 +98,9 @@ def simulate_storm(scenarios, event_info, model_type):  # noqa: D103
             param = cur_scen['CycloneParam']
             track = cur_scen['StormTrack']
             np.random.seed(100)
-            # parallel
-            with mp.Manager() as manager:
-                res_mp = manager.list([])
-                proc_list = []
-                for k in range(num_per_site):  # noqa: B007
-                    proc = mp.Process(
-                        target=run_model,
-                        args=(
-                            cur_scen,
-                            param,
-                            track,
-                            path_perturb,
-                            feat_perturb,
-                            res_mp,
-                        ),
-                    )
-                    proc_list.append(proc)
-                for k in range(num_per_site):
-                    proc = proc_list[k]
-                    proc.start()
-                for k in range(num_per_site):
-                    proc = proc_list[k]
-                    proc.join()
-                # extract data
-                res = [x for x in res_mp]  # noqa: C416
-
+            res = run_model(
+                cur_scen, param, track, path_perturb, feat_perturb, num_per_site
+            )
     else:
         print(  # noqa: T201
             'ComputeIntensityMeasure: currently only supporting LinearAnalytical model'
@@ -49,10 +49,12 @@
 # tropical cyclone boundary layer. Journal of Wind Engineering and Industrial
 # Aerodynamics, 171, pp. 248-260.
 
-from itertools import starmap
+import copy
 
 import numpy as np
-from shapely.geometry import Point, Polygon
+import shapely
+from shapely.geometry import Polygon
+from shapely.strtree import STRtree
 
 
 class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
@@ -123,6 +125,7 @@ class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
         self.terrain_num = 0
         self.terrain_poly = []
         self.terrain_z0 = []
+        self.terrain_tree = None
         self.delta_path = np.zeros(3)
         self.r = []
         self.theta = []
@@ -157,20 +160,26 @@ class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
 
     def __interp_z0(self, lat, lon):
         """__interp_z0: finding the z0 at (lat, lon) by interpolating reference terrain polygons"""  # noqa: D400
-        z0 = []
+        # return
+        return self.__interp_z0_array(np.array([lat]), np.array([lon]))[0]  # noqa: DOC201, RUF100
+
+    def __interp_z0_array(self, lat, lon):
+        """__interp_z0_array: finding the z0 at arrays of (lat, lon) from the reference terrain polygons"""  # noqa: D400
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
         if not self.terrain_z0:
             # no reference terrain provided, using default reference z0 = 0.03
-            z0 = 0.03
-        else:
-            # pt = Point(lat, lon)
-            pt = Point(lon, lat)
-            for p, z in zip(self.terrain_poly, self.terrain_z0):
-                if pt.within(p):
-                    z0 = z
-            if not z0:
-                z0 = 0.01
-        # return
-        return z0  # noqa: DOC201, RUF100
+            return np.full(lat.shape, 0.03)  # noqa: DOC201, RUF100
+        if self.terrain_tree is None:
+            self.terrain_tree = STRtree(self.terrain_poly)
+        pts = shapely.points(lon.ravel(), lat.ravel())
+        pt_idx, poly_idx = self.terrain_tree.query(pts, predicate='within')
+        # the last polygon (in the input order) containing the point is used
+        last_poly = np.full(pts.shape, -1)
+        np.maximum.at(last_poly, pt_idx, poly_idx)
+        z0 = np.append(np.asarray(self.terrain_z0, dtype=float), 0.0)[last_poly]
+        z0[z0 == 0] = 0.01
+        return z0.reshape(lat.shape)
 
     def add_reference_terrain(self, terrain_info):
         """add_reference_terrainL specifying reference z0 values for a set of polygons
@@ -183,6 +192,7 @@ class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
                 self.terrain_poly.append(new_poly)
                 self.terrain_z0.append(p['properties']['z0'])
                 self.terrain_num += 1
+        self.terrain_tree = None
 
     def set_cyclone_mesh(self, mesh_info):
         """set_cyclone_meesh: meshing the cyclone in radius and cycle
@@ -273,297 +283,278 @@ class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
             station_list['z0'] = np.zeros(len(station_list['Latitude']))
 
         # adding stations (without duplication)
+        station_z0 = np.array(station_list['z0'], dtype=float)
+        no_z0 = station_z0 == 0
+        if np.any(no_z0):
+            # interpolating z0 from terrain feature
+            station_z0[no_z0] = self.__interp_z0_array(
+                np.array(station_list['Latitude'], dtype=float)[no_z0],
+                np.array(station_list['Longitude'], dtype=float)[no_z0],
+            )
         for lat, lon, z0 in zip(
-            station_list['Latitude'], station_list['Longitude'], station_list['z0']
+            station_list['Latitude'], station_list['Longitude'], station_z0
         ):
             self.station['Latitude'].append(lat)
             self.station['Longitude'].append(lon)
-            if z0 == 0:
-                # interpolating z0 from terrain feature
-                self.station['z0'].append(self.__interp_z0(lat, lon))
-            else:
-                self.station['z0'].append(z0)
+            self.station['z0'].append(float(z0))
             # updating station number
             self.station_num += 1
 
     def __calculate_heading(self):
         """__calculate_heading: computing the heading path"""  # noqa: D400
-        self.beta_c = np.zeros(len(self.track_lat_m))
-        for i in range(len(self.track_lat_m) - 1):
-            Delta = self.track_lon_m[i + 1] - self.track_lon_m[i] + self.EPS**2  # noqa: N806
-            self.beta_c[i] = (
-                -self.delta_path[2]
-                + 90.0
-                + self.RA
-                * np.arctan2(
-                    np.sin(Delta / self.RA)
-                    * np.cos(self.track_lat_m[i + 1] / self.RA),
-                    np.cos(self.track_lat_m[i] / self.RA)
-                    * np.sin(self.track_lat_m[i + 1] / self.RA)
-                    - np.sin(self.track_lat_m[i] / self.RA)
-                    * np.cos(self.track_lat_m[i + 1] / self.RA)
-                    * np.cos(Delta / self.RA),
-                )
+        self.beta_c = self.__heading(np.array([self.delta_path[2]]))[0].tolist()
+
+    def __heading(self, delta_angle):
+        """__heading: computing the heading path for an array of heading angle perturbations"""  # noqa: D400
+        track_lat = np.asarray(self.track_lat_m, dtype=float)
+        track_lon = np.asarray(self.track_lon_m, dtype=float)
+        beta_c = np.zeros((len(delta_angle), len(track_lat)))
+        Delta = track_lon[1:] - track_lon[:-1] + self.EPS**2  # noqa: N806
+        beta_c[:, :-1] = (
+            -np.asarray(delta_angle, dtype=float)[:, np.newaxis]
+            + 90.0
+            + self.RA
+            * np.arctan2(
+                np.sin(Delta / self.RA) * np.cos(track_lat[1:] / self.RA),
+                np.cos(track_lat[:-1] / self.RA) * np.sin(track_lat[1:] / self.RA)
+                - np.sin(track_lat[:-1] / self.RA)
+                * np.cos(track_lat[1:] / self.RA)
+                * np.cos(Delta / self.RA),
             )
+        )
         # positive angle values for beta_c
-        self.beta_c = [x if x >= 0 else x + 360.0 for x in self.beta_c]
+        beta_c = np.where(beta_c >= 0, beta_c, beta_c + 360.0)
         # fixing the last value
-        self.beta_c[-1] = self.beta_c[-2]
+        beta_c[:, -1] = beta_c[:, -2]
+        return beta_c  # noqa: DOC201, RUF100
+
+    def __wind_speed(self, lat, lon, beta, theta, r, pres, sped, radm, holland_b):
+        """__wind_speed: computing the wind speed at polar mesh points (theta, r) and all heights
+        lat, lon, beta, pres, sped, radm, holland_b: storm center and features, shape (n, 1)
+        theta, r: polar coordinates of the mesh points, shape (n, m)
+        return: wind speed, shape (n, m, len(zp))
+        """  # noqa: D205, D400
+        # coriolis
+        omega = 0.7292 * 1e-4
+        f = 2.0 * omega * np.sin(lat * np.pi / 180.0)
+        Ctheta = -sped * np.sin((theta - beta) / self.RA)  # noqa: N806
+        THETA = np.where((theta >= 0) & (theta <= 90), 90.0 - theta, 450 - theta)  # noqa: N806, PLR2004
+        # mesh point coordinates
+        lat_t = self.RA * np.arcsin(
+            np.sin(lat / self.RA) * np.cos(r / self.R)
+            + np.cos(lat / self.RA) * np.sin(r / self.R) * np.cos(THETA / self.RA)
+        )
+        lon_t = lon + self.RA * np.arctan2(
+            np.sin(THETA / self.RA) * np.sin(r / self.R) * np.cos(lat / self.RA),
+            np.cos(r / self.R) - np.sin(lat / self.RA) * np.sin(lat_t),
+        )
+        z0 = self.__interp_z0_array(lat_t, lon_t)
+        # configuring coefficients
+        z10 = 10.0
+        A = 11.4  # noqa: N806
+        h = A * z0**0.86
+        d = 0.75 * h
+        kappa = 0.40
+        Cd = kappa**2 / (np.log((z10 + h - d) / z0)) ** 2  # noqa: N806
+        der_p = (
+            holland_b
+            * radm**holland_b
+            * pres
+            * (r ** (-holland_b - 1))
+            * np.exp(-((radm * r ** (-1.0)) ** holland_b))
+        )
+        der_p_2 = (
+            -(holland_b + 1) * (r ** (-1.0))
+            + holland_b * radm**holland_b * (r ** (-holland_b - 1))
+        ) * der_p
+        vg1 = (
+            0.5 * (Ctheta - f * r)
+            + ((0.5 * (Ctheta - f * r)) ** 2.0 + (r / self.AIR_DENSITY) * der_p)
+            ** 0.5
+        )
+        der_vg1_r = -0.5 * f + 0.5 * (
+            (((Ctheta - f * r) / 2.0) ** 2.0 + r / self.AIR_DENSITY * der_p)
+            ** (-0.5)
+        ) * (
+            -(Ctheta - f * r) * f / 2.0
+            + 1.0 / self.AIR_DENSITY * der_p
+            + 1.0 / self.AIR_DENSITY * r * der_p_2
+        )
+        der_vg1_theta = -sped * np.cos(
+            (theta - beta) / self.RA
+        ) / 2.0 + 0.25 * sped * np.cos((theta - beta) / self.RA) * (
+            -Ctheta + f * r
+        ) * (
+            (0.5 * (Ctheta - f * r)) ** 2.0 + (r / self.AIR_DENSITY) * der_p
+        ) ** (-0.5)
+        BB = 1.0 / (2.0 * self.EDDY_VISCOCITY * r) * der_vg1_theta  # noqa: N806
+        Eta = (  # noqa: N806
+            (0.5 * (Ctheta - f * r)) ** 2.0 + (r / self.AIR_DENSITY) * der_p
+        ) ** 0.5
+        ALPHA = 1.0 / (2.0 * self.EDDY_VISCOCITY) * (f + 2.0 * vg1 / r)  # noqa: N806
+        BETA = 1.0 / (2.0 * self.EDDY_VISCOCITY) * (f + vg1 / r + der_vg1_r)  # noqa: N806
+        GAMMA = 1.0 / (2.0 * self.EDDY_VISCOCITY) * vg1 / r  # noqa: N806
+        ALPHA = ALPHA.astype(complex)  # noqa: N806
+        BETA = BETA.astype(complex)  # noqa: N806
+        XXX = -((ALPHA * BETA) ** 0.25)  # noqa: N806
+        PP_zero = XXX + 1j * XXX  # noqa: N806
+        PP_one = -complex(1, 1) * ((GAMMA + np.sqrt(ALPHA * BETA) - BB) ** 0.5)  # noqa: N806
+        PP_minus_one = -complex(1, 1) * (  # noqa: N806
+            (-GAMMA + np.sqrt(ALPHA * BETA) - BB) ** 0.5
+        )
+        X1 = (  # noqa: N806
+            PP_zero
+            + f * r * Cd / self.EDDY_VISCOCITY
+            - 2.0 * Eta * Cd / self.EDDY_VISCOCITY
+            - sped**2.0
+            * Cd**2.0
+            / (4.0 * self.EDDY_VISCOCITY**2.0 * (PP_one - np.conj(PP_minus_one)))
+            + sped**2.0
+            * Cd**2.0
+            / (4.0 * self.EDDY_VISCOCITY**2.0 * (np.conj(PP_one) - PP_minus_one))
+        )
+        X2 = (  # noqa: N806
+            -np.conj(PP_zero)
+            - f * r * Cd / self.EDDY_VISCOCITY
+            + 2.0 * Eta * Cd / self.EDDY_VISCOCITY
+            - sped**2.0
+            * Cd**2.0
+            / (4.0 * self.EDDY_VISCOCITY**2.0 * (PP_one - np.conj(PP_minus_one)))
+            + sped**2.0
+            * Cd**2.0
+            / (4.0 * self.EDDY_VISCOCITY**2.0 * (np.conj(PP_one) - PP_minus_one))
+        )
+        X3 = complex(0, -2) * Cd / self.EDDY_VISCOCITY * (Eta - f * r / 2.0) ** 2.0  # noqa: N806
+        X4 = -(  # noqa: N806
+            -PP_zero
+            - f * r * Cd / (2.0 * self.EDDY_VISCOCITY)
+            + Eta * Cd / self.EDDY_VISCOCITY
+        ) / (
+            -np.conj(PP_zero)
+            - f * r * Cd / (2.0 * self.EDDY_VISCOCITY)
+            + Eta * Cd / self.EDDY_VISCOCITY
+        )
+        A_zero = -X3 / (X1 + X2 * X4)  # noqa: N806
+        A_one = (  # noqa: N806
+            complex(0, 1)
+            * sped
+            * Cd
+            * np.exp(complex(0, -1) * beta)
+            / (4.0 * self.EDDY_VISCOCITY * (PP_one - np.conj(PP_minus_one)))
+            * (A_zero + np.conj(A_zero))
+        )
+        A_minus_one = -np.conj(A_one)  # noqa: N806
+        # all heights zp along the last axis
+        zp = np.asarray(self.zp, dtype=float)
+        sqrt_ab = np.sqrt(ALPHA / BETA)[..., np.newaxis]
+        exp_zero = A_zero[..., np.newaxis] * np.exp(PP_zero[..., np.newaxis] * zp)
+        exp_one = A_one[..., np.newaxis] * np.exp(
+            PP_one[..., np.newaxis] * zp
+            + (complex(0, 1) * theta / self.RA)[..., np.newaxis]
+        )
+        exp_minus_one = A_minus_one[..., np.newaxis] * np.exp(
+            PP_minus_one[..., np.newaxis] * zp
+            - (complex(0, 1) * theta / self.RA)[..., np.newaxis]
+        )
+        u = (
+            np.real(sqrt_ab * np.real(exp_zero))
+            + np.real(sqrt_ab * np.real(exp_one))
+            + np.real(sqrt_ab * np.real(exp_minus_one))
+        )
+        v = np.imag(exp_zero) + np.imag(exp_one) + np.imag(exp_minus_one)
+        # wind speed components
+        v1 = v + vg1[..., np.newaxis]
+        return (v1**2.0 + u**2.0) ** 0.5  # noqa: DOC201, RUF100
 
     def compute_wind_field(self):
         """compute_wind_field: computing the peak wind speed (10-min gust duraiton)"""  # noqa: D400
         print('WindFieldSimulation: running linear analytical model.')  # noqa: T201
-        # checking if all parameters are defined
-
         # calculating heading
         self.__calculate_heading()
+        station_umax = self.__station_peak_wind_speed(
+            np.array([self.delta_path], dtype=float),
+            np.array(
+                [
+                    [
+                        self.cyclone_pres,
+                        self.cyclone_sped,
+                        self.cyclone_radm,
+                        self.Holland_B,
+                    ]
+                ]
+            ),
+        )[0]
+        # copying results
+        self.station['PWS']['height'] = self.zp
+        self.station['PWS']['windspeed'] = station_umax.tolist()
+        print('WindFieldSimulation: linear analytical simulation completed.')  # noqa: T201
 
-        # initializing matrices
-        station_lat = self.station['Latitude']
-        station_lon = self.station['Longitude']
-        station_umax = np.zeros((len(station_lat), len(self.zp)))
-        u = np.zeros((len(self.theta), len(self.r), len(self.zp)))
-        v = np.zeros((len(self.theta), len(self.r), len(self.zp)))
-        vg1 = np.zeros((len(self.theta), len(self.r)))
-        z0 = np.zeros(len(self.r))
-        # looping over different storm cyclone locations
-        for i in range(len(self.track_lat_m)):
-            # location and heading
-            lat = self.track_lat_m[i] + self.delta_path[0]
-            lon = self.track_lon_m[i] - 0.3 * self.delta_path[1]
-            beta = self.beta_c[i]
-            # coriolis
-            omega = 0.7292 * 1e-4
-            f = 2.0 * omega * np.sin(lat * np.pi / 180.0)
-            # looping over different polar coordinates theta
-            for j in range(len(self.theta)):
-                Ctheta = -self.cyclone_sped * np.sin(  # noqa: N806
-                    (self.theta[j] - beta) / self.RA
-                )
-                if (self.theta[j] >= 0) and (self.theta[j] <= 90):  # noqa: PLR2004
-                    THETA = 90.0 - self.theta[j]  # noqa: N806
-                else:
-                    THETA = 450 - self.theta[j]  # noqa: N806
-
-                lat_t = self.RA * np.arcsin(
-                    np.sin(lat / self.RA) * np.cos(self.r / self.R)
-                    + np.cos(lat / self.RA)
-                    * np.sin(self.r / self.R)
-                    * np.cos(THETA / self.RA)
-                )
-                lon_t = lon + self.RA * np.arctan2(
-                    np.sin(THETA / self.RA)
-                    * np.sin(self.r / self.R)
-                    * np.cos(lat / self.RA),
-                    np.cos(self.r / self.R) - np.sin(lat / self.RA) * np.sin(lat_t),
-                )
-                # looping over different polar coordinates r
-                for k in range(len(self.r)):
-                    z0[k] = self.__interp_z0(lat_t[k], lon_t[k])
-                # configuring coefficients
-                z10 = 10.0
-                A = 11.4  # noqa: N806
-                h = A * z0**0.86
-                d = 0.75 * h
-                kappa = 0.40
-                Cd = kappa**2 / (np.log((z10 + h - d) / z0)) ** 2  # noqa: N806
-                der_p = (
-                    self.Holland_B
-                    * self.cyclone_radm**self.Holland_B
-                    * self.cyclone_pres
-                    * (self.r ** (-self.Holland_B - 1))
-                    * np.exp(
-                        -((self.cyclone_radm * self.r ** (-1.0)) ** self.Holland_B)
-                    )
-                )
-                der_p_2 = (
-                    -(self.Holland_B + 1) * (self.r ** (-1.0))
-                    + self.Holland_B
-                    * self.cyclone_radm**self.Holland_B
-                    * (self.r ** (-self.Holland_B - 1))
-                ) * der_p
-                vg1[j, :] = (
-                    0.5 * (Ctheta - f * self.r)
-                    + (
-                        (0.5 * (Ctheta - f * self.r)) ** 2.0
-                        + (self.r / self.AIR_DENSITY) * der_p
-                    )
-                    ** 0.5
-                )
-                der_vg1_r = -0.5 * f + 0.5 * (
-                    (
-                        ((Ctheta - f * self.r) / 2.0) ** 2.0
-                        + self.r / self.AIR_DENSITY * der_p
-                    )
-                    ** (-0.5)
-                ) * (
-                    -(Ctheta - f * self.r) * f / 2.0
-                    + 1.0 / self.AIR_DENSITY * der_p
-                    + 1.0 / self.AIR_DENSITY * self.r * der_p_2
-                )
-                der_vg1_theta = -self.cyclone_sped * np.cos(
-                    (self.theta[j] - beta) / self.RA
-                ) / 2.0 + 0.25 * self.cyclone_sped * np.cos(
-                    (self.theta[j] - beta) / self.RA
-                ) * (-Ctheta + f * self.r) * (
-                    (0.5 * (Ctheta - f * self.r)) ** 2.0
-                    + (self.r / self.AIR_DENSITY) * der_p
-                ) ** (-0.5)
-                BB = 1.0 / (2.0 * self.EDDY_VISCOCITY * self.r) * der_vg1_theta  # noqa: N806
-                Eta = (  # noqa: N806
-                    (0.5 * (Ctheta - f * self.r)) ** 2.0
-                    + (self.r / self.AIR_DENSITY) * der_p
-                ) ** 0.5
-                ALPHA = (  # noqa: N806
-                    1.0
-                    / (2.0 * self.EDDY_VISCOCITY)
-                    * (f + 2.0 * vg1[j, :] / self.r)
-                )
-                BETA = (  # noqa: N806
-                    1.0
-                    / (2.0 * self.EDDY_VISCOCITY)
-                    * (f + vg1[j, :] / self.r + der_vg1_r)
-                )
-                GAMMA = 1.0 / (2.0 * self.EDDY_VISCOCITY) * vg1[j, :] / self.r  # noqa: N806
-                ALPHA = np.array(  # noqa: N806
-                    [complex(x, y) for x, y in zip(np.real(ALPHA), np.imag(ALPHA))]
-                )
-                BETA = np.array(  # noqa: N806
-                    [complex(x, y) for x, y in zip(np.real(BETA), np.imag(BETA))]
-                )
-                XXX = -((ALPHA * BETA) ** 0.25)  # noqa: N806
-                YYY = -((ALPHA * BETA) ** 0.25)  # noqa: N806
-                PP_zero = np.array([complex(x, y) for x, y in zip(XXX, YYY)])  # noqa: N806
-                PP_one = -complex(1, 1) * (  # noqa: N806
-                    (GAMMA + np.sqrt(ALPHA * BETA) - BB) ** 0.5
-                )
-                PP_minus_one = -complex(1, 1) * (  # noqa: N806
-                    (-GAMMA + np.sqrt(ALPHA * BETA) - BB) ** 0.5
-                )
-                X1 = (  # noqa: N806
-                    PP_zero
-                    + f * self.r * Cd / self.EDDY_VISCOCITY
-                    - 2.0 * Eta * Cd / self.EDDY_VISCOCITY
-                    - self.cyclone_sped**2.0
-                    * Cd**2.0
-                    / (
-                        4.0
-                        * self.EDDY_VISCOCITY**2.0
-                        * (PP_one - np.conj(PP_minus_one))
-                    )
-                    + self.cyclone_sped**2.0
-                    * Cd**2.0
-                    / (
-                        4.0
-                        * self.EDDY_VISCOCITY**2.0
-                        * (np.conj(PP_one) - PP_minus_one)
-                    )
-                )
-
-                X2 = (  # noqa: N806
-                    -np.conj(PP_zero)
-                    - f * self.r * Cd / self.EDDY_VISCOCITY
-                    + 2.0 * Eta * Cd / self.EDDY_VISCOCITY
-                    - self.cyclone_sped**2.0
-                    * Cd**2.0
-                    / (
-                        4.0
-                        * self.EDDY_VISCOCITY**2.0
-                        * (PP_one - np.conj(PP_minus_one))
-                    )
-                    + self.cyclone_sped**2.0
-                    * Cd**2.0
-                    / (
-                        4.0
-                        * self.EDDY_VISCOCITY**2.0
-                        * (np.conj(PP_one) - PP_minus_one)
-                    )
-                )
-
-                X3 = (  # noqa: N806
-                    complex(0, -2)
-                    * Cd
-                    / self.EDDY_VISCOCITY
-                    * (Eta - f * self.r / 2.0) ** 2.0
-                )
-
-                X4 = -(  # noqa: N806
-                    -PP_zero
-                    - f * self.r * Cd / (2.0 * self.EDDY_VISCOCITY)
-                    + Eta * Cd / self.EDDY_VISCOCITY
-                ) / (
-                    -np.conj(PP_zero)
-                    - f * self.r * Cd / (2.0 * self.EDDY_VISCOCITY)
-                    + Eta * Cd / self.EDDY_VISCOCITY
-                )
-
-                A_zero = -X3 / (X1 + X2 * X4)  # noqa: N806
-                A_one = (  # noqa: N806
-                    complex(0, 1)
-                    * self.cyclone_sped
-                    * Cd
-                    * np.exp(complex(0, -1) * beta)
-                    / (4.0 * self.EDDY_VISCOCITY * (PP_one - np.conj(PP_minus_one)))
-                    * (A_zero + np.conj(A_zero))
-                )
-                A_minus_one = -np.conj(A_one)  # noqa: N806
-                # looping over different heights zp
-                for ii in range(len(self.zp)):
-                    u_zero = np.sqrt(ALPHA / BETA) * np.real(
-                        A_zero * np.exp(PP_zero * self.zp[ii])
-                    )
-                    v_zero = np.imag(A_zero * np.exp(PP_zero * self.zp[ii]))
-                    u_one = np.sqrt(ALPHA / BETA) * np.real(
-                        A_one
-                        * np.exp(
-                            PP_one * self.zp[ii]
-                            + complex(0, 1) * self.theta[j] / self.RA
-                        )
-                    )
-                    u_minus_one = np.sqrt(ALPHA / BETA) * np.real(
-                        A_minus_one
-                        * np.exp(
-                            PP_minus_one * self.zp[ii]
-                            - complex(0, 1) * self.theta[j] / self.RA
-                        )
-                    )
-                    v_one = np.imag(
-                        A_one
-                        * np.exp(
-                            PP_one * self.zp[ii]
-                            + complex(0, 1) * self.theta[j] / self.RA
-                        )
-                    )
-                    v_minus_one = np.imag(
-                        A_minus_one
-                        * np.exp(
-                            PP_minus_one * self.zp[ii]
-                            - complex(0, 1) * self.theta[j] / self.RA
-                        )
-                    )
-                    for tmptag in range(u.shape[1]):
-                        u[j, tmptag, ii] = (
-                            np.real(u_zero)[tmptag]
-                            + np.real(u_one)[tmptag]
-                            + np.real(u_minus_one)[tmptag]
-                        )
-                        v[j, tmptag, ii] = (
-                            v_zero[tmptag] + v_one[tmptag] + v_minus_one[tmptag]
-                        )
-
-            # wind speed components
-            v1 = v
-            for m in range(v.shape[2]):
-                v1[:, :, m] = v1[:, :, m] + vg1
-            U = (v1**2.0 + u**2.0) ** 0.5  # noqa: N806
+    def compute_wind_field_batch(self, delta_path_list, delta_feat_list):
+        """compute_wind_field_batch: computing the peak wind speed (10-min gust duraiton) for a batch of perturbed storms
+        delta_path_list: list of delta_path (see set_delta_path)
+        delta_feat_list: list of delta_feat (see set_delta_feat)
+        return: list of station data, one per perturbed storm
+        """  # noqa: D205, D400
+        print('WindFieldSimulation: running linear analytical model.')  # noqa: T201
+        delta_paths = []
+        feats = []
+        for delta_path, delta_feat in zip(delta_path_list, delta_feat_list):
+            self.set_delta_path(delta_path)
+            self.set_delta_feat(delta_feat)
+            delta_paths.append(self.delta_path)
+            feats.append(
+                [self.cyclone_pres, self.cyclone_sped, self.cyclone_radm, self.Holland_B]
+            )
+        station_umax = self.__station_peak_wind_speed(
+            np.array(delta_paths, dtype=float), np.array(feats, dtype=float)
+        )
+        res = []
+        for cur_umax in station_umax:
+            cur_station = copy.deepcopy(self.station)
+            cur_station['PWS']['height'] = self.zp
+            cur_station['PWS']['windspeed'] = cur_umax.tolist()
+            res.append(cur_station)
+        print('WindFieldSimulation: linear analytical simulation completed.')  # noqa: T201
+        # return
+        return res  # noqa: DOC201, RUF100
 
-            # mapping to staitons
+    def __station_peak_wind_speed(self, delta_paths, feats, max_batch_points=500000):
+        """__station_peak_wind_speed: peak wind speed at the stations over the storm track
+        delta_paths: perturbations of the storm path, shape (n_rlz, 3)
+        feats: central pressure difference, moving speed, max-wind-speed radius, and Holland B, shape (n_rlz, 4)
+        return: peak wind speed, shape (n_rlz, n_station, len(zp))
+        """  # noqa: D205, D400
+        station_lat = np.array(self.station['Latitude'], dtype=float)
+        station_lon = np.abs(np.array(self.station['Longitude'], dtype=float))
+        num_rlz = delta_paths.shape[0]
+        num_track = len(self.track_lat_m)
+        num_station = len(station_lat)
+        station_umax = np.zeros((num_rlz, num_station, len(self.zp)))
+        beta_c = self.__heading(delta_paths[:, 2])
+        # storm center at each (realization, track point)
+        rlz_id = np.repeat(np.arange(num_rlz), num_track)
+        track_id = np.tile(np.arange(num_track), num_rlz)
+        lat_c = np.asarray(self.track_lat_m, dtype=float)[track_id] + delta_paths[
+            rlz_id, 0
+        ]
+        lon_c = (
+            np.asarray(self.track_lon_m, dtype=float)[track_id]
+            - 0.3 * delta_paths[rlz_id, 1]
+        )
+        beta_all = beta_c[rlz_id, track_id]
+        # batches of storm centers
+        batch_size = max(1, int(max_batch_points / max(num_station, 1)))
+        for b0 in range(0, len(rlz_id), batch_size):
+            sel = slice(b0, b0 + batch_size)
+            lat = lat_c[sel, np.newaxis]
+            lon = lon_c[sel, np.newaxis]
+            # mapping stations to the polar mesh of the storm center
             dd = (
                 np.arccos(
-                    np.cos(np.array(station_lat) / self.RA)
+                    np.cos(station_lat / self.RA)
                     * np.cos(lat / self.RA)
-                    * np.cos((np.abs(np.array(station_lon)) - lon) / self.RA)
-                    + np.sin(np.array(station_lat) / self.RA) * np.sin(lat / self.RA)
+                    * np.cos((station_lon - lon) / self.RA)
+                    + np.sin(station_lat / self.RA) * np.sin(lat / self.RA)
                 )
                 * 6371.0
                 * 180.0
@@ -571,28 +562,37 @@ class LinearAnalyticalModel_SnaikiWu_2017:  # noqa: D101
                 / self.RA
                 * 1000.0
             )
-            Delta = np.abs(np.array(station_lon)) - lon + self.EPS**2.0  # noqa: N806
+            Delta = station_lon - lon + self.EPS**2.0  # noqa: N806
             bearing = 90.0 + self.RA * np.arctan2(
-                np.sin(Delta / self.RA) * np.cos(np.array(station_lat) / self.RA),
-                np.cos(lat / self.RA) * np.sin(np.array(station_lat) / self.RA)
+                np.sin(Delta / self.RA) * np.cos(station_lat / self.RA),
+                np.cos(lat / self.RA) * np.sin(station_lat / self.RA)
                 - np.sin(lat / self.RA)
-                * np.cos(np.array(station_lat) / self.RA)
+                * np.cos(station_lat / self.RA)
                 * np.cos(Delta / self.RA),
             )
-            bearing = [x if x >= 0 else x + 360.0 for x in bearing]
-            jj = [int(x / self.mesh_info[4]) for x in bearing]
-            kk = [min(int(x / self.mesh_info[1]), len(self.r) - 1) for x in dd]
-            for ii in range(len(self.zp)):
-                tmp = U[:, :, ii].tolist()
-                wind_speed = [tmp[jtag][ktag] for jtag, ktag in zip(jj, kk)]
-                station_umax[:, ii] = [
-                    max(x, y) for x, y in zip(wind_speed, station_umax[:, ii])
-                ]
-
-        # copying results
-        self.station['PWS']['height'] = self.zp
-        self.station['PWS']['windspeed'] = station_umax.tolist()
-        print('WindFieldSimulation: linear analytical simulation completed.')  # noqa: T201
+            bearing = np.where(bearing >= 0, bearing, bearing + 360.0)
+            jj = (bearing / self.mesh_info[4]).astype(int)
+            kk = np.minimum((dd / self.mesh_info[1]).astype(int), len(self.r) - 1)
+            # wind speed at the mesh points the stations are mapped to
+            cur_feats = feats[rlz_id[sel]]
+            wind_speed = self.__wind_speed(
+                lat,
+                lon,
+                beta_all[sel, np.newaxis],
+                np.asarray(self.theta, dtype=float)[jj],
+                np.asarray(self.r, dtype=float)[kk],
+                cur_feats[:, [0]],
+                cur_feats[:, [1]],
+                cur_feats[:, [2]],
+                cur_feats[:, [3]],
+            )
+            # running maximum over the storm track
+            for cur_rlz, cur_speed in zip(rlz_id[sel], wind_speed):
+                cur_umax = station_umax[cur_rlz]
+                station_umax[cur_rlz] = np.where(
+                    cur_umax > cur_speed, cur_umax, cur_speed
+                )
+        return station_umax  # noqa: DOC201, RUF100
 
     def get_station_data(self):
         """get_station_data: returning station data"""  # noqa: D400
@@ -41,44 +41,34 @@
 import argparse  # noqa: I001
 import importlib
 import json
+import multiprocessing as mp
+import os
+import sys
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import NearestNeighbors
+from sklearn.neighbors import BallTree
 import geopandas as gpd
 
+this_dir = Path(os.path.dirname(os.path.abspath(__file__))).resolve()  # noqa: PTH100, PTH120
+main_dir = this_dir.parents[1]
 
-def find_neighbors(  # noqa: C901, D103
-    asset_file,
-    event_grid_file,
-    samples,
-    neighbors,
-    filter_label,
-    seed,
-    do_parallel,
-):
-    # check if running parallel
-    num_processes = 1
-    process_id = 0
-    run_parallel = False
+sys.path.insert(0, str(main_dir / 'common'))
 
-    if do_parallel == 'True':
-        mpi_spec = importlib.util.find_spec('mpi4py')
-        found = mpi_spec is not None
-        if found:
-            from mpi4py import MPI
+from asset_store import AssetStore, load_aim, shard_path  # noqa: E402
+
+# mean radius of the Earth (km) used to scale the haversine distances
+R_EARTH = 6371.0
+
+# number of assets read, mapped, and written together
+BATCH_SIZE = 1000
+
+# mapping settings shared by all asset batches of a process
+_nne = dict()  # noqa: C408
 
-            run_parallel = True
-            comm = MPI.COMM_WORLD
-            num_processes = comm.Get_size()
-            process_id = comm.Get_rank()
-            if num_processes < 2:  # noqa: PLR2004
-                do_parallel = 'False'
-                run_parallel = False
-                num_processes = 1
-                process_id = 0
 
+def load_event_grid(event_grid_file, filter_label):  # noqa: D103
     # read the event grid data file
     event_grid_path = Path(event_grid_file).resolve()
     event_dir = event_grid_path.parent
@@ -87,15 +77,11 @@ def find_neighbors(  # noqa: C901, D103
     # Check if the file is a CSV or a GIS file
     file_extension = Path(event_grid_file).suffix.lower()
 
+    grid_extra_keys = []
     if file_extension == '.csv':
         # Existing code for CSV files
         grid_df = pd.read_csv(event_dir / event_grid_file, header=0)
 
-        # store the locations of the grid points in grid_locations
-        lat_e = grid_df['Latitude']
-        lon_e = grid_df['Longitude']
-        grid_locations = np.array([[lo, la] for lo, la in zip(lon_e, lat_e)])
-
         if filter_label == '':
             grid_extra_keys = list(
                 grid_df.drop(['GP_file', 'Longitude', 'Latitude'], axis=1).columns
@@ -113,11 +99,6 @@ def find_neighbors(  # noqa: C901, D103
         gdf['Longitude'] = gdf.geometry.x
         gdf['Latitude'] = gdf.geometry.y
 
-        # store the locations of the grid points in grid_locations
-        lat_e = gdf['Latitude']
-        lon_e = gdf['Longitude']
-        grid_locations = np.array([[lo, la] for lo, la in zip(lon_e, lat_e)])
-
         if filter_label == '':
             grid_extra_keys = list(
                 gdf.drop(['geometry', 'Longitude', 'Latitude'], axis=1).columns
@@ -126,252 +107,201 @@ def find_neighbors(  # noqa: C901, D103
         # Convert GeoDataFrame to regular DataFrame for consistency with the rest of the code
         grid_df = pd.DataFrame(gdf.drop(columns='geometry'))
 
-    # prepare the tree for the nearest neighbor search
-    if filter_label != '' or len(grid_extra_keys) > 0:
-        neighbors_to_get = min(neighbors * 10, len(lon_e))
+    return grid_df, event_dir, file_extension, grid_extra_keys
+
+
+def get_event_type(grid_df, event_dir, file_extension):  # noqa: D103
+    # returns the event type, the number of events per grid point, and
+    # whether the grid uses the legacy (non-csv) grid point files
+    if file_extension != '.csv':
+        return 'intensityMeasure', 1, False
+
+    # this is the preferred behavior, the legacy flag is left for legacy inputs
+    if grid_df.iloc[0]['GP_file'][-3:] != 'csv':
+        return 'timeHistory', 1, True
+
+    # We assume that every grid point has the same type and number of
+    # event data. That is, you cannot mix ground motion records and
+    # intensity measures and you cannot assign 10 records to one point
+    # and 15 records to another.
+
+    # Load the first file and identify if this is a grid of IM or GM
+    # information. GM grids have GM record filenames defined in the
+    # grid point files.
+    first_file = pd.read_csv(event_dir / grid_df.iloc[0]['GP_file'], header=0)
+    if first_file.columns[0] == 'TH_file':
+        event_type = 'timeHistory'
     else:
-        neighbors_to_get = neighbors
+        event_type = 'intensityMeasure'
+    return event_type, first_file.shape[0], False
 
-    nbrs = NearestNeighbors(n_neighbors=neighbors_to_get, algorithm='ball_tree').fit(
-        grid_locations
-    )
 
-    # load the building data file
-    with open(asset_file, encoding='utf-8') as f:  # noqa: PTH123
-        asset_dict = json.load(f)
+def init_mapping(settings):  # noqa: D103
+    _nne.clear()
+    _nne.update(settings)
+    # grid point event files are read once per process
+    _nne['gp_events'] = dict()  # noqa: C408
+    _nne['gis_files'] = set()
+    # packed asset stores opened by the process
+    _nne['stores'] = dict()  # noqa: C408
 
-    # prepare a dataframe that holds asset filenames and locations
-    aim_df = pd.DataFrame(
-        columns=['Latitude', 'Longitude', 'file'], index=np.arange(len(asset_dict))
-    )
 
-    count = 0
-    for i, asset in enumerate(asset_dict):
-        if run_parallel == False or (i % num_processes) == process_id:  # noqa: E712
-            with open(asset['file'], encoding='utf-8') as f:  # noqa: PTH123
-                asset_data = json.load(f)
-
-            asset_loc = asset_data['GeneralInformation']['location']
-            aim_id = aim_df.index[count]
-            aim_df.loc[aim_id, 'Longitude'] = asset_loc['longitude']
-            aim_df.loc[aim_id, 'Latitude'] = asset_loc['latitude']
-            aim_df.loc[aim_id, 'file'] = asset['file']
-            count = count + 1
-
-    # store building locations in bldg_locations
-    bldg_locations = np.array(
-        [
-            [lo, la]
-            for lo, la in zip(aim_df['Longitude'], aim_df['Latitude'])
-            if not np.isnan(lo) and not np.isnan(la)
+def get_grid_point_events(nbr_index):  # noqa: D103
+    # GM record names and scale factors of a grid point (cached)
+    if nbr_index not in _nne['gp_events']:
+        event_df = pd.read_csv(
+            _nne['event_dir'] / _nne['gp_file'][nbr_index], header=0
+        )
+        names = event_df.iloc[:, 0].tolist()
+        if len(event_df.columns) > 1:
+            scales = event_df.iloc[:, 1].astype(float).tolist()
+        else:
+            scales = [1.0] * len(names)
+        _nne['gp_events'][nbr_index] = (names, scales)
+    return _nne['gp_events'][nbr_index]
+
+
+def get_gis_event_file(nbr_index):  # noqa: D103
+    # For GIS files, create a new CSV file
+    csv_filename = f'Site_{nbr_index}.csv'
+    if nbr_index not in _nne['gis_files']:
+        csv_path = _nne['event_dir'] / csv_filename
+        if not csv_path.exists():
+            # Create a CSV file with data from the GIS file
+            grid_df = _nne['grid_df']
+            im_columns = [
+                col
+                for col in grid_df.columns
+                if col not in ['geometry', 'Longitude', 'Latitude']
+            ]
+            im_data = pd.DataFrame(
+                {col: [grid_df.iloc[nbr_index][col]] for col in im_columns}
+            )
+            im_data.to_csv(csv_path, index=False)
+        _nne['gis_files'].add(nbr_index)
+    return csv_filename
+
+
+def select_neighbors(asset_data_list, ind):  # noqa: D103
+    # mask of the candidate grid points that match the labels of the asset;
+    # only the closest neighbors matching points are kept
+    neighbors = _nne['neighbors']
+    keep = np.ones(ind.shape, dtype=bool)
+    if _nne['filter_label'] != '':
+        label_keys = [_nne['filter_label']]
+    else:
+        label_keys = _nne['grid_extra_keys']
+    for key in label_keys:
+        has_key = np.array(
+            [key in x['GeneralInformation'] for x in asset_data_list]
+        )
+        if not has_key.any():
+            continue
+        asset_label = np.empty(len(asset_data_list), dtype=object)
+        asset_label[:] = [
+            x['GeneralInformation'].get(key) for x in asset_data_list
         ]
+        grid_label = _nne['grid_labels'][key][ind]
+        keep &= ~has_key[:, np.newaxis] | (grid_label == asset_label[:, np.newaxis])
+    keep &= np.cumsum(keep, axis=1) <= neighbors
+
+    no_match = ~keep.any(axis=1)
+    if no_match.any():
+        print(  # noqa: T201
+            f'NNE: warning - {np.sum(no_match)} assets have no grid point with matching labels, the closest grid points are used.'
+        )
+        keep[no_match, :neighbors] = True
+    return keep
+
+
+def map_asset_batch(batch):  # noqa: C901, D103
+    batch_id, assets = batch
+
+    # read each AIM once
+    asset_data_list = []
+    asset_list = []
+    asset_locations = []
+    for asset in assets:
+        asset_file = asset['file']
+        asset_data = load_aim(asset, _nne['stores'])
+        asset_loc = asset_data['GeneralInformation'].get('location', {})
+        lat = asset_loc.get('latitude', np.nan)
+        lon = asset_loc.get('longitude', np.nan)
+        if lat is None or lon is None or np.isnan(lat) or np.isnan(lon):
+            print(f'NNE: warning - no valid location found in {asset_file}')  # noqa: T201
+            continue
+        asset_data_list.append(asset_data)
+        asset_list.append(asset)
+        asset_locations.append([lat, lon])
+    if len(asset_data_list) == 0:
+        return []
+
+    # collect the neighbor indices and great-circle distances for every asset
+    dist, ind = _nne['tree'].query(
+        np.radians(np.array(asset_locations, dtype=float)),
+        k=_nne['neighbors_to_get'],
     )
+    dist = dist * R_EARTH + 1e-20
 
-    # collect the neighbor indices and distances for every building
-    distances, indices = nbrs.kneighbors(bldg_locations)
-    distances = distances + 1e-20
+    keep = select_neighbors(asset_data_list, ind)
 
-    # initialize the random generator
-    if seed is not None:
-        rng = np.random.default_rng(seed)
+    # calculate the weights for each neighbor based on their distance
+    weights = np.where(keep, 1.0 / (dist**2.0), 0.0)
+    cdf = np.cumsum(weights, axis=1)
+    cdf = cdf / cdf[:, -1:]
+
+    # sample the pre-defined number of events from the neighbors
+    if _nne['seed'] is not None:
+        rng = np.random.default_rng([_nne['seed'], _nne['process_id'], batch_id])
     else:
         rng = np.random.default_rng()
+    u = rng.random((len(asset_data_list), _nne['samples']))
+    nbr_samples = np.sum(u[:, :, np.newaxis] >= cdf[:, np.newaxis, :], axis=2)
+    nbr_grid = np.take_along_axis(ind, nbr_samples, axis=1)
 
-    count = 0
+    # make sure we resample events if samples > event_count
+    event_j_list = np.arange(_nne['samples']) % _nne['event_count']
 
-    # iterate through the buildings and store the selected events in the AIM
-    for asset_i, (aim_id, dist_list, ind_list) in enumerate(  # noqa: B007
-        zip(aim_df.index, distances, indices)
+    event_type = _nne['event_type']
+    packed_aims = []
+    for asset_i, (asset, asset_data) in enumerate(
+        zip(asset_list, asset_data_list)
     ):
-        # open the AIM file
-        aim_index_id = aim_df.index[aim_id]
-        asst_file = aim_df.loc[aim_index_id, 'file']
-
-        with open(asst_file, encoding='utf-8') as f:  # noqa: PTH123
-            asset_data = json.load(f)
-
-        if filter_label != '':
-            # soil type of building
-            asset_label = asset_data['GeneralInformation'][filter_label]
-            # soil types of all initial neighbors
-            grid_label = grid_df[filter_label][ind_list]
-
-            # only keep the distances and indices corresponding to neighbors
-            # with the same soil type
-            dist_list = dist_list[(grid_label == asset_label).values]  # noqa: PD011, PLW2901
-            ind_list = ind_list[(grid_label == asset_label).values]  # noqa: PD011, PLW2901
-
-            # return dist_list & ind_list with a length equals neighbors
-            # assuming that at least neighbors grid points exist with
-            # the same filter_label as the building
-
-            # because dist_list, ind_list sorted initially in order of increasing
-            # distance, just take the first neighbors grid points of each
-            dist_list = dist_list[:neighbors]  # noqa: PLW2901
-            ind_list = ind_list[:neighbors]  # noqa: PLW2901
-
-        if len(grid_extra_keys) > 0:
-            filter_labels = []
-            for key in asset_data['GeneralInformation'].keys():  # noqa: SIM118
-                if key in grid_extra_keys:
-                    filter_labels.append(key)  # noqa: PERF401
-
-            filter_list = [True for i in dist_list]
-            for filter_label in filter_labels:  # noqa: PLR1704
-                asset_label = asset_data['GeneralInformation'][filter_label]
-                grid_label = grid_df[filter_label][ind_list]
-                filter_list_i = (grid_label == asset_label).values  # noqa: PD011
-                filter_list = filter_list and filter_list_i
-
-            # only keep the distances and indices corresponding to neighbors
-            # with the same soil type
-            dist_list = dist_list[filter_list]  # noqa: PLW2901
-            ind_list = ind_list[filter_list]  # noqa: PLW2901
-
-            # return dist_list & ind_list with a length equals neighbors
-            # assuming that at least neighbors grid points exist with
-            # the same filter_label as the building
-
-            # because dist_list, ind_list sorted initially in order of increasing
-            # distance, just take the first neighbors grid points of each
-            dist_list = dist_list[:neighbors]  # noqa: PLW2901
-            ind_list = ind_list[:neighbors]  # noqa: PLW2901
-
-        # calculate the weights for each neighbor based on their distance
-        dist_list = 1.0 / (dist_list**2.0)  # noqa: PLW2901
-        weights = np.array(dist_list) / np.sum(dist_list)
-
-        # get the pre-defined number of samples for each neighbor
-        nbr_samples = np.where(rng.multinomial(1, weights, samples) == 1)[1]
-
-        # this is the preferred behavior, the else clause is left for legacy inputs
-        if file_extension == '.csv':
-            if grid_df.iloc[0]['GP_file'][-3:] == 'csv':
-                # We assume that every grid point has the same type and number of
-                # event data. That is, you cannot mix ground motion records and
-                # intensity measures and you cannot assign 10 records to one point
-                # and 15 records to another.
-
-                # Load the first file and identify if this is a grid of IM or GM
-                # information. GM grids have GM record filenames defined in the
-                # grid point files.
-                first_file = pd.read_csv(
-                    event_dir / grid_df.iloc[0]['GP_file'], header=0
-                )
-                if first_file.columns[0] == 'TH_file':
-                    event_type = 'timeHistory'
-                else:
-                    event_type = 'intensityMeasure'
-                event_count = first_file.shape[0]
-
-                # collect the list of events and scale factors
-                event_list = []
-                scale_list = []
-
-                # for each neighbor
-                for sample_j, nbr in enumerate(nbr_samples):
-                    # make sure we resample events if samples > event_count
-                    event_j = sample_j % event_count
-
-                    # get the index of the nth neighbor
-                    nbr_index = ind_list[nbr]
-
-                    # if the grid has ground motion records...
-                    if event_type == 'timeHistory':
-                        # load the file for the selected grid point
-                        event_collection_file = grid_df.iloc[nbr_index]['GP_file']
-                        event_df = pd.read_csv(
-                            event_dir / event_collection_file, header=0
-                        )
-
-                        # append the GM record name to the event list
-                        event_list.append(event_df.iloc[event_j, 0])
-
-                        # append the scale factor (or 1.0) to the scale list
-                        if len(event_df.columns) > 1:
-                            scale_list.append(float(event_df.iloc[event_j, 1]))
-                        else:
-                            scale_list.append(1.0)
-
-                    # if the grid has intensity measures
-                    elif event_type == 'intensityMeasure':
-                        # save the collection file name and the IM row id
-                        event_list.append(
-                            grid_df.iloc[nbr_index]['GP_file'] + f'x{event_j}'
-                        )
-
-                        # IM collections are not scaled
-                        scale_list.append(1.0)
-
+        # collect the list of events and scale factors
+        event_list = []
+        scale_list = []
+        if _nne['legacy']:
             # TODO: update the LLNL input data and remove this clause  # noqa: TD002
-            else:
-                event_list = []
-                for e, i in zip(nbr_samples, ind_list):
-                    event_list += [
-                        grid_df.iloc[i]['GP_file'],
-                    ] * e
-
-                scale_list = np.ones(len(event_list))
+            nbr_filtered = np.cumsum(keep[asset_i])[nbr_samples[asset_i]] - 1
+            for e, i in zip(nbr_filtered, ind[asset_i][keep[asset_i]]):
+                event_list += [
+                    _nne['gp_file'][i],
+                ] * e
+            scale_list = np.ones(len(event_list))
+        elif _nne['file_extension'] != '.csv':
+            for nbr_index, event_j in zip(nbr_grid[asset_i], event_j_list):
+                # save the collection file name and the IM row id
+                event_list.append(get_gis_event_file(nbr_index) + f'x{event_j}')
+                # IM collections are not scaled
+                scale_list.append(1.0)
+        elif event_type == 'timeHistory':
+            for nbr_index, event_j in zip(nbr_grid[asset_i], event_j_list):
+                names, scales = get_grid_point_events(nbr_index)
+                # append the GM record name and the scale factor (or 1.0)
+                event_list.append(names[event_j])
+                scale_list.append(scales[event_j])
         else:
-            event_list = []
-            scale_list = []
-            event_type = 'intensityMeasure'
-
-            # Determine event_count (number of IMs per grid point)
-            im_columns = [
-                col
-                for col in grid_df.columns
-                if col not in ['geometry', 'Longitude', 'Latitude']
-            ]
-            # event_count = len(im_columns)
-            event_count = 1
-
-            # for each neighbor
-            for sample_j, nbr in enumerate(nbr_samples):
-                # make sure we resample events if samples > event_count
-                event_j = sample_j % event_count
-
-                # get the index of the nth neighbor
-                nbr_index = ind_list[nbr]
-
-                # For GIS files, create a new CSV file
-                csv_filename = f'Site_{nbr_index}.csv'
-
-                csv_path = event_dir / csv_filename
-
-                if not csv_path.exists():
-                    # Create a CSV file with data from the GIS file
-                    # Use actual data from the GIS file if available, otherwise use dummy data
-                    im_columns = [
-                        col
-                        for col in grid_df.columns
-                        if col not in ['geometry', 'Longitude', 'Latitude']
-                    ]
-
-                    im_data = pd.DataFrame(
-                        {
-                            col: [grid_df.iloc[nbr_index][col]] * event_count
-                            for col in im_columns
-                        }
-                    )
-
-                    im_data.to_csv(csv_path, index=False)
+            for nbr_index, event_j in zip(nbr_grid[asset_i], event_j_list):
                 # save the collection file name and the IM row id
-                event_list.append(csv_filename + f'x{event_j}')
-
+                event_list.append(_nne['gp_file'][nbr_index] + f'x{event_j}')
                 # IM collections are not scaled
                 scale_list.append(1.0)
 
         # prepare a dictionary of events
-        event_list_json = []
-        for e_i, event in enumerate(event_list):
-            # event_list_json.append({
-            #    #"EventClassification": "Earthquake",
-            #    "fileName": f'{event}x{e_i:05d}',
-            #    "factor": scale_list[e_i],
-            #    #"type": event_type
-            #    })
-            event_list_json.append([f'{event}x{e_i:05d}', scale_list[e_i]])
+        event_list_json = [
+            [f'{event}x{e_i:05d}', scale_list[e_i]]
+            for e_i, event in enumerate(event_list)
+        ]
 
         # save the event dictionary to the AIM
         # TODO: we assume there is only one event  # noqa: TD002
@@ -385,15 +315,167 @@ def find_neighbors(  # noqa: C901, D103
         asset_data['Events'][0].update(
             {
                 # "EventClassification": "Earthquake",
-                'EventFolderPath': str(event_dir),
+                'EventFolderPath': str(_nne['event_dir']),
                 'Events': event_list_json,
                 'type': event_type,
                 # "type": "SimCenterEvents"
             }
         )
 
-        with open(asst_file, 'w', encoding='utf-8') as f:  # noqa: PTH123
-            json.dump(asset_data, f, indent=2)
+        # AIMs of packed inventories are written to the store by the caller
+        if 'store' in asset:
+            packed_aims.append((asset['id'], asset_data))
+        else:
+            with open(asset['file'], 'w', encoding='utf-8') as f:  # noqa: PTH123
+                json.dump(asset_data, f, indent=2)
+
+    return packed_aims
+
+
+def map_batches(batches, num_workers):  # noqa: D103
+    # map the batches, optionally with parallel readers/writers
+    packed_aims = []
+    if num_workers > 1 and len(batches) > 1:
+        with mp.Pool(
+            min(num_workers, len(batches)),
+            initializer=init_mapping,
+            initargs=(
+                {
+                    k: v
+                    for k, v in _nne.items()
+                    if k not in ['gp_events', 'gis_files', 'stores']
+                },
+            ),
+        ) as pool:
+            for batch_aims in pool.imap_unordered(map_asset_batch, batches):
+                packed_aims += batch_aims
+    else:
+        for batch in batches:
+            packed_aims += map_asset_batch(batch)
+    return packed_aims
+
+
+def write_packed_aims(store_path, packed_aims, comm, process_id, num_processes):  # noqa: D103
+    # write the mapped AIMs of a packed inventory; every process writes its
+    # own shard and the first one merges them
+    for store in _nne['stores'].values():
+        store.close()
+    _nne['stores'].clear()
+
+    if comm is not None:
+        with AssetStore(shard_path(store_path, process_id), mode='w') as store:
+            store.put_many(packed_aims)
+        comm.Barrier()
+        if process_id == 0:
+            with AssetStore(store_path, mode='a') as store:
+                store.merge([shard_path(store_path, i) for i in range(num_processes)])
+        comm.Barrier()
+    else:
+        with AssetStore(store_path, mode='a') as store:
+            store.put_many(packed_aims)
+
+
+def find_neighbors(  # noqa: D103
+    asset_file,
+    event_grid_file,
+    samples,
+    neighbors,
+    filter_label,
+    seed,
+    do_parallel,
+    num_workers=1,
+):
+    # check if running parallel
+    num_processes = 1
+    process_id = 0
+    run_parallel = False
+
+    if do_parallel == 'True':
+        mpi_spec = importlib.util.find_spec('mpi4py')
+        found = mpi_spec is not None
+        if found:
+            from mpi4py import MPI
+
+            run_parallel = True
+            comm = MPI.COMM_WORLD
+            num_processes = comm.Get_size()
+            process_id = comm.Get_rank()
+            if num_processes < 2:  # noqa: PLR2004
+                do_parallel = 'False'
+                run_parallel = False
+                num_processes = 1
+                process_id = 0
+
+    grid_df, event_dir, file_extension, grid_extra_keys = load_event_grid(
+        event_grid_file, filter_label
+    )
+
+    # prepare the tree for the nearest neighbor search (haversine metric on
+    # the latitude and longitude of the grid points in radians)
+    grid_locations = np.radians(
+        grid_df[['Latitude', 'Longitude']].to_numpy(dtype=float)
+    )
+    if filter_label != '' or len(grid_extra_keys) > 0:
+        neighbors_to_get = min(neighbors * 10, len(grid_locations))
+    else:
+        neighbors_to_get = min(neighbors, len(grid_locations))
+    tree = BallTree(grid_locations, metric='haversine')
+
+    event_type, event_count, legacy = get_event_type(
+        grid_df, event_dir, file_extension
+    )
+
+    label_keys = [filter_label] if filter_label != '' else grid_extra_keys
+    init_mapping(
+        {
+            'tree': tree,
+            'grid_df': grid_df,
+            'gp_file': grid_df['GP_file'].to_numpy(dtype=object)
+            if 'GP_file' in grid_df.columns
+            else None,
+            'grid_labels': {
+                key: grid_df[key].to_numpy(dtype=object) for key in label_keys
+            },
+            'grid_extra_keys': grid_extra_keys,
+            'filter_label': filter_label,
+            'event_dir': event_dir,
+            'file_extension': file_extension,
+            'event_type': event_type,
+            'event_count': event_count,
+            'legacy': legacy,
+            'samples': samples,
+            'neighbors': neighbors,
+            'neighbors_to_get': neighbors_to_get,
+            'seed': seed,
+            'process_id': process_id,
+        }
+    )
+
+    # load the building data file
+    with open(asset_file, encoding='utf-8') as f:  # noqa: PTH123
+        asset_dict = json.load(f)
+
+    assets = [
+        asset
+        for i, asset in enumerate(asset_dict)
+        if run_parallel == False or (i % num_processes) == process_id  # noqa: E712
+    ]
+    batches = [
+        (batch_id, assets[k : k + BATCH_SIZE])
+        for batch_id, k in enumerate(range(0, len(assets), BATCH_SIZE))
+    ]
+
+    packed_aims = map_batches(batches, num_workers)
+
+    store_path = asset_dict[0].get('store') if len(asset_dict) > 0 else None
+    if store_path is not None:
+        write_packed_aims(
+            store_path,
+            packed_aims,
+            comm if run_parallel else None,
+            process_id,
+            num_processes,
+        )
 
 
 if __name__ == '__main__':
@@ -408,6 +490,7 @@ if __name__ == '__main__':
     parser.add_argument('-n', '--numP', default='8')
     parser.add_argument('-m', '--mpiExec', default='mpiexec')
     parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--numWorkers', type=int, default=1)
     args = parser.parse_args()
 
     find_neighbors(
@@ -418,4 +501,5 @@ if __name__ == '__main__':
         args.filter_label,
         args.seed,
         args.doParallel,
+        args.numWorkers,
     )
@@ -182,7 +182,15 @@ def find_unit_scale_factor(aim):
     return f_scale_im_user_to_cms, f_scale_edp_cms_to_user
 
 
-def run_csm(demand_model, capacity_model, damping_model, tol, max_iter, im_i):
+def run_csm(  # noqa: PLR0913
+    demand_model,
+    capacity_model,
+    damping_model,
+    tol,
+    max_iter,
+    im_i,
+    log_file=None,
+):
     """Run the Capacity Spectrum Method (CSM) analysis.
 
     Args:
@@ -192,6 +200,8 @@ def run_csm(demand_model, capacity_model, damping_model, tol, max_iter, im_i):
         tol (float): The tolerance for convergence.
         max_iter (int): The maximum number of iterations.
         im_i (int): The intensity measure index.
+        log_file (str, optional): If provided, the capacity and demand spectra
+            of every iteration are saved to this JSON file.
 
     Returns
     -------
@@ -223,13 +233,14 @@ def run_csm(demand_model, capacity_model, damping_model, tol, max_iter, im_i):
         iter_sd.append(perf_sd)
         iter_sa.append(perf_sa)
 
-        iteration_data = {
-            'capacity_spectrum': {'Sd': cap_sd.tolist(), 'Sa': cap_sa.tolist()},
-            'demand_spectrum': {'Sd': dem_sd.tolist(), 'Sa': dem_sa.tolist()},
-            'beta_eff': beta_eff,
-            'performance_point': [perf_sd, perf_sa],
-        }
-        capacity_data['iterations'].append(iteration_data)
+        if log_file is not None:
+            iteration_data = {
+                'capacity_spectrum': {'Sd': cap_sd.tolist(), 'Sa': cap_sa.tolist()},
+                'demand_spectrum': {'Sd': dem_sd.tolist(), 'Sa': dem_sa.tolist()},
+                'beta_eff': beta_eff,
+                'performance_point': [perf_sd, perf_sa],
+            }
+            capacity_data['iterations'].append(iteration_data)
 
         # Calc effective damping at this point on the capacity curve
         beta_eff = damping_model.get_beta(perf_sd, perf_sa)
@@ -257,8 +268,443 @@ def run_csm(demand_model, capacity_model, damping_model, tol, max_iter, im_i):
                 f'The capacity spectrum method did not converge for the {im_i}th IM realization.'
             )
 
-    with open('capacity_data.json', 'w') as f:  # noqa: PTH123
-        json.dump(capacity_data, f, indent=2)
+    if log_file is not None:
+        with open(log_file, 'w') as f:  # noqa: PTH123
+            json.dump(capacity_data, f, indent=2)
+
+    return perf_sd, perf_sa
+
+
+def get_csm_parameters(capacity_model, damping_model):
+    """Collect the scalar model parameters used by `run_csm_batch`.
+
+    Args:
+        capacity_model (object): A HAZUS_cao_peterson_2006 capacity model.
+        damping_model (object): A HAZUS_cao_peterson_2006 damping model.
+
+    Returns
+    -------
+        dict: Capacity curve parameters, elastic damping ratio and kappa.
+    """
+    return {
+        'Dy': capacity_model.Dy,
+        'Ay': capacity_model.Ay,
+        'Du': capacity_model.Du,
+        'Au': capacity_model.Au,
+        'Ax': capacity_model.Ax,
+        'B': capacity_model.B,
+        'C': capacity_model.C,
+        'beta_elastic': damping_model.get_beta_elastic(),
+        'kappa': damping_model.base_model.get_kappa(
+            damping_model.HAZUS_type, damping_model.design_level, damping_model.Mw
+        ),
+    }
+
+
+def _take(params, idx):
+    return {key: val[idx] for key, val in params.items()}
+
+
+def _batch_sa(t, p):
+    # HAZUS demand spectrum at 5% damping, see DemandModels.HAZUS.get_sa
+    return np.where(
+        t <= p['Tav'],
+        p['sa_03'],
+        np.where(t <= p['Tvd'], p['sa_10'] / t, p['sa_10'] * p['Tvd'] / t**2),
+    )
+
+
+def _batch_sd_from_sa(sa, t):
+    return 386 / (4 * np.pi**2) * t**2 * sa
+
+
+def _batch_beta(p, dp, ap):
+    # see DampingModels.HAZUS_cao_peterson_2006.get_beta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kt = (p['Du'] - dp) / (ap - p['Ax']) * (p['B'] / p['C']) ** 2
+        ke = p['Ay'] / p['Dy']
+        area_h = np.fmax(0, 4 * (ap - dp * ke) * (dp * kt - ap) / (ke - kt))
+        beta_h = p['kappa'] * area_h / (2 * 3.1416 * dp * ap)
+    return np.where(
+        (dp <= 0) | (ap <= 0), p['beta_elastic'], p['beta_elastic'] + beta_h
+    )
+
+
+def _batch_capacity_sa(p, sd):
+    # analytic form of the CapacityModels.cao_peterson_2006 curve
+    with np.errstate(invalid='ignore'):
+        sa_elpl = p['Ax'] + p['B'] * np.sqrt(1 - np.square((sd - p['Du']) / p['C']))
+    return np.where(
+        sd < p['Dy'],
+        sd * p['Ay'] / p['Dy'],
+        np.where(sd < p['Du'], sa_elpl, p['Au']),
+    )
+
+
+def _batch_damping_iteration(p, get_sa_sd, tol=0.05, max_iter=100):
+    # fixed point iteration used by HAZUS.set_Tavb and HAZUS.set_beta_tvd
+    n = len(p['Dy'])
+    x_prev = np.full(n, 5.0)
+    beta_last = np.full(n, 5.0)
+    beta_eff_last = np.full(n, np.nan)
+    converged = np.zeros(n, dtype=bool)
+    idx = np.arange(n)
+    for _i in range(max_iter):
+        p_i = _take(p, idx)
+        beta = x_prev[idx]
+        sa, sd = get_sa_sd(p_i, beta)
+        beta_eff = _batch_beta(p_i, sd, sa)
+        beta_last[idx] = beta
+        beta_eff_last[idx] = beta_eff
+        x_prev[idx] = beta_eff
+        done = np.abs(beta_eff - beta) < tol
+        converged[idx[done]] = True
+        idx = idx[~done]
+        if idx.size == 0:
+            break
+    return converged, beta_last, beta_eff_last
+
+
+def _batch_set_demand(p, demand_model_name):
+    # vectorized HAZUS.set_IMs, HAZUS.set_Tavb and HAZUS.set_beta_tvd
+    if demand_model_name not in ['HAZUS', 'HAZUS_lin_chang_2003']:
+        msg = f'Unknown Demand Model: {demand_model_name}'
+        raise ValueError(msg)
+
+    n = len(p['Dy'])
+    p['Tav'] = p['sa_10'] / p['sa_03']
+    periods = np.broadcast_to(np.array(DemandModels.HAZUS().T), (n, 21))
+    p['T'] = np.sort(
+        np.column_stack((periods, p['Tvd'], p['Tav'])),
+        axis=1,
+    )
+
+    def tavb_sa_sd(p_i, beta):
+        ra = 2.12 / (3.21 - 0.68 * np.log(beta))
+        tavb = p_i['Tav'] * ra / (1.65 / (2.31 - 0.41 * np.log(beta)))
+        sa = _batch_sa(tavb, p_i) / ra
+        return sa, _batch_sd_from_sa(sa, tavb)
+
+    def tvd_sa_sd(p_i, beta):
+        rd = 1.65 / (2.31 - 0.41 * np.log(beta))
+        sa = _batch_sa(p_i['Tvd'], p_i) / rd
+        return sa, _batch_sd_from_sa(sa, p_i['Tvd'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        converged, beta, beta_eff = _batch_damping_iteration(p, tavb_sa_sd)
+        p['Tavb'] = np.where(
+            ~converged
+            | ((3.21 - 0.68 * np.log(beta_eff)) < 0)
+            | (2.12 / (3.21 - 0.68 * np.log(beta)) < 1),
+            p['Tav'],
+            p['Tav']
+            * (2.12 / (3.21 - 0.68 * np.log(beta_eff)))
+            / (1.65 / (2.31 - 0.41 * np.log(beta_eff))),
+        )
+
+        converged, beta, beta_eff = _batch_damping_iteration(p, tvd_sa_sd)
+        p['beta_tvd'] = np.where(
+            ~converged
+            | ((2.31 - 0.41 * np.log(beta_eff)) < 0)
+            | (1.65 / (2.31 - 0.41 * np.log(beta_eff)) < 1),
+            -1,
+            beta_eff,
+        )
+
+
+def _batch_reduced_demand(p, beta_eff, demand_model_name):
+    # vectorized HAZUS.get_reduced_demand and HAZUS_lin_chang_2003.get_reduced_demand
+    t = p['T']
+    beta = beta_eff[:, None]
+    col = {key: p[key][:, None] for key in ['sa_03', 'sa_10', 'Tav', 'Tvd']}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if demand_model_name == 'HAZUS_lin_chang_2003':
+            alpha = 1.303 + 0.436 * np.log(beta)
+            R = 1 - alpha * t**0.3 / (t + 1) ** 0.65  # noqa: N806
+        else:
+            RA = 2.12 / (3.21 - 0.68 * np.log(beta))  # noqa: N806
+            Rv = 1.65 / (2.31 - 0.41 * np.log(beta))  # noqa: N806
+            RD = np.where(  # noqa: N806
+                p['beta_tvd'][:, None] < 0,
+                1.39 / (1.82 - 0.27 * np.log(beta)),
+                1.65 / (2.31 - 0.41 * np.log(p['beta_tvd'][:, None])),
+            )
+            R = np.where(  # noqa: N806
+                t <= p['Tavb'][:, None], RA, np.where(t <= col['Tvd'], Rv, RD)
+            )
+        dem_sa = _batch_sa(t, col) / R
+    return _batch_sd_from_sa(dem_sa, t), dem_sa
+
+
+def _batch_demand_sa(blk, rows, x):
+    # demand Sa of the given rows of a block at Sd values x
+    x_dem = np.clip(x, blk['x_lo'][rows, None], blk['x_hi'][rows, None])
+    return np.interp(x_dem + blk['offset'][rows, None], blk['xp'], blk['fp'])
+
+
+def _batch_curves(blk, rows, x):
+    # demand and capacity Sa of the given rows of a block at Sd values x
+    cap = _batch_capacity_sa(
+        {key: val[rows, None] for key, val in blk['p'].items()}, x
+    )
+    return _batch_demand_sa(blk, rows, x), cap
+
+
+def _batch_first_cell(blk, m, dd, cell):
+    # Index of the first Sd grid point from where an intersection is possible.
+    # The grid is split into cells of `cell` points. Demand Sa is piecewise
+    # linear in Sd, so its minimum in a cell is at the cell ends or at a knot
+    # in the cell. The capacity curve is non-decreasing, so its maximum in a
+    # cell is at the right end of the segment(s) the cell overlaps. Cells
+    # where the demand minimum is above the capacity maximum cannot contain a
+    # sign change and are skipped.
+    rows = np.arange(m.size)
+    last = m - 1
+    n_cell = -(-last // cell)
+    edges = np.minimum(np.arange(n_cell.max() + 1)[None, :] * cell, last[:, None])
+    x_e = edges * dd
+    dem_e = _batch_demand_sa(blk, rows, x_e)
+
+    low = np.minimum(dem_e[:, :-1], dem_e[:, 1:])
+    knot_cell = np.floor(blk['dem_sd'] / (cell * dd)).astype(int)
+    inside = (knot_cell >= 0) & (knot_cell < n_cell[:, None])
+    knot_row = np.broadcast_to(rows[:, None], knot_cell.shape)
+    np.minimum.at(low, (knot_row[inside], knot_cell[inside]), blk['dem_sa'][inside])
+
+    p_c = {key: val[:, None] for key, val in blk['p'].items()}
+    x_a = x_e[:, :-1]
+    x_b = x_e[:, 1:]
+    with np.errstate(invalid='ignore'):
+        cap_high = np.fmax(
+            np.where(
+                x_a < p_c['Dy'],
+                np.minimum(x_b, p_c['Dy']) * p_c['Ay'] / p_c['Dy'],
+                -np.inf,
+            ),
+            np.where(
+                (x_b >= p_c['Dy']) & (x_a < p_c['Du']),
+                p_c['Ax']
+                + p_c['B']
+                * np.sqrt(
+                    1
+                    - np.square((np.minimum(x_b, p_c['Du']) - p_c['Du']) / p_c['C'])
+                ),
+                -np.inf,
+            ),
+        )
+        cap_high = np.where(x_b >= p_c['Du'], np.fmax(cap_high, p_c['Au']), cap_high)
+        safe = (low - cap_high > 1e-10) & (p_c['B'] >= 0)
+
+    safe |= np.arange(n_cell.max())[None, :] >= n_cell[:, None]
+    first = np.where(safe.all(axis=1), n_cell, safe.argmin(axis=1))
+    return np.minimum(first * cell, np.maximum(last, 0))
+
+
+def _batch_performance_point(p, dem_sd, dem_sa, dd, block_size, window):
+    # Same discretization and first-intersection rule as find_performance_point,
+    # but the curves of a block of cases are evaluated together. Each case
+    # skips ahead to the first grid cell that may hold an intersection and the
+    # dense evaluation continues from there in growing windows until the first
+    # intersection is found.
+    n = dem_sd.shape[0]
+    perf_sd = np.empty(n)
+    perf_sa = np.empty(n)
+    n_grid = np.maximum(np.ceil((dem_sd[:, -1] + dd) / dd).astype(int), 1)
+    p_cap = {key: p[key] for key in ['Dy', 'Ay', 'Du', 'Au', 'Ax', 'B', 'C']}
+
+    # np.interp only gives consistent results for a non-decreasing demand Sd,
+    # the other demand curves are interpolated one at a time
+    monotonic = np.all(np.diff(dem_sd, axis=1) >= 0, axis=1)
+    for i in np.where(~monotonic)[0]:
+        x = np.arange(n_grid[i]) * dd
+        dem = np.interp(x, dem_sd[i], dem_sa[i])
+        cap = _batch_capacity_sa(_take(p_cap, i), x)
+        diff = dem - cap
+        change = np.flatnonzero(diff[:-1] * diff[1:] <= 0)
+        if change.size > 0:
+            ix = change[0]
+            perf_sd[i] = x[ix]
+            perf_sa[i] = (cap[ix] + dem[ix]) / 2
+        elif dem[0] > cap[0]:
+            perf_sd[i] = x[-1]
+            perf_sa[i] = cap[-1]
+        else:
+            perf_sd[i] = 0.001
+            perf_sa[i] = 0.001
+
+    # blocks of cases with similar grid lengths keep the padding small
+    batch = np.where(monotonic)[0]
+    batch = batch[np.argsort(n_grid[batch], kind='stable')]
+    for start in range(0, batch.size, block_size):
+        cases = batch[start : start + block_size]
+        m = n_grid[cases]
+
+        # shift every demand curve by a row offset so that a single np.interp
+        # call serves all rows of the block
+        span = np.nanmax(np.abs(dem_sd[cases])) + 1.0
+        offset = np.arange(cases.size) * span
+        blk = {
+            'p': _take(p_cap, cases),
+            'dem_sd': dem_sd[cases],
+            'dem_sa': dem_sa[cases],
+            'x_lo': dem_sd[cases, 0],
+            'x_hi': dem_sd[cases, -1],
+            'offset': offset,
+            'xp': (dem_sd[cases] + offset[:, None]).ravel(),
+            'fp': dem_sa[cases].ravel(),
+        }
+
+        rows = np.arange(cases.size)
+        found = np.zeros(cases.size, dtype=bool)
+        w0 = _batch_first_cell(blk, m, dd, window)
+        width = window
+        while rows.size > 0:
+            rows = rows[m[rows] > w0[rows] + 1]
+            if rows.size == 0:
+                break
+            cols = w0[rows, None] + np.arange(width + 1)[None, :]
+            w0[rows] += width
+            width *= 2
+            dem, cap = _batch_curves(blk, rows, cols * dd)
+            diff = dem - cap
+            change = (diff[:, :-1] * diff[:, 1:] <= 0) & (
+                cols[:, 1:] < m[rows, None]
+            )
+            hit = change.any(axis=1)
+            ix = change.argmax(axis=1)[hit]
+            i_hit = np.where(hit)[0]
+            perf_sd[cases[rows[hit]]] = cols[i_hit, ix] * dd
+            perf_sa[cases[rows[hit]]] = (cap[i_hit, ix] + dem[i_hit, ix]) / 2
+            found[rows[hit]] = True
+            rows = rows[~hit]
+
+        # cases without an intersection
+        rows = np.where(~found)[0]
+        if rows.size > 0:
+            dem_0, cap_0 = _batch_curves(blk, rows, np.zeros((1, 1)))
+            x_last = ((m[rows] - 1) * dd)[:, None]
+            _, cap_last = _batch_curves(blk, rows, x_last)
+            above = dem_0[:, 0] > cap_0[:, 0]
+            perf_sd[cases[rows]] = np.where(above, x_last[:, 0], 0.001)
+            perf_sa[cases[rows]] = np.where(above, cap_last[:, 0], 0.001)
+
+    return perf_sd, perf_sa
+
+
+def run_csm_batch(  # noqa: C901, PLR0913
+    asset_params,
+    sa_03,
+    sa_10,
+    event_magnitude,
+    demand_model_name='HAZUS',
+    tol=0.05,
+    max_iter=100,
+    beta_init=5,
+    dd=0.001,
+    block_size=256,
+    window=64,
+    log_file=None,
+):
+    """Run the Capacity Spectrum Method for a batch of cases at once.
+
+    Every case is an (asset, IM realization) pair. The performance points of
+    all cases are iterated together and a case leaves the iteration once its
+    effective damping converged. The demand and capacity models follow
+    `run_csm` with the HAZUS_cao_peterson_2006 capacity and damping models.
+
+    Args:
+        asset_params (dict): Arrays (or scalars) of the parameters returned by
+            `get_csm_parameters`, broadcast to the number of cases.
+        sa_03 (array): Spectral acceleration at 0.3 s in g.
+        sa_10 (array): Spectral acceleration at 1.0 s in g.
+        event_magnitude (float or array): Earthquake magnitude.
+        demand_model_name (str): 'HAZUS' or 'HAZUS_lin_chang_2003'.
+        tol (float): The tolerance for convergence.
+        max_iter (int): The maximum number of iterations.
+        beta_init (float): Damping ratio of the first demand spectrum.
+        dd (float): Sd discretization used to find the intersections.
+        block_size (int): Number of cases whose curves are evaluated together.
+        window (int): Number of Sd grid points in the cells used to skip to
+            the first possible intersection and in the first dense window.
+        log_file (str, optional): If provided, the demand spectra, effective
+            damping and performance points of every iteration are saved to
+            this JSON file.
+
+    Returns
+    -------
+        tuple: Arrays of the Sd and Sa at the performance points.
+    """
+    sa_03 = np.atleast_1d(np.asarray(sa_03, dtype=float))
+    sa_10 = np.atleast_1d(np.asarray(sa_10, dtype=float))
+    n = np.broadcast(sa_03, sa_10, *asset_params.values()).size
+
+    p = {
+        key: np.broadcast_to(np.asarray(val, dtype=float), (n,)).copy()
+        for key, val in asset_params.items()
+    }
+    p['sa_03'] = np.broadcast_to(sa_03, (n,)).copy()
+    p['sa_10'] = np.broadcast_to(sa_10, (n,)).copy()
+    p['Tvd'] = np.broadcast_to(
+        np.power(10, (np.asarray(event_magnitude, dtype=float) - 5) / 2), (n,)
+    ).copy()
+
+    _batch_set_demand(p, demand_model_name)
+
+    perf_sd = np.zeros(n)
+    perf_sa = np.zeros(n)
+    beta_eff = np.full(n, float(beta_init))
+    beta_d = beta_eff.copy()
+
+    if log_file is not None:
+        capacity_data = {'cases': [{'iterations': []} for _ in range(n)]}
+
+    idx = np.arange(n)
+    for _i in range(max_iter):
+        p_i = _take(p, idx)
+
+        # Calc demand spectra
+        dem_sd, dem_sa = _batch_reduced_demand(p_i, beta_eff[idx], demand_model_name)
+
+        # Calc intersections (PP)
+        sd_i, sa_i = _batch_performance_point(
+            p_i, dem_sd, dem_sa, dd, block_size, window
+        )
+        perf_sd[idx] = sd_i
+        perf_sa[idx] = sa_i
+
+        if log_file is not None:
+            for j, case in enumerate(idx):
+                capacity_data['cases'][case]['iterations'].append(
+                    {
+                        'demand_spectrum': {
+                            'Sd': dem_sd[j].tolist(),
+                            'Sa': dem_sa[j].tolist(),
+                        },
+                        'beta_eff': float(beta_eff[case]),
+                        'performance_point': [float(sd_i[j]), float(sa_i[j])],
+                    }
+                )
+
+        # Calc effective damping at these points on the capacity curves
+        beta_new = _batch_beta(p_i, sd_i, sa_i)
+        beta_eff[idx] = beta_new
+
+        # Cases that met the tolerance leave the iteration
+        done = np.abs(beta_d[idx] - beta_new) <= tol
+        idx = idx[~done]
+        beta_d[idx] = beta_eff[idx]
+        if idx.size == 0:
+            break
+
+    if idx.size > 0:
+        logging.warning(
+            f'The capacity spectrum method did not converge for {idx.size} '
+            f'of {n} cases.'
+        )
+
+    if log_file is not None:
+        with open(log_file, 'w') as f:  # noqa: PTH123
+            json.dump(capacity_data, f, indent=2)
 
     return perf_sd, perf_sa
 
@@ -290,6 +736,11 @@ def determine_response(AIM_input_path, EVENT_input_path, EDP_input_path):  # noq
     tol = SIM_input_data.get('tolerance', 0.05)
     max_iter = SIM_input_data.get('max_iter', 100)
 
+    # the spectra of every CSM iteration are only saved on request
+    log_file = None
+    if SIM_input_data.get('saveIterations', False):
+        log_file = 'capacity_data.json'
+
     # get magnitude, use event file one over interface one
     if 'magnitude' in evt:
         event_magnitude = evt['magnitude']
@@ -396,59 +847,32 @@ def determine_response(AIM_input_path, EVENT_input_path, EDP_input_path):  # noq
     roof_disp1 = [0, 0]
 
     #
-    # compute X dirn response
+    # collect the x and y (or 1 and 2) dirn spectral accelerations
     #
 
-    accel_x = None
-    if 'accel_x' in response_accel:
-        accel_x = response_accel['accel_x']
-    elif 'dirn1' in response_accel:
-        accel_x = response_accel['dirn1']
-
-    if accel_x is not None:
-        pga[0], sa_x_03, sa_x_10 = accel_x
-
-        demand_model = getattr(DemandModels, demand_model_name)(event_magnitude)
-
-        capacity_model = getattr(CapacityModels, capacity_model_name)(
-            general_info=general_info
-        )
-
-        damping_model = getattr(DampingModels, damping_model_name)(
-            demand_model, capacity_model
-        )
-
-        demand_model.set_IMs(
-            sa_x_03, sa_x_10
-        )  # this function almost surely expects SA in "g"
-        demand_model.set_Tavb(damping_model)
-        demand_model.set_beta_tvd(damping_model)
-
-        # iterate to get sd and sa
-        perf_sd_x, perf_sa_x = run_csm(
-            demand_model, capacity_model, damping_model, tol, max_iter, 0
-        )
-
-        average_drift_x = perf_sd_x / (
-            capacity_model.get_hazus_alpha2() * roof_height
-        )
-        drift_ratio1[0] = average_drift_x
-        roof_sa1[0] = perf_sa_x
-        roof_disp1[0] = average_drift_x * roof_height
+    dirn_keys = [('accel_x', 'dirn1'), ('accel_y', 'dirn2')]
+    dirn_ids = []
+    sa_03 = []
+    sa_10 = []
+    for d_i, keys in enumerate(dirn_keys):
+        accel = None
+        for key in keys:
+            if key in response_accel:
+                accel = response_accel[key]
+                break
+
+        if accel is not None:
+            # the demand model expects SA in "g"
+            pga[d_i], sa_d_03, sa_d_10 = accel
+            dirn_ids.append(d_i)
+            sa_03.append(sa_d_03)
+            sa_10.append(sa_d_10)
 
     #
-    # now y (or 2) dirn response
+    # compute the response in every dirn at once
     #
 
-    accel_y = None
-    if 'accel_y' in response_accel:
-        accel_y = response_accel['accel_y']
-    elif 'dirn2' in response_accel:
-        accel_y = response_accel['dirn2']
-
-    if accel_y is not None:
-        pga[1], sa_y_03, sa_y_10 = accel_y
-
+    if len(dirn_ids) > 0:
         demand_model = getattr(DemandModels, demand_model_name)(event_magnitude)
 
         capacity_model = getattr(CapacityModels, capacity_model_name)(
@@ -459,21 +883,25 @@ def determine_response(AIM_input_path, EVENT_input_path, EDP_input_path):  # noq
             demand_model, capacity_model
         )
 
-        demand_model.set_IMs(sa_y_03, sa_y_10)
-        demand_model.set_Tavb(damping_model)
-        demand_model.set_beta_tvd(damping_model)
-
         # iterate to get sd and sa
-        perf_sd_y, perf_sa_y = run_csm(
-            demand_model, capacity_model, damping_model, tol, max_iter, 0
+        perf_sd, perf_sa = run_csm_batch(
+            get_csm_parameters(capacity_model, damping_model),
+            sa_03,
+            sa_10,
+            event_magnitude,
+            demand_model_name=demand_model_name,
+            tol=tol,
+            max_iter=max_iter,
+            log_file=log_file,
         )
 
-        average_drift_y = perf_sd_y / (
-            capacity_model.get_hazus_alpha2() * roof_height
-        )
-        drift_ratio1[1] = average_drift_y
-        roof_sa1[1] = perf_sa_y
-        roof_disp1[1] = average_drift_y * roof_height
+        for d_i, perf_sd_d, perf_sa_d in zip(dirn_ids, perf_sd, perf_sa):
+            average_drift = perf_sd_d / (
+                capacity_model.get_hazus_alpha2() * roof_height
+            )
+            drift_ratio1[d_i] = average_drift
+            roof_sa1[d_i] = perf_sa_d
+            roof_disp1[d_i] = average_drift * roof_height
 
     #
     # store the EDPs
@@ -184,11 +184,15 @@ def runDefault(root_AIM, aimName, samName, evtName, edpName, simName, getRV=Fals
         )
 
 
-def runSurrogate(modelName, GI, SAM, root_AIM, aimName, edpName):  # noqa: C901, N802, N803, D103
-    #
-    # Augment to params.in file
-    #
+def augment_params(GI, SAM, params_file='params.in'):  # noqa: C901, N803
+    """Add the GI and SAM properties used by the surrogates to params.in
 
+    Returns
+    -------
+    list of str
+        The lines of the updated params file.
+
+    """  # noqa: D400
     GIkeys = [  # noqa: N806
         'Latitude',
         'Longitude',
@@ -214,7 +218,7 @@ def runSurrogate(modelName, GI, SAM, root_AIM, aimName, edpName):  # noqa: C901,
     ]
     SAMkeys_nodes = ['mass']  # noqa: N806
 
-    with open('params.in') as f:  # noqa: PTH123
+    with open(params_file) as f:  # noqa: PTH123
         paramsStr = f.read()  # noqa: N806
     nAddParams = 0  # noqa: N806
 
@@ -264,10 +268,18 @@ def runSurrogate(modelName, GI, SAM, root_AIM, aimName, edpName):  # noqa: C901,
     stringList = set(stringList)  # remove duplicates  # noqa: N806
     stringList = [i for i in stringList if i]  # remove empty  # noqa: N806
     stringList = [str(len(stringList))] + stringList  # noqa: N806, RUF005
-    with open('params.in', 'w') as f:  # noqa: PTH123
+    with open(params_file, 'w') as f:  # noqa: PTH123
         f.write('\n'.join(stringList))
 
-    f.close()
+    return stringList
+
+
+def runSurrogate(modelName, GI, SAM, root_AIM, aimName, edpName):  # noqa: N802, N803, D103
+    #
+    # Augment to params.in file
+    #
+
+    augment_params(GI, SAM)
 
     #
     # get sur model info
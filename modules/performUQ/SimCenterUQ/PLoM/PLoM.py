@@ -12,6 +12,7 @@ import numpy as np
 import pandas as pd
 import PLoM_library as plom
 from general import *  # noqa: F403
+from scipy import sparse
 
 
 class PLoM:  # noqa: D101
@@ -684,6 +685,8 @@ class PLoM:  # noqa: D101
         runDiffMaps=None,  # noqa: N803
         seed_num=None,
         tolKDE=0.1,  # noqa: N803
+        kde_neighbors=None,
+        isde_file=None,
     ):
         """Running the PLoM algorithm to train the model and generate new realizations
         - n_mc: realization/sample size ratio
@@ -691,6 +694,8 @@ class PLoM:  # noqa: D101
         - epsilon_kde: smoothing parameter in the kernel density estimation
         - tol: tolerance in the PLoM iterations
         - max_iter: maximum number of iterations of the PLoM algorithm
+        - kde_neighbors: number of nearest neighbors kept in the diffusion kernel (None: all)
+        - isde_file: .npy file to stream the ISDE realizations to (None: kept in memory)
         """  # noqa: D205, D400, D401
         if runDiffMaps == None:  # noqa: E711
             runDiffMaps = self.runDiffMaps  # noqa: N806
@@ -789,7 +794,7 @@ class PLoM:  # noqa: D101
                 ).avail_var_list = []
                 # parameters KDE
                 self.s_v, self.c_v, self.hat_s_v, self.K, self.b = self.RunKDE(
-                    self.H, epsilon_kde
+                    self.H, epsilon_kde, k_neighbors=kde_neighbors
                 )
                 self.logfile.write_msg(
                     msg='PLoM.RunAlgorithm: kernel density estimation completed.',
@@ -801,12 +806,31 @@ class PLoM:  # noqa: D101
                 self.dbserver.add_item(
                     item_name='hat_s_v', item=np.array([self.hat_s_v])
                 )
-                self.dbserver.add_item(
-                    item_name='X_KDE', item=self.K, data_shape=self.K.shape
-                )
-                self.dbserver.add_item(
-                    item_name='EigenValues_KDE', item=self.b, data_shape=self.b.shape
-                )
+                if sparse.issparse(self.K):
+                    # the nearest-neighbor kernel is saved as (row, col, value)
+                    # triplets and its degree matrix by the diagonal
+                    K_coo = self.K.tocoo()  # noqa: N806
+                    K_triplets = np.column_stack((K_coo.row, K_coo.col, K_coo.data))  # noqa: N806
+                    self.dbserver.add_item(
+                        item_name='X_KDE',
+                        col_names=['row', 'col', 'value'],
+                        item=K_triplets,
+                        data_shape=K_triplets.shape,
+                    )
+                    self.dbserver.add_item(
+                        item_name='EigenValues_KDE',
+                        item=self.b.diagonal(),
+                        data_shape=self.b.diagonal().shape,
+                    )
+                else:
+                    self.dbserver.add_item(
+                        item_name='X_KDE', item=self.K, data_shape=self.K.shape
+                    )
+                    self.dbserver.add_item(
+                        item_name='EigenValues_KDE',
+                        item=self.b,
+                        data_shape=self.b.shape,
+                    )
                 self.logfile.write_msg(
                     msg='PLoM.RunAlgorithm: KDE, X_KDE and EigenValues_KDE saved.',
                     msg_type='RUNNING',
@@ -898,18 +922,28 @@ class PLoM:  # noqa: D101
                     tol=tol,
                     max_iter=max_iter,
                     seed_num=seed_num,
+                    out_file=isde_file,
                 )
                 self.logfile.write_msg(
                     msg='PLoM.RunAlgorithm: Realizations generated.',
                     msg_type='RUNNING',
                     msg_level=0,
                 )
-                self.dbserver.add_item(
-                    item_name='X_new',
-                    col_names=list(self.X0.columns),
-                    item=self.Xnew.T,
-                    data_shape=self.Xnew.shape,
-                )
+                if isde_file is None:
+                    self.dbserver.add_item(
+                        item_name='X_new',
+                        col_names=list(self.X0.columns),
+                        item=self.Xnew.T,
+                        data_shape=self.Xnew.shape,
+                    )
+                else:
+                    # written chunk by chunk from the realizations in isde_file
+                    self.dbserver.add_item_chunks(
+                        item_name='X_new',
+                        col_names=list(self.X0.columns),
+                        item_chunks=(x.T for x in self.Xnew_chunks()),
+                        data_shape=(self.n, self.Hnew.shape[1]),
+                    )
                 self.logfile.write_msg(
                     msg='PLoM.RunAlgorithm: X_new saved.',
                     msg_type='RUNNING',
@@ -987,13 +1021,14 @@ class PLoM:  # noqa: D101
         """
         return H, mu, phi, nu, errors
 
-    def RunKDE(self, X, epsilon_kde):  # noqa: N802, N803
+    def RunKDE(self, X, epsilon_kde, k_neighbors=None):  # noqa: N802, N803
         """Running Kernel Density Estimation
         - X: the data matrix to be reduced
         - epsilon_kde: smoothing parameter in the kernel density estimation
+        - k_neighbors: number of nearest neighbors kept in the kernel (None: all)
         """  # noqa: D205, D400, D401
         (s_v, c_v, hat_s_v) = plom.parameters_kde(X)
-        K, b = plom.K(X, epsilon_kde)  # noqa: N806
+        K, b = plom.K(X, epsilon_kde, k_neighbors=k_neighbors)  # noqa: N806
 
         return s_v, c_v, hat_s_v, K, b  # noqa: DOC201, RUF100
 
@@ -1001,7 +1036,7 @@ class PLoM:  # noqa: D101
         # ..diff maps basis...
         # self.Z = PCA(self.H)
         try:
-            g, eigenvalues = plom.g(K, b)  # diffusion maps
+            g, eigenvalues = plom.g(K, b, tol=tol)  # diffusion maps
             g = g.real
             m = plom.m(eigenvalues, tol=tol)
             a = g[:, 0:m].dot(np.linalg.inv(np.transpose(g[:, 0:m]).dot(g[:, 0:m])))
@@ -1037,6 +1072,7 @@ class PLoM:  # noqa: D101
         tol=0.02,
         max_iter=50,
         seed_num=None,
+        out_file=None,
     ):
         """The construction of a nonlinear Ito Stochastic Differential Equation (ISDE) to generate realizations of random variable H"""  # noqa: D400, D401
         if seed_num:
@@ -1101,6 +1137,7 @@ class PLoM:  # noqa: D101
                     lambda_i=self.lambda_i,
                     g_c=self.g_c,
                     D_x_g_c=self.D_x_g_c,
+                    out_file=out_file,
                 )  # solve the ISDE in n_mc iterations
 
                 self.gradient = plom.gradient_gamma(
@@ -1163,6 +1200,7 @@ class PLoM:  # noqa: D101
                 self.phi,
                 self.g[:, 0 : int(self.m)],
                 seed_num=seed_num,
+                out_file=out_file,
             )  # solve the ISDE in n_mc iterations
             self.logfile.write_msg(
                 msg='PLoM.ISDEGeneration: new generations are simulated.',
@@ -1179,11 +1217,27 @@ class PLoM:  # noqa: D101
                 data_shape=np.array(self.errors).shape,
             )
 
+        if out_file is not None:
+            # the realizations stay in out_file, see Xnew_chunks
+            self.Hnew = Hnewvalues
+            return
+
         self.Xnew = self.x_mean + self.phi.dot(np.diag(self.mu)).dot(Hnewvalues)
 
         # unscale
         self.Xnew = np.diag(self.alpha).dot(self.Xnew) + self.x_min
 
+    def Xnew_chunks(self, chunk_size=100000):  # noqa: N802
+        """Yielding the new realizations (columns) of X from the memory-mapped ISDE realizations
+        - chunk_size: number of realizations per chunk
+        """  # noqa: D205, D400, D401
+        for i in range(0, self.Hnew.shape[1], chunk_size):
+            x_new = self.x_mean + self.phi.dot(np.diag(self.mu)).dot(
+                self.Hnew[:, i : i + chunk_size]
+            )
+            # unscale
+            yield np.diag(self.alpha).dot(x_new) + self.x_min
+
     def export_results(self, data_list=[], file_format_list=['csv']):  # noqa: B006
         """Exporting results by the data names
         - data_list: list of data names
@@ -8,7 +8,9 @@ from sys import platform as pltm
 
 import numpy as np
 from general import Logfile
-from scipy import integrate
+from scipy import integrate, sparse
+from scipy.sparse.linalg import eigsh
+from scipy.spatial import cKDTree
 
 if pltm == 'linux' or pltm == 'linux2':
     c_lib = CDLL(  # noqa: F405
@@ -105,33 +107,44 @@ def kernel(x, y, epsilon):
     return k  # noqa: RET504
 
 
-def K(eta, epsilon):  # noqa: N802
+def K(eta, epsilon, k_neighbors=None):  # noqa: N802
     """>>> K((np.array([[1,1],[1,1]])), 3)
     (array([[1., 1.],
            [1., 1.]]), array([[2., 0.],
            [0., 2.]]))
     """  # noqa: D205, D400
     N = eta.shape[1]  # noqa: N806
-    K = np.zeros((N, N))  # noqa: N806
-    b = np.zeros((N, N))
-    for i in range(N):
-        row_sum = 0
-        for j in range(N):
-            if j != i:
-                K[i, j] = kernel((eta[:, i]), (eta[:, j]), epsilon)
-                row_sum = row_sum + K[i, j]
-            else:
-                K[i, j] = 1
-                row_sum = row_sum + 1
-        b[i, i] = row_sum
+    if k_neighbors is not None and k_neighbors < N - 1:
+        # sparse kernel of the k nearest neighbors of each sample (symmetrized),
+        # the dense N x N distances are never formed
+        dist, nearest = cKDTree(eta.T).query(eta.T, k=k_neighbors + 1)
+        rows = np.repeat(np.arange(N), k_neighbors + 1)
+        K = sparse.csr_matrix(  # noqa: N806
+            (np.exp(-(dist.ravel() ** 2) / (4 * epsilon)), (rows, nearest.ravel())),
+            shape=(N, N),
+        )
+        K = K.maximum(K.T).tolil()  # noqa: N806
+        K.setdiag(1)
+        K = K.tocsr()  # noqa: N806
+        b = sparse.diags(np.asarray(K.sum(axis=1)).ravel(), format='csr')
+        return K, b
+    # pairwise squared distances between the columns of eta
+    sq_norm = np.sum(eta**2, axis=0)
+    dist = sq_norm[:, np.newaxis] + sq_norm[np.newaxis, :] - 2 * eta.T.dot(eta)
+    np.maximum(dist, 0, out=dist)
+    K = np.exp(-dist / (4 * epsilon))  # noqa: N806
+    np.fill_diagonal(K, 1)
+    b = np.diag(np.sum(K, axis=1))
     return K, b
 
 
-def g(K, b):  # noqa: N803
+def g(K, b, tol=0.1):  # noqa: N803
     """>>> g((np.array([[1,0.5],[0.5,1]])), np.array([[1.5, 0.], [0., 1.5]]))
     (array([[ 0.57735027, -0.57735027],
            [ 0.57735027,  0.57735027]]), array([1.        , 0.33333333]))
     """  # noqa: D205, D400
+    if sparse.issparse(K):
+        return g_sparse(K, b, tol=tol)
     invb = np.diag(1 / np.diag(b))
     inv_sqrt_b = np.sqrt(invb)
     xi = np.linalg.eigh(inv_sqrt_b.dot(K).dot(inv_sqrt_b))
@@ -145,6 +158,26 @@ def g(K, b):  # noqa: N803
     return g, eigenvalues
 
 
+def g_sparse(K, b, tol=0.1, n_eig=32):  # noqa: N803
+    """Leading eigenvectors of a sparse kernel, as many as m() needs with tol"""  # noqa: D400
+    N = K.shape[0]  # noqa: N806
+    inv_sqrt_b = sparse.diags(1 / np.sqrt(b.diagonal()))
+    k_mat = inv_sqrt_b.dot(K).dot(inv_sqrt_b)
+    n_eig = min(n_eig, N - 1)
+    while True:
+        eigenvalues, xi = eigsh(k_mat, k=n_eig, which='LA')
+        order = np.argsort(eigenvalues, kind='mergesort')[::-1]
+        eigenvalues = eigenvalues[order]
+        # enough eigenvalues once one drops below tol times the second one
+        if n_eig == N - 1 or np.any(eigenvalues[2:] <= eigenvalues[1] * tol):
+            break
+        n_eig = min(2 * n_eig, N - 1)
+    g = inv_sqrt_b.dot(xi[:, order])
+    norm = np.sum(g**2 * b.diagonal()[:, np.newaxis], axis=0)
+    g = np.multiply(g, np.sqrt(1 / norm))
+    return g, eigenvalues
+
+
 def m(eigenvalues, tol=0.1):
     """>>> m(np.array([1, 0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2, 0.1, 0.05, 0.025]))
     11
@@ -339,7 +372,10 @@ def generator(  # noqa: D103, PLR0913
     g_c=0,
     D_x_g_c=0,  # noqa: N803
     seed_num=None,
+    out_file=None,
 ):
+    # out_file: if given, the realizations of eta are written to this .npy file
+    # (memory-mapped) as they are generated instead of being kept in memory
     if seed_num:
         np.random.seed(seed_num)
     delta_t = 2 * pi * hat_s_v / 20
@@ -350,15 +386,24 @@ def generator(  # noqa: D103, PLR0913
     beta = f_0 * delta_t / 4
     nu = z_init.shape[0]
     N = a.shape[0]  # noqa: N806
-    eta_lambda = np.zeros((nu, (n_mc + 1) * N))
-    nu_lambda = np.zeros((nu, (n_mc + 1) * N))
+    if out_file is None:
+        eta_lambda = np.zeros((nu, n_mc * N))
+    else:
+        eta_lambda = np.lib.format.open_memmap(
+            out_file, mode='w+', dtype=np.float64, shape=(nu, n_mc * N)
+        )
     n = x_mean.shape[0]
     x_ = np.zeros((n, n_mc))
     x_2 = np.zeros((n, n_mc))
     z_l = z_init
     y_l = y_init
-    eta_lambda[:, 0:N] = z_init.dot(np.transpose(g))
-    nu_lambda[:, 0:N] = y_init.dot(np.transpose(g))
+    # only the last realization of nu is needed to restart the ISDE
+    nu_lambda = y_init.dot(np.transpose(g))
+    # running sums of x and x^2 over all realizations (incl. the initial ones)
+    phi_mu = phi.dot(np.diag(mu))
+    x_l = x_mean + phi_mu.dot(z_init.dot(np.transpose(g)))
+    x_sum = np.sum(x_l, axis=1)
+    x2_sum = np.sum(x_l**2, axis=1)
     for i in range(l_0):  # noqa: B007
         z_l_half = z_l + delta_t * 0.5 * y_l
         w_l_1 = np.random.normal(scale=sqrt(delta_t), size=(nu, N)).dot(
@@ -410,26 +455,19 @@ def generator(  # noqa: D103, PLR0913
         z_l = z_l_half + delta_t * 0.5 * y_l_1
         y_l = y_l_1
         if l % M_0 == M_0 - 1:
-            eta_lambda[:, int(l / M_0) * N : (int(l / M_0) + 1) * N] = z_l.dot(
-                np.transpose(g)
-            )
-            nu_lambda[:, int(l / M_0) * N : (int(l / M_0) + 1) * N] = y_l.dot(
-                np.transpose(g)
-            )
-            x_[:, int(l / M_0) - 1 : int(l / M_0)] = mean(
-                x_mean
-                + phi.dot(np.diag(mu)).dot(eta_lambda[:, : (int(l / M_0) + 1) * N])
-            )
-            x_2[:, int(l / M_0) - 1 : int(l / M_0)] = mean(
-                (
-                    x_mean
-                    + phi.dot(np.diag(mu)).dot(
-                        eta_lambda[:, : (int(l / M_0) + 1) * N]
-                    )
-                )
-                ** 2
-            )
-    return eta_lambda[:, N:], nu_lambda[:, N:], x_, x_2
+            k = int(l / M_0)
+            eta_l = z_l.dot(np.transpose(g))
+            eta_lambda[:, (k - 1) * N : k * N] = eta_l
+            nu_lambda = y_l.dot(np.transpose(g))
+            # running mean and second moment of x
+            x_l = x_mean + phi_mu.dot(eta_l)
+            x_sum = x_sum + np.sum(x_l, axis=1)
+            x2_sum = x2_sum + np.sum(x_l**2, axis=1)
+            x_[:, k - 1] = x_sum / ((k + 1) * N)
+            x_2[:, k - 1] = x2_sum / ((k + 1) * N)
+    if out_file is not None:
+        eta_lambda.flush()
+    return eta_lambda, nu_lambda, x_, x_2
 
 
 def ac(sig):  # noqa: D103
@@ -192,6 +192,33 @@ class DBServer:  # noqa: D101
             # Not supported data_type
             return False  # noqa: DOC201, RUF100
 
+    def add_item_chunks(
+        self,
+        item_name=None,
+        col_names=None,
+        item_chunks=(),
+        data_shape=None,
+    ):
+        """Adding a new data item into database chunk by chunk
+        - item_chunks: iterable of arrays with the rows of the item
+        - data_shape: shape of the full data item
+        """  # noqa: D205, D400
+        store = pd.HDFStore(self.db_path, 'a')
+        try:
+            if '/' + item_name in store.keys():  # noqa: SIM118
+                store.remove(item_name)
+            n_rows = 0
+            for chunk in item_chunks:
+                chunk_df = pd.DataFrame(chunk, columns=col_names)
+                chunk_df.index = chunk_df.index + n_rows
+                n_rows = n_rows + len(chunk_df)
+                # table format to be appendable and readable in chunks
+                store.append(item_name, chunk_df)
+            dshape = pd.DataFrame(data_shape, columns=['DS_' + item_name])
+            dshape.to_hdf(store, 'DS_' + item_name, mode='a')
+        finally:
+            store.close()
+
     def get_item(self, item_name=None, table_like=False, data_type='Data'):  # noqa: FBT002
         """Getting a specific data item"""  # noqa: D400, D401
         if data_type == 'Data':  # noqa: RET503
@@ -264,9 +291,18 @@ class DBServer:  # noqa: D101
         - data_name: data tag
         - format: data format
         """  # noqa: D205, D400, D401
-        d = self.get_item(item_name=data_name[1:], table_like=True)
-        if d is None:
-            return 1  # noqa: DOC201, RUF100
+        store = pd.HDFStore(self.db_path, 'r')
+        try:
+            is_table = data_name in store and store.get_storer(data_name).is_table
+        finally:
+            store.close()
+        if is_table:
+            # items added by add_item_chunks are exported chunk by chunk
+            d = None
+        else:
+            d = self.get_item(item_name=data_name[1:], table_like=True)
+            if d is None:
+                return 1  # noqa: DOC201, RUF100
         if filename is None:
             filename = os.path.join(  # noqa: PTH118
                 self.dir_export, str(data_name).replace('/', '') + '.' + file_format
@@ -275,7 +311,18 @@ class DBServer:  # noqa: D101
             filename = os.path.join(  # noqa: PTH118
                 self.dir_export, filename.split('.')[0] + '.' + file_format
             )
-        if file_format == 'csv' or 'txt':  # noqa: SIM222
+        if is_table and file_format in ['csv', 'txt']:
+            with pd.HDFStore(self.db_path, 'r') as store:
+                for i, chunk in enumerate(store.select(data_name, chunksize=100000)):
+                    chunk.to_csv(
+                        filename,
+                        header=(i == 0),
+                        index=True,
+                        mode='w' if i == 0 else 'a',
+                    )
+        elif is_table:
+            return 2
+        elif file_format == 'csv' or 'txt':  # noqa: SIM222
             d.to_csv(filename, header=True, index=True)
         elif file_format == 'json':
             with open(filename, 'w', encoding='utf-8') as f:  # noqa: PTH123
@@ -1,4 +1,5 @@
 import glob  # noqa: INP001, D100
+import importlib
 import json
 import os
 import shutil
@@ -35,7 +36,17 @@ class UQengine:  # noqa: D101
             jsonPath = eeJsonPath  # noqa: N806
 
         with open(jsonPath) as f:  # noqa: PTH123
-            dakotaJson = json.load(f)  # noqa: N806, F841
+            dakotaJson = json.load(f)  # noqa: N806
+
+        # reuse one workdir per worker instead of one workdir per sample. Not
+        # for EEUQ, where the IMs are read from the per-sample workdirs
+        self.reuse_workdirs = dakotaJson.get('UQ', {}).get('reuseWorkdirs', False)
+        # directory of the cached outputs of earlier evaluations
+        self.evaluation_cache_dir = dakotaJson.get('UQ', {}).get('evaluationCacheDir', None)
+        self.evaluation_caches = {}
+        if jsonPath == eeJsonPath:
+            self.reuse_workdirs = False
+            self.evaluation_cache_dir = None
 
         # self.workflowDriver = "workflow_driver"
         # if self.os_type.lower().startswith('win'):
@@ -114,6 +125,17 @@ class UQengine:  # noqa: D101
 
         X = np.atleast_2d(X)  # noqa: N806
         nsamp = X.shape[0]
+
+        evaluation_cache = self.get_evaluation_cache(runIdx)
+        if evaluation_cache is None:
+            cache_keys = [None] * nsamp
+            cached_outputs = [None] * nsamp
+        else:
+            cache_keys = [
+                evaluation_cache.key(self.rv_name, X[i, :]) for i in range(nsamp)
+            ]
+            cached_outputs = [evaluation_cache.get(key) for key in cache_keys]
+
         if not self.do_parallel:
             Y = np.zeros((nsamp, self.y_dim))  # noqa: N806
             for ns in range(nsamp):
@@ -124,6 +146,10 @@ class UQengine:  # noqa: D101
                     self.work_dir,
                     workflowDriver,
                     runIdx,
+                    self.reuse_workdirs,
+                    cached_outputs[ns],
+                    self.evaluation_cache_dir,
+                    cache_keys[ns],
                 )
                 if Y_tmp.shape[0] != self.y_dim:
                     msg = f'model output <results.out> in sample {ns} contains {Y_tmp.shape[0]} value(s) while the number of QoIs specified is {y_dim}'  # type: ignore # noqa: F821
@@ -151,6 +177,10 @@ class UQengine:  # noqa: D101
                     self.work_dir,
                     self.workflowDriver,
                     runIdx,
+                    self.reuse_workdirs,
+                    cached_outputs[i],
+                    self.evaluation_cache_dir,
+                    cache_keys[i],
                 )
                 for i in range(nsamp)
             )
@@ -181,6 +211,9 @@ class UQengine:  # noqa: D101
                 else:
                     Y[id - id_sim, :] = val
 
+        if evaluation_cache is not None:
+            print(evaluation_cache.report())  # noqa: T201
+
         if len(alterInput) > 0:
             idx = alterInput[0]
             X = np.hstack([X[:, :idx], X[:, idx + 1 :]])  # noqa: N806
@@ -207,7 +240,25 @@ class UQengine:  # noqa: D101
 
         return X, Y, id_sim + Nsim
 
+    def get_evaluation_cache(self, runIdx=0):  # noqa: N803, D102
+        if self.evaluation_cache_dir is None:
+            return None
+        if runIdx not in self.evaluation_caches:
+            if runIdx == 0:
+                template_dir = os.path.join(self.work_dir, 'templatedir')  # noqa: PTH118
+            else:
+                template_dir = os.path.join(self.work_dir, f'templatedir.{runIdx}')  # noqa: PTH118
+            evaluation_cache = import_from_common('evaluation_cache')
+            self.evaluation_caches[runIdx] = evaluation_cache.EvaluationCache(
+                self.evaluation_cache_dir, [template_dir]
+            )
+        return self.evaluation_caches[runIdx]
+
     def compute_IM(self, i_begin, i_end):  # noqa: N802, D102
+        if self.reuse_workdirs:
+            # per-sample workdirs are not kept
+            return None
+
         workdir_list = [
             os.path.join(self.work_dir, f'workdir.{int(i)}')  # noqa: PTH118
             for i in range(i_begin, i_end + 1)
@@ -310,7 +361,26 @@ class UQengine:  # noqa: D101
     #
 
 
-def run_FEM(X, id_sim, rv_name, work_dir, workflowDriver, runIdx=0):  # noqa: C901, N802, N803, D103
+# persistent workdirs of this process, one pool for each template directory
+workdir_pools = {}
+
+
+def import_from_common(module_name):  # noqa: D103
+    # performUQ/common is only needed by the optional features
+    common_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'common')  # noqa: PTH100, PTH118, PTH120
+    if common_dir not in sys.path:
+        sys.path.insert(0, common_dir)
+    return importlib.import_module(module_name)
+
+
+def run_FEM(X, id_sim, rv_name, work_dir, workflowDriver, runIdx=0, reuse_workdirs=False, cached_outputs=None, evaluation_cache_dir=None, evaluation_cache_key=None):  # noqa: C901, N802, N803, D103, FBT002
+    if cached_outputs is not None:
+        if runIdx == 0:
+            print(f'RUNNING FEM: outputs of simulation {id_sim + 1} read from the evaluation cache')  # noqa: T201
+        else:
+            print(f'RUNNING FEM: outputs of simulation {runIdx}-{id_sim + 1} read from the evaluation cache')  # noqa: T201
+        return cached_outputs, id_sim
+
     if runIdx == 0:
         templatedirFolder = '/templatedir'  # noqa: N806
         workdirFolder = '/workdir.' + str(id_sim + 1)  # noqa: N806
@@ -328,16 +398,29 @@ def run_FEM(X, id_sim, rv_name, work_dir, workflowDriver, runIdx=0):  # noqa: C9
     # (1) create "workdir.idx " folder :need C++17 to use the files system namespace
     #
 
-    current_dir_i = work_dir + workdirFolder
-    try:
-        shutil.copytree(work_dir + templatedirFolder, current_dir_i)
-    except Exception:  # noqa: BLE001
+    if reuse_workdirs:
+        pool_key = work_dir + templatedirFolder
+        if pool_key not in workdir_pools:
+            workdir_pool = import_from_common('workdir_pool')
+            workdir_pools[pool_key] = workdir_pool.WorkdirPool(
+                work_dir, [templatedirFolder[1:]], workdirFolder[1:].rsplit('.', 1)[0]
+            )
         try:
-            shutil.copytree(work_dir + templatedirFolder, current_dir_i)
-
+            current_dir_i = workdir_pools[pool_key].acquire()
         except Exception as ex:  # noqa: BLE001
             msg = 'Error running FEM: ' + str(ex)
             return msg, id_sim
+    else:
+        current_dir_i = work_dir + workdirFolder
+        try:
+            shutil.copytree(work_dir + templatedirFolder, current_dir_i)
+        except Exception:  # noqa: BLE001
+            try:
+                shutil.copytree(work_dir + templatedirFolder, current_dir_i)
+
+            except Exception as ex:  # noqa: BLE001
+                msg = 'Error running FEM: ' + str(ex)
+                return msg, id_sim
 
     #
     # (2) write param.in file
@@ -358,6 +441,7 @@ def run_FEM(X, id_sim, rv_name, work_dir, workflowDriver, runIdx=0):  # noqa: C9
     # (3) run workflow_driver.bat
     #
 
+    t_init = time.time()
     os.chdir(current_dir_i)
     workflow_run_command = f'{current_dir_i}/{workflowDriver}  1> workflow.log 2>&1'
     # subprocess.check_call(
@@ -428,6 +512,14 @@ def run_FEM(X, id_sim, rv_name, work_dir, workflowDriver, runIdx=0):  # noqa: C9
         msg = f'Error running FEM: Response value at workdir.{id_sim + 1} is NaN'
         return msg, id_sim
 
+    if evaluation_cache_key is not None:
+        with open(os.path.join(current_dir_i, 'results.out')) as f:  # noqa: PTH118, PTH123
+            results = f.read()
+        evaluation_cache = import_from_common('evaluation_cache')
+        evaluation_cache.put_entry(
+            evaluation_cache_dir, evaluation_cache_key, results, time.time() - t_init
+        )
+
     return g, id_sim
 
     # def readCSV(self):
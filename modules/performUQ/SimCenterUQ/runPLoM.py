@@ -643,6 +643,12 @@ class runPLoM:
                 )
             self.numIter = surrogateInfo.get('numIter', 50)
             self.tolIter = surrogateInfo.get('tolIter', 0.02)
+            # nearest neighbors kept in the diffusion kernel (None: all samples)
+            self.kdeNeighbors = surrogateInfo.get('kdeNeighbors', None)
+            # write the ISDE realizations to a file instead of keeping them in memory
+            self.isdeFile = None
+            if surrogateInfo.get('streamISDE', False):
+                self.isdeFile = os.path.join(self.work_dir, 'ISDE_realizations.npy')  # noqa: PTH118
             self.preTrained = surrogateInfo.get('preTrained', False)
             if self.preTrained:
                 self.preTrainedModel = os.path.join(  # noqa: PTH118
@@ -844,6 +850,8 @@ class runPLoM:
             max_iter=self.numIter,
             seed_num=self.randomSeed,
             tolKDE=self.kdeTolerance,
+            kde_neighbors=self.kdeNeighbors,
+            isde_file=self.isdeFile,
         )
         if self.n_mc > 0:
             self.modelPLoM.export_results(data_list=['/X0', '/X_new'])
@@ -496,6 +496,14 @@ class surrogate(UQengine):  # noqa: D101
             msg = 'Error reading json: select among "Import Data File", "Sampling and Simulation" or "Import Multi-fidelity Data File"'
             self.exit(msg)
 
+        # heteroscedastic runs replicate samples on purpose to estimate the
+        # noise variance, so the replications must not be read from the cache
+        if any(self.stochastic) or any(
+            getattr(model, 'numRepl', 0) > 0
+            for model in (self.modelInfoHF, self.modelInfoLF)
+        ):
+            self.evaluation_cache_dir = None
+
         if self.do_mf:
             try:
                 moduleName = 'emukit'  # noqa: N806
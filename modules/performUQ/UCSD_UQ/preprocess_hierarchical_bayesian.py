@@ -132,9 +132,17 @@ def main(arguments: InputsType):  # noqa: D103
     # path_to_common_uq = main_script_directory.parent / "common"
     # sys.path.append(str(path_to_common_uq))
 
+    nataf_cache_dir, nataf_n_workers = uq_utilities.get_nataf_options(
+        working_directory_path,
+        run_type,
+        uq_inputs.get('Nataf Cache Directory'),
+        uq_inputs.get('Nataf Number Of Workers'),
+    )
     joint_distribution = uq_utilities.ERANatafJointDistribution(
         rv_inputs,
         correlation_matrix_inputs,
+        nataf_cache_dir,
+        nataf_n_workers,
     )
     # joint_distribution = uq_utilities.get_ERANataf_joint_distribution_instance(
     #     list_of_rv_data=rv_inputs,
@@ -175,6 +183,7 @@ def main(arguments: InputsType):  # noqa: D103
             run_directory=working_directory_path,
             driver_filename=str(driver_file),
             workdir_prefix=f'{dir_name}.workdir',
+            reuse_workdirs=uq_inputs.get('Reuse Workdirs', False),
         )
 
         list_of_models.append(model)
@@ -1,4 +1,10 @@
 # import of modules  # noqa: INP001, D100
+import hashlib
+import os
+from functools import lru_cache
+from multiprocessing import Pool
+from pathlib import Path
+
 import numpy as np
 from scipy import optimize, stats
 
@@ -80,9 +86,12 @@ class ERANataf:
     coefficients) can have values between -1 and 1.
     """  # noqa: D205, D400
 
-    def __init__(self, M, Correlation):  # noqa: C901, N803
+    def __init__(self, M, Correlation, cache_dir=None, n_workers=1):  # noqa: N803
         """Constructor method, for more details have a look at the
         class description.
+        The transformed correlation matrix is stored in and read from
+        'cache_dir' if it is given, and the Nataf integral equations are
+        solved on 'n_workers' processes.
         """  # noqa: D205, D401
         self.Marginals = np.array(M, ndmin=1)
         self.Marginals = self.Marginals.ravel()
@@ -124,134 +133,11 @@ class ERANataf:
         by a quadratic two-dimensional Gauss-Legendre integration
         """
 
-        n = 1024
-        zmax = 8
-        zmin = -zmax
-        points, weights = np.polynomial.legendre.leggauss(n)
-        points = -(0.5 * (points + 1) * (zmax - zmin) + zmin)
-        weights = weights * (0.5 * (zmax - zmin))
-
-        xi = np.tile(points, [n, 1])
-        xi = xi.flatten(order='F')
-        eta = np.tile(points, n)
-
-        first = np.tile(weights, n)
-        first = np.reshape(first, [n, n])
-        second = np.transpose(first)
-
-        weights2d = first * second
-        w2d = weights2d.flatten()
-
         #  check is X the identity
         self.Rho_Z = np.identity(n=n_dist)
         if np.linalg.norm(self.Rho_X - np.identity(n=n_dist)) > 10 ** (-5):
-            for i in range(n_dist):
-                for j in range(i + 1, n_dist):
-                    if self.Rho_X[i, j] == 0:
-                        continue
-
-                    elif (  # noqa: RET507
-                        (
-                            (self.Marginals[i].Name == 'standardnormal')
-                            and (self.Marginals[j].Name == 'standardnormal')
-                        )
-                        or (
-                            (self.Marginals[i].Name == 'normal')
-                            and (self.Marginals[j].Name == 'normal')
-                        )
-                    ):
-                        self.Rho_Z[i, j] = self.Rho_X[i, j]
-                        self.Rho_Z[j, i] = self.Rho_X[j, i]
-                        continue
-
-                    elif (self.Marginals[i].Name == 'normal') and (
-                        self.Marginals[j].Name == 'lognormal'
-                    ):
-                        Vj = self.Marginals[j].std() / self.Marginals[j].mean()  # noqa: N806
-                        self.Rho_Z[i, j] = (
-                            self.Rho_X[i, j] * Vj / np.sqrt(np.log(1 + Vj**2))
-                        )
-                        self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                        continue
-
-                    elif (self.Marginals[i].Name == 'lognormal') and (
-                        self.Marginals[j].Name == 'normal'
-                    ):
-                        Vi = self.Marginals[i].std() / self.Marginals[i].mean()  # noqa: N806
-                        self.Rho_Z[i, j] = (
-                            self.Rho_X[i, j] * Vi / np.sqrt(np.log(1 + Vi**2))
-                        )
-                        self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                        continue
-
-                    elif (self.Marginals[i].Name == 'lognormal') and (
-                        self.Marginals[j].Name == 'lognormal'
-                    ):
-                        Vi = self.Marginals[i].std() / self.Marginals[i].mean()  # noqa: N806
-                        Vj = self.Marginals[j].std() / self.Marginals[j].mean()  # noqa: N806
-                        self.Rho_Z[i, j] = np.log(
-                            1 + self.Rho_X[i, j] * Vi * Vj
-                        ) / np.sqrt(np.log(1 + Vi**2) * np.log(1 + Vj**2))
-                        self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                        continue
-
-                    #  solving Nataf
-                    tmp_f_xi = (
-                        self.Marginals[j].icdf(stats.norm.cdf(eta))
-                        - self.Marginals[j].mean()
-                    ) / self.Marginals[j].std()
-                    tmp_f_eta = (
-                        self.Marginals[i].icdf(stats.norm.cdf(xi))
-                        - self.Marginals[i].mean()
-                    ) / self.Marginals[i].std()
-                    coef = tmp_f_xi * tmp_f_eta * w2d
-
-                    def fun(rho0):
-                        return (
-                            coef * self.bivariateNormalPdf(xi, eta, rho0)  # noqa: B023
-                        ).sum() - self.Rho_X[i, j]  # noqa: B023
-
-                    x0, r = optimize.brentq(
-                        f=fun,
-                        a=-1 + np.finfo(float).eps,
-                        b=1 - np.finfo(float).eps,
-                        full_output=True,
-                    )
-                    if r.converged == 1:
-                        self.Rho_Z[i, j] = x0
-                        self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                    else:
-                        sol = optimize.fsolve(
-                            func=fun, x0=self.Rho_X[i, j], full_output=True
-                        )
-                        if sol[2] == 1:
-                            self.Rho_Z[i, j] = sol[0]
-                            self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                        else:
-                            sol = optimize.fsolve(
-                                func=fun, x0=-self.Rho_X[i, j], full_output=True
-                            )
-                            if sol[2] == 1:
-                                self.Rho_Z[i, j] = sol[0]
-                                self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                            else:
-                                for i in range(10):  # noqa: B007, PLW2901
-                                    init = 2 * np.random.rand() - 1
-                                    sol = optimize.fsolve(
-                                        func=fun, x0=init, full_output=True
-                                    )
-                                    if sol[2] == 1:
-                                        break
-                                if sol[2] == 1:
-                                    self.Rho_Z[i, j] = sol[0]
-                                    self.Rho_Z[j, i] = self.Rho_Z[i, j]
-                                else:
-                                    raise RuntimeError(  # noqa: TRY003
-                                        'brentq and fsolve coul'  # noqa: EM101
-                                        'd not converge to a '
-                                        'solution of the Nataf '
-                                        'integral equation'
-                                    )
+            self.Rho_Z = self.modified_correlation(cache_dir, n_workers)
+
         try:
             self.A = np.linalg.cholesky(self.Rho_Z)
         except np.linalg.LinAlgError:
@@ -261,6 +147,99 @@ class ERANataf:
                 'applicable.'
             )
 
+    # %%
+    def modified_correlation(self, cache_dir=None, n_workers=1):  # noqa: C901
+        """Computes the correlation matrix Rho_Z of the standard normal
+        space. Pairs with closed-form solutions are computed directly, the
+        Nataf integrals of the other pairs are tabulated for all pairs at
+        once to bracket the solutions, which are then refined pair by pair.
+        """  # noqa: D205, D401
+        n_dist = len(self.Marginals)
+        points, weights = nataf_quadrature()
+
+        # standardized marginals at the quadrature points times the weights
+        u = np.zeros((len(points), n_dist))
+        for i in range(n_dist):
+            u[:, i] = (
+                weights
+                * (
+                    self.Marginals[i].icdf(stats.norm.cdf(points))
+                    - self.Marginals[i].mean()
+                )
+                / self.Marginals[i].std()
+            )
+
+        cache_file = None
+        if cache_dir is not None:
+            # the key changes whenever a marginal or the correlation changes
+            key = hashlib.sha1()  # noqa: S324
+            for i in range(n_dist):
+                key.update(
+                    f'{self.Marginals[i].Name}|{self.Marginals[i].mean()!r}|'
+                    f'{self.Marginals[i].std()!r}|'.encode()
+                )
+            key.update(np.ascontiguousarray(u).tobytes())
+            key.update(np.ascontiguousarray(self.Rho_X, dtype=float).tobytes())
+            cache_file = os.path.join(cache_dir, f'Rho_Z_{key.hexdigest()}.npy')  # noqa: PTH118
+            if os.path.exists(cache_file):  # noqa: PTH110
+                return np.load(cache_file)
+
+        Rho_Z = np.identity(n=n_dist)  # noqa: N806
+        normal_names = ('standardnormal', 'normal')
+        pairs = []
+        for i in range(n_dist):
+            for j in range(i + 1, n_dist):
+                if self.Rho_X[i, j] == 0:
+                    continue
+
+                name_i = self.Marginals[i].Name
+                name_j = self.Marginals[j].Name
+                if (name_i in normal_names) and (name_j in normal_names):
+                    Rho_Z[i, j] = self.Rho_X[i, j]
+
+                elif (name_i == 'lognormal') and (name_j == 'lognormal'):
+                    Vi = self.Marginals[i].std() / self.Marginals[i].mean()  # noqa: N806
+                    Vj = self.Marginals[j].std() / self.Marginals[j].mean()  # noqa: N806
+                    Rho_Z[i, j] = np.log(1 + self.Rho_X[i, j] * Vi * Vj) / np.sqrt(
+                        np.log(1 + Vi**2) * np.log(1 + Vj**2)
+                    )
+
+                elif (name_i in normal_names) or (name_j in normal_names):
+                    # the correlation of a normal and any other marginal is
+                    # linear in rho0, i.e. rho = rho0 * E[Z f(Z)]
+                    k = j if name_i in normal_names else i
+                    if self.Marginals[k].Name == 'lognormal':
+                        Vk = self.Marginals[k].std() / self.Marginals[k].mean()  # noqa: N806
+                        factor = Vk / np.sqrt(np.log(1 + Vk**2))
+                    else:
+                        factor = 1 / np.sum(
+                            points * u[:, k] * stats.norm.pdf(points)
+                        )
+                    if np.abs(self.Rho_X[i, j] * factor) < 1:
+                        Rho_Z[i, j] = self.Rho_X[i, j] * factor
+                    else:
+                        pairs.append((i, j))
+
+                else:
+                    pairs.append((i, j))
+
+        if len(pairs) > 0:
+            rho_z = solve_nataf_pairs(points, u, self.Rho_X, pairs, n_workers)
+            for (i, j), rho in zip(pairs, rho_z):
+                Rho_Z[i, j] = rho
+
+        Rho_Z = np.triu(Rho_Z) + np.triu(Rho_Z, 1).T  # noqa: N806
+
+        if cache_file is not None:
+            os.makedirs(cache_dir, exist_ok=True)  # noqa: PTH103
+            # write to a temporary file first so readers never see partial files
+            tmp_file = f'{cache_file}.{os.getpid()}'
+            with open(tmp_file, 'wb') as f:  # noqa: PTH123
+                np.save(f, Rho_Z)
+            Path(tmp_file).replace(cache_file)
+
+        return Rho_Z
+
     # %%
     """
     This function performs the transformation from X to U by taking
@@ -484,3 +463,118 @@ class ERANataf:
             / (2 * np.pi * np.sqrt(1 - rho**2))
             * np.exp(-1 / (2 * (1 - rho**2)) * (x1**2 - 2 * rho * x1 * x2 + x2**2))
         )
+
+
+# %%
+@lru_cache(maxsize=None)
+def _leggauss(n, zmax):
+    zmin = -zmax
+    points, weights = np.polynomial.legendre.leggauss(n)
+    points = -(0.5 * (points + 1) * (zmax - zmin) + zmin)
+    weights = weights * (0.5 * (zmax - zmin))
+    return points, weights
+
+
+def nataf_quadrature(n=1024, zmax=8):
+    """Points and weights of the Gauss-Legendre rule on [-zmax, zmax] used
+    for the Nataf integrals.
+    """  # noqa: D205
+    points, weights = _leggauss(n, zmax)
+    return points.copy(), weights.copy()
+
+
+def nataf_integral(points, u_i, u_j, rho0):
+    """Correlation of two marginals for the correlation rho0 in the standard
+    normal space, where u_i and u_j are the standardized marginals at the
+    quadrature points times the weights.
+    """  # noqa: D205
+    pdf = ERANataf.bivariateNormalPdf(points[:, None], points[None, :], rho0)
+    return u_i @ (pdf @ u_j)
+
+
+def solve_nataf_pair(points, u_i, u_j, rho_x, a, b):
+    """Solves the Nataf integral equation of one pair in the bracket [a, b],
+    with fsolve as fallback if brentq does not converge.
+    """  # noqa: D205
+
+    def fun(rho0):
+        return nataf_integral(points, u_i, u_j, rho0) - rho_x
+
+    x0, r = optimize.brentq(f=fun, a=a, b=b, full_output=True)
+    if r.converged == 1:
+        return x0
+
+    sol = optimize.fsolve(func=fun, x0=rho_x, full_output=True)
+    if sol[2] == 1:
+        return sol[0][0]
+
+    sol = optimize.fsolve(func=fun, x0=-rho_x, full_output=True)
+    if sol[2] == 1:
+        return sol[0][0]
+
+    for _ in range(10):
+        init = 2 * np.random.rand() - 1
+        sol = optimize.fsolve(func=fun, x0=init, full_output=True)
+        if sol[2] == 1:
+            return sol[0][0]
+
+    raise RuntimeError(  # noqa: TRY003
+        'brentq and fsolve coul'  # noqa: EM101
+        'd not converge to a '
+        'solution of the Nataf '
+        'integral equation'
+    )
+
+
+def solve_nataf_pairs(points, u, Rho_X, pairs, n_workers=1, n_nodes=41):  # noqa: N803
+    """Solves the Nataf integral equations of several pairs. The integrals of
+    all pairs are tabulated on a grid of correlations with matrix products to
+    find a bracket of each solution, and the pairs are then solved in
+    parallel on 'n_workers' processes.
+    """  # noqa: D205
+    eps = np.finfo(float).eps
+    nodes = np.linspace(-1, 1, n_nodes)
+    nodes[0] = -1 + eps
+    nodes[-1] = 1 - eps
+
+    pair_i = np.array([i for i, _ in pairs])
+    pair_j = np.array([j for _, j in pairs])
+    rho_x = Rho_X[pair_i, pair_j]
+
+    # the full interval is used as bracket if there are too few pairs to
+    # make up for the cost of the table
+    a = np.full(len(pairs), nodes[0])
+    b = np.full(len(pairs), nodes[-1])
+
+    if len(pairs) >= n_nodes // 4:
+        # integrals of all pairs at the nodes, for the marginals of the pairs
+        used, index = np.unique(
+            np.concatenate([pair_i, pair_j]), return_inverse=True
+        )
+        u_used = u[:, used]
+        table = np.zeros((n_nodes, len(pairs)))
+        with np.errstate(all='ignore'):
+            for m, rho0 in enumerate(nodes):
+                pdf = ERANataf.bivariateNormalPdf(
+                    points[:, None], points[None, :], rho0
+                )
+                table[m] = (u_used.T @ pdf @ u_used)[
+                    index[: len(pairs)], index[len(pairs) :]
+                ]
+
+        # first sign change of each pair, the full interval if there is none
+        f_table = table - rho_x
+        change = f_table[:-1] * f_table[1:] <= 0
+        first = np.argmax(change, axis=0)
+        found = np.any(change, axis=0)
+        a[found] = nodes[first[found]]
+        b[found] = nodes[first[found] + 1]
+
+    args = [
+        (points, u[:, i], u[:, j], rho_x[p], a[p], b[p])
+        for p, (i, j) in enumerate(pairs)
+    ]
+    if n_workers is not None and n_workers > 1 and len(pairs) > 1:
+        with Pool(processes=min(n_workers, len(pairs))) as pool:
+            return pool.starmap(solve_nataf_pair, args)
+    return [solve_nataf_pair(*arg) for arg in args]
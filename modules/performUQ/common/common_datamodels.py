@@ -123,6 +123,13 @@ class GP_AB_UQData(BaseModel):
         log_likelihood_path (Optional[Path]): The path to the log likelihood file.
         sample_size (int): The sample size.
         seed (int): The seed value.
+        natafCacheDir (Optional[Path]): Directory of the cached Nataf
+            correlation matrices, 'nataf_cache' in the working directory by
+            default.
+        natafNumWorkers (Optional[int]): Number of processes that solve the
+            Nataf integral equations.
+        reuseWorkdirs (Optional[bool]): Reuse one model evaluation workdir
+            per worker process instead of creating one for each sample.
     """
 
     calDataFile: str
@@ -133,6 +140,9 @@ class GP_AB_UQData(BaseModel):
     seed: int
     uqType: Literal['Transitional Markov chain Monte Carlo']  # noqa: N815
     useApproximation: Optional[bool] = False  # noqa: N815
+    natafCacheDir: Optional[Path] = None  # noqa: N815, UP007
+    natafNumWorkers: Optional[int] = None  # noqa: N815, UP007
+    reuseWorkdirs: Optional[bool] = False  # noqa: N815, UP007
 
 
 class Model(BaseModel):
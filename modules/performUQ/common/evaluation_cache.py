@@ -0,0 +1,180 @@
+#
+# Copyright (c) 2021 Leland Stanford Junior University
+# Copyright (c) 2021 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+
+"""
+evaluation_cache.py.
+
+Provides an on-disk cache of model evaluations. An entry is keyed by a hash
+of the contents of the template directories, the names of the random
+variables and the exact values of the sample, and stores the contents of
+the results.out file written by the model. Entries are written to a
+temporary file that is then renamed, so the cache can be shared by
+concurrent multiprocessing or MPI workers.
+
+The key covers only the template directories. Do not use the cache if the
+model reads inputs from elsewhere that change between runs, or if the model
+is stochastic and samples are replicated on purpose, e.g., to estimate the
+noise variance of a heteroscedastic GP: every replication would return the
+same cached outputs.
+
+Typical usage:
+
+    from evaluation_cache import EvaluationCache
+    cache = EvaluationCache(cache_dir, [template_dir])
+    key = cache.key(rv_names, sample_values)
+    outputs = cache.get(key)
+    if outputs is None:
+        ...  # run the model
+        cache.put(key, results_out_text, run_time)
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+
+def _value_string(value):
+    # samples can hold strings, e.g., quoted values of discrete RVs
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _entry_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f'{key}.json')  # noqa: PTH118
+
+
+def put_entry(cache_dir, key, results, run_time):
+    """Store the contents of results.out and the model run time."""
+    entry_path = _entry_path(cache_dir, key)
+    entry_dir = os.path.dirname(entry_path)  # noqa: PTH120
+    try:
+        os.makedirs(entry_dir, exist_ok=True)  # noqa: PTH103
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'results': results, 'run_time': run_time}, f)
+        Path(tmp_path).replace(entry_path)
+    except OSError as ex:
+        # a failure to cache must not fail the evaluation
+        print(f'WARNING: could not write the evaluation cache entry: {ex}')  # noqa: T201
+
+
+class EvaluationCache:
+    """
+    On-disk cache of the results.out outputs of model evaluations.
+
+    Parameters
+    ----------
+        cache_dir (str): Directory of the cache entries. It can be shared
+            between analyses and between workers.
+        list_of_template_dirs (list): Directories whose contents are part
+            of the key.
+
+    Hits, misses and the saved model run time are counted in the process
+    that calls get().
+    """
+
+    def __init__(self, cache_dir, list_of_template_dirs):
+        self.cache_dir = cache_dir
+        self.list_of_template_dirs = list_of_template_dirs
+        self._template_hash = None
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+    def template_hash(self):
+        """Hash of the file names and contents of the template directories."""
+        if self._template_hash is None:
+            sha = hashlib.sha1()  # noqa: S324
+            for template_dir in self.list_of_template_dirs:
+                sha.update(b'\0dir\0')
+                for root, dir_names, file_names in os.walk(template_dir):
+                    dir_names.sort()
+                    rel_root = os.path.relpath(root, template_dir)
+                    for file_name in sorted(file_names):
+                        path = os.path.join(root, file_name)  # noqa: PTH118
+                        rel_path = os.path.join(rel_root, file_name)  # noqa: PTH118
+                        sha.update(rel_path.replace(os.sep, '/').encode() + b'\0')
+                        with open(path, 'rb') as f:  # noqa: PTH123
+                            for chunk in iter(lambda: f.read(1 << 20), b''):
+                                sha.update(chunk)
+                        sha.update(b'\0')
+            self._template_hash = sha.hexdigest()
+        return self._template_hash
+
+    def key(self, list_of_rv_names, sample_values):
+        """Key of the evaluation of the model at sample_values."""
+        values = np.atleast_1d(np.asarray(sample_values)).ravel()
+        if len(list_of_rv_names) != len(values):
+            msg = (
+                f'Expected one sample value for each of the '
+                f'{len(list_of_rv_names)} random variables, got {len(values)}.'
+            )
+            raise ValueError(msg)
+        sha = hashlib.sha1(self.template_hash().encode())  # noqa: S324
+        for name, value in zip(list_of_rv_names, values):
+            sha.update(f'\0{name}\0{_value_string(value)}'.encode())
+        return sha.hexdigest()
+
+    def get(self, key):
+        """Return the cached outputs, or None if the key is not cached."""
+        try:
+            with open(_entry_path(self.cache_dir, key)) as f:  # noqa: PTH123
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.saved_time += entry['run_time']
+        return np.loadtxt(io.StringIO(entry['results']), dtype=float).flatten()
+
+    def put(self, key, results, run_time):
+        """Store the contents of results.out and the model run time."""
+        put_entry(self.cache_dir, key, results, run_time)
+
+    def report(self):
+        """Summary of hits, misses and saved run time of this process."""
+        return (
+            f'Evaluation cache: {self.hits} hit(s), {self.misses} miss(es), '
+            f'{self.saved_time:.1f} s of model runs saved'
+        )
@@ -858,6 +858,9 @@ class GP_AB_Algorithm:
                 log_prior_fn,
                 self.sample_transformation_function,
                 run_parallel=True,
+                # the GP surrogate predicts a batch of samples in one call,
+                # which is faster than running the chains in a parallel pool
+                vectorize_chains=True,
                 logger=self.logger,
                 run_type=self.run_type,
             )
@@ -1619,9 +1622,17 @@ def preprocess(input_arguments):
         application_inputs,
     ) = read_inputs(input_file_full_path)
 
+    nataf_cache_dir, nataf_n_workers = uq_utilities.get_nataf_options(
+        input_arguments.path_to_working_directory,
+        input_arguments.run_type,
+        uq_inputs.natafCacheDir,
+        uq_inputs.natafNumWorkers,
+    )
     joint_distribution = uq_utilities.ERANatafJointDistribution(
         rv_inputs,
         correlation_matrix_inputs,  # type: ignore
+        nataf_cache_dir,
+        nataf_n_workers,
     )
     prior_variances = [
         (marginal.Dist.var()) ** 2
@@ -1643,6 +1654,7 @@ def preprocess(input_arguments):
         run_directory=input_arguments.path_to_working_directory,
         driver_filename=str(input_arguments.driver_file_name),
         workdir_prefix='workdir',
+        reuse_workdirs=bool(uq_inputs.reuseWorkdirs),
     )
     model_evaluation_function = model.evaluate_model_once
 
@@ -597,6 +597,116 @@ def run_mcmc_chain(
     return current_x, current_x_model, loglike_current, logtarget_current, num_accept
 
 
+def run_mcmc_chains_vectorized(
+    initial_x,
+    initial_x_model,
+    loglike_initial,
+    logtarget_initial,
+    proposal_chol,
+    beta,
+    log_likelihood_fn,
+    log_prior_fn,
+    sample_transformation_fn,
+    rngs,
+    num_steps,
+):
+    """
+    Run all MCMC chains of a stage in lockstep with batched model evaluations.
+
+    Each step proposes one sample per chain and evaluates the whole
+    (n_chains, d) batch with a single call to the transformation, likelihood,
+    and prior functions. The random numbers of every chain are drawn from its
+    own generator in the same order as in `metropolis_step`, so the chains match
+    those produced by `run_mcmc_chain` with the same generators.
+
+    Parameters
+    ----------
+    initial_x : np.ndarray
+        Initial samples in latent space, shape (n_chains, d).
+    initial_x_model : np.ndarray
+        Corresponding model-space samples, shape (n_chains, d).
+    loglike_initial : np.ndarray
+        Log-likelihoods of the initial samples, shape (n_chains,).
+    logtarget_initial : np.ndarray
+        Log of the tempered target density at the initial samples, shape (n_chains,).
+    proposal_chol : np.ndarray
+        Cholesky factor of the fixed proposal covariance matrix, shape (d, d).
+    beta : float
+        Current tempering parameter.
+    log_likelihood_fn, log_prior_fn, sample_transformation_fn : callable
+        Model functions accepting samples of shape (n_chains, d).
+    rngs : list of np.random.Generator
+        One random number generator per chain.
+    num_steps : int
+        Number of Metropolis-Hastings steps to run.
+
+    Returns
+    -------
+    final_x : np.ndarray
+        Final latent space samples (n_chains, d).
+    final_x_model : np.ndarray
+        Final model space samples (n_chains, d).
+    loglike : np.ndarray
+        Final log-likelihoods (n_chains,).
+    logtarget : np.ndarray
+        Final log-target densities (n_chains,).
+    num_accept : np.ndarray
+        Number of accepted proposals per chain (n_chains,).
+    """
+    current_x = np.array(initial_x, dtype=float)
+    current_x_model = np.array(initial_x_model, dtype=float)
+    loglike_current = np.asarray(loglike_initial, dtype=float).reshape(-1).copy()
+    logtarget_current = np.asarray(logtarget_initial, dtype=float).reshape(-1).copy()
+
+    num_chains, d = current_x.shape
+    if len(rngs) != num_chains:
+        msg = f'Expected {num_chains} random number generators, got {len(rngs)}'
+        raise ValueError(msg)
+    if proposal_chol.shape != (d, d):
+        msg = f'proposal_chol must be shape ({d}, {d}), got {proposal_chol.shape}'
+        raise ValueError(msg)
+
+    num_accept = np.zeros(num_chains, dtype=int)
+    standard_normal_samples = np.empty((num_chains, d))
+    log_u = np.empty(num_chains)
+
+    for step_num in range(num_steps):
+        # --- Draw the random numbers of every chain from its own stream ---
+        for i, rng in enumerate(rngs):
+            standard_normal_samples[i] = rng.standard_normal(d)
+            log_u[i] = np.log(rng.uniform())
+
+        # --- Propose, map to model space, and evaluate the whole batch ---
+        proposal_x = current_x + standard_normal_samples @ proposal_chol.T
+        proposal_x_model = np.reshape(
+            sample_transformation_fn(proposal_x), (num_chains, d)
+        )
+        loglike = np.asarray(
+            log_likelihood_fn(proposal_x_model, simulation_number=step_num),
+            dtype=float,
+        ).reshape(-1)
+        logprior = np.asarray(log_prior_fn(proposal_x_model), dtype=float).reshape(
+            -1
+        )
+        if loglike.size != num_chains or logprior.size != num_chains:
+            msg = (
+                f'Expected {num_chains} values, but got {loglike.size} '
+                f'log-likelihood and {logprior.size} log-prior values.'
+            )
+            raise ValueError(msg)
+        logtarget = beta * loglike + logprior
+
+        # --- Accept/reject step ---
+        accept = log_u < (logtarget - logtarget_current)
+        current_x[accept] = proposal_x[accept]
+        current_x_model[accept] = proposal_x_model[accept]
+        loglike_current[accept] = loglike[accept]
+        logtarget_current[accept] = logtarget[accept]
+        num_accept += accept
+
+    return current_x, current_x_model, loglike_current, logtarget_current, num_accept
+
+
 def run_one_stage_equal_chain_lengths(
     samples,
     model_parameters,
@@ -612,6 +722,7 @@ def run_one_stage_equal_chain_lengths(
     num_burn_in=0,
     thinning_factor=2,
     run_type='runningLocal',
+    vectorize_chains=False,  # noqa: FBT002
 ):
     """
     Run one TMCMC stage with equal-length MCMC chains and fixed proposal scale.
@@ -643,6 +754,11 @@ def run_one_stage_equal_chain_lengths(
     thinning_factor : int
         If >1 and beta=1, the chain will run num_steps * thinning_factor steps after burn-in.
         Only the last sample is returned.
+    run_type : str
+        The run type ("runningLocal" or "runningRemote") for the parallel pool.
+    vectorize_chains : bool
+        If True, all chains are advanced in lockstep in this process and the
+        proposals of each step are evaluated as one (N, d) batch.
 
     Returns
     -------
@@ -718,6 +834,61 @@ def run_one_stage_equal_chain_lengths(
         f'Total number of model evaluations = {total_num_model_evaluations}'
     )
 
+    if vectorize_chains:
+        x = np.atleast_2d(samples[chain_starting_indices]).reshape(num_samples, -1)
+        x_model = np.atleast_2d(model_parameters[chain_starting_indices]).reshape(
+            num_samples, -1
+        )
+        loglike = np.asarray(log_likelihood_values, dtype=float).reshape(-1)[
+            chain_starting_indices
+        ]
+        logprior = np.asarray(log_prior_fn(x_model), dtype=float).reshape(-1)
+        logtarget = new_beta * loglike + logprior
+
+        logging_msg_list.append(f'Running {num_samples} chains vectorized')
+        (
+            new_samples,
+            new_model_parameters,
+            new_log_likelihoods,
+            new_log_target_densities,
+            num_accepts,
+        ) = run_mcmc_chains_vectorized(
+            x,
+            x_model,
+            loglike,
+            logtarget,
+            proposal_chol,
+            new_beta,
+            log_likelihood_fn,
+            log_prior_fn,
+            sample_transformation_fn,
+            chain_rngs,
+            chain_length,
+        )
+        logging_msg_list.append(
+            f'{total_num_model_evaluations} model evaluations completed'
+        )
+        new_samples = new_samples.reshape(samples.shape)
+        new_model_parameters = new_model_parameters.reshape(model_parameters.shape)
+        new_log_likelihoods = new_log_likelihoods.reshape(
+            np.shape(log_likelihood_values)
+        )
+        new_log_target_densities = new_log_target_densities.reshape(
+            np.shape(log_likelihood_values)
+        )
+        total_num_accepts = np.sum(num_accepts)
+        return (
+            new_samples,
+            new_model_parameters,
+            new_log_likelihoods,
+            new_log_target_densities,
+            new_beta,
+            log_evidence,
+            total_num_model_evaluations,
+            total_num_accepts,
+            logging_msg_list,
+        )
+
     # Build job arguments for each chain
     job_args = []
     for i, idx in enumerate(chain_starting_indices):
@@ -894,6 +1065,8 @@ class TMCMC:
         Thinning factor applied only at the final stage (if beta = 1).
     adapt_frequency : int
         Adaptation frequency for proposal scaling (used only in non-parallel mode).
+    vectorize_chains : bool
+        Whether to advance all equal-length chains in lockstep with batched model evaluations.
     """
 
     def __init__(
@@ -909,6 +1082,7 @@ class TMCMC:
         num_steps=1,
         thinning_factor=10,
         adapt_frequency=50,
+        vectorize_chains=False,
         logger=None,
     ):
         """
@@ -936,6 +1110,11 @@ class TMCMC:
             Thinning factor for final stage chains. Defaults to 10.
         adapt_frequency : int, optional
             Adaptation frequency (used only in unequal-chain serial mode). Defaults to 50.
+        vectorize_chains : bool, optional
+            Whether to advance all chains of a stage in lockstep, evaluating the
+            proposals of each step as one (n_chains, d) batch instead of running
+            the chains in a parallel pool. Requires the likelihood, prior, and
+            transformation functions to accept batches of samples. Defaults to False.
         """
         # self.logger = logger or get_default_logger()
         self.logger = logger or setup_logger()
@@ -960,6 +1139,7 @@ class TMCMC:
             self.cov_threshold = cov_threshold
             self.thinning_factor = thinning_factor
             self.adapt_frequency = adapt_frequency
+            self.vectorize_chains = vectorize_chains
 
     # def flush_logs(self):
     #     """Flush the TMCMC logger and ensure all logs are written to disk."""
@@ -1038,7 +1218,7 @@ class TMCMC:
                     #     f'Stage {stage_num} | Current β = {betas_dict[stage_num]:.4f}'
                     # ):
                     seed = seed_sequence.spawn(1)[0].entropy
-                    if self.run_parallel:
+                    if self.run_parallel or self.vectorize_chains:
                         (
                             new_samples,
                             new_model_parameters,
@@ -1064,6 +1244,7 @@ class TMCMC:
                             num_burn_in=num_burn_in,
                             thinning_factor=self.thinning_factor,
                             run_type=self.run_type,
+                            vectorize_chains=self.vectorize_chains,
                         )
                     else:
                         (
@@ -1134,7 +1315,7 @@ class TMCMC:
                                 scale_factor_dict[i] = (
                                     scale_factor_dict[i] * 0.8 + scale_factor * 0.2
                                 )
-                        if self.run_parallel:
+                        if self.run_parallel or self.vectorize_chains:
                             self.loginfo(
                                 f'Adjusted scale factor = {scale_factor:.4f}, ({adapt_message})'
                             )
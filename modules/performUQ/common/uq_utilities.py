@@ -4,6 +4,7 @@ import os
 import shutil
 import subprocess
 import sys
+import time
 import traceback
 from dataclasses import dataclass
 from multiprocessing import get_context
@@ -17,7 +18,9 @@ import quoFEM_RV_models
 import scipy.stats
 from ERAClasses.ERADist import ERADist
 from ERAClasses.ERANataf import ERANataf
+from evaluation_cache import EvaluationCache
 from numpy.typing import NDArray
+from workdir_pool import WorkdirPool
 
 if quoFEM_RV_models not in sys.modules:
     import quoFEM_RV_models
@@ -80,6 +83,8 @@ class SimCenterWorkflowDriver:  # noqa: D101
         length_of_results: int,
         workdir_prefix: str = 'workdir',
         ignore_nans: bool = True,  # noqa: FBT001, FBT002
+        reuse_workdirs: bool = False,  # noqa: FBT001, FBT002
+        evaluation_cache_dir: Union[str, None] = None,  # noqa: FA100
     ) -> None:
         self.full_path_of_tmpSimCenter_dir = full_path_of_tmpSimCenter_dir
         self.list_of_dir_names_to_copy_files_from = (
@@ -93,6 +98,26 @@ class SimCenterWorkflowDriver:  # noqa: D101
 
         self.num_rv = len(self.list_of_rv_names)
 
+        # one persistent workdir per worker process, reset between evaluations
+        self.workdir_pool = None
+        if reuse_workdirs:
+            self.workdir_pool = WorkdirPool(
+                self.full_path_of_tmpSimCenter_dir,
+                self.list_of_dir_names_to_copy_files_from,
+                self.workdir_prefix,
+            )
+
+        # outputs of earlier evaluations at the same sample values
+        self.evaluation_cache = None
+        if evaluation_cache_dir is not None:
+            self.evaluation_cache = EvaluationCache(
+                evaluation_cache_dir,
+                [
+                    os.path.join(self.full_path_of_tmpSimCenter_dir, src_dir)  # noqa: PTH118
+                    for src_dir in self.list_of_dir_names_to_copy_files_from
+                ],
+            )
+
     def _check_size_of_sample(self, sample_values: NDArray) -> None:
         num_samples = len(sample_values)
         if num_samples > 1:
@@ -106,6 +131,13 @@ class SimCenterWorkflowDriver:  # noqa: D101
                 raise ModelEvaluationError(msg)
 
     def _create_workdir(self, simulation_number: int) -> str:
+        if self.workdir_pool is not None:
+            try:
+                return self.workdir_pool.acquire()
+            except Exception as ex:
+                msg = f'Could not reset the workdir for simulation {simulation_number + 1}.'
+                raise ModelEvaluationError(msg) from ex
+
         workdir = os.path.join(  # noqa: PTH118
             self.full_path_of_tmpSimCenter_dir,
             f'{self.workdir_prefix}.{simulation_number + 1}',
@@ -189,13 +221,29 @@ class SimCenterWorkflowDriver:  # noqa: D101
         self, simulation_number: int, sample_values: NDArray
     ) -> Union[str, NDArray]:  # noqa: FA100
         outputs = ''
+        workdir = ''
         try:
             sample_values = np.atleast_2d(sample_values)
             self._check_size_of_sample(sample_values)
+            if self.evaluation_cache is not None:
+                cache_key = self.evaluation_cache.key(
+                    self.list_of_rv_names, sample_values
+                )
+                outputs = self.evaluation_cache.get(cache_key)
+                if outputs is not None:
+                    print(  # noqa: T201
+                        f'Simulation {simulation_number + 1}: outputs read from the evaluation cache. {self.evaluation_cache.report()}'
+                    )
+                    return outputs
+            t_init = time.time()
             workdir = self._create_workdir(simulation_number)
             self._create_params_file(sample_values, workdir)
             self._execute_driver_file(workdir)
             outputs = self._read_outputs_from_results_file(workdir)
+            if self.evaluation_cache is not None:
+                with open(os.path.join(workdir, 'results.out')) as f:  # noqa: PTH118, PTH123
+                    results = f.read()
+                self.evaluation_cache.put(cache_key, results, time.time() - t_init)
         except ModelEvaluationError as model_err:
             # Custom error handling for ModelEvaluationError
             msg = f'\nIn workdir: {workdir}\n' f'Error: {model_err!s}\n'
@@ -292,8 +340,35 @@ def make_correlation_matrix(correlation_matrix_data, num_rvs) -> NDArray:  # noq
     return np.atleast_2d(correlation_matrix_data).reshape((num_rvs, num_rvs))
 
 
-def make_ERANataf_object(list_of_ERADist, correlation_matrix) -> ERANataf:  # noqa: N802, N803, D103
-    return ERANataf(M=list_of_ERADist, Correlation=correlation_matrix)
+def make_ERANataf_object(  # noqa: N802, D103
+    list_of_ERADist,  # noqa: N803
+    correlation_matrix,
+    nataf_cache_dir=None,
+    nataf_n_workers=1,
+) -> ERANataf:
+    return ERANataf(
+        M=list_of_ERADist,
+        Correlation=correlation_matrix,
+        cache_dir=nataf_cache_dir,
+        n_workers=nataf_n_workers,
+    )
+
+
+def get_nataf_options(run_directory, run_type, cache_dir=None, n_workers=None):
+    """
+    Return the Nataf correlation cache directory and number of workers.
+
+    The cache directory defaults to 'nataf_cache' in the run directory, so a
+    restarted analysis does not solve the Nataf integral equations again.
+    Point cache_dir to a directory outside of the run directory to share the
+    cache between analyses. The number of workers defaults to the number of
+    CPUs for local runs and to 1 for remote (MPI) runs.
+    """
+    if cache_dir is None:
+        cache_dir = Path(run_directory) / 'nataf_cache'
+    if n_workers is None:
+        n_workers = os.cpu_count() if run_type == 'runningLocal' else 1
+    return str(cache_dir), max(int(n_workers), 1)
 
 
 class ERANatafJointDistribution:  # noqa: D101
@@ -301,6 +376,8 @@ class ERANatafJointDistribution:  # noqa: D101
         self,
         list_of_random_variables_data: list,
         correlation_matrix_data: NDArray,
+        nataf_cache_dir: Union[str, None] = None,  # noqa: FA100
+        nataf_n_workers: int = 1,
     ) -> None:
         self.list_of_random_variables_data = list_of_random_variables_data
         self.correlation_matrix_data = correlation_matrix_data
@@ -313,7 +390,10 @@ class ERANatafJointDistribution:  # noqa: D101
             make_list_of_marginal_distributions(self.list_of_random_variables_data)
         )
         self.ERANataf_object = make_ERANataf_object(
-            self.marginal_ERAdistribution_objects_list, self.correlation_matrix
+            self.marginal_ERAdistribution_objects_list,
+            self.correlation_matrix,
+            nataf_cache_dir,
+            nataf_n_workers,
         )
 
     def u_to_x(  # noqa: D102
@@ -394,6 +474,8 @@ def create_default_model(  # noqa: D103
     driver_filename,
     length_of_results,
     workdir_prefix,
+    reuse_workdirs=False,  # noqa: FBT002
+    evaluation_cache_dir=None,
 ):
     model = SimCenterWorkflowDriver(
         full_path_of_tmpSimCenter_dir=run_directory,
@@ -402,6 +484,8 @@ def create_default_model(  # noqa: D103
         driver_filename=driver_filename,
         length_of_results=length_of_results,
         workdir_prefix=workdir_prefix,
+        reuse_workdirs=reuse_workdirs,
+        evaluation_cache_dir=evaluation_cache_dir,
     )
     return model  # noqa: RET504
 
@@ -413,9 +497,11 @@ def get_default_model_evaluation_function(model):  # noqa: D103
 def get_ERANataf_joint_distribution_instance(  # noqa: N802, D103
     list_of_rv_data,
     correlation_matrix_data,
+    nataf_cache_dir=None,
+    nataf_n_workers=1,
 ):
     joint_distribution = ERANatafJointDistribution(
-        list_of_rv_data, correlation_matrix_data
+        list_of_rv_data, correlation_matrix_data, nataf_cache_dir, nataf_n_workers
     )
     return joint_distribution  # noqa: RET504
 
@@ -432,6 +518,8 @@ def get_default_model(  # noqa: D103
     run_directory,
     driver_filename='driver',
     workdir_prefix='workdir',
+    reuse_workdirs=False,  # noqa: FBT002
+    evaluation_cache_dir=None,
 ):
     list_of_rv_names = make_list_of_rv_names(list_of_rv_data)
     length_of_results = get_length_of_results(edp_data)
@@ -446,6 +534,8 @@ def get_default_model(  # noqa: D103
         driver_filename,
         length_of_results,
         workdir_prefix,
+        reuse_workdirs,
+        evaluation_cache_dir,
     )
     return model  # noqa: RET504
 
@@ -0,0 +1,271 @@
+#
+# Copyright (c) 2021 Leland Stanford Junior University
+# Copyright (c) 2021 The Regents of the University of California
+#
+# This file is part of the SimCenter Backend Applications
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+# this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+# this list of conditions and the following disclaimer in the documentation
+# and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its contributors
+# may be used to endorse or promote products derived from this software without
+# specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+# You should have received a copy of the BSD 3-Clause License along with
+# this file. If not, see <http://www.opensource.org/licenses/>.
+
+"""
+workdir_pool.py.
+
+Provides persistent model evaluation workdirs. Every worker process gets one
+workdir that is filled from the template directories once and is reset
+between evaluations by removing the files the previous evaluation created
+and restoring only the template files it changed. Read-only template files
+can optionally be hard-linked instead of copied.
+
+Typical usage:
+
+    from workdir_pool import WorkdirPool
+    pool = WorkdirPool(tmp_simcenter_dir, ['templatedir'])
+    workdir = pool.acquire()
+
+Running this file compares evaluations per second of the pool against
+copying the template directory for every evaluation:
+
+    python workdir_pool.py --templateDir templatedir --numEvaluations 100
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _remove(path):
+    # hard links share the mode of the template file, unlink them as they are
+    if os.path.isfile(path) and os.stat(path).st_nlink > 1:  # noqa: PTH113, PTH116
+        os.unlink(path)  # noqa: PTH108
+        return
+    # make the path writable first, files of a model can be read-only
+    with contextlib.suppress(OSError):
+        os.chmod(path, stat.S_IRWXU)  # noqa: PTH101
+    if os.path.isdir(path) and not os.path.islink(path):  # noqa: PTH112, PTH114
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)  # noqa: PTH108
+
+
+def _is_read_only(path):
+    return not (os.stat(path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))  # noqa: PTH116
+
+
+class WorkdirPool:
+    """
+    Persistent model evaluation workdirs, one for each worker process.
+
+    Parameters
+    ----------
+        root_dir (str): Directory in which the workdirs are created.
+        list_of_template_dirs (list): Directories, relative to root_dir, whose
+            files are copied to the workdirs. Later directories override
+            files of earlier ones.
+        workdir_prefix (str): Prefix of the workdir names.
+        link_read_only (bool): Hard-link read-only template files instead of
+            copying them. Files are copied if linking is not possible.
+    """
+
+    def __init__(
+        self,
+        root_dir,
+        list_of_template_dirs,
+        workdir_prefix='workdir',
+        *,
+        link_read_only=False,
+    ):
+        self.root_dir = root_dir
+        self.list_of_template_dirs = list_of_template_dirs
+        self.workdir_prefix = workdir_prefix
+        self.link_read_only = link_read_only
+
+        # workdir -> {relative path: (source, (inode, size, mtime))} of the
+        # files and the set of the directories of a clean workdir
+        self._file_manifests = {}
+        self._dir_manifests = {}
+
+    def workdir_name(self):
+        """Name of the workdir of the calling process."""
+        host = socket.gethostname().split('.')[0]
+        return f'{self.workdir_prefix}.worker.{host}.{os.getpid()}'
+
+    def acquire(self):
+        """Return a clean workdir for the calling process."""
+        workdir = os.path.join(self.root_dir, self.workdir_name())  # noqa: PTH118
+        # the workdir can be removed in between, e.g., by a cleanup
+        if workdir in self._file_manifests and os.path.isdir(workdir):  # noqa: PTH112
+            self._reset(workdir)
+        else:
+            self._populate(workdir)
+        return workdir
+
+    def _template_files(self):
+        files = {}
+        dirs = set()
+        for template_dir in self.list_of_template_dirs:
+            src_root = os.path.join(self.root_dir, template_dir)  # noqa: PTH118
+            for root, dir_names, file_names in os.walk(src_root):
+                rel_root = os.path.relpath(root, src_root)
+                for dir_name in dir_names:
+                    dirs.add(os.path.normpath(os.path.join(rel_root, dir_name)))  # noqa: PTH118
+                for file_name in file_names:
+                    rel_path = os.path.normpath(os.path.join(rel_root, file_name))  # noqa: PTH118
+                    files[rel_path] = os.path.join(root, file_name)  # noqa: PTH118
+        return files, dirs
+
+    def _restore(self, src, dst):
+        if os.path.lexists(dst):
+            _remove(dst)
+        if self.link_read_only and _is_read_only(src):
+            try:
+                os.link(src, dst)
+            except OSError:
+                pass
+            else:
+                return
+        shutil.copy2(src, dst)
+
+    @staticmethod
+    def _signature(path):
+        st = os.lstat(path)
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _populate(self, workdir):
+        if os.path.exists(workdir):  # noqa: PTH110
+            _remove(workdir)
+        os.makedirs(workdir)  # noqa: PTH103
+
+        files, dirs = self._template_files()
+        for rel_dir in sorted(dirs):
+            os.makedirs(os.path.join(workdir, rel_dir), exist_ok=True)  # noqa: PTH103, PTH118
+
+        manifest = {}
+        for rel_path, src in files.items():
+            dst = os.path.join(workdir, rel_path)  # noqa: PTH118
+            self._restore(src, dst)
+            manifest[rel_path] = (src, self._signature(dst))
+
+        self._file_manifests[workdir] = manifest
+        self._dir_manifests[workdir] = dirs
+
+    def _reset(self, workdir):
+        manifest = self._file_manifests[workdir]
+        dirs = self._dir_manifests[workdir]
+
+        # remove everything that is not part of a clean workdir
+        for root, dir_names, file_names in os.walk(workdir, topdown=True):
+            rel_root = os.path.relpath(root, workdir)
+            for dir_name in list(dir_names):
+                rel_dir = os.path.normpath(os.path.join(rel_root, dir_name))  # noqa: PTH118
+                if rel_dir not in dirs:
+                    _remove(os.path.join(root, dir_name))  # noqa: PTH118
+                    dir_names.remove(dir_name)
+            for file_name in file_names:
+                rel_path = os.path.normpath(os.path.join(rel_root, file_name))  # noqa: PTH118
+                if rel_path not in manifest:
+                    _remove(os.path.join(root, file_name))  # noqa: PTH118
+
+        # restore the template files that were changed, replaced or removed
+        for rel_dir in dirs:
+            os.makedirs(os.path.join(workdir, rel_dir), exist_ok=True)  # noqa: PTH103, PTH118
+        for rel_path, (src, signature) in manifest.items():
+            dst = os.path.join(workdir, rel_path)  # noqa: PTH118
+            try:
+                unchanged = self._signature(dst) == signature
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                self._restore(src, dst)
+                manifest[rel_path] = (src, self._signature(dst))
+
+
+def benchmark(template_dir, num_evaluations, driver=None, link_read_only=False):  # noqa: FBT002
+    """
+    Compare evaluations per second of the pool and of copytree.
+
+    Each evaluation creates a workdir, writes params.in, optionally runs the
+    driver command in the workdir, and writes results.out.
+
+    Returns
+    -------
+        dict: evaluations per second of both approaches.
+    """
+    root_dir = tempfile.mkdtemp(prefix='workdir_pool_benchmark_')
+    try:
+        shutil.copytree(template_dir, os.path.join(root_dir, 'templatedir'))  # noqa: PTH118
+
+        def evaluate(workdir, i):
+            with open(os.path.join(workdir, 'params.in'), 'w') as f:  # noqa: PTH118, PTH123
+                f.write(f'1\nx {i}\n')
+            if driver is not None:
+                subprocess.run(driver, shell=True, cwd=workdir, check=True)  # noqa: S602
+            with open(os.path.join(workdir, 'results.out'), 'w') as f:  # noqa: PTH118, PTH123
+                f.write(f'{i}\n')
+
+        t_init = time.time()
+        for i in range(num_evaluations):
+            workdir = os.path.join(root_dir, f'workdir.{i + 1}')  # noqa: PTH118
+            shutil.copytree(os.path.join(root_dir, 'templatedir'), workdir)  # noqa: PTH118
+            evaluate(workdir, i)
+        copytree_rate = num_evaluations / (time.time() - t_init)
+
+        pool = WorkdirPool(root_dir, ['templatedir'], link_read_only=link_read_only)
+        t_init = time.time()
+        for i in range(num_evaluations):
+            evaluate(pool.acquire(), i)
+        pool_rate = num_evaluations / (time.time() - t_init)
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+    return {'copytree': copytree_rate, 'pool': pool_rate}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compare the evaluation rate of persistent workdirs '
+        'against copying the template directory for every evaluation.'
+    )
+    parser.add_argument('--templateDir', required=True)
+    parser.add_argument('--numEvaluations', type=int, default=100)
+    parser.add_argument('--driver', default=None, help='Command run in the workdir.')
+    parser.add_argument('--linkReadOnly', action='store_true')
+    args = parser.parse_args()
+
+    rates = benchmark(
+        args.templateDir, args.numEvaluations, args.driver, args.linkReadOnly
+    )
+    for name, rate in rates.items():
+        sys.stdout.write(f'{name}: {rate:.1f} evaluations per second\n')
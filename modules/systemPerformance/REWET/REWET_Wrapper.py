@@ -482,7 +482,7 @@ if __name__ == '__main__':
 
     mpi_spec = importlib.util.find_spec('mpi4py')
     found = mpi_spec is not None
-    if found and arg_parser.par:
+    if found and parser_data.par:
         from mpi4py import MPI
 
         comm = MPI.COMM_WORLD
@@ -576,21 +576,26 @@ if __name__ == '__main__':
 
         damage_save_path = scneario_list_path.parent
 
-        for scn_number in Damage_file_name:
-            dl_file_path, dl_file_dir = get_dl_file_name(
-                run_dir, parser_data.dir, scn_number
-            )
-
-            damage_data = damage_convertor.read_damage_file(
-                dl_file_path, run_dir, event_time, sc_geojson
-            )
+        dl_file_path_list = [
+            get_dl_file_name(run_dir, parser_data.dir, scn_number)[0]
+            for scn_number in Damage_file_name
+        ]
 
-            cur_damage_file_name_list = preprocessorIO.save_damage_data(
-                damage_save_path, damage_data, scn_number
-            )
+        # all scenarios are read at once and their damage files are saved in
+        # parallel on the CPUs of this process; AIM files are read only once
+        # for all scenarios
+        damage_file_names = damage_convertor.save_damage_files(
+            dl_file_path_list,
+            Damage_file_name,
+            run_dir,
+            event_time,
+            sc_geojson,
+            damage_save_path,
+        )
 
+        for scn_number in Damage_file_name:
             scenario_table = preprocessorIO.update_scenario_table(
-                scenario_table, cur_damage_file_name_list, scn_number
+                scenario_table, damage_file_names[scn_number], scn_number
             )
 
         preprocessorIO.save_scenario_table(
@@ -36,6 +36,9 @@
 # Contributors:
 # Sina Naeimi
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import preprocessorIO
 
@@ -353,7 +356,7 @@ def read_damage_file(file_addr, run_dir, event_time, sc_geojson):
         Damage data in PELICUN dict format.
 
     """
-    # TODO(SINA): Make reading once for each scenario
+    # read_damage_files converts many scenarios reading each AIM only once
 
     damage_data = preprocessorIO.read_json_file(file_addr)
 
@@ -394,3 +397,506 @@ def read_damage_file(file_addr, run_dir, event_time, sc_geojson):
     damage_data['Node'] = node_damage_data
 
     return damage_data
+
+
+def read_pipe_damage_rows(pipe_damage_data):
+    """Read the damage records of the pipes of one scenario.
+
+    Parameters
+    ----------
+    pipe_damage_data : dict
+        Pipe damage in PELICUN format.
+
+    Raises
+    ------
+    ValueError
+        If damage type is not what it should be.
+
+    Returns
+    -------
+    list
+        Pipe ID, damage location, and damage type of each damage.
+
+    """
+    rows = []
+    for pipe_id, cur_data in pipe_damage_data.items():
+        cur_damage = cur_data['Damage']
+
+        aggregates_list = [
+            cur_agg for cur_agg in list(cur_damage.keys()) if 'aggregate' in cur_agg
+        ]
+        if len(aggregates_list) == 0:
+            continue
+        segment_step = 1 / len(aggregates_list)
+        c = 0
+
+        for cur_agg in aggregates_list:
+            damage_val = cur_damage[cur_agg]
+            if damage_val > 0:
+                if damage_val == LEAK_VALUE:
+                    damage_type = 'leak'
+                elif damage_val == BREAK_VALUE:
+                    damage_type = 'break'
+                else:
+                    raise ValueError('The damage type must be either 1 or 2')  # noqa: EM101, TRY003
+            else:
+                continue
+
+            cur_loc = c * segment_step + segment_step / 2
+            c += 1
+            rows.append((pipe_id, cur_loc, damage_type))
+    return rows
+
+
+def read_node_damage_rows(node_damage_data):
+    """Read the damage records of the junctions of one scenario.
+
+    Parameters
+    ----------
+    node_damage_data : dict
+        Junction damage in PELICUN format.
+
+    Returns
+    -------
+    list
+        Node ID and number of damages of each damaged junction.
+
+    """
+    rows = []
+    for node_id, cur_data in node_damage_data.items():
+        aggregates_list = [
+            cur_agg for cur_agg in list(cur_data.keys()) if 'aggregate' in cur_agg
+        ]
+
+        if len(aggregates_list) == 0:
+            continue
+
+        rows.append((node_id, cur_data['Damage']['aggregate']))
+    return rows
+
+
+def read_restore_damage_rows(asset_damage_data):
+    """Read the damage records of the pumps or tanks of one scenario.
+
+    Parameters
+    ----------
+    asset_damage_data : dict
+        Pump or tank damage in PELICUN format.
+
+    Returns
+    -------
+    list
+        Asset ID and restore time of each damaged asset.
+
+    """
+    return [
+        (asset_id, cur_data['Repair'])
+        for asset_id, cur_data in asset_damage_data.items()
+        # cur_damage_state = 0 means undamaged asset
+        if cur_data['Damage'] != 0
+    ]
+
+
+def read_scenario_damage(file_addr):
+    """Read the damage records of one scenario.
+
+    Parameters
+    ----------
+    file_addr : path
+        PELICUN damage file in JSON format.
+
+    Returns
+    -------
+    damage_rows : dict
+        Pipe, node, pump, and tank damage records as lists of rows.
+
+    """
+    damage_data = preprocessorIO.read_json_file(file_addr)
+
+    wn_damage_data = damage_data['WaterDistributionNetwork']
+
+    return {
+        'Pipe': read_pipe_damage_rows(wn_damage_data.get('Pipe', {})),
+        'Node': read_node_damage_rows(wn_damage_data.get('Junction', {})),
+        'Pump': read_restore_damage_rows(wn_damage_data.get('Pump', {})),
+        'Tank': read_restore_damage_rows(wn_damage_data.get('Tank', {})),
+    }
+
+
+def read_aim_general_information(asset_key):
+    """Read the general information of an asset's AIM file.
+
+    Parameters
+    ----------
+    asset_key : tuple
+        Asset ID, asset type, asset sub-type, and run directory.
+
+    Returns
+    -------
+    dict
+        General information of the asset.
+
+    """
+    return find_read_aim_file(*asset_key)['GeneralInformation']
+
+
+def parallel_map(func, iterable, n_workers):
+    """Map a function over an iterable using a process pool if possible."""
+    iterable = list(iterable)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(iterable))
+    if n_workers < 2:  # noqa: PLR2004
+        return [func(item) for item in iterable]
+
+    chunk_size = max(1, len(iterable) // (4 * n_workers))
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(func, iterable, chunksize=chunk_size))
+
+
+def read_damage_tables(
+    file_addr_list, scn_number_list, run_dir, event_time, sc_geojson, n_workers=None
+):
+    """Read PELICUN damage files of many scenarios into damage tables.
+
+    The damage files are read in parallel, and every AIM file and the asset
+    GeoJSON file are read only once for all scenarios.
+
+    Parameters
+    ----------
+    file_addr_list : list
+        PELICUN damage files in JSON format.
+    scn_number_list : list
+        Scenario number of each damage file.
+    run_dir : path
+        The directory where data is stored (aka the R2dTool directory)
+    event_time : int
+        Time of the event.
+    sc_geojson : path
+        Asset GeoJSON file.
+    n_workers : int, optional
+        Number of processes. The default is the number of CPUs.
+
+    Raises
+    ------
+    ValueError
+        If there is not one scenario number for each damage file.
+
+    Returns
+    -------
+    damage_tables : dict
+        Pipe, node, pump, and tank damage tables of all scenarios.
+
+    """
+    if len(file_addr_list) != len(scn_number_list):
+        raise ValueError(  # noqa: TRY003
+            f'{len(file_addr_list)} damage files were given for '  # noqa: EM102
+            f'{len(scn_number_list)} scenarios.'
+        )
+
+    scenario_rows = parallel_map(read_scenario_damage, file_addr_list, n_workers)
+    damage_tables = create_damage_tables(scn_number_list, scenario_rows)
+
+    # asset data of the damaged pipes and junctions
+    pipe_table = damage_tables['Pipe']
+    node_table = damage_tables['Node']
+    asset_keys = [
+        (asset_id, 'WaterDistributionNetwork', 'Pipe', run_dir)
+        for asset_id in pipe_table['asset'].unique()
+    ] + [
+        (asset_id, 'WaterDistributionNetwork', 'Node', run_dir)
+        for asset_id in node_table['asset'].unique()
+    ]
+    general_information = dict(
+        zip(
+            asset_keys,
+            parallel_map(read_aim_general_information, asset_keys, n_workers),
+        )
+    )
+
+    add_pipe_table_data(pipe_table, general_information, sc_geojson)
+    add_node_table_data(node_table, general_information)
+    for sub_type in ['Pump', 'Tank']:
+        table = damage_tables[sub_type]
+        table.insert(1, sub_type.lower() + '_id', table['asset'])
+        table.insert(2, 'time', event_time)
+
+    return damage_tables
+
+
+def read_damage_files(
+    file_addr_list, scn_number_list, run_dir, event_time, sc_geojson, n_workers=None
+):
+    """Read PELICUN damage files of many scenarios at once.
+
+    The REWET-style damage of each scenario is sliced from the damage tables
+    of read_damage_tables. The result is the same as calling
+    read_damage_file for every scenario.
+
+    Parameters
+    ----------
+    file_addr_list : list
+        PELICUN damage files in JSON format.
+    scn_number_list : list
+        Scenario number of each damage file.
+    run_dir : path
+        The directory where data is stored (aka the R2dTool directory)
+    event_time : int
+        Time of the event.
+    sc_geojson : path
+        Asset GeoJSON file.
+    n_workers : int, optional
+        Number of processes. The default is the number of CPUs.
+
+    Returns
+    -------
+    damage_data : dict
+        REWET-style damage data of each scenario number.
+
+    """
+    damage_tables = read_damage_tables(
+        file_addr_list, scn_number_list, run_dir, event_time, sc_geojson, n_workers
+    )
+    return scenario_damage_data(damage_tables, scn_number_list, event_time)
+
+
+def save_damage_files(
+    file_addr_list,
+    scn_number_list,
+    run_dir,
+    event_time,
+    sc_geojson,
+    damage_save_path,
+    n_workers=None,
+):
+    """Convert PELICUN damage files of many scenarios to REWET damage files.
+
+    The damage files are read with read_damage_tables, and the REWET-style
+    damage files of the scenarios are sliced and saved in parallel.
+
+    Parameters
+    ----------
+    file_addr_list : list
+        PELICUN damage files in JSON format.
+    scn_number_list : list
+        Scenario number of each damage file.
+    run_dir : path
+        The directory where data is stored (aka the R2dTool directory)
+    event_time : int
+        Time of the event.
+    sc_geojson : path
+        Asset GeoJSON file.
+    damage_save_path : path
+        Path to the damage directory.
+    n_workers : int, optional
+        Number of processes. The default is the number of CPUs.
+
+    Returns
+    -------
+    damage_file_names : dict
+        Names of the damage files saved for each scenario number.
+
+    """
+    damage_tables = read_damage_tables(
+        file_addr_list, scn_number_list, run_dir, event_time, sc_geojson, n_workers
+    )
+
+    # every task gets only the rows of its own group of scenarios
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    group_size = max(1, -(-len(scn_number_list) // (4 * n_workers)))
+    scenario_groups = []
+    for k in range(0, len(scn_number_list), group_size):
+        group = scn_number_list[k : k + group_size]
+        group_tables = {
+            sub_type: table[table['scenario'].isin(group)]
+            for sub_type, table in damage_tables.items()
+        }
+        scenario_groups.append((damage_save_path, event_time, group, group_tables))
+
+    damage_file_names = {}
+    for group_file_names in parallel_map(
+        save_scenario_group, scenario_groups, n_workers
+    ):
+        damage_file_names.update(group_file_names)
+
+    return damage_file_names
+
+
+def save_scenario_group(scenario_group):
+    """Save the REWET-style damage files of a group of scenarios.
+
+    Parameters
+    ----------
+    scenario_group : tuple
+        Damage directory, event time, scenario numbers, and the damage
+        tables of the scenarios.
+
+    Returns
+    -------
+    dict
+        Names of the damage files saved for each scenario number.
+
+    """
+    damage_save_path, event_time, scn_number_list, damage_tables = scenario_group
+    damage_data = scenario_damage_data(damage_tables, scn_number_list, event_time)
+    return {
+        scn_number: preprocessorIO.save_damage_data(
+            damage_save_path, damage_data[scn_number], scn_number
+        )
+        for scn_number in scn_number_list
+    }
+
+
+def scenario_damage_data(damage_tables, scn_number_list, event_time):
+    """Slice the REWET-style damage of each scenario from damage tables.
+
+    Parameters
+    ----------
+    damage_tables : dict
+        Pipe, node, pump, and tank damage tables of the scenarios.
+    scn_number_list : list
+        Scenario numbers.
+    event_time : int
+        Time of the event.
+
+    Returns
+    -------
+    damage_data : dict
+        REWET-style damage data of each scenario number.
+
+    """
+    damage_data = {}
+    for scn_number in scn_number_list:
+        damage_data[scn_number] = {}
+    for sub_type, table in damage_tables.items():
+        for scn_number, damage_list in slice_damage_table(
+            table, scn_number_list, reverse=sub_type == 'Pipe'
+        ).items():
+            damage_data[scn_number][sub_type] = pd.Series(
+                data=damage_list,
+                index=[event_time for val in damage_list],
+                dtype='O',
+            )
+
+    return damage_data
+
+
+def create_damage_tables(scn_number_list, scenario_rows):
+    """Collect the damage records of all scenarios into tables.
+
+    Parameters
+    ----------
+    scn_number_list : list
+        Scenario number of each damage file.
+    scenario_rows : list
+        Damage records of each scenario from read_scenario_damage.
+
+    Returns
+    -------
+    damage_tables : dict
+        Pipe, node, pump, and tank damage tables of all scenarios. The values
+        keep their JSON types.
+
+    """
+    damage_tables = {}
+    columns = {
+        'Pipe': ['asset', 'damage_loc', 'type'],
+        'Node': ['asset', 'number_of_damages'],
+        'Pump': ['asset', 'Restore_time'],
+        'Tank': ['asset', 'Restore_time'],
+    }
+    for sub_type, sub_type_columns in columns.items():
+        rows = [
+            (scn_number, *row)
+            for scn_number, damage_rows in zip(scn_number_list, scenario_rows)
+            for row in damage_rows[sub_type]
+        ]
+        damage_tables[sub_type] = pd.DataFrame(
+            rows, columns=['scenario', *sub_type_columns], dtype='O'
+        )
+    return damage_tables
+
+
+def add_pipe_table_data(pipe_table, general_information, sc_geojson):
+    """Add the pipe IDs and materials to the pipe damage table in place.
+
+    Parameters
+    ----------
+    pipe_table : pd.DataFrame
+        Pipe damage table of all scenarios.
+    general_information : dict
+        General information of the AIM of each asset key.
+    sc_geojson : path
+        Asset GeoJSON file.
+
+    """
+    if len(pipe_table) == 0:
+        return
+
+    sc_geojson_file = preprocessorIO.read_json_file(sc_geojson)
+    pipe_index_to_id = {
+        str(ss['id']): ss['properties']['InpID']
+        for ss in sc_geojson_file['features']
+        if ss['properties']['type'] == 'Pipe'
+    }
+    # If material is not ptovided, then the material is CI as the default
+    material = {
+        asset_key[0]: 'CI' if gi.get('Material', None) is None else gi['Material']
+        for asset_key, gi in general_information.items()
+        if asset_key[2] == 'Pipe'
+    }
+    pipe_table.insert(1, 'pipe_id', pipe_table['asset'].map(pipe_index_to_id))
+    pipe_table['Material'] = pipe_table['asset'].map(material)
+
+
+def add_node_table_data(node_table, general_information):
+    """Add the node names and pipe lengths to the node damage table in place.
+
+    Parameters
+    ----------
+    node_table : pd.DataFrame
+        Node damage table of all scenarios.
+    general_information : dict
+        General information of the AIM of each asset key.
+
+    """
+    total_length = {
+        asset_key[0]: gi.get('Total_length', None)
+        for asset_key, gi in general_information.items()
+        if asset_key[2] == 'Node'
+    }
+    node_table.insert(1, 'node_name', node_table['asset'])
+    node_table['node_Pipe_Length'] = node_table['asset'].map(total_length)
+
+
+def slice_damage_table(table, scn_number_list, *, reverse=False):
+    """Slice the damage records of each scenario from a damage table.
+
+    Parameters
+    ----------
+    table : pd.DataFrame
+        Damage table of all scenarios.
+    scn_number_list : list
+        Scenario numbers.
+    reverse : bool, optional
+        Reverse the order of the records of each scenario.
+
+    Returns
+    -------
+    dict
+        List of damage records of each scenario number.
+
+    """
+    record_columns = [
+        column for column in table.columns if column not in {'scenario', 'asset'}
+    ]
+    scenario_groups = table.groupby('scenario', sort=False).indices
+    damage_lists = {}
+    for scn_number in scn_number_list:
+        index = scenario_groups.get(scn_number, [])
+        damage_list = table.iloc[index][record_columns].to_dict('records')
+        if reverse:
+            damage_list.reverse()
+        damage_lists[scn_number] = damage_list
+    return damage_lists
@@ -234,8 +234,10 @@ def save_scenario_table(scenario_table, scenario_table_file_path):
 
     Parameters
     ----------
-    rewet_input_data : Dict
-        REWET input data.
+    scenario_table : Pandas DataFrame or List
+        Scenario table.
+    scenario_table_file_path : path
+        Path to the scenario table file.
 
     Returns
     -------
@@ -105,6 +105,106 @@ def calculate_road_capacity(nlanes: int,
     """
     return nlanes * traffic_volume_per_lane
 
+class AssignmentNetwork:
+    """
+    Fixed road network topology reused across traffic assignment substeps.
+
+    The node coordinates, edge end nodes and the lookup from (start node,
+    end node) pairs to edge positions are built once. Each substep only
+    provides the current edge weights, and edge states are handled as
+    NumPy arrays indexed by edge position instead of "u-v" strings.
+
+    Attributes__
+        nodes_df (pd.DataFrame): Nodes with 'x' and 'y' coordinates.
+        edge_labels (pd.Index): The "u-v" labels of the edges.
+        start_nid (np.ndarray): Start node id of each edge.
+        end_nid (np.ndarray): End node id of each edge.
+        two_way_edges (bool): Flag indicating if edges are two-way.
+    """
+
+    def __init__(self, nodes_df, edges_df, two_way_edges=False):  # noqa: FBT002
+        self.nodes_df = nodes_df
+        self.edge_labels = edges_df.index
+        self.start_nid = edges_df['start_nid'].to_numpy(dtype=np.int64)
+        self.end_nid = edges_df['end_nid'].to_numpy(dtype=np.int64)
+        self.two_way_edges = two_way_edges
+        self._key_base = (
+            max(
+                int(np.max(nodes_df.index.to_numpy(), initial=0)),
+                int(np.max(self.end_nid, initial=0)),
+                int(np.max(self.start_nid, initial=0)),
+            )
+            + 1
+        )
+        edge_keys = self.start_nid * self._key_base + self.end_nid
+        self._key_order = np.argsort(edge_keys, kind='stable')
+        self._sorted_keys = edge_keys[self._key_order]
+
+    def edge_positions(self, start_nodes, end_nodes):
+        """
+        Find the positions of the edges connecting the given node pairs.
+
+        Args:
+            start_nodes (np.ndarray): Start node ids.
+            end_nodes (np.ndarray): End node ids.
+
+        Returns
+        -------
+            np.ndarray: Edge positions (-1 for pairs that are not an edge).
+        """
+        keys = (
+            np.asarray(start_nodes, dtype=np.int64) * self._key_base
+            + np.asarray(end_nodes, dtype=np.int64)
+        )
+        loc = np.searchsorted(self._sorted_keys, keys)
+        loc = np.minimum(loc, len(self._sorted_keys) - 1)
+        found = self._sorted_keys[loc] == keys
+        return np.where(found, self._key_order[loc], -1)
+
+    def label_positions(self, labels):
+        """
+        Find the positions of edges given by their "u-v" labels.
+
+        Args:
+            labels (array-like): Edge labels (None for no edge).
+
+        Returns
+        -------
+            np.ndarray: Edge positions (-1 for unknown labels).
+        """
+        return self.edge_labels.get_indexer(pd.Index(labels, dtype=object))
+
+    def shortest_paths(self, weights, origins, destinations):
+        """
+        Compute shortest paths and path lengths for the current edge weights.
+
+        pandana does not support changing the impedance of an existing network,
+        so the contraction hierarchy is prepared for the given weights on the
+        fixed topology.
+
+        Args:
+            weights (np.ndarray): Weight of each edge.
+            origins (np.ndarray): Origin node ids.
+            destinations (np.ndarray): Destination node ids.
+
+        Returns
+        -------
+            tuple: List of node paths and array of path lengths.
+        """
+        net = pdna.Network(
+            self.nodes_df['x'],
+            self.nodes_df['y'],
+            pd.Series(self.start_nid),
+            pd.Series(self.end_nid),
+            pd.DataFrame({'weight': np.asarray(weights, dtype=float)}),
+            twoway=self.two_way_edges,
+        )
+        net.set(pd.Series(net.node_ids))
+        paths = net.shortest_paths(origins, destinations)
+        path_lengths = net.shortest_path_lengths(origins, destinations)
+        return paths, np.asarray(path_lengths, dtype=float)
+
+
 class TransportationPerformance(ABC):  # noqa: B024
     """
     An abstract base class for simulating transportation networks.
@@ -452,6 +552,7 @@ class TransportationPerformance(ABC):  # noqa: B024
         alpha_f=0.3,
         beta_f=3,
         two_way_edges=False,  # noqa: FBT002
+        network=None,
     ):
         """
         Perform substep assignment for transportation network simulation.
@@ -473,6 +574,8 @@ class TransportationPerformance(ABC):  # noqa: B024
             alpha_f (float): Alpha factor for travel time calculation.
             beta_f (float): Beta factor for travel time calculation.
             two_way_edges (bool): Flag indicating if edges are two-way.
+            network (AssignmentNetwork): Network topology of weighted_edges_df
+                reused across substeps. Built from the inputs if None.
 
         Returns
         -------
@@ -480,101 +583,112 @@ class TransportationPerformance(ABC):  # noqa: B024
         """
         # open_edges_df = weighted_edges_df.loc[weighted_edges_df['fft'] < 36000]
         open_edges_df = weighted_edges_df
-
-        net = pdna.Network(
-            nodes_df['x'],
-            nodes_df['y'],
-            open_edges_df['start_nid'],
-            open_edges_df['end_nid'],
-            open_edges_df[['weight']],
-            twoway=two_way_edges,
-        )
-
-        # print('network')  # noqa: RUF100, T201
-        net.set(pd.Series(net.node_ids))
-        # print('net')  # noqa: RUF100, T201
+        if network is None or not network.edge_labels.equals(open_edges_df.index):
+            network = AssignmentNetwork(nodes_df, open_edges_df, two_way_edges)
 
         nodes_origin = od_ss['origin_nid'].to_numpy()
         nodes_destin = od_ss['destin_nid'].to_numpy()
         nodes_current = od_ss['current_nid'].to_numpy()
         agent_ids = od_ss['agent_id'].to_numpy()
-        agent_current_links = od_ss['current_link'].to_numpy()
+        agent_current_links = network.label_positions(od_ss['current_link'])
         agent_current_link_times = od_ss['current_link_time'].to_numpy()
-        paths = net.shortest_paths(nodes_current, nodes_destin)
+        paths, path_lengths = network.shortest_paths(
+            open_edges_df['weight'].to_numpy(), nodes_current, nodes_destin
+        )
+        num_agents = len(paths)
 
         # check agent time limit
-        path_lengths = net.shortest_path_lengths(nodes_current, nodes_destin)
-        remove_agent_list = []
         if agent_time_limit is None:
-            pass
+            removed = np.zeros(num_agents, dtype=bool)
         else:
-            for agent_idx, agent_id in enumerate(agent_ids):
-                planned_trip_length = path_lengths[agent_idx]
-                # agent_time_limit[agent_id]
-                trip_length_limit = agent_time_limit
-                if planned_trip_length > trip_length_limit + 0:
-                    remove_agent_list.append(agent_id)
-
-        edge_travel_time_dict = weighted_edges_df['t_avg'].T.to_dict()
-        edge_current_vehicles = weighted_edges_df['veh_current'].T.to_dict()
-        edge_quarter_vol = weighted_edges_df['vol_true'].T.to_dict()
-        # edge_length_dict = weighted_edges_df['length'].T.to_dict()
-        od_residual_ss_list = []
-        # all_paths = []
-        path_i = 0
-        for path in paths:
-            trip_origin = nodes_origin[path_i]
-            trip_destin = nodes_destin[path_i]
-            agent_id = agent_ids[path_i]
-            # remove some agent (path too long)
-            if agent_id in remove_agent_list:
-                path_i += 1
-                # no need to update trip info
-                continue
-            remaining_time = (
-                3600 / quarter_counts + agent_current_link_times[path_i]
+            # agent_time_limit[agent_id]
+            trip_length_limit = agent_time_limit
+            removed = path_lengths > trip_length_limit + 0
+            removed = np.isin(agent_ids, agent_ids[removed])
+
+        # edge states indexed by edge position
+        edge_travel_time = open_edges_df['t_avg'].to_numpy()
+        edge_current_vehicles = open_edges_df['veh_current'].to_numpy().copy()
+        edge_quarter_vol = open_edges_df['vol_true'].to_numpy().copy()
+
+        # path edges of all agents in one flat array
+        num_path_edges = np.array(
+            [max(len(path) - 1, 0) for path in paths], dtype=np.int64
+        )
+        path_offsets = np.concatenate(([0], np.cumsum(num_path_edges)[:-1]))
+        path_start_nodes = np.concatenate(
+            [np.asarray(path[:-1], dtype=np.int64) for path in paths]
+            + [np.zeros(0, dtype=np.int64)]
+        )
+        path_end_nodes = np.concatenate(
+            [np.asarray(path[1:], dtype=np.int64) for path in paths]
+            + [np.zeros(0, dtype=np.int64)]
+        )
+        path_edges = network.edge_positions(path_start_nodes, path_end_nodes)
+        if np.any(path_edges < 0):
+            missing = np.flatnonzero(path_edges < 0)[0]
+            raise KeyError(f'{path_start_nodes[missing]}-{path_end_nodes[missing]}')
+
+        # advance all agents along their paths, one path edge at a time
+        remaining_time = 3600 / quarter_counts + agent_current_link_times.astype(
+            float
+        )
+        used_time = np.zeros(num_agents)
+        trip_stop = nodes_current.copy()
+        stop_edge = np.full(num_agents, -1, dtype=np.int64)
+        active = (~removed) & (num_path_edges > 0)
+        step = 0
+        while np.any(active):
+            idx = np.flatnonzero(active)
+            flat_pos = path_offsets[idx] + step
+            edges = path_edges[flat_pos]
+            travel_time = edge_travel_time[edges]
+            moves = (remaining_time[idx] > travel_time) & (
+                travel_time < 36000  # noqa: PLR2004
             )
-            used_time = 0
-            for edge_s, edge_e in zip(path, path[1:]):
-                edge_str = f'{edge_s}-{edge_e}'
-                edge_travel_time = edge_travel_time_dict[edge_str]
-                if (remaining_time > edge_travel_time) and (
-                    edge_travel_time < 36000  # noqa: PLR2004
-                ):
-                    # all_paths.append(edge_str)
-                    # p_dist += edge_travel_time
-                    remaining_time -= edge_travel_time
-                    used_time += edge_travel_time
-                    edge_quarter_vol[edge_str] += 1 * sample_interval
-                    trip_stop = edge_e
-                    if edge_str == agent_current_links[path_i]:
-                        edge_current_vehicles[edge_str] -= 1 * sample_interval
-                else:
-                    if edge_str != agent_current_links[path_i]:
-                        edge_current_vehicles[edge_str] += 1 * sample_interval
-                    new_current_link = edge_str
-                    new_current_link_time = remaining_time
-                    trip_stop = edge_s
-                    od_residual_ss_list.append(
-                        [
-                            agent_id,
-                            trip_origin,
-                            trip_destin,
-                            trip_stop,
-                            new_current_link,
-                            new_current_link_time,
-                        ]
-                    )
-                    break
-            trip_info[(agent_id, trip_origin, trip_destin)][0] += (
-                3600 / quarter_counts
+            # agents traversing the edge
+            move_idx = idx[moves]
+            move_edges = edges[moves]
+            remaining_time[move_idx] -= travel_time[moves]
+            used_time[move_idx] += travel_time[moves]
+            np.add.at(edge_quarter_vol, move_edges, 1 * sample_interval)
+            trip_stop[move_idx] = path_end_nodes[flat_pos[moves]]
+            leaving = move_edges == agent_current_links[move_idx]
+            np.add.at(edge_current_vehicles, move_edges[leaving], -1 * sample_interval)
+            # agents stopping on the edge
+            stop_idx = idx[~moves]
+            stop_edges = edges[~moves]
+            entering = stop_edges != agent_current_links[stop_idx]
+            np.add.at(edge_current_vehicles, stop_edges[entering], 1 * sample_interval)
+            stop_edge[stop_idx] = stop_edges
+            trip_stop[stop_idx] = path_start_nodes[flat_pos[~moves]]
+            active[stop_idx] = False
+            step += 1
+            active[move_idx[num_path_edges[move_idx] <= step]] = False
+
+        od_residual_ss_list = [
+            [
+                agent_ids[agent_i],
+                nodes_origin[agent_i],
+                nodes_destin[agent_i],
+                trip_stop[agent_i],
+                network.edge_labels[stop_edge[agent_i]],
+                remaining_time[agent_i],
+            ]
+            for agent_i in np.flatnonzero(stop_edge >= 0)
+        ]
+        for agent_i in np.flatnonzero(~removed):
+            trip_key = (
+                agent_ids[agent_i],
+                nodes_origin[agent_i],
+                nodes_destin[agent_i],
             )
-            trip_info[(agent_id, trip_origin, trip_destin)][1] += used_time
-            trip_info[(agent_id, trip_origin, trip_destin)][2] = trip_stop
-            trip_info[(agent_id, trip_origin, trip_destin)][3] = hour
-            trip_info[(agent_id, trip_origin, trip_destin)][4] = quarter
-            trip_info[(agent_id, trip_origin, trip_destin)][5] = ss_id
-            path_i += 1
+            trip_info[trip_key][0] += 3600 / quarter_counts
+            trip_info[trip_key][1] += used_time[agent_i]
+            trip_info[trip_key][2] = trip_stop[agent_i]
+            trip_info[trip_key][3] = hour
+            trip_info[trip_key][4] = quarter
+            trip_info[trip_key][5] = ss_id
 
         new_edges_df = weighted_edges_df[
             [
@@ -594,14 +708,8 @@ class TransportationPerformance(ABC):  # noqa: B024
                 'geometry',
             ]
         ].copy()
-        # new_edges_df = new_edges_df.join(edge_volume, how='left')
-        # new_edges_df['vol_ss'] = new_edges_df['vol_ss'].fillna(0)
-        # new_edges_df['vol_true'] += new_edges_df['vol_ss']
-        new_edges_df['vol_true'] = new_edges_df.index.map(edge_quarter_vol)
-        new_edges_df['veh_current'] = new_edges_df.index.map(
-            edge_current_vehicles
-        )
-        # new_edges_df['vol_tot'] += new_edges_df['vol_ss']
+        new_edges_df['vol_true'] = edge_quarter_vol
+        new_edges_df['veh_current'] = edge_current_vehicles
         new_edges_df['flow'] = (
             new_edges_df['vol_true'] * quarter_demand / assigned_demand
         ) * quarter_counts
@@ -813,6 +921,8 @@ class TransportationPerformance(ABC):  # noqa: B024
         net.set(pd.Series(net.node_ids))
         paths = net.shortest_paths(orig, dest)
         no_path_ind = [i for i in range(len(paths)) if len(paths[i]) == 0]
+        # the topology of the open network is fixed during the assignment
+        network = AssignmentNetwork(nodes_df, open_edges_df, two_way_edges)
         od_no_path = od_all.iloc[no_path_ind].copy()
         od_all = od_all.drop(od_no_path.index)
 
@@ -997,6 +1107,7 @@ class TransportationPerformance(ABC):  # noqa: B024
                             alpha_f=alpha_f,
                             beta_f=beta_f,
                             two_way_edges=two_way_edges,
+                            network=network,
                         )
                         od_residual_list += od_residual_ss_list
                         # write_edge_vol(edges_df=edges_df,